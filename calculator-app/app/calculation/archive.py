@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+from .columns import OPERATIONS, HistoryColumns, format_timestamp
+
+# How a bounded history disposes of its oldest rows. ``archive`` is the default:
+# rows loaded from a history file are only ever lost by choosing ``drop``.
+EVICTION_POLICIES = ("drop", "archive")
+
+
+class HistoryArchive:
+    """Append-only CSV spill file for rows evicted from a bounded history."""
+
+    COLUMNS = ("timestamp", "operation", "a", "b", "result")
+
+    def __init__(self, path: str | Path, encoding: str = "utf-8") -> None:
+        self.path = Path(path)
+        self.encoding = encoding
+
+    def append(self, cols: HistoryColumns, start: int, stop: int) -> None:
+        if stop <= start:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_header = not self.path.exists() or self.path.stat().st_size == 0
+        names = OPERATIONS.names
+
+        with self.path.open("a", newline="", encoding=self.encoding) as fh:
+            writer = csv.writer(fh)
+            if write_header:
+                writer.writerow(self.COLUMNS)
+            writer.writerows(
+                (format_timestamp(ts), names[op], a, b, result)
+                for ts, op, a, b, result in cols.rows(start, stop)
+            )
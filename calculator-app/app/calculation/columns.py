@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from .records import MappedRecords
+
+# Sentinel for rows without a timestamp (older CSVs). Matches NaT's int64 value.
+MISSING_TIMESTAMP = -(2**63)
+
+
+class OperationTable:
+    """Interns operation names into small integer codes."""
+
+    def __init__(self) -> None:
+        self._codes: dict[str, int] = {}
+        self._names: list[str] = []
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = len(self._names)
+            self._codes[name] = code
+            self._names.append(name)
+        return code
+
+    def find(self, name: str) -> int | None:
+        """Code for ``name`` if it has been interned, without interning it."""
+        return self._codes.get(name)
+
+    def name(self, code: int) -> str:
+        return self._names[code]
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return tuple(self._names)
+
+
+# Shared by every history so codes stay comparable across copies and snapshots.
+OPERATIONS = OperationTable()
+
+# Serializes pruning of the mark lists, which snapshots on background threads (autosave) also extend
+_MARKS_LOCK = threading.Lock()
+
+
+class RowMark:
+    """Held by whatever still reads a segment's rows ``[0, stop)`` (see ``HistoryColumns.mark``)."""
+
+    __slots__ = ("__weakref__",)
+
+
+class HistoryColumns:
+    """Growable typed column arrays with amortized O(1) appends.
+
+    Columns are stdlib ``array.array`` buffers: float64 for operands and
+    results, int32 operation codes and int64 UTC epoch microseconds.
+    Rows are never rewritten while anything still reads them, so a
+    ``(columns, size)`` pair is a stable view that snapshots can share
+    without copying. Readers hold a ``mark(size)``; rows past every live
+    mark may be truncated in place and appended again (an execute after
+    undo), instead of copying the segment.
+
+    A segment may start with a read-only ``base`` of memory-mapped rows
+    (lazy loading, see ``records``); the arrays then hold only the rows
+    appended after it. Row indexes always count from the start of ``base``.
+
+    A ``copy`` remembers where its rows came from in ``origin``, so the
+    journal can tell how far a forked or compacted segment still matches
+    the one it replaced (see ``shared_prefix``).
+    """
+
+    # __weakref__: per-segment query indexes are keyed weakly on the segment
+    __slots__ = ("base", "timestamp", "operation", "a", "b", "result", "origin", "_marks", "_mark_limit", "__weakref__")
+
+    def __init__(self, base: MappedRecords | None = None) -> None:
+        self.base = base
+        self.timestamp = array("q")
+        self.operation = array("i")
+        self.a = array("d")
+        self.b = array("d")
+        self.result = array("d")
+        # (weak ref to the source segment, offset, rows): rows [0, rows) here are its rows from offset on
+        self.origin: tuple[weakref.ref, int, int] | None = None
+        # (stop, weak ref to the RowMark) per mark handed out; dead ones are pruned in bulk
+        self._marks: list[tuple[int, weakref.ref]] = []
+        self._mark_limit = 64
+
+    def mark(self, stop: int) -> RowMark:
+        """A token that keeps rows ``[0, stop)`` from being truncated while it is alive."""
+        marks = self._marks
+        if marks and marks[-1][0] == stop:
+            token = marks[-1][1]()
+            if token is not None:
+                return token
+        token = RowMark()
+        marks.append((stop, weakref.ref(token)))  # atomic: other threads may mark too
+        if len(marks) > self._mark_limit:
+            self._prune_marks()
+        return token
+
+    def _prune_marks(self) -> None:
+        with _MARKS_LOCK:
+            marks = self._marks
+            n = len(marks)
+            # Replace only the first n: marks appended meanwhile by other threads are kept
+            marks[:n] = [(size, ref) for size, ref in marks[:n] if ref() is not None]
+            self._mark_limit = max(64, 2 * len(marks))
+
+    def marked_past(self, size: int) -> bool:
+        """Whether a live mark still covers rows from ``size`` on."""
+        return any(stop > size and ref() is not None for stop, ref in list(self._marks))
+
+    def __len__(self) -> int:
+        return self._base_len() + len(self.result)
+
+    def _base_len(self) -> int:
+        return len(self.base) if self.base is not None else 0
+
+    def append(self, timestamp: int, operation: int, a: float, b: float, result: float) -> None:
+        self.timestamp.append(timestamp)
+        self.operation.append(operation)
+        self.a.append(a)
+        self.b.append(b)
+        self.result.append(result)
+
+    def extend(
+        self,
+        timestamp: Iterable[int],
+        operation: Iterable[int],
+        a: Iterable[float],
+        b: Iterable[float],
+        result: Iterable[float],
+    ) -> None:
+        self.timestamp.extend(timestamp)
+        self.operation.extend(operation)
+        self.a.extend(a)
+        self.b.extend(b)
+        self.result.extend(result)
+
+    def extend_bytes(self, timestamp: bytes, operation: bytes, a: bytes, b: bytes, result: bytes) -> None:
+        """Bulk-append raw native-endian column buffers (e.g. ``ndarray.tobytes()``)."""
+        self.timestamp.frombytes(timestamp)
+        self.operation.frombytes(operation)
+        self.a.frombytes(a)
+        self.b.frombytes(b)
+        self.result.frombytes(result)
+
+    def truncate(self, size: int) -> None:
+        """Drop rows from ``size`` onwards. Only when nothing reads them (see ``marked_past``)."""
+        nbase = self._base_len()
+        if size < nbase:
+            self.base = self.base.slice(0, size)
+        size = max(size - nbase, 0)
+        del self.timestamp[size:]
+        del self.operation[size:]
+        del self.a[size:]
+        del self.b[size:]
+        del self.result[size:]
+        if self.origin is not None and self.origin[2] > size:
+            source, offset, _ = self.origin
+            self.origin = (source, offset, size)
+
+    def copy(self, start: int = 0, stop: int | None = None) -> "HistoryColumns":
+        # Slicing an array is a single buffer copy; a mapped base is only re-windowed.
+        stop = len(self) if stop is None else stop
+        nbase = self._base_len()
+        cols = HistoryColumns(self.base.slice(start, stop) if start < nbase else None)
+        lo, hi = max(start - nbase, 0), max(stop - nbase, 0)
+        cols.timestamp = self.timestamp[lo:hi]
+        cols.operation = self.operation[lo:hi]
+        cols.a = self.a[lo:hi]
+        cols.b = self.b[lo:hi]
+        cols.result = self.result[lo:hi]
+        cols.origin = (weakref.ref(self), start, stop - start)
+        return cols
+
+    def shared_prefix(self, source: "HistoryColumns", max_hops: int = 8) -> tuple[int, int] | None:
+        """``(offset, rows)`` if rows ``[0, rows)`` here equal ``source`` rows from ``offset`` on.
+
+        Follows ``origin`` back through at most ``max_hops`` copies; None if
+        ``source`` isn't an ancestor that is still alive.
+        """
+        cols, offset, rows = self, 0, len(self)
+        for _ in range(max_hops):
+            if cols is source:
+                return offset, rows
+            if cols.origin is None:
+                return None
+            ref, start, size = cols.origin
+            cols, offset, rows = ref(), start + offset, min(rows, size - offset)
+            if cols is None or rows <= 0:
+                return None
+        return (offset, rows) if cols is source else None
+
+    def rows(self, start: int = 0, stop: int | None = None) -> Iterator[tuple[int, int, float, float, float]]:
+        """Iterate ``(timestamp, operation, a, b, result)`` for rows ``[start, stop)``."""
+        stop = len(self) if stop is None else stop
+        nbase = self._base_len()
+        if start < nbase:
+            yield from self.base.rows(start, min(stop, nbase))
+        lo, hi = max(start - nbase, 0), max(stop - nbase, 0)
+        yield from zip(
+            self.timestamp[lo:hi], self.operation[lo:hi], self.a[lo:hi], self.b[lo:hi], self.result[lo:hi]
+        )
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def format_timestamp(value: int) -> str:
+    """Format int64 epoch microseconds as an ISO-8601 UTC string ("" when missing)."""
+    if value == MISSING_TIMESTAMP:
+        return ""
+    return (_EPOCH + timedelta(microseconds=value)).isoformat()
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Mapping, Union
+
+import numpy as np
+
+from app.exceptions import ValidationError
+from app.operation.base import ArrayError, ArrayResult, Operation
+from app.result_cache import MISSING, LRUCache
+
+from .factory import CalculationFactory
+
+DEFAULT_EXPRESSION_CACHE_SIZE = 256
+
+# Infix symbols -> factory operation keys. Operation names (``root``,
+# ``percent``, ...) work as infix words too.
+SYMBOLS: dict[str, str] = {
+    "+": "add",
+    "-": "sub",
+    "*": "mul",
+    "/": "div",
+    "//": "int_div",
+    "%": "mod",
+    "^": "pow",
+    "**": "pow",
+}
+ADDITIVE = 1
+MULTIPLICATIVE = 2
+POWER = 3  # right-associative, binds tighter than unary minus: -2 ^ 2 == -4
+_POWER_OPS = {"pow", "root"}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_]\w*|\$\d+)"
+    r"|(?P<symbol>//|\*\*|[-+*/%^()]))"
+)
+
+
+@dataclass(frozen=True)
+class Num:
+    value: float
+
+
+@dataclass(frozen=True)
+class Var:
+    name: str
+
+
+@dataclass(frozen=True)
+class BinOp:
+    op: str  # factory operation key
+    left: "Node"
+    right: "Node"
+
+
+Node = Union[Num, Var, BinOp]
+
+
+def tokenize(source: str) -> list[tuple[str, str]]:
+    tokens: list[tuple[str, str]] = []
+    pos = 0
+    source = source.rstrip()
+    while pos < len(source):
+        match = _TOKEN.match(source, pos)
+        if match is None:
+            raise ValidationError(f"Unexpected character in expression: {source[pos:].lstrip()[:1]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Precedence climbing over ``tokenize`` output."""
+
+    def __init__(self, source: str, words: Mapping[str, str]) -> None:
+        self.tokens = tokenize(source)
+        self.words = words
+        self.pos = 0
+
+    def peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise ValidationError("Incomplete expression.")
+        self.pos += 1
+        return token
+
+    def infix(self) -> tuple[str, int] | None:
+        """The operator at the current position, with its precedence."""
+        token = self.peek()
+        if token is None:
+            return None
+        kind, text = token
+        if kind == "symbol" and text in SYMBOLS:
+            op = SYMBOLS[text]
+        elif kind == "name" and text.lower() in self.words:
+            op = self.words[text.lower()]
+        else:
+            return None
+        if op in ("add", "sub") and kind == "symbol":
+            return op, ADDITIVE
+        return op, POWER if op in _POWER_OPS else MULTIPLICATIVE
+
+    def parse(self) -> Node:
+        node = self.expression(ADDITIVE)
+        if self.peek() is not None:
+            raise ValidationError(f"Unexpected {self.peek()[1]!r} in expression.")
+        return node
+
+    def expression(self, min_precedence: int) -> Node:
+        left = self.unary()
+        while True:
+            found = self.infix()
+            if found is None or found[1] < min_precedence:
+                return left
+            op, precedence = found
+            self.pos += 1
+            right = self.expression(precedence + 1) if precedence + 1 < POWER else self.unary()
+            left = BinOp(op, left, right)
+
+    def unary(self) -> Node:
+        token = self.peek()
+        if token == ("symbol", "-"):
+            self.pos += 1
+            operand = self.unary()
+            if isinstance(operand, Num):
+                return Num(-operand.value)
+            # Negation runs through Multiply: -1 * x == -x, signed zero included.
+            return BinOp("mul", Num(-1.0), operand)
+        if token == ("symbol", "+"):
+            self.pos += 1
+            return self.unary()
+        return self.power()
+
+    def power(self) -> Node:
+        base = self.primary()
+        found = self.infix()
+        if found is None or found[1] != POWER:
+            return base
+        self.pos += 1
+        # Right-associative, and the exponent may be signed: 2 ^ -1
+        return BinOp(found[0], base, self.unary())
+
+    def primary(self) -> Node:
+        kind, text = self.take()
+        if kind == "number":
+            return Num(float(text))
+        if kind == "name":
+            if text.lower() in self.words:
+                raise ValidationError(f"Operation {text!r} needs a left operand.")
+            return Var(text)
+        if text == "(":
+            node = self.expression(ADDITIVE)
+            if self.take() != ("symbol", ")"):
+                raise ValidationError("Expected ')' in expression.")
+            return node
+        raise ValidationError(f"Unexpected {text!r} in expression.")
+
+
+def fold_constants(node: Node, operations: Mapping[str, Operation]) -> Node:
+    """Evaluate every operation whose operands are constants.
+
+    Failing steps (e.g. a division by zero) are left in place so the error
+    surfaces, with its usual message, when the expression is evaluated.
+    """
+    if not isinstance(node, BinOp):
+        return node
+    left = fold_constants(node.left, operations)
+    right = fold_constants(node.right, operations)
+    if isinstance(left, Num) and isinstance(right, Num):
+        try:
+            return Num(operations[node.op].compute(left.value, right.value))
+        except (ArithmeticError, ValueError):
+            pass
+    return BinOp(node.op, left, right)
+
+
+def variables_of(node: Node) -> tuple[str, ...]:
+    if isinstance(node, Var):
+        return (node.name,)
+    if isinstance(node, BinOp):
+        return tuple(dict.fromkeys(variables_of(node.left) + variables_of(node.right)))
+    return ()
+
+
+Bindings = Mapping[str, float]
+ScalarFn = Callable[[Bindings], float]
+VectorFn = Callable[[Mapping[str, np.ndarray], int], ArrayResult]
+
+
+def _unbound(name: str) -> ValidationError:
+    return ValidationError(f"Unknown variable: {name}")
+
+
+def _compile_scalar(node: Node, operations: Mapping[str, Operation]) -> ScalarFn:
+    if isinstance(node, Num):
+        value = node.value
+        return lambda env: value
+    if isinstance(node, Var):
+        name = node.name
+
+        def load(env: Bindings) -> float:
+            try:
+                return env[name]
+            except KeyError:
+                raise _unbound(name) from None
+
+        return load
+
+    compute = operations[node.op].compute
+    left = _compile_scalar(node.left, operations)
+    right = _compile_scalar(node.right, operations)
+    return lambda env: compute(left(env), right(env))
+
+
+def _mask_errors(errors: tuple[ArrayError, ...], exclude: np.ndarray) -> list[ArrayError]:
+    masked = [(exc, where & ~exclude) for exc, where in errors]
+    return [(exc, where) for exc, where in masked if where.any()]
+
+
+def chain_results(left: ArrayResult, right: ArrayResult, step: ArrayResult) -> ArrayResult:
+    """Result of a step computed on ``left``/``right`` values, carrying their failures.
+
+    An element whose operand already failed keeps that first error and is NaN.
+    """
+    left_failed = left.failed
+    prior = left_failed | right.failed
+    errors = list(left.errors) + _mask_errors(right.errors, left_failed) + _mask_errors(step.errors, prior)
+    values = step.values
+    if prior.any():
+        values = values.copy()
+        values[prior] = np.nan
+    return ArrayResult(values, tuple(errors))
+
+
+def _apply_array(operation: Operation, left: ArrayResult, right: ArrayResult) -> ArrayResult:
+    return chain_results(left, right, operation.compute_array(left.values, right.values))
+
+
+def _compile_vector(node: Node, operations: Mapping[str, Operation]) -> VectorFn:
+    if isinstance(node, Num):
+        value = node.value
+        return lambda env, n: ArrayResult(np.full(n, value))
+    if isinstance(node, Var):
+        name = node.name
+
+        def load(env: Mapping[str, np.ndarray], n: int) -> ArrayResult:
+            try:
+                return ArrayResult(env[name])
+            except KeyError:
+                raise _unbound(name) from None
+
+        return load
+
+    operation = operations[node.op]
+    left = _compile_vector(node.left, operations)
+    right = _compile_vector(node.right, operations)
+    return lambda env, n: _apply_array(operation, left(env, n), right(env, n))
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """A parsed, constant-folded expression compiled to Python closures.
+
+    The final operation is kept apart (``operation``, with closures for its
+    two operands) so a caller can record the whole expression as that one
+    step: ``operation(a, b) = result``. A bare value or name (``5``, ``x``)
+    has no ``operation``; its closures live in ``_left``/``_left_array``.
+    """
+
+    source: str
+    tree: Node
+    operation: Operation | None
+    variables: tuple[str, ...]
+    _left: ScalarFn = field(repr=False, compare=False)
+    _right: ScalarFn | None = field(repr=False, compare=False)
+    _left_array: VectorFn = field(repr=False, compare=False)
+    _right_array: VectorFn | None = field(repr=False, compare=False)
+
+    def operands(self, bindings: Bindings | None = None) -> tuple[float, float]:
+        """Values of the final operation's operands; raises if an inner step fails."""
+        if self.operation is None:
+            raise ValidationError("Expression must apply at least one operation.")
+        env = bindings if bindings is not None else {}
+        return self._left(env), self._right(env)
+
+    def evaluate(self, bindings: Bindings | None = None) -> float:
+        if self.operation is None:
+            return self._left(bindings if bindings is not None else {})
+        return self.operation.compute(*self.operands(bindings))
+
+    def operand_arrays(self, bindings: Mapping[str, object]) -> tuple[ArrayResult, ArrayResult, int]:
+        """Final-step operands for vectors of bindings (scalars broadcast), plus the length."""
+        if self.operation is None:
+            raise ValidationError("Expression must apply at least one operation.")
+        names = [name for name in self.variables if name in bindings]
+        arrays = np.broadcast_arrays(*(np.atleast_1d(np.asarray(bindings[n], dtype=np.float64)) for n in names))
+        if arrays and arrays[0].ndim != 1:
+            raise ValueError("Variable bindings must be one-dimensional.")
+        length = len(arrays[0]) if arrays else 1
+        env = dict(zip(names, arrays))
+        return self._left_array(env, length), self._right_array(env, length), length
+
+    def evaluate_many(self, bindings: Mapping[str, object]) -> ArrayResult:
+        """Evaluate over vectors of variable bindings; failures are per element, as in ``compute_array``."""
+        left, right, _ = self.operand_arrays(bindings)
+        return _apply_array(self.operation, left, right)
+
+
+class ExpressionCompiler:
+    """Compiles expressions against a factory's operations, caching by source text."""
+
+    def __init__(
+        self, factory: CalculationFactory | None = None, cache_size: int = DEFAULT_EXPRESSION_CACHE_SIZE
+    ) -> None:
+        self.factory = factory if factory is not None else CalculationFactory()
+        self.cache = LRUCache(cache_size)
+        self.words = {key: key for key in self.factory.supported}
+        self.words.update({self.factory.operation(key).name: key for key in self.factory.supported})
+        self.operations = {key: self.factory.operation(key) for key in self.factory.supported}
+
+    def parse(self, source: str) -> Node:
+        if not source.strip():
+            raise ValidationError("Empty expression.")
+        return _Parser(source, self.words).parse()
+
+    def compile(self, source: str) -> CompiledExpression:
+        source = source.strip()
+        compiled = self.cache.get(source)
+        if compiled is MISSING:
+            compiled = self._compile(source)
+            self.cache.put(source, compiled)
+        return compiled
+
+    def _compile(self, source: str) -> CompiledExpression:
+        tree = self.parse(source)
+        ops = self.operations
+        if not isinstance(tree, BinOp):
+            return CompiledExpression(
+                source=source,
+                tree=tree,
+                operation=None,
+                variables=variables_of(tree),
+                _left=_compile_scalar(tree, ops),
+                _right=None,
+                _left_array=_compile_vector(tree, ops),
+                _right_array=None,
+            )
+        # The outermost step is what history records; fold only beneath it.
+        tree = BinOp(tree.op, fold_constants(tree.left, ops), fold_constants(tree.right, ops))
+        return CompiledExpression(
+            source=source,
+            tree=tree,
+            operation=ops[tree.op],
+            variables=variables_of(tree),
+            _left=_compile_scalar(tree.left, ops),
+            _right=_compile_scalar(tree.right, ops),
+            _left_array=_compile_vector(tree.left, ops),
+            _right_array=_compile_vector(tree.right, ops),
+        )
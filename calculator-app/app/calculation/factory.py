@@ -29,8 +29,11 @@ class CalculationFactory:
     def supported(self) -> tuple[str, ...]:
         return tuple(self._ops.keys())
 
-    def create(self, op_name: str, a: float, b: float) -> Calculation:
+    def operation(self, op_name: str) -> Operation:
         op_name = op_name.strip().lower()
         if op_name not in self._ops:
             raise ValueError(f"Unsupported operation: {op_name}")
-        return Calculation(operation=self._ops[op_name], a=a, b=b)
+        return self._ops[op_name]
+
+    def create(self, op_name: str, a: float, b: float) -> Calculation:
+        return Calculation(operation=self.operation(op_name), a=a, b=b)
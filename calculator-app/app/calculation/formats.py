@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol
+
+import numpy as np
+
+from .columns import MISSING_TIMESTAMP, OPERATIONS, HistoryColumns
+from .records import MAGIC as RECORDS_MAGIC, map_records, write_records
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas is imported where a DataFrame is actually needed (analytics, CSV
+# reads), not at startup: it costs more than the rest of the app combined.
+
+REQUIRED_COLUMNS = ("timestamp", "operation", "a", "b", "result")
+
+# Accepted values for CALCULATOR_HISTORY_FORMAT. "auto" picks by file extension;
+# "binary" means Feather when pyarrow is installed, else NumPy .npz.
+# "records" is the fixed-width file that lazy loading memory-maps.
+HISTORY_FORMATS = ("auto", "csv", "feather", "parquet", "npz", "records", "binary")
+
+
+def has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _window(values, start: int, stop: int, dtype) -> np.ndarray:
+    # Slice first: it copies, so no buffer export pins the live array while
+    # another thread appends to it.
+    chunk = values[start:stop]
+    return np.frombuffer(chunk, dtype=dtype) if len(chunk) else np.empty(0, dtype=dtype)
+
+
+def column_arrays(cols: HistoryColumns, start: int, stop: int) -> dict[str, np.ndarray]:
+    """NumPy copies of rows ``[start, stop)``; ``operation`` holds shared OPERATIONS codes."""
+    nbase = len(cols.base) if cols.base is not None else 0
+    lo, hi = max(start - nbase, 0), max(stop - nbase, 0)
+    tail = {
+        "timestamp": _window(cols.timestamp, lo, hi, np.int64),
+        "operation": _window(cols.operation, lo, hi, np.int32),
+        "a": _window(cols.a, lo, hi, np.float64),
+        "b": _window(cols.b, lo, hi, np.float64),
+        "result": _window(cols.result, lo, hi, np.float64),
+    }
+    if start >= nbase:
+        return tail
+    head = cols.base.arrays(start, min(stop, nbase))
+    return {name: np.concatenate([head[name], tail[name]]) for name in tail}
+
+
+def columns_from_arrays(
+    timestamp: np.ndarray, operation: np.ndarray, a: np.ndarray, b: np.ndarray, result: np.ndarray
+) -> HistoryColumns:
+    cols = HistoryColumns()
+    cols.extend_bytes(
+        np.ascontiguousarray(timestamp, dtype=np.int64).tobytes(),
+        np.ascontiguousarray(operation, dtype=np.int32).tobytes(),
+        np.ascontiguousarray(a, dtype=np.float64).tobytes(),
+        np.ascontiguousarray(b, dtype=np.float64).tobytes(),
+        np.ascontiguousarray(result, dtype=np.float64).tobytes(),
+    )
+    return cols
+
+
+def intern_operations(names) -> np.ndarray:
+    """Map a column of operation names to OPERATIONS codes, one table lookup per distinct name."""
+    lookup: dict = {}
+
+    def code(name) -> int:
+        found = lookup.get(name)
+        if found is None:
+            found = lookup[name] = OPERATIONS.code(str(name))
+        return found
+
+    return np.fromiter(map(code, names), dtype=np.int32, count=len(names))
+
+
+def timestamps_to_iso(values: np.ndarray) -> np.ndarray:
+    """Format int64 epoch microseconds as ISO-8601 UTC strings ("" when missing)."""
+    text = np.datetime_as_string(values.astype("datetime64[us]"), unit="us").astype(object)
+    out = text + "+00:00"
+    out[values == MISSING_TIMESTAMP] = ""
+    return out
+
+
+def iso_to_timestamps(values) -> np.ndarray:
+    """Parse ISO-8601 strings into int64 epoch microseconds (unparseable -> missing)."""
+    import pandas as pd
+
+    ts = pd.to_datetime(pd.Series(values).astype(str), utc=True, errors="coerce", format="ISO8601")
+    return ts.dt.tz_localize(None).to_numpy("datetime64[us]").view(np.int64)
+
+
+def to_frame(cols: HistoryColumns, start: int, stop: int) -> pd.DataFrame:
+    import pandas as pd
+
+    arrays = column_arrays(cols, start, stop)
+    names = np.asarray(OPERATIONS.names, dtype=object)
+    return pd.DataFrame(
+        {
+            "timestamp": timestamps_to_iso(arrays["timestamp"]),
+            "operation": names[arrays["operation"]],
+            "a": arrays["a"],
+            "b": arrays["b"],
+            "result": arrays["result"],
+        },
+        columns=list(REQUIRED_COLUMNS),
+    )
+
+
+def _check_columns(present, kind: str) -> None:
+    missing = [c for c in REQUIRED_COLUMNS if c != "timestamp" and c not in present]
+    if missing:
+        raise ValueError(f"History {kind} missing required columns: {missing}")
+
+
+class HistoryFormat(Protocol):
+    name: str
+    suffixes: tuple[str, ...]
+
+    def write(self, cols: HistoryColumns, start: int, stop: int, path: Path) -> None:
+        ...
+
+    def read(self, path: Path) -> HistoryColumns:
+        ...
+
+
+class CsvFormat:
+    """Text format; the original on-disk layout, with ISO timestamps."""
+
+    name = "csv"
+    suffixes = (".csv",)
+
+    def write(self, cols: HistoryColumns, start: int, stop: int, path: Path) -> None:
+        # Same bytes as DataFrame.to_csv (floats as repr, NaN as ""), without pandas
+        arrays = column_arrays(cols, start, stop)
+        values = [arrays[name].tolist() for name in ("a", "b", "result")]
+        for column, array in zip(values, (arrays["a"], arrays["b"], arrays["result"])):
+            for i in np.flatnonzero(np.isnan(array)).tolist():
+                column[i] = ""
+        names = np.asarray(OPERATIONS.names, dtype=object)[arrays["operation"]].tolist()
+        with path.open("w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh, lineterminator="\n")
+            writer.writerow(REQUIRED_COLUMNS)
+            writer.writerows(zip(timestamps_to_iso(arrays["timestamp"]).tolist(), names, *values))
+
+    def read(self, path: Path) -> HistoryColumns:
+        import pandas as pd
+
+        df = pd.read_csv(path)
+
+        # Backward compatibility: older CSVs may not have timestamp
+        if "timestamp" not in df.columns:
+            df["timestamp"] = ""
+        _check_columns(df.columns, "CSV")
+
+        return columns_from_arrays(
+            iso_to_timestamps(df["timestamp"]),
+            intern_operations(df["operation"]),
+            pd.to_numeric(df["a"]).to_numpy(np.float64),
+            pd.to_numeric(df["b"]).to_numpy(np.float64),
+            pd.to_numeric(df["result"]).to_numpy(np.float64),
+        )
+
+
+class _ArrowFormat:
+    """Shared Arrow table conversion for Feather and Parquet (requires pyarrow)."""
+
+    name = ""
+    suffixes: tuple[str, ...] = ()
+
+    def _table(self, cols: HistoryColumns, start: int, stop: int):
+        import pyarrow as pa
+
+        arrays = column_arrays(cols, start, stop)
+        ts = arrays["timestamp"]
+        return pa.table(
+            {
+                "timestamp": pa.array(ts, type=pa.int64(), mask=ts == MISSING_TIMESTAMP).cast(
+                    pa.timestamp("us", tz="UTC")
+                ),
+                "operation": pa.DictionaryArray.from_arrays(
+                    pa.array(arrays["operation"], type=pa.int32()),
+                    pa.array(OPERATIONS.names, type=pa.string()),
+                ),
+                "a": arrays["a"],
+                "b": arrays["b"],
+                "result": arrays["result"],
+            }
+        )
+
+    def _columns(self, table) -> HistoryColumns:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        _check_columns(table.column_names, self.name)
+        rows = table.num_rows
+
+        if "timestamp" not in table.column_names:
+            timestamp = np.full(rows, MISSING_TIMESTAMP, dtype=np.int64)
+        else:
+            ts = table.column("timestamp")
+            if pa.types.is_string(ts.type) or pa.types.is_large_string(ts.type):
+                timestamp = iso_to_timestamps(ts.to_pandas())
+            else:
+                if pa.types.is_timestamp(ts.type):
+                    ts = ts.cast(pa.timestamp("us", tz=ts.type.tz)).cast(pa.int64())
+                timestamp = pc.fill_null(ts, MISSING_TIMESTAMP).to_numpy()
+
+        return columns_from_arrays(
+            timestamp,
+            intern_operations(table.column("operation").to_pandas()),
+            table.column("a").to_numpy().astype(np.float64, copy=False),
+            table.column("b").to_numpy().astype(np.float64, copy=False),
+            table.column("result").to_numpy().astype(np.float64, copy=False),
+        )
+
+
+class FeatherFormat(_ArrowFormat):
+    """Arrow IPC file; memory-mapped on read."""
+
+    name = "feather"
+    suffixes = (".feather", ".arrow")
+
+    def write(self, cols: HistoryColumns, start: int, stop: int, path: Path) -> None:
+        import pyarrow.feather as feather
+
+        feather.write_feather(self._table(cols, start, stop), path)
+
+    def read(self, path: Path) -> HistoryColumns:
+        import pyarrow.feather as feather
+
+        return self._columns(feather.read_table(path, memory_map=True))
+
+
+class ParquetFormat(_ArrowFormat):
+    name = "parquet"
+    suffixes = (".parquet",)
+
+    def write(self, cols: HistoryColumns, start: int, stop: int, path: Path) -> None:
+        import pyarrow.parquet as pq
+
+        pq.write_table(self._table(cols, start, stop), path)
+
+    def read(self, path: Path) -> HistoryColumns:
+        import pyarrow.parquet as pq
+
+        return self._columns(pq.read_table(path))
+
+
+class NpzFormat:
+    """NumPy archive; the binary format that works without pyarrow."""
+
+    name = "npz"
+    suffixes = (".npz",)
+
+    def write(self, cols: HistoryColumns, start: int, stop: int, path: Path) -> None:
+        arrays = column_arrays(cols, start, stop)
+        # Pass a file object so numpy doesn't append ".npz" to the path.
+        with open(path, "wb") as fh:
+            np.savez(fh, operation_names=np.array(OPERATIONS.names, dtype=str), **arrays)
+
+    def read(self, path: Path) -> HistoryColumns:
+        with np.load(path, allow_pickle=False) as data:
+            present = set(data.files)
+            _check_columns(present, "npz")
+            rows = len(data["result"])
+            timestamp = (
+                data["timestamp"]
+                if "timestamp" in present
+                else np.full(rows, MISSING_TIMESTAMP, dtype=np.int64)
+            )
+            operation = data["operation"]
+            if "operation_names" in present:
+                operation = intern_operations(data["operation_names"])[operation]
+            else:
+                operation = intern_operations(operation)
+            return columns_from_arrays(timestamp, operation, data["a"], data["b"], data["result"])
+
+
+class RecordsFormat:
+    """Fixed-width binary records (see ``records``); can be memory-mapped."""
+
+    name = "records"
+    suffixes = (".hist",)
+
+    def write(self, cols: HistoryColumns, start: int, stop: int, path: Path) -> None:
+        write_records(column_arrays(cols, start, stop), path)
+
+    def read(self, path: Path) -> HistoryColumns:
+        mapped = map_records(path)
+        return columns_from_arrays(**mapped.arrays(0, len(mapped)))
+
+    def map(self, path: Path) -> HistoryColumns:
+        """Lazy load: the returned segment reads rows from the file on demand."""
+        return HistoryColumns(base=map_records(path))
+
+
+_FORMATS: dict[str, HistoryFormat] = {
+    fmt.name: fmt
+    for fmt in (CsvFormat(), FeatherFormat(), ParquetFormat(), NpzFormat(), RecordsFormat())
+}
+
+_MAGIC = (
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "feather"),
+    (b"PK\x03\x04", "npz"),
+    (RECORDS_MAGIC, "records"),
+)
+
+
+def _sniff(path: Path) -> str:
+    try:
+        with open(path, "rb") as fh:
+            head = fh.read(8)
+    except OSError:
+        return "csv"
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return "csv"
+
+
+def format_name_for(path: str | Path, fmt: str = "auto") -> str:
+    """Concrete format name for ``path`` given a configured HISTORY_FORMATS value."""
+    if fmt not in HISTORY_FORMATS:
+        raise ValueError(f"Unsupported history format: {fmt}")
+    if fmt == "binary":
+        return "feather" if has_pyarrow() else "npz"
+    if fmt != "auto":
+        return fmt
+
+    suffix = Path(path).suffix.lower()
+    for name, known in _FORMATS.items():
+        if suffix in known.suffixes:
+            return name
+    # Unknown extension (e.g. a temp file): look at the content.
+    return _sniff(Path(path))
+
+
+def resolve_format(path: str | Path, fmt: str = "auto") -> HistoryFormat:
+    name = format_name_for(path, fmt)
+    if name in ("feather", "parquet") and not has_pyarrow():
+        raise ValueError(f"The {name} history format requires pyarrow; use .npz or CSV instead.")
+    return _FORMATS[name]
+
+
+def default_suffix(fmt: str) -> str:
+    """File extension for a configured format ("" for auto: keep whatever was given)."""
+    if fmt == "auto":
+        return ""
+    return _FORMATS[format_name_for("", fmt)].suffixes[0]
@@ -1,91 +1,377 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import time
+import weakref
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping, Sequence
 
-import pandas as pd
+import numpy as np
 
+from .archive import HistoryArchive
+from .columns import OPERATIONS, HistoryColumns, RowMark
+from .formats import REQUIRED_COLUMNS, column_arrays, intern_operations, resolve_format, to_frame
 from .models import Calculation
+from .query import HistoryIndex, HistoryQuery, parse_query, take
+from .stats import HistoryStats, by_name, inherit, read_stats, seed, segment_stats, summarize_rows, write_stats
+from .variables import VariableGraph, VariableState
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Rows formatted per chunk when streaming history output
+HISTORY_CHUNK_ROWS = 4096
+
+_LINE = "{} {} {} = {}".format
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+def _format_rows(cols: HistoryColumns, start: int, stop: int) -> list[str]:
+    """``op a b = result`` for rows ``[start, stop)``, read a column slice at a time."""
+    arrays = column_arrays(cols, start, stop)
+    names = np.asarray(OPERATIONS.names, dtype=object)[arrays["operation"]].tolist()
+    return list(map(_LINE, names, arrays["a"].tolist(), arrays["b"].tolist(), arrays["result"].tolist()))
+
+
+def _format_ids(cols: HistoryColumns, ids: np.ndarray) -> list[str]:
+    """``_format_rows`` for the (sorted) rows ``ids``."""
+    names = np.asarray(OPERATIONS.names, dtype=object)[take(cols, "operation", ids)].tolist()
+    columns = (take(cols, name, ids).tolist() for name in ("a", "b", "result"))
+    return list(map(_LINE, names, *columns))
+
+
+@dataclass(frozen=True)
+class HistoryMatches:
+    """Rows matched by ``CalculationHistory.query``.
+
+    ``positions`` are 0-based rows of the visible history (``$n`` is
+    ``position + 1``), oldest first; ``total`` counts every match, which can
+    exceed ``len(positions)`` when the query has a ``limit``.
+    """
+    positions: np.ndarray
+    total: int
+    lines: list[str]
 
 
 @dataclass(frozen=True)
 class HistorySnapshot:
-    """Immutable snapshot of calculator history state."""
-    df: pd.DataFrame
+    """Immutable snapshot of calculator history state.
+
+    Holds a handle to a shared, append-only column segment plus the row
+    window visible in it, so taking and restoring snapshots is O(1).
+    ``variables`` is the (copy-on-write) session variable table, if any,
+    and ``failures`` the failed attempts per operation (see ``stats``).
+    ``mark`` keeps the segment from truncating the snapshot's rows.
+    """
+    columns: HistoryColumns
+    start: int
+    stop: int
+    variables: VariableState | None = None
+    failures: Mapping[str, int] = field(default_factory=dict, compare=False)
+    mark: RowMark | None = field(default=None, compare=False, repr=False)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return to_frame(self.columns, self.start, self.stop)
+
+    def save(self, path: str | Path, history_format: str = "auto") -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        resolve_format(p, history_format).write(self.columns, self.start, self.stop, p)
+        summaries = segment_stats(self.columns).window(self.columns, self.start, self.stop)
+        write_stats(p, summaries, len(self), self.failures)
 
 
 class CalculationHistory:
-    """pandas-backed history with CSV persistence."""
+    """Columnar history with CSV (or binary, see ``formats``) persistence.
+
+    Rows are appended to typed column arrays; a pandas DataFrame is only
+    materialized when ``all()``, ``save()`` or analytics ask for one.
+    The visible history is the ``(columns, start, stop)`` window in
+    ``_view``; segments are shared with snapshots and never mutated inside a
+    visible window. ``_view`` is replaced as a whole, so ``snapshot()`` is a
+    consistent read even while another thread is appending.
+
+    With ``max_size`` set, the history behaves as a ring buffer: once full,
+    each append evicts the oldest row (spilling it to ``archive`` if given).
+
+    With ``lazy_load`` set, loading a record file (``.hist``) memory-maps it
+    instead of reading it, so startup cost doesn't grow with the file.
+    """
+
+    REQUIRED_COLUMNS = REQUIRED_COLUMNS
+
+    def __init__(
+        self,
+        max_size: int | None = None,
+        archive: HistoryArchive | None = None,
+        history_format: str = "auto",
+        lazy_load: bool = False,
+    ) -> None:
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be a positive integer.")
+        self.max_size = max_size
+        self.archive = archive
+        self.history_format = history_format
+        self.lazy_load = lazy_load
+        self.evicted_total = 0
+        self._view: tuple[HistoryColumns, int, int] = (HistoryColumns(), 0, 0)
+        # Query indexes per segment; snapshots share segments, so they share indexes
+        self._indexes: weakref.WeakKeyDictionary[HistoryColumns, HistoryIndex] = weakref.WeakKeyDictionary()
+        # Session variables; ``ans``/``$n`` references read rows via result_at
+        self.variables = VariableGraph()
+        # Failed attempts per operation name; replaced as a whole, like _view
+        self.failures: Mapping[str, int] = {}
+        # Mark of the last restored snapshot: the view may reach rows that only it covered
+        self._restored: RowMark | None = None
 
-    REQUIRED_COLUMNS = ("timestamp", "operation", "a", "b", "result")
+    def __len__(self) -> int:
+        _, start, stop = self._view
+        return stop - start
 
-    def __init__(self) -> None:
-        self._df = self._empty_df()
+    @property
+    def _cols(self) -> HistoryColumns:
+        return self._view[0]
 
-    def _empty_df(self) -> pd.DataFrame:
-        return pd.DataFrame(columns=list(self.REQUIRED_COLUMNS))
+    def _set_segment(self, cols: HistoryColumns) -> None:
+        self._view = (cols, 0, len(cols))
 
-    def add(self, calc: Calculation) -> None:
-        res = float(calc.result())
-        row = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "operation": calc.operation.name,
-            "a": float(calc.a),
-            "b": float(calc.b),
-            "result": res,
-        }
-        self._df = pd.concat([self._df, pd.DataFrame([row])], ignore_index=True)
+    def _evict(self) -> int:
+        """Drop rows beyond max_size from the front. Returns the number evicted."""
+        if self.max_size is None:
+            return 0
+        cols, start, stop = self._view
+        excess = stop - start - self.max_size
+        if excess <= 0:
+            return 0
+
+        if self.archive is not None:
+            self.archive.append(cols, start, start + excess)
+        start += excess
+        self.evicted_total += excess
+
+        # Compact once the dead prefix outgrows the live window (amortized O(1)).
+        if start >= self.max_size:
+            self._set_segment(cols.copy(start, stop))
+        else:
+            self._view = (cols, start, stop)
+        return excess
+
+    def _make_room(self, cols: HistoryColumns, start: int, stop: int) -> tuple[HistoryColumns, int, int]:
+        """Prepare to append after ``stop`` when the segment holds rows past it (after an undo).
+
+        Rows that a snapshot still covers (e.g. on the redo stack) are kept:
+        the visible rows are forked into a new segment. Otherwise the rows
+        past ``stop`` are dropped in place, with the query index and stats.
+        """
+        if cols.marked_past(stop):
+            forked = cols.copy(start, stop)
+            if start == 0:
+                inherit(cols, forked, stop)
+            return forked, 0, stop - start
+        inherit(cols, cols, stop)  # cut the running stats back to the kept prefix
+        index = self._indexes.get(cols)
+        if index is not None:
+            index.truncate(stop)
+        cols.truncate(stop)
+        return cols, start, stop
+
+    def add(self, calc: Calculation) -> int:
+        """Append a calculation. Returns the number of rows evicted to make room."""
+        cols, start, stop = self._view
+        if len(cols) != stop:
+            cols, start, stop = self._make_room(cols, start, stop)
+        cols.append(_now_us(), calc.code, float(calc.a), float(calc.b), float(calc.result()))
+        self._view = (cols, start, stop + 1)
+        return self._evict()
+
+    def add_many(
+        self, operation: str | Sequence[str], a: np.ndarray, b: np.ndarray, result: np.ndarray
+    ) -> int:
+        """Append a batch of rows (one operation name, or one per row).
+
+        Returns the number of rows evicted to make room.
+        """
+        cols, start, stop = self._view
+        if len(cols) != stop:
+            cols, start, stop = self._make_room(cols, start, stop)
+        n = len(result)
+        if isinstance(operation, str):
+            codes = np.full(n, OPERATIONS.code(operation), dtype=np.int32)
+        else:
+            codes = intern_operations(operation)
+        cols.extend_bytes(
+            np.full(n, _now_us(), dtype=np.int64).tobytes(),
+            codes.tobytes(),
+            np.ascontiguousarray(a, dtype=np.float64).tobytes(),
+            np.ascontiguousarray(b, dtype=np.float64).tobytes(),
+            np.ascontiguousarray(result, dtype=np.float64).tobytes(),
+        )
+        self._view = (cols, start, stop + n)
+        return self._evict()
 
     def all(self) -> pd.DataFrame:
-        return self._df.copy()
+        return to_frame(*self._view)
 
     def clear(self) -> None:
-        self._df = self._empty_df()
+        self._set_segment(HistoryColumns())
+        self.failures = {}
 
-    def format_lines(self) -> list[str]:
-        if self._df.empty:
-            return ["(no history)"]
+    def record_failures(self, names: Iterable[str]) -> None:
+        """Count failed attempts (one per name) towards the operations' error rates."""
+        failures = dict(self.failures)
+        for name in names:
+            failures[name] = failures.get(name, 0) + 1
+        self.failures = failures
+
+    def stats(self, last: int | None = None) -> HistoryStats:
+        """Per-operation count, sum, mean, variance, min and max of the results.
+
+        Over the whole visible history (with error rates), or only its
+        newest ``last`` rows. Whole-history stats come from running
+        per-segment accumulators, so they cost O(rows added since the last
+        call), amortized, even once a ring buffer evicts; see
+        ``stats.SegmentStats``.
+        """
+        cols, start, stop = self._view
+        if last is not None and last < stop - start:
+            summaries = summarize_rows(cols, stop - last, stop)  # one-off; leaves the running window alone
+            return HistoryStats(last, by_name(summaries), {})
+        summaries = segment_stats(cols).window(cols, start, stop)
+        return HistoryStats(stop - start, by_name(summaries), self.failures)
 
-        lines: list[str] = []
-        for _, row in self._df.iterrows():
-            op = str(row["operation"])
-            a = float(row["a"])
-            b = float(row["b"])
-            result = float(row["result"])
-            lines.append(f"{op} {a} {b} = {result}")
+    def format_lines(self, limit: int | None = None) -> list[str]:
+        """Display lines, oldest first; with ``limit``, only the newest ``limit`` rows."""
+        if not len(self):
+            return ["(no history)"]
+        first = 0 if limit is None else max(0, len(self) - limit)
+        lines = [f"... ({first} earlier rows)"] if first else []
+        lines.extend(self.format_range(first))
         return lines
 
-    def snapshot(self) -> HistorySnapshot:
-        return HistorySnapshot(df=self._df.copy(deep=True))
+    def format_range(self, start: int = 0, stop: int | None = None) -> list[str]:
+        """Display lines for visible rows ``[start, stop)``, with slice semantics."""
+        cols, lo, hi = self._view
+        start, stop, _ = slice(start, stop).indices(hi - lo)
+        return _format_rows(cols, lo + start, lo + max(start, stop))
+
+    def iter_lines(
+        self, start: int = 0, stop: int | None = None, chunk_size: int = HISTORY_CHUNK_ROWS
+    ) -> Iterator[list[str]]:
+        """``format_range`` in chunks of ``chunk_size`` lines, for streaming large histories.
+
+        The rows shown are fixed when iteration starts, even if calculations
+        are added meanwhile.
+        """
+        cols, lo, hi = self._view
+        pin = cols.mark(hi)  # noqa: F841 - keeps the rows shown from being truncated meanwhile
+        start, stop, _ = slice(start, stop).indices(hi - lo)
+        for first in range(lo + start, lo + stop, chunk_size):
+            yield _format_rows(cols, first, min(first + chunk_size, lo + stop))
+
+    def query(self, query: HistoryQuery | str) -> HistoryMatches:
+        """Rows matching ``query`` (see ``query.parse_query`` for the syntax).
+
+        Uses the segment's secondary indexes, brought up to date with any
+        rows appended since the last query, so the cost follows the number
+        of candidate rows rather than the size of the history.
+        """
+        if isinstance(query, str):
+            query = parse_query(query)
+        cols, start, stop = self._view
+        if query.unfiltered:
+            ids = np.arange(start, stop, dtype=np.int64)[-query.limit if query.limit else None:]
+            return HistoryMatches(ids - start, stop - start, _format_ids(cols, ids))
+        index = self._indexes.get(cols)
+        if index is None:
+            index = self._indexes[cols] = HistoryIndex()
+        ids = index.search(cols, start, stop, query)
+        total = len(ids)
+        if query.limit is not None:
+            ids = ids[max(0, total - query.limit):]
+        return HistoryMatches(ids - start, total, _format_ids(cols, ids))
+
+    def result_at(self, position: int) -> float:
+        """Result of the row at ``position`` in the visible window (negative counts from the end)."""
+        cols, start, stop = self._view
+        if position < 0:
+            position += stop - start
+        if not 0 <= position < stop - start:
+            raise IndexError(f"History row {position} out of range.")
+        row = start + position
+        return next(cols.rows(row, row + 1))[4]
+
+    def snapshot(self, mark: bool = True) -> HistorySnapshot:
+        """The current state, O(1).
+
+        Without ``mark`` the snapshot doesn't stop its rows from being
+        truncated by a later append after a restore. The calculator's undo
+        and redo stacks use that: undo entries never reach past the visible
+        window (later states on the same segment only append to them), and
+        the redo stack is cleared before anything is appended.
+        """
+        while True:
+            view = self._view
+            cols, start, stop = view
+            row_mark = cols.mark(stop) if mark else None
+            # An undo and append between reading the view and marking may have
+            # cut these rows; any such change replaces the view, so retry.
+            if row_mark is None or self._view is view:
+                break
+        return HistorySnapshot(
+            columns=cols,
+            start=start,
+            stop=stop,
+            variables=self.variables.state,
+            failures=self.failures,
+            mark=row_mark,
+        )
 
     def restore(self, snap: HistorySnapshot) -> None:
-        self._df = snap.df.copy(deep=True)
+        self._view = (snap.columns, snap.start, snap.stop)
+        self._restored = snap.mark
+        self.failures = snap.failures
+        if snap.variables is not None:
+            self.variables.restore(snap.variables)
 
     def save(self, path: str | Path) -> None:
-        p = Path(path)
-        p.parent.mkdir(parents=True, exist_ok=True)
-        self._df.to_csv(p, index=False)
+        self.snapshot().save(path, self.history_format)
+
+    def load(self, path: str | Path, evict: bool = True) -> int:
+        """Replace history with the file contents. Returns the number of rows evicted.
 
-    def load(self, path: str | Path) -> None:
+        Rows archived to make room are also trimmed from the file, so each
+        is archived once however often the file is loaded. With ``evict``
+        false the whole file is loaded, for a caller that evicts later.
+        """
         p = Path(path)
         if not p.exists():
             raise FileNotFoundError(f"History file not found: {p}")
+        fmt = resolve_format(p, self.history_format)
+        mapper = getattr(fmt, "map", None) if self.lazy_load else None
+        cols = mapper(p) if mapper is not None else fmt.read(p)
+        # Stats saved next to the file spare a pass over the rows (and, when
+        # memory-mapped, reading them at all)
+        saved = read_stats(p, len(cols))
+        if saved is not None:
+            seed(cols, saved[0])
+        self.failures = saved[1] if saved is not None else {}
+        if not evict:
+            self._set_segment(cols)
+            return 0
+        evicted = self.replace(cols)
+        if evicted and self.archive is not None:
+            self.save(p)
+        return evicted
 
-        df = pd.read_csv(p)
-
-        # Backward compatibility: older CSVs may not have timestamp
-        if "timestamp" not in df.columns:
-            df["timestamp"] = ""
-
-        missing = [c for c in self.REQUIRED_COLUMNS if c not in df.columns]
-        if missing:
-            raise ValueError(f"History CSV missing required columns: {missing}")
-
-        df = df.loc[:, list(self.REQUIRED_COLUMNS)]
-        df["timestamp"] = df["timestamp"].astype(str)
-        df["a"] = pd.to_numeric(df["a"])
-        df["b"] = pd.to_numeric(df["b"])
-        df["result"] = pd.to_numeric(df["result"])
-
-        self._df = df.reset_index(drop=True)
\ No newline at end of file
+    def replace(self, cols: HistoryColumns) -> int:
+        """Make ``cols`` the visible history. Returns the number of rows evicted."""
+        self._set_segment(cols)
+        return self._evict()
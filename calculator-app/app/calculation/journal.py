@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import csv
+import os
+from pathlib import Path
+from typing import TextIO
+
+from .columns import OPERATIONS, HistoryColumns
+from .formats import format_name_for
+from .history import CalculationHistory, HistorySnapshot
+from .stats import inherit, stats_path
+
+# How autosave persists history: full CSV rewrite, or journal + periodic compaction.
+AUTOSAVE_MODES = ("snapshot", "journal")
+
+# Record kinds. Rows carry raw epoch-microsecond timestamps so replay needs no parsing.
+_BASE = "B"      # B,<inode>,<size>,<mtime_ns>   snapshot file this journal extends
+_APPEND = "+"    # +,<timestamp>,<operation>,<a>,<b>,<result>
+_TRUNCATE = "T"  # T,<n>   drop the newest n rows (undo of appends)
+_EVICT = "E"     # E,<n>   drop the oldest n rows (ring-buffer eviction)
+_CLEAR = "C"     # C       empty the history
+
+
+class HistoryJournal:
+    """Append-only change journal layered on top of a full CSV snapshot.
+
+    ``sync()`` writes only what changed since the last persisted state:
+    appended rows, or tombstone markers for undo, eviction and clear. The
+    journal is folded into a fresh snapshot every ``compact_every`` records
+    and by ``compact()`` (e.g. on exit), so autosave costs O(1) per change.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str | Path,
+        journal_path: str | Path | None = None,
+        compact_every: int = 1000,
+        encoding: str = "utf-8",
+    ) -> None:
+        if compact_every < 1:
+            raise ValueError("compact_every must be a positive integer.")
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = (
+            Path(journal_path)
+            if journal_path is not None
+            else self.snapshot_path.with_name(self.snapshot_path.name + ".journal")
+        )
+        self.compact_every = compact_every
+        self.encoding = encoding
+        self.records = 0
+        self._persisted: HistorySnapshot | None = None
+        self._fh: TextIO | None = None
+
+    # ---------------------------------------------------------------- writing
+    def _writer(self):
+        if self._fh is None:
+            self._fh = self.journal_path.open("a", newline="", encoding=self.encoding)
+        return csv.writer(self._fh)
+
+    def _snapshot_stamp(self) -> list[int]:
+        st = self.snapshot_path.stat()
+        return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+    def compact(self, history: CalculationHistory) -> None:
+        """Write a full snapshot and start an empty journal on top of it."""
+        self._compact(history.snapshot(), history.history_format)
+
+    def _compact(self, snap: HistorySnapshot, history_format: str) -> None:
+        self.close()
+        tmp = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        snap.save(tmp, format_name_for(self.snapshot_path, history_format))
+        os.replace(tmp, self.snapshot_path)
+        os.replace(stats_path(tmp), stats_path(self.snapshot_path))
+
+        with self.journal_path.open("w", newline="", encoding=self.encoding) as fh:
+            csv.writer(fh).writerow([_BASE, *self._snapshot_stamp()])
+
+        self.records = 0
+        self._persisted = snap
+
+    def sync(self, history: CalculationHistory) -> None:
+        """Persist the difference between the last synced state and ``history``."""
+        prev = self._persisted
+        cur = history.snapshot()
+        if prev is None:
+            self._compact(cur, history.history_format)
+            return
+        if prev == cur:
+            return
+
+        records = self._diff(prev, cur)
+        if records is None or self.records + len(records) >= self.compact_every:
+            self._compact(cur, history.history_format)
+            return
+
+        self._writer().writerows(records)
+        self._fh.flush()
+        self.records += len(records)
+        self._persisted = cur
+
+    def _diff(self, prev: HistorySnapshot, cur: HistorySnapshot) -> list[list] | None:
+        """Journal records turning ``prev`` into ``cur``, or None if a snapshot is cheaper."""
+        if cur.columns is prev.columns:
+            # Same append-only segment: rows at equal indexes are identical.
+            records = _delta(prev, cur, 0, cur.stop)
+        else:
+            # A fork or compaction of prev's segment still starts with some of its rows
+            lineage = cur.columns.shared_prefix(prev.columns)
+            records = _delta(prev, cur, *lineage) if lineage is not None else None
+            if records is None and len(cur) <= self.compact_every:
+                records = [[_CLEAR], *_rows(cur.columns, cur.start, cur.stop)]
+        return records
+
+    def checkpoint(self, history: CalculationHistory) -> None:
+        """Fold pending changes into a fresh snapshot (e.g. on exit)."""
+        cur = history.snapshot()
+        if self._persisted is None and not len(cur):
+            return
+        if self.records or self._persisted != cur:
+            self._compact(cur, history.history_format)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    # ---------------------------------------------------------------- reading
+    def load(self, history: CalculationHistory) -> int:
+        """Load the snapshot, replay the journal on top and return rows evicted.
+
+        Eviction runs once, after the replay. Rows it archives are folded
+        out of the snapshot at once, so a reload doesn't archive them again.
+        """
+        self.close()
+        records = self._read_records()
+        history.load(self.snapshot_path, evict=False)
+        cols = _replay(history.snapshot(), records) if records else history.snapshot().columns
+        evicted = history.replace(cols)
+        if evicted and history.archive is not None:
+            self._compact(history.snapshot(), history.history_format)
+            return evicted
+        self.records = len(records)
+        self._persisted = history.snapshot()
+        return evicted
+
+    def _read_records(self) -> list[list[str]]:
+        if not self.journal_path.exists():
+            return []
+        with self.journal_path.open(newline="", encoding=self.encoding) as fh:
+            rows = [row for row in csv.reader(fh) if row]
+
+        # A journal whose base stamp doesn't match the snapshot belongs to an
+        # older snapshot (e.g. a crash mid-compaction) and is already folded in.
+        if not rows or rows[0][0] != _BASE:
+            return []
+        if [int(v) for v in rows[0][1:]] != self._snapshot_stamp():
+            return []
+        return rows[1:]
+
+
+def _rows(cols: HistoryColumns, start: int, stop: int) -> list[list]:
+    names = OPERATIONS.names
+    return [
+        [_APPEND, ts, names[op], a, b, result]
+        for ts, op, a, b, result in cols.rows(start, stop)
+    ]
+
+
+def _delta(prev: HistorySnapshot, cur: HistorySnapshot, offset: int, shared: int) -> list[list] | None:
+    """Truncate/append/evict records from ``prev`` to ``cur``, given that ``cur``
+    rows ``[0, shared)`` are rows of ``prev``'s segment from ``offset`` on."""
+    # In prev's indexes: where cur's window begins, and where it stops matching
+    first = offset + cur.start
+    keep = min(offset + min(shared, cur.stop), prev.stop)
+    if first < prev.start or first > keep:
+        return None
+
+    records: list[list] = []
+    if keep < prev.stop:
+        records.append([_TRUNCATE, prev.stop - keep])
+    if cur.stop > keep - offset:
+        records.extend(_rows(cur.columns, keep - offset, cur.stop))
+    if first > prev.start:
+        records.append([_EVICT, first - prev.start])
+    return records
+
+
+def _replay(base: HistorySnapshot, records: list[list[str]]) -> HistoryColumns:
+    cols = base.columns.copy(base.start, base.stop)
+    start = 0
+    # Leading rows still shared with base (for carrying its stats over)
+    shared = base.stop if base.start == 0 else 0
+    for record in records:
+        kind = record[0]
+        if kind == _APPEND:
+            _, ts, op, a, b, result = record
+            cols.append(int(ts), OPERATIONS.code(op), float(a), float(b), float(result))
+        elif kind == _TRUNCATE:
+            cols.truncate(max(start, len(cols) - int(record[1])))
+            shared = min(shared, len(cols))
+        elif kind == _EVICT:
+            start = min(len(cols), start + int(record[1]))
+            shared = 0
+        elif kind == _CLEAR:
+            cols = HistoryColumns()
+            start = 0
+            shared = 0
+        else:
+            raise ValueError(f"Unknown history journal record: {record!r}")
+    inherit(base.columns, cols, shared)
+    return cols.copy(start) if start else cols
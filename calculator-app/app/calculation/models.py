@@ -1,20 +1,49 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-
 from app.operation.base import Operation
 
+from .columns import OPERATIONS
+
 
-@dataclass(frozen=True)
 class Calculation:
-    """A single calculation: operation(a, b) -> result."""
+    """A single calculation: operation(a, b) -> result.
+
+    A compact slotted record. The result is computed at most once and
+    carried with the record, so the strategy, history, formatting and
+    observers all see the same value. ``code`` is the operation's shared
+    OPERATIONS code, used by history. Treat instances as immutable.
+    """
+
+    __slots__ = ("operation", "a", "b", "code", "_result")
 
-    operation: Operation
-    a: float
-    b: float
+    def __init__(self, operation: Operation, a: float, b: float) -> None:
+        self.operation = operation
+        self.a = a
+        self.b = b
+        self.code = OPERATIONS.code(operation.name)
+        self._result: float | None = None
+
+    def __repr__(self) -> str:
+        return f"Calculation(operation={self.operation!r}, a={self.a!r}, b={self.b!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.operation, self.a, self.b) == (other.operation, other.a, other.b)
+
+    def __hash__(self) -> int:
+        return hash((self.operation, self.a, self.b))
 
     def result(self) -> float:
-        return self.operation.compute(self.a, self.b)
+        result = self._result
+        if result is None:
+            result = self._result = self.operation.compute(self.a, self.b)
+        return result
+
+    def settle(self, result: float) -> float:
+        """Record the result a strategy returned, so later readers reuse it."""
+        self._result = result
+        return result
 
     def format(self) -> str:
         return f"{self.operation.name} {self.a} {self.b} = {self.result()}"
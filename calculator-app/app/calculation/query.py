@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import re
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.exceptions import ValidationError
+
+from .columns import OPERATIONS, HistoryColumns
+from .formats import column_arrays
+
+VALUE_FIELDS = ("a", "b", "result")
+_DTYPES = {"timestamp": np.int64, "operation": np.int32, "a": np.float64, "b": np.float64, "result": np.float64}
+# take(): rows copied per block, and the spread beyond which rows are fetched one by one instead
+_TAKE_BLOCK = 1 << 15
+_SPARSE_TAKE = 256
+
+_TERM = re.compile(r"(op|since|until|limit|a|b|result)(>=|<=|=|>|<)(.+)\Z", re.IGNORECASE)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class Range:
+    """``low < value < high``, or ``<=`` on an end that is inclusive."""
+
+    field: str
+    low: float = -np.inf
+    high: float = np.inf
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+
+    def intersect(self, other: "Range") -> "Range":
+        low, low_inclusive = max((self.low, not self.low_inclusive), (other.low, not other.low_inclusive))
+        high, high_inclusive = min((self.high, self.high_inclusive), (other.high, other.high_inclusive))
+        return Range(self.field, low, high, not low_inclusive, high_inclusive)
+
+    def mask(self, values: np.ndarray) -> np.ndarray:
+        above = values >= self.low if self.low_inclusive else values > self.low
+        below = values <= self.high if self.high_inclusive else values < self.high
+        return above & below
+
+
+@dataclass(frozen=True)
+class HistoryQuery:
+    """Filters over history rows; every condition must hold. ``limit`` keeps the newest matches."""
+
+    operations: tuple[str, ...] = ()
+    ranges: tuple[Range, ...] = ()
+    limit: int | None = None
+
+    @property
+    def unfiltered(self) -> bool:
+        return not self.operations and not self.ranges
+
+
+def _timestamp(text: str, name: str) -> int:
+    """ISO date or datetime -> epoch microseconds (naive values are UTC)."""
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValidationError(f"Invalid date for {name}: {text}") from None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def _comparison(name: str, op: str, value: float) -> Range:
+    if op == "=":
+        return Range(name, value, value)
+    if op in (">", ">="):
+        return Range(name, low=value, low_inclusive=op == ">=")
+    return Range(name, high=value, high_inclusive=op == "<=")
+
+
+def parse_query(text: str) -> HistoryQuery:
+    """Parse terms like ``op=pow since=2026-03-01 result>1e6 limit 20``.
+
+    ``op=`` takes a comma-separated list; ``since`` is inclusive and
+    ``until`` exclusive; ``a``, ``b`` and ``result`` compare with
+    ``= < <= > >=``.
+    """
+    operations: list[str] = []
+    ranges: list[Range] = []
+    limit = None
+    tokens = text.split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.lower() == "limit" and i + 1 < len(tokens):
+            token = f"limit={tokens[i + 1]}"
+            i += 1
+        i += 1
+        match = _TERM.match(token)
+        if match is None:
+            raise ValidationError(f"Invalid query term: {token}")
+        name, op, value = match.groups()
+        name = name.lower()
+        if name in ("op", "limit") and op != "=":
+            raise ValidationError(f"Invalid query term: {token}")
+        if name == "op":
+            operations.extend(v for v in value.lower().split(",") if v)
+        elif name == "limit":
+            if not value.isdigit() or int(value) < 1:
+                raise ValidationError(f"limit must be a positive integer: {value}")
+            limit = int(value)
+        elif name in ("since", "until"):
+            moment = _timestamp(value, name)
+            if name == "since" and op in ("=", ">="):
+                ranges.append(Range("timestamp", low=moment))
+            elif name == "until" and op in ("=", "<"):
+                ranges.append(Range("timestamp", high=moment, high_inclusive=False))
+            else:
+                raise ValidationError(f"Use {name}=<date>: {token}")
+        else:
+            try:
+                number = float(value)
+            except ValueError:
+                raise ValidationError(f"Invalid number for {name}: {value}") from None
+            ranges.append(_comparison(name, op, number))
+    # One range per field, so ``since=.. until=..`` is a single index lookup
+    merged: dict[str, Range] = {}
+    for where in ranges:
+        merged[where.field] = merged[where.field].intersect(where) if where.field in merged else where
+    return HistoryQuery(tuple(operations), tuple(merged.values()), limit)
+
+
+class _SortedRuns:
+    """``(key, row id)`` pairs kept as sorted runs, merged like a binary counter.
+
+    Appending a batch sorts it and merges it with trailing runs no larger
+    than itself, so each row is re-merged O(log n) times overall and there
+    are O(log n) runs to binary-search per lookup. Batches are consecutive
+    row ids, so each run covers the id range in ``bounds``.
+    """
+
+    def __init__(self) -> None:
+        self.runs: list[tuple[np.ndarray, np.ndarray]] = []
+        self.bounds: list[tuple[int, int]] = []
+
+    def add(self, keys: np.ndarray, ids: np.ndarray) -> None:
+        if not len(ids):
+            return
+        first, stop = int(ids[0]), int(ids[-1]) + 1
+        while self.runs and len(self.runs[-1][0]) <= len(keys):
+            run_keys, run_ids = self.runs.pop()
+            first = self.bounds.pop()[0]
+            keys, ids = np.concatenate([run_keys, keys]), np.concatenate([run_ids, ids])
+        order = np.argsort(keys, kind="stable")
+        self.runs.append((keys[order], ids[order]))
+        self.bounds.append((first, stop))
+
+    def truncate(self, size: int) -> None:
+        """Drop row ids from ``size`` on; only the newest runs hold them."""
+        while self.runs and self.bounds[-1][0] >= size:
+            self.runs.pop()
+            self.bounds.pop()
+        if self.runs and self.bounds[-1][1] > size:
+            keys, ids = self.runs[-1]
+            keep = ids < size
+            self.runs[-1] = (keys[keep], ids[keep])
+            self.bounds[-1] = (self.bounds[-1][0], size)
+
+    def _bounds(self, keys: np.ndarray, where: Range) -> tuple[int, int]:
+        lo = np.searchsorted(keys, where.low, "left" if where.low_inclusive else "right")
+        hi = np.searchsorted(keys, where.high, "right" if where.high_inclusive else "left")
+        return int(lo), int(max(lo, hi))
+
+    def count(self, where: Range) -> int:
+        return sum(hi - lo for lo, hi in (self._bounds(keys, where) for keys, _ in self.runs))
+
+    def ids(self, where: Range) -> np.ndarray:
+        parts = []
+        for keys, ids in self.runs:
+            lo, hi = self._bounds(keys, where)
+            parts.append(ids[lo:hi])
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+
+@dataclass
+class HistoryIndex:
+    """Secondary indexes over one column segment.
+
+    Segments are append-only, so the index covers rows ``[0, size)`` and
+    catches up on the rows appended since whenever it is used. Snapshots
+    share segments and therefore indexes: undo/redo and restore need no
+    rebuild, and a cleared or loaded history starts a new (empty) segment.
+    Operand indexes are built the first time a query filters on them.
+    """
+
+    size: int = 0
+    by_operation: dict[int, array] = field(default_factory=dict)
+    sorted: dict[str, _SortedRuns] = field(default_factory=lambda: {"timestamp": _SortedRuns()})
+
+    def update(self, cols: HistoryColumns) -> None:
+        stop = len(cols)
+        if stop == self.size:
+            return
+        arrays = column_arrays(cols, self.size, stop)
+        ids = np.arange(self.size, stop, dtype=np.int64)
+        for code in np.unique(arrays["operation"]).tolist():
+            rows = self.by_operation.setdefault(code, array("q"))
+            rows.frombytes(ids[arrays["operation"] == code].tobytes())
+        for name, runs in self.sorted.items():
+            runs.add(arrays[name], ids)
+        self.size = stop
+
+    def truncate(self, size: int) -> None:
+        """Forget rows from ``size`` on, after the segment was truncated in place."""
+        if size >= self.size:
+            return
+        for rows in self.by_operation.values():
+            ids = np.frombuffer(rows, dtype=np.int64)
+            keep = int(np.searchsorted(ids, size))
+            del ids  # release the buffer export before resizing
+            del rows[keep:]
+        for runs in self.sorted.values():
+            runs.truncate(size)
+        self.size = size
+
+    def _runs(self, cols: HistoryColumns, name: str) -> _SortedRuns:
+        runs = self.sorted.get(name)
+        if runs is None:
+            runs = self.sorted[name] = _SortedRuns()
+            if self.size:
+                runs.add(column_arrays(cols, 0, self.size)[name], np.arange(self.size, dtype=np.int64))
+        return runs
+
+    def _operation_rows(self, codes: list[int], start: int, stop: int) -> list[np.ndarray]:
+        parts = []
+        for code in codes:
+            rows = np.frombuffer(self.by_operation.get(code, array("q")), dtype=np.int64)
+            lo, hi = np.searchsorted(rows, [start, stop])
+            parts.append(rows[lo:hi].copy())  # copy: don't keep the array's buffer exported
+        return parts
+
+    def search(self, cols: HistoryColumns, start: int, stop: int, query: HistoryQuery) -> np.ndarray:
+        """Sorted ids of the rows in ``[start, stop)`` that match ``query``.
+
+        The most selective indexed condition (by count, a few binary searches
+        each) produces the candidates; the other conditions are checked on
+        just those rows.
+        """
+        self.update(cols)
+        if query.unfiltered:
+            return np.arange(start, stop, dtype=np.int64)
+
+        codes = [c for c in map(OPERATIONS.find, query.operations) if c is not None]
+        candidates: list[tuple[int, Range | None]] = []
+        if query.operations:
+            by_operation = self._operation_rows(codes, start, stop)
+            candidates.append((sum(map(len, by_operation)), None))
+        for where in query.ranges:
+            candidates.append((self._runs(cols, where.field).count(where), where))
+        _, best = min(candidates, key=lambda candidate: candidate[0])
+
+        if best is None:
+            ids = np.sort(np.concatenate(by_operation)) if by_operation else np.empty(0, dtype=np.int64)
+        else:
+            ids = self.sorted[best.field].ids(best)
+            ids = ids[(ids >= start) & (ids < stop)]
+            if query.operations:
+                ids = ids[np.isin(take(cols, "operation", ids), codes)]
+        for where in query.ranges:
+            if where is not best and len(ids):
+                ids = ids[where.mask(take(cols, where.field, ids))]
+        return ids
+
+
+def take(cols: HistoryColumns, name: str, ids: np.ndarray) -> np.ndarray:
+    """Values of column ``name`` at segment row ``ids`` (sorted)."""
+    nbase = len(cols.base) if cols.base is not None else 0
+    split = int(np.searchsorted(ids, nbase))
+    parts = []
+    if split:
+        parts.append(_take_base(cols, name, ids[:split]))
+    if split < len(ids):
+        parts.append(_take_live(getattr(cols, name), ids[split:] - nbase, _DTYPES[name]))
+    if not parts:
+        return np.empty(0, dtype=_DTYPES[name])
+    return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+
+def _take_live(values: array, ids: np.ndarray, dtype) -> np.ndarray:
+    # Never a view of the live array: while one exists, an append on another
+    # thread fails with BufferError. Copy slices first, like column_arrays,
+    # a block at a time so a wide span doesn't cost one huge allocation.
+    lo, hi = int(ids[0]), int(ids[-1]) + 1
+    if len(ids) * _SPARSE_TAKE < hi - lo:
+        return np.fromiter(map(values.__getitem__, ids.tolist()), dtype=dtype, count=len(ids))
+    out = np.empty(len(ids), dtype=dtype)
+    edges = np.searchsorted(ids, np.arange(lo, hi, _TAKE_BLOCK)).tolist() + [len(ids)]
+    for block, (i, j) in enumerate(zip(edges, edges[1:])):
+        if i < j:
+            first = lo + block * _TAKE_BLOCK
+            out[i:j] = np.frombuffer(values[first : first + _TAKE_BLOCK], dtype=dtype)[ids[i:j] - first]
+    return out
+
+
+def _take_base(cols: HistoryColumns, name: str, ids: np.ndarray) -> np.ndarray:
+    values = cols.base.records[name][ids]
+    if name == "operation":
+        return cols.base.lookup[values]
+    return np.asarray(values, dtype=_DTYPES[name])
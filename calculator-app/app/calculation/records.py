@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .columns import OPERATIONS
+
+# Fixed-width history file: one header, then one 40-byte record per row, so
+# row i lives at a known offset and the file can be memory-mapped as-is.
+MAGIC = b"CALCREC1"
+VERSION = 1
+MAX_OPERATIONS = 64
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("count", "<u4"),
+        ("names", "S16", (MAX_OPERATIONS,)),
+    ]
+)
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("operation", "<i4"),
+        ("reserved", "<i4"),
+        ("a", "<f8"),
+        ("b", "<f8"),
+        ("result", "<f8"),
+    ]
+)
+
+
+class MappedRecords:
+    """Read-only window onto a memory-mapped record file.
+
+    Nothing is read up front: pages are faulted in by the OS only when
+    ``arrays()`` or ``rows()`` touch them, so showing the newest rows of a
+    huge file costs the same as for a small one. Slicing returns another
+    view over the same mapping.
+    """
+
+    __slots__ = ("records", "lookup")
+
+    def __init__(self, records: np.ndarray, lookup: np.ndarray) -> None:
+        self.records = records
+        # File-local operation code -> shared OPERATIONS code
+        self.lookup = lookup
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def slice(self, start: int, stop: int) -> "MappedRecords":
+        return MappedRecords(self.records[start:stop], self.lookup)
+
+    def arrays(self, start: int, stop: int) -> dict[str, np.ndarray]:
+        rec = self.records[start:stop]
+        return {
+            "timestamp": np.array(rec["timestamp"], dtype=np.int64),
+            "operation": self.lookup[rec["operation"]],
+            "a": np.array(rec["a"], dtype=np.float64),
+            "b": np.array(rec["b"], dtype=np.float64),
+            "result": np.array(rec["result"], dtype=np.float64),
+        }
+
+    def rows(self, start: int, stop: int):
+        arrays = self.arrays(start, stop)
+        return zip(*(arrays[name].tolist() for name in ("timestamp", "operation", "a", "b", "result")))
+
+
+def map_records(path: str | Path) -> MappedRecords:
+    p = Path(path)
+    header = np.fromfile(p, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header["magic"][0] != MAGIC:
+        raise ValueError(f"Not a history record file: {p}")
+    if int(header["version"][0]) != VERSION:
+        raise ValueError(f"Unsupported history record version: {int(header['version'][0])}")
+
+    count = int(header["count"][0])
+    names = [name.decode("ascii") for name in header["names"][0][:count]]
+    lookup = np.array([OPERATIONS.code(name) for name in names], dtype=np.int32)
+
+    # A trailing partial record can only come from a foreign writer; ignore it.
+    rows = (p.stat().st_size - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+    if rows <= 0:
+        return MappedRecords(np.empty(0, dtype=RECORD_DTYPE), lookup)
+    records = np.memmap(p, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize, shape=(rows,))
+    return MappedRecords(records, lookup)
+
+
+def write_records(arrays: dict[str, np.ndarray], path: str | Path) -> None:
+    """Write rows (``operation`` as OPERATIONS codes) to a record file.
+
+    The file is replaced atomically: a live mapping of the old file (e.g. the
+    lazily loaded history being saved back) keeps reading the old inode.
+    """
+    p = Path(path)
+    used, local = np.unique(arrays["operation"], return_inverse=True)
+    names = [OPERATIONS.name(int(code)).encode("ascii") for code in used]
+    if len(names) > MAX_OPERATIONS:
+        raise ValueError(f"History record files support at most {MAX_OPERATIONS} operations.")
+    too_long = [name.decode() for name in names if len(name) > HEADER_DTYPE["names"].base.itemsize]
+    if too_long:
+        raise ValueError(f"Operation names too long for a history record file: {too_long}")
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["count"] = len(names)
+    header["names"][0][: len(names)] = names
+
+    records = np.zeros(len(arrays["result"]), dtype=RECORD_DTYPE)
+    records["operation"] = local.reshape(-1)
+    for name in ("timestamp", "a", "b", "result"):
+        records[name] = arrays[name]
+
+    tmp = p.with_name(p.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(header.tobytes())
+        fh.write(records.tobytes())
+    os.replace(tmp, p)
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+
+from .columns import OPERATIONS, HistoryColumns
+from .formats import column_arrays
+
+# Prefix summaries are kept every this many rows, so any prefix of a
+# segment (what undo shows) is one checkpoint plus at most this many rows.
+STATS_CHECKPOINT_ROWS = 4096
+
+_SIDECAR_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Summary:
+    """Count, sum, mean, spread and range of a set of results.
+
+    ``m2`` is the sum of squared deviations from the mean, as in Welford's
+    online algorithm; ``merge`` combines two summaries exactly (Chan et al.),
+    so batches can be summarized separately and folded in.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    @property
+    def variance(self) -> float:
+        """Population variance (0.0 when empty)."""
+        return self.m2 / self.count if self.count else 0.0
+
+    def merge(self, other: Summary) -> Summary:
+        if not other.count:
+            return self
+        if not self.count:
+            return other
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return Summary(
+            count=count,
+            total=self.total + other.total,
+            mean=self.mean + delta * other.count / count,
+            m2=self.m2 + other.m2 + delta * delta * self.count * other.count / count,
+            minimum=min(self.minimum, other.minimum),
+            maximum=max(self.maximum, other.maximum),
+        )
+
+
+# Operation code -> summary of that operation's results. Treated as immutable.
+Summaries = Mapping[int, Summary]
+
+
+def merge_all(left: Summaries, right: Summaries) -> dict[int, Summary]:
+    merged = dict(left)
+    for code, summary in right.items():
+        merged[code] = merged[code].merge(summary) if code in merged else summary
+    return merged
+
+
+def summarize(codes: np.ndarray, values: np.ndarray) -> dict[int, Summary]:
+    """Per-operation summaries of a batch of results, one vectorized pass per statistic."""
+    if not len(values):
+        return {}
+    keys, inverse = np.unique(codes, return_inverse=True)
+    counts = np.bincount(inverse)
+    totals = np.bincount(inverse, weights=values)
+    means = totals / counts
+    m2 = np.bincount(inverse, weights=(values - means[inverse]) ** 2)
+    grouped = values[np.argsort(inverse, kind="stable")]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    minimum = np.minimum.reduceat(grouped, starts)
+    maximum = np.maximum.reduceat(grouped, starts)
+    return {
+        code: Summary(n, total, mean, sq, lo, hi)
+        for code, n, total, mean, sq, lo, hi in zip(
+            keys.tolist(), counts.tolist(), totals.tolist(), means.tolist(),
+            m2.tolist(), minimum.tolist(), maximum.tolist(),
+        )
+    }
+
+
+def summarize_rows(cols: HistoryColumns, start: int, stop: int) -> dict[int, Summary]:
+    """Per-operation summaries of rows ``[start, stop)``, read from the rows."""
+    arrays = column_arrays(cols, start, stop)
+    return summarize(arrays["operation"], arrays["result"])
+
+
+def _suffixes(cols: HistoryColumns, start: int, stop: int) -> dict[int, tuple[np.ndarray, ...]]:
+    """Per operation: its row numbers in ``[start, stop)`` and the summaries of its results from each on.
+
+    Arrays are ``(rows, count, total, mean, m2, minimum, maximum)``; the
+    deviations are taken from the operation's mean to keep ``m2`` accurate.
+    """
+    arrays = column_arrays(cols, start, stop)
+    codes, values = arrays["operation"], arrays["result"]
+    suffixes = {}
+    for code in np.unique(codes).tolist():
+        where = np.flatnonzero(codes == code)
+        tail = values[where][::-1]
+        count = np.arange(1, len(tail) + 1)
+        shift = tail.mean()
+        s1 = np.cumsum(tail - shift)
+        m2 = np.maximum(np.cumsum((tail - shift) ** 2) - s1 * s1 / count, 0.0)
+        suffixes[code] = (where + start, *(a[::-1] for a in (
+            count, np.cumsum(tail), shift + s1 / count, m2,
+            np.minimum.accumulate(tail), np.maximum.accumulate(tail),
+        )))
+    return suffixes
+
+
+def _suffix_at(suffixes: dict[int, tuple[np.ndarray, ...]], start: int) -> dict[int, Summary]:
+    """Summaries of the rows from ``start`` on, out of ``_suffixes``."""
+    summaries = {}
+    for code, (rows, *columns) in suffixes.items():
+        i = int(np.searchsorted(rows, start))
+        if i < len(rows):
+            n, total, mean, m2, lo, hi = (a[i].item() for a in columns)
+            summaries[code] = Summary(int(n), total, mean, m2, lo, hi)
+    return summaries
+
+
+class SegmentStats:
+    """Running per-operation summaries of one (append-only) column segment.
+
+    Rows are folded in batches when stats are asked for, so appends cost
+    nothing extra; totals over the whole segment are then ready at once.
+    Prefix checkpoints answer any ``[0, stop)`` window, which is what undo
+    leaves visible, from one checkpoint plus fewer than
+    ``STATS_CHECKPOINT_ROWS`` rows.
+
+    A window that doesn't start at row 0 (a ring buffer after eviction) is
+    kept as a two-stack sliding window: per-operation suffix summaries of a
+    front run of rows, which eviction steps through, plus a running summary
+    of the rows appended after it. The front is rebuilt from the window's
+    rows only once eviction has passed it, so each call is amortized O(1).
+    """
+
+    def __init__(self, size: int = 0, totals: Summaries | None = None, checkpoints: list | None = None) -> None:
+        self.size = size
+        self.totals: Summaries = totals or {}
+        # checkpoints[k] summarizes rows [0, k * STATS_CHECKPOINT_ROWS); None when
+        # seeded from a sidecar file, until a prefix query needs them.
+        self.checkpoints: list[Summaries] | None = [{}] if checkpoints is None and not size else checkpoints
+        # Sliding window: suffixes of rows [front_start, front_stop), then
+        # back summarizing rows [front_stop, back_stop)
+        self._front: dict[int, tuple[np.ndarray, ...]] = {}
+        self._front_start = self._front_stop = self._back_stop = -1
+        self._back: Summaries = {}
+        self._lock = threading.Lock()
+
+    def _catch_up(self, cols: HistoryColumns) -> None:
+        stop = len(cols)
+        if self.checkpoints is None:
+            self.totals = merge_all(self.totals, summarize_rows(cols, self.size, stop))
+            self.size = stop
+            return
+        while self.size < stop:
+            boundary = len(self.checkpoints) * STATS_CHECKPOINT_ROWS
+            end = min(stop, boundary)
+            self.totals = merge_all(self.totals, summarize_rows(cols, self.size, end))
+            self.size = end
+            if end == boundary:
+                self.checkpoints.append(self.totals)
+
+    def prefix(self, cols: HistoryColumns, stop: int) -> Summaries:
+        """Summaries of rows ``[0, stop)``."""
+        with self._lock:
+            self._catch_up(cols)
+            if stop == self.size:
+                return self.totals
+            if self.checkpoints is None:
+                self.size, self.totals, self.checkpoints = 0, {}, [{}]
+                self._catch_up(cols)
+            k = stop // STATS_CHECKPOINT_ROWS
+            return merge_all(self.checkpoints[k], summarize_rows(cols, k * STATS_CHECKPOINT_ROWS, stop))
+
+    def window(self, cols: HistoryColumns, start: int, stop: int) -> Summaries:
+        """Summaries of rows ``[start, stop)``, the visible window of a history."""
+        if start == 0:
+            return self.prefix(cols, stop)
+        with self._lock:
+            if self._front_start <= start <= self._front_stop and self._back_stop <= stop:
+                self._back = merge_all(self._back, summarize_rows(cols, self._back_stop, stop))
+            else:
+                self._front = _suffixes(cols, start, stop)
+                self._front_start, self._front_stop, self._back = start, stop, {}
+            self._back_stop = stop
+            return merge_all(_suffix_at(self._front, start), self._back)
+
+
+# Keyed weakly by segment: snapshots share segments and so share their stats.
+# Module-level because snapshots are saved (with stats) without their history.
+_SEGMENTS: weakref.WeakKeyDictionary[HistoryColumns, SegmentStats] = weakref.WeakKeyDictionary()
+_SEGMENTS_LOCK = threading.Lock()
+
+
+def segment_stats(cols: HistoryColumns) -> SegmentStats:
+    with _SEGMENTS_LOCK:
+        stats = _SEGMENTS.get(cols)
+        if stats is None:
+            stats = _SEGMENTS[cols] = SegmentStats()
+        return stats
+
+
+def inherit(source: HistoryColumns, target: HistoryColumns, rows: int) -> None:
+    """Give ``target``, whose first ``rows`` rows are ``source``'s, the matching stats.
+
+    For segments forked, replayed or truncated from another one (or
+    itself); a no-op when the source has no stats yet. With no rows shared,
+    the target's stats are dropped and rebuilt from its own rows.
+    """
+    with _SEGMENTS_LOCK:
+        if not rows:
+            _SEGMENTS.pop(target, None)
+            return
+        stats = _SEGMENTS.get(source)
+    if stats is None:
+        return
+    totals = stats.prefix(source, rows)
+    checkpoints = None
+    if stats.checkpoints is not None:
+        checkpoints = stats.checkpoints[: rows // STATS_CHECKPOINT_ROWS + 1]
+    with _SEGMENTS_LOCK:
+        _SEGMENTS[target] = SegmentStats(rows, totals, checkpoints)
+
+
+@dataclass(frozen=True)
+class HistoryStats:
+    """Per-operation summaries of a run of history results.
+
+    ``failures`` counts failed attempts per operation name since the
+    history was cleared or loaded; it is empty for partial windows.
+    """
+
+    rows: int
+    operations: Mapping[str, Summary]
+    failures: Mapping[str, int]
+
+    @property
+    def overall(self) -> Summary:
+        summary = Summary()
+        for part in self.operations.values():
+            summary = summary.merge(part)
+        return summary
+
+    def error_rate(self, name: str | None = None) -> float:
+        """Failed attempts / all attempts, for one operation or overall."""
+        if name is None:
+            failed, succeeded = sum(self.failures.values()), self.overall.count
+        else:
+            failed, succeeded = self.failures.get(name, 0), self.operations.get(name, Summary()).count
+        attempts = failed + succeeded
+        return failed / attempts if attempts else 0.0
+
+
+def by_name(summaries: Summaries) -> dict[str, Summary]:
+    return {OPERATIONS.name(code): summaries[code] for code in sorted(summaries)}
+
+
+# ------------------------------------------------------------------ sidecar
+def stats_path(path: str | Path) -> Path:
+    """Where the stats for history file ``path`` are kept (``history.csv.stats.json``)."""
+    p = Path(path)
+    return p.with_name(p.name + ".stats.json")
+
+
+def write_stats(path: str | Path, summaries: Summaries, rows: int, failures: Mapping[str, int]) -> None:
+    """Write the stats of the rows just saved to history file ``path``.
+
+    The history file's size and mtime are recorded so a sidecar left over
+    from another version of the file is ignored.
+    """
+    st = Path(path).stat()
+    data = {
+        "version": _SIDECAR_VERSION,
+        "rows": rows,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "operations": {
+            name: [s.count, s.total, s.mean, s.m2, s.minimum, s.maximum] for name, s in by_name(summaries).items()
+        },
+        "failures": dict(failures),
+    }
+    target = stats_path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, target)
+
+
+def read_stats(path: str | Path, rows: int) -> tuple[dict[int, Summary], dict[str, int]] | None:
+    """Summaries and failure counts saved with history file ``path``, if still valid for it."""
+    try:
+        data = json.loads(stats_path(path).read_text(encoding="utf-8"))
+        st = Path(path).stat()
+        if (data["version"], data["rows"], data["size"], data["mtime_ns"]) != (
+            _SIDECAR_VERSION, rows, st.st_size, st.st_mtime_ns,
+        ):
+            return None
+        summaries = {
+            OPERATIONS.code(name): Summary(int(v[0]), *map(float, v[1:])) for name, v in data["operations"].items()
+        }
+        failures = {str(name): int(n) for name, n in data["failures"].items()}
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+    return summaries, failures
+
+
+def seed(cols: HistoryColumns, summaries: Summaries) -> None:
+    """Use saved summaries as the stats of a freshly loaded segment."""
+    with _SEGMENTS_LOCK:
+        _SEGMENTS[cols] = SegmentStats(len(cols), summaries)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterator, Mapping
+
+from app.exceptions import ValidationError
+
+from .expression import CompiledExpression
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .history import CalculationHistory
+
+VARIABLE_NAME = re.compile(r"[A-Za-z_]\w*\Z")
+LAST_RESULT = "ans"
+
+
+def is_history_reference(name: str) -> bool:
+    """``ans`` (the newest result) or ``$n`` (the n-th visible history row, from 1)."""
+    return name == LAST_RESULT or name.startswith("$")
+
+
+@dataclass(frozen=True)
+class Variable:
+    """A named formula and its current value.
+
+    History references (``ans``, ``$n``) are frozen in ``refs`` when the
+    formula is assigned, so later calculations don't change it; only other
+    variables are live inputs (``depends_on``). ``error`` is set instead of
+    ``value`` when a recompute fails, e.g. a divisor became zero.
+    """
+
+    name: str
+    expression: CompiledExpression
+    refs: Mapping[str, float]
+    depends_on: tuple[str, ...]
+    value: float
+    error: Exception | None = field(default=None, compare=False)
+
+
+@dataclass(frozen=True)
+class Assignment:
+    name: str
+    value: float
+    recomputed: tuple[str, ...]  # downstream variables re-evaluated, in order
+    failed: tuple[str, ...] = ()  # those whose formula now raises
+
+
+# ``VariableGraph.state``: the variable table and, per variable, the
+# variables whose formulas read it. Both are replaced, never mutated.
+VariableState = tuple[Mapping[str, Variable], Mapping[str, frozenset[str]]]
+
+
+class VariableGraph:
+    """Session variables as a DAG of formulas with incremental recompute.
+
+    Assigning a variable re-evaluates only the variables downstream of it,
+    in topological order, and stops early along any path where a recomputed
+    value did not change. The table and its reverse-dependency index are
+    copy-on-write: ``state`` is an O(1) handle that ``restore`` brings back,
+    which is how history snapshots carry variables through undo/redo.
+    """
+
+    def __init__(self) -> None:
+        self._vars: Mapping[str, Variable] = {}
+        self._children: Mapping[str, frozenset[str]] = {}
+        self.recomputed_total = 0
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._vars
+
+    def __iter__(self) -> Iterator[Variable]:
+        return iter(self._vars.values())
+
+    def __len__(self) -> int:
+        return len(self._vars)
+
+    def get(self, name: str) -> Variable | None:
+        return self._vars.get(name)
+
+    @property
+    def state(self) -> VariableState:
+        return self._vars, self._children
+
+    def restore(self, state: VariableState) -> None:
+        self._vars, self._children = state
+
+    def dependents(self, name: str) -> set[str]:
+        """Variables that (transitively) depend on ``name``."""
+        found: set[str] = set()
+        stack = [name]
+        while stack:
+            for child in self._children.get(stack.pop(), ()):
+                if child not in found:
+                    found.add(child)
+                    stack.append(child)
+        return found
+
+    def check(self, name: str, expression: CompiledExpression) -> tuple[str, ...]:
+        """Validate an assignment; returns the variables the formula depends on."""
+        if not VARIABLE_NAME.match(name) or name == LAST_RESULT:
+            raise ValidationError(f"Invalid variable name: {name}")
+        depends_on = tuple(v for v in expression.variables if not is_history_reference(v))
+        if name in depends_on or self.dependents(name).intersection(depends_on):
+            raise ValidationError(f"Circular reference: {name} depends on itself.")
+        return depends_on
+
+    def assign(
+        self, name: str, expression: CompiledExpression, refs: Mapping[str, float], value: float
+    ) -> Assignment:
+        """Set ``name`` to ``value`` (computed by the caller) and update everything downstream."""
+        depends_on = self.check(name, expression)
+        previous = self._vars.get(name)
+        table = dict(self._vars)
+        table[name] = Variable(name, expression, dict(refs), depends_on, value)
+        children = dict(self._children)
+        for dep in previous.depends_on if previous is not None else ():
+            children[dep] = children[dep] - {name}
+        for dep in depends_on:
+            children[dep] = children.get(dep, frozenset()) | {name}
+        self._vars, self._children = table, children
+
+        recomputed: list[str] = []
+        failed: list[str] = []
+        if previous is not None and _same(previous.value, value) and previous.error is None:
+            dirty: set[str] = set()
+        else:
+            dirty = set(children.get(name, ()))
+        for var_name in _topological(table, self.dependents(name)) if dirty else ():
+            if var_name not in dirty:
+                continue
+            var = table[var_name]
+            env = dict(var.refs)
+            env.update((dep, table[dep].value) for dep in var.depends_on)
+            broken = next((dep for dep in var.depends_on if table[dep].error is not None), None)
+            try:
+                if broken is not None:
+                    raise ValidationError(f"Variable {broken} has no value: {table[broken].error}")
+                new_value, error = var.expression.evaluate(env), None
+            except (ArithmeticError, ValueError, ValidationError) as exc:
+                new_value, error = float("nan"), exc
+                failed.append(var_name)
+            recomputed.append(var_name)
+            table[var_name] = Variable(var.name, var.expression, var.refs, var.depends_on, new_value, error)
+            if error is not None or not _same(var.value, new_value) or var.error is not None:
+                dirty.update(children.get(var_name, ()))
+
+        self.recomputed_total += len(recomputed)
+        return Assignment(name, value, tuple(recomputed), tuple(failed))
+
+
+def _same(a: float, b: float) -> bool:
+    return a == b or (a != a and b != b)
+
+
+def _topological(table: Mapping[str, Variable], names: set[str]) -> list[str]:
+    """``names`` ordered so every variable comes after the ones it depends on."""
+    order: list[str] = []
+    seen: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in table[name].depends_on:
+            if dep in names:
+                visit(dep)
+        order.append(name)
+
+    for name in sorted(names):
+        visit(name)
+    return order
+
+
+class Scope(Mapping[str, float]):
+    """Name lookup for expressions: explicit bindings, then variables, then history.
+
+    ``ans`` is the newest history result and ``$n`` the n-th visible row
+    (from 1, oldest first, as ``history`` lists them).
+    """
+
+    def __init__(
+        self,
+        history: CalculationHistory,
+        variables: VariableGraph,
+        bindings: Mapping[str, float] | None = None,
+    ) -> None:
+        self.history = history
+        self.variables = variables
+        self.bindings = bindings if bindings is not None else {}
+
+    def __getitem__(self, name: str) -> float:
+        if name in self.bindings:
+            return self.bindings[name]
+        var = self.variables.get(name)
+        if var is not None:
+            if var.error is not None:
+                raise ValidationError(f"Variable {name} has no value: {var.error}")
+            return var.value
+        if name == LAST_RESULT:
+            if not len(self.history):
+                raise ValidationError("No previous result: history is empty.")
+            return self.history.result_at(-1)
+        if name.startswith("$"):
+            position = int(name[1:])
+            if not 1 <= position <= len(self.history):
+                raise ValidationError(f"History reference {name} is out of range (1..{len(self.history)}).")
+            return self.history.result_at(position - 1)
+        raise KeyError(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.bindings)
+
+    def __len__(self) -> int:
+        return len(self.bindings)
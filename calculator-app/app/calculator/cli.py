@@ -1,15 +1,22 @@
 from __future__ import annotations
 from app.exceptions import ValidationError
-from collections.abc import Callable
+import functools
+import re
+import signal
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, TextIO
+
+import numpy as np
 
 from app.calculator.facade import Calculator
-from app.calculator_config import load_config
+from app.calculator_config import CalculatorConfig, load_config
 from app.exceptions import ConfigurationError
 from app.input_validators import parse_two_numbers
-from colorama import Fore, Style, init
-
-init(autoreset=True)
 
 ALIASES: dict[str, str] = {
     # Required command names -> internal operation names
@@ -25,6 +32,10 @@ ALIASES: dict[str, str] = {
 }
 
 
+# ``name = expression`` sets a session variable
+ASSIGNMENT = re.compile(r"\s*([A-Za-z_]\w*)\s*=(.*)\Z")
+
+
 def handle_line(line: str, calc: Calculator) -> str | None:
     line = line.strip()
     if not line:
@@ -35,8 +46,8 @@ def handle_line(line: str, calc: Calculator) -> str | None:
     if cmd == "help":
         return calc.help_text()
 
-    if cmd == "history":
-        return "\n".join(calc.history_lines())
+    if _is_history(cmd):
+        return "\n".join(history_chunks(line, calc))
 
     if cmd == "clear":
         calc.clear()
@@ -66,6 +77,37 @@ def handle_line(line: str, calc: Calculator) -> str | None:
     if cmd == "exit":
         return None
 
+    if cmd == "vars":
+        return "\n".join(calc.variable_lines())
+
+    if cmd == "stats" or cmd.startswith("stats "):
+        args = cmd.split()[1:]
+        if args[:1] == ["last"]:
+            args = args[1:]
+        if len(args) > 1 or not all(n.isdigit() and int(n) >= 1 for n in args):
+            return "Invalid format. Use: stats [last n]"
+        return "\n".join(calc.stats_lines(int(args[0]) if args else None))
+
+    if line.startswith("="):
+        try:
+            return f"Result: {calc.evaluate(line[1:])}"
+        except (ArithmeticError, ValueError, ValidationError) as exc:
+            return f"Error: {exc}"
+
+    assignment = ASSIGNMENT.match(line)
+    if assignment is not None:
+        name, source = assignment.groups()
+        try:
+            done = calc.assign(name, source)
+        except (ArithmeticError, ValueError, ValidationError) as exc:
+            return f"Error: {exc}"
+        response = f"Result: {name} = {done.value}"
+        if done.recomputed:
+            response += f" (recomputed {len(done.recomputed)}: {', '.join(done.recomputed)})"
+        if done.failed:
+            response += f"; now failing: {', '.join(done.failed)}"
+        return response
+
     parts = line.split()
     if len(parts) != 3:
         return "Invalid format. Use: <op> <a> <b> (example: add 2 3)"
@@ -87,11 +129,102 @@ def handle_line(line: str, calc: Calculator) -> str | None:
         return f"Error: {exc}"
 
 
+HISTORY_USAGE = "Invalid format. Use: history [n | head n | tail n | page p [size] | <filters> [limit n]]"
+DEFAULT_PAGE_SIZE = 20
+
+
+def _is_history(cmd: str) -> bool:
+    return cmd == "history" or cmd.startswith("history ")
+
+
+def _history_window(cmd: str, total: int) -> tuple[int, int, str, str] | str:
+    """Rows ``[start, stop)`` a ``history`` command shows and notes before/after them, or an error."""
+    args = cmd.split()[1:]
+    if len(args) == 1:
+        args = ["tail", *args]  # history n
+    if not args:
+        return 0, total, "", ""
+    kind, counts = args[0], args[1:]
+    if not all(n.isdigit() and int(n) >= 1 for n in counts):
+        return HISTORY_USAGE
+    counts = [int(n) for n in counts]
+
+    if kind == "tail" and len(counts) == 1:
+        start = max(0, total - counts[0])
+        return start, total, f"... ({start} earlier rows)" if start else "", ""
+    if kind == "head" and len(counts) == 1:
+        stop = min(total, counts[0])
+        return 0, stop, "", f"... ({total - stop} later rows)" if stop < total else ""
+    if kind == "page" and len(counts) in (1, 2):
+        page, size = counts[0], counts[1] if len(counts) == 2 else DEFAULT_PAGE_SIZE
+        pages = -(-total // size)
+        if page > pages:
+            return f"Error: Page {page} is out of range (1..{pages})."
+        start, stop = (page - 1) * size, min(total, page * size)
+        return start, stop, f"Page {page}/{pages} (rows {start + 1}-{stop} of {total})", ""
+    return HISTORY_USAGE
+
+
+def _is_query(args: list[str]) -> bool:
+    return args[0].lower() == "limit" or any(c in arg for arg in args for c in "=<>")
+
+
+def _query_lines(args: list[str], calc: Calculator) -> list[str]:
+    """Matching rows, prefixed with their ``$n`` reference, for ``history <filters>``."""
+    try:
+        matches = calc.query_history(" ".join(args))
+    except ValidationError as exc:
+        return [f"Error: {exc}"]
+    if not matches.total:
+        return ["(no matches)"]
+    earlier = matches.total - len(matches.positions)
+    lines = [f"... ({earlier} earlier matches)"] if earlier else []
+    lines.extend(f"${pos + 1}  {line}" for pos, line in zip(matches.positions.tolist(), matches.lines))
+    return lines
+
+
+def history_chunks(cmd: str, calc: Calculator) -> Iterator[str]:
+    """Output of a ``history`` command as text chunks, so long histories can be streamed.
+
+    Only the rows shown are formatted, a chunk at a time (``HISTORY_CHUNK_ROWS``).
+    Filtered queries (``history op=pow result>1e6 limit 20``) go through the
+    history's indexes and are returned in one chunk.
+    """
+    if not len(calc.history):
+        yield "(no history)"
+        return
+    args = cmd.split()[1:]
+    if args and _is_query(args):
+        yield "\n".join(_query_lines(args, calc))
+        return
+    window = _history_window(cmd.lower(), len(calc.history))
+    if isinstance(window, str):
+        yield window
+        return
+    start, stop, before, after = window
+    if before:
+        yield before
+    for lines in calc.history_chunks(start, stop):
+        yield "\n".join(lines)
+    if after:
+        yield after
+
+
+@functools.cache
+def _colors() -> tuple[Any, Any]:
+    """colorama's ``Fore`` and ``Style``, imported (and initialized) on first colored output."""
+    from colorama import Fore, Style, init
+
+    init(autoreset=True)
+    return Fore, Style
+
+
 def _colorize_response(text: str) -> str:
     """
     Apply color formatting only for interactive CLI output.
     This keeps handle_line() test-safe.
     """
+    Fore, Style = _colors()
 
     if text.startswith("Result:"):
         return Fore.GREEN + text + Style.RESET_ALL
@@ -108,6 +241,75 @@ def _colorize_response(text: str) -> str:
     return text
 
 
+def _colorize_history(chunk: str) -> str:
+    Fore, Style = _colors()
+    if chunk.startswith(("Error:", "Invalid format")):
+        return Fore.RED + chunk + Style.RESET_ALL
+    return Fore.CYAN + chunk + Style.RESET_ALL
+
+
+def _raise_system_exit(signum: int, frame: object) -> None:
+    raise SystemExit(128 + signum)
+
+
+def _install_signal_handlers() -> dict[int, Any]:
+    """Turn termination signals into SystemExit so pending saves get flushed."""
+    if threading.current_thread() is not threading.main_thread():
+        return {}
+    previous: dict[int, Any] = {}
+    for name in ("SIGTERM", "SIGHUP"):
+        signum = getattr(signal, name, None)
+        if signum is not None:
+            previous[signum] = signal.signal(signum, _raise_system_exit)
+    return previous
+
+
+def _restore_signal_handlers(previous: dict[int, Any]) -> None:
+    for signum, handler in previous.items():
+        signal.signal(signum, handler)
+
+
+def _create_calculator(cfg: CalculatorConfig, history_path: str | Path | None) -> Calculator:
+    # CLI arg overrides env config if provided
+    path = Path(history_path) if history_path is not None else cfg.history_path
+
+    return Calculator.create_default(
+        history_path=path,
+        auto_save=cfg.auto_save,
+        auto_load=False,
+        log_path=cfg.log_path,
+        log_encoding=cfg.default_encoding,
+        log_format=cfg.log_format,
+        log_buffer_size=cfg.log_buffer_size,
+        log_max_bytes=cfg.log_max_bytes,
+        log_backup_count=cfg.log_backup_count,
+        log_rotate_when=cfg.log_rotate_when,
+        max_history_size=cfg.max_history_size,
+        max_undo_depth=cfg.max_undo_depth,
+        history_eviction=cfg.history_eviction,
+        archive_path=cfg.archive_path,
+        autosave_mode=cfg.autosave_mode,
+        journal_compact_every=cfg.journal_compact_every,
+        autosave_async=cfg.autosave_async,
+        autosave_delay=cfg.autosave_delay,
+        autosave_batch=cfg.autosave_batch,
+        history_format=cfg.history_format,
+        lazy_load=cfg.lazy_load,
+        execution_strategy=cfg.execution_strategy,
+        execution_workers=cfg.execution_workers or None,
+        batch_chunk_size=cfg.batch_chunk_size,
+        result_cache=cfg.result_cache,
+        result_cache_size=cfg.result_cache_size,
+        result_cache_ttl=cfg.result_cache_ttl,
+        result_cache_path=cfg.result_cache_path,
+        result_cache_disk_size=cfg.result_cache_disk_size,
+        observer_dispatch=cfg.observer_dispatch,
+        observer_queue_size=cfg.observer_queue_size,
+        observer_backpressure=cfg.observer_backpressure,
+        config_profile=cfg.to_profile() if cfg.execution_strategy == "process" else None,
+    )
+
+
 def run_repl(
     input_func: Callable[[str], str] = input,
     output_func: Callable[[str], None] = print,
@@ -121,16 +323,7 @@ def run_repl(
         output_func(f"Configuration error: {exc}")
         return
 
-    # CLI arg overrides env config if provided
-    path = Path(history_path) if history_path is not None else cfg.history_path
-
-    calc = Calculator.create_default(
-        history_path=path,
-        auto_save=cfg.auto_save,
-        auto_load=False,
-        log_path=cfg.log_path,
-        log_encoding=cfg.default_encoding,
-    )
+    calc = _create_calculator(cfg, history_path)
 
     output_func("Calculator REPL. Type 'help' for commands.")
 
@@ -142,12 +335,231 @@ def run_repl(
         except Exception as exc:
             output_func(f"Warning: Failed to load history: {exc}")
 
-    while True:
-        line = input_func("> ")
-        response = handle_line(line, calc)
+    previous_handlers = _install_signal_handlers()
+    try:
+        while True:
+            line = input_func("> ")
+            if _is_history(line.strip().lower()):
+                for chunk in history_chunks(line.strip(), calc):
+                    output_func(_colorize_history(chunk))
+                continue
+            response = handle_line(line, calc)
+
+            if response is None:
+                output_func("Goodbye.")
+                break
+
+            output_func(_colorize_response(response))
+    finally:
+        _restore_signal_handlers(previous_handlers)
+        calc.close()
+
+
+# ------------------------------------------------------------------ batch mode
+BATCH_SIZE = 65_536
+
+# Commands that touch state other than appending a calculation; they end a batch.
+_CONTROL_COMMANDS = frozenset({"help", "history", "vars", "stats", "clear", "undo", "redo", "save", "load", "exit"})
+
+Pending = tuple[str, float, float] | str
+
 
+@dataclass
+class BatchSummary:
+    commands: int = 0
+    calculations: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    def line(self) -> str:
+        rate = self.commands / self.seconds if self.seconds > 0 else float("inf")
+        return (
+            f"Processed {self.commands} commands ({self.calculations} calculations, "
+            f"{self.errors} errors) in {self.seconds:.3f}s: {rate:,.0f} commands/s"
+        )
+
+
+def _script_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Strip lines, skipping blanks and ``#`` comments."""
+    for raw in lines:
+        line = raw.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def _parse_calculation(line: str, supported: tuple[str, ...]) -> Pending | None:
+    """``(op, a, b)`` for an arithmetic command, its error response if malformed, None for others."""
+    cmd = line.lower()
+    if cmd in _CONTROL_COMMANDS or cmd.startswith(("history ", "stats ", "=")) or ASSIGNMENT.match(line):
+        return None
+
+    parts = line.split()
+    if len(parts) != 3:
+        return "Invalid format. Use: <op> <a> <b> (example: add 2 3)"
+
+    op_name, a_str, b_str = parts
+    op_name = ALIASES.get(op_name.lower(), op_name.lower())
+    try:  # operands first, as handle_line does
+        a, b = parse_two_numbers(a_str, b_str)
+    except ValidationError as exc:
+        return f"Error: {exc}"
+    if op_name not in supported:
+        return f"Error: Unsupported operation: {op_name}"
+    return op_name, a, b
+
+
+def _run_pending(pending: list[Pending], calc: Calculator) -> list[str]:
+    """Execute queued calculations as one vectorized batch; responses in input order.
+
+    Each calculation stays its own undo step, as in the REPL.
+    """
+    responses = [item if isinstance(item, str) else "" for item in pending]
+    positions = [i for i, item in enumerate(pending) if not isinstance(item, str)]
+    if not positions:
+        return responses
+
+    ops, a, b = zip(*(pending[i] for i in positions))
+    batch = calc.execute_many(list(ops), a, b, undo_per_row=True)
+
+    errors = np.full(len(positions), None, dtype=object)
+    for exc, where in batch.errors:
+        errors[where] = f"Error: {exc}"
+    for i, value, error in zip(positions, batch.values.tolist(), errors.tolist()):
+        responses[i] = error or f"Result: {value}"
+    return responses
+
+
+def _count(summary: BatchSummary, responses: list[str]) -> None:
+    for response in responses:
+        if response.startswith("Result:"):
+            summary.calculations += 1
+        elif response.startswith(("Error:", "Invalid format")):
+            summary.errors += 1
+
+
+def run_batch(
+    lines: Iterable[str], calc: Calculator, out: TextIO, batch_size: int = BATCH_SIZE
+) -> BatchSummary:
+    """Stream commands through ``calc`` without prompts or colors.
+
+    Runs of arithmetic commands are executed ``batch_size`` at a time with
+    ``execute_many``; any other command flushes the run first, so results
+    and history keep input order. Each run's output is written in one go.
+    """
+    summary = BatchSummary()
+    started = time.perf_counter()
+    supported = calc.factory.supported
+    pending: list[Pending] = []
+
+    def flush() -> None:
+        if pending:
+            responses = _run_pending(pending, calc)
+            _count(summary, responses)
+            out.write("\n".join(responses) + "\n")
+            pending.clear()
+
+    for line in _script_lines(lines):
+        summary.commands += 1
+        item = _parse_calculation(line, supported)
+        if item is not None:
+            pending.append(item)
+            if len(pending) >= batch_size:
+                flush()
+            continue
+
+        flush()
+        if _is_history(line.lower()):
+            # Written as it is formatted, a chunk at a time
+            for chunk in history_chunks(line, calc):
+                _count(summary, [chunk])
+                out.write(chunk + "\n")
+            continue
+        response = handle_line(line, calc)
         if response is None:
-            output_func("Goodbye.")
             break
+        _count(summary, [response])
+        out.write(response + "\n")
+
+    flush()
+    out.flush()
+    summary.seconds = time.perf_counter() - started
+    return summary
+
+
+def respond(lines: Iterable[str], calc: Calculator, batch_size: int = BATCH_SIZE) -> tuple[list[str], bool]:
+    """One response per line, as the REPL would print it, and whether ``exit`` ended the run.
+
+    Like ``run_batch``, runs of arithmetic commands go through
+    ``execute_many``, each command still its own undo step. Unlike it, blank lines are answered too, so responses
+    pair up with requests; ``exit`` answers ``Goodbye.`` and stops.
+    """
+    responses: list[str] = []
+    supported = calc.factory.supported
+    pending: list[Pending] = []
+
+    def flush() -> None:
+        if pending:
+            responses.extend(_run_pending(pending, calc))
+            pending.clear()
+
+    for line in lines:
+        line = line.strip()
+        item = _parse_calculation(line, supported) if line else None
+        if item is not None:
+            pending.append(item)
+            if len(pending) >= batch_size:
+                flush()
+            continue
+
+        flush()
+        response = handle_line(line, calc)
+        if response is None:
+            responses.append("Goodbye.")
+            return responses, True
+        responses.append(response)
+
+    flush()
+    return responses, False
+
+
+def run_batch_file(
+    source: str | Path,
+    history_path: str | Path | None = None,
+    out: TextIO | None = None,
+    report: TextIO | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """Run a command file (``-`` for stdin) non-interactively. Returns an exit status."""
+    # sys.__stdout__/__stderr__ bypass colorama's wrapped streams.
+    out = out if out is not None else sys.__stdout__
+    report = report if report is not None else sys.__stderr__
+
+    try:
+        cfg = load_config()
+    except ConfigurationError as exc:
+        report.write(f"Configuration error: {exc}\n")
+        return 2
 
-        output_func(_colorize_response(response))
\ No newline at end of file
+    calc = _create_calculator(cfg, history_path)
+    if cfg.auto_load:
+        try:
+            calc.auto_load_if_exists()
+        except Exception as exc:
+            report.write(f"Warning: Failed to load history: {exc}\n")
+
+    previous_handlers = _install_signal_handlers()
+    try:
+        if str(source) == "-":
+            summary = run_batch(sys.stdin, calc, out, batch_size)
+        else:
+            with open(source, encoding=cfg.default_encoding) as fh:
+                summary = run_batch(fh, calc, out, batch_size)
+    except OSError as exc:
+        report.write(f"Error: {exc}\n")
+        return 1
+    finally:
+        _restore_signal_handlers(previous_handlers)
+        calc.close()
+
+    report.write(summary.line() + "\n")
+    return 0
@@ -0,0 +1,183 @@
+"""Client for a running calculator service (see ``app.calculator.service``).
+
+``ServiceClient.send`` pipelines commands: a window of lines is written
+before any response is read, so a script costs a few round trips rather
+than one per command. ``run_remote_repl`` and ``run_remote_batch`` give the
+CLI's interactive and ``--batch`` modes on top of it.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import socket
+import sys
+import time
+from contextlib import suppress
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import TextIO
+
+from app.calculator.cli import BatchSummary, _colorize_response, _count, _script_lines
+from app.calculator.service import ServiceAddress, parse_address
+from app.exceptions import ServiceError
+
+# Lines written before reading their responses. Bounded so neither side
+# blocks on a full socket buffer while the other is still writing.
+PIPELINE_WINDOW = 1024
+
+
+class ServiceClient:
+    def __init__(self, address: str | ServiceAddress, timeout: float | None = 60.0) -> None:
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self._stream = None
+        self._http: http.client.HTTPConnection | None = None
+        try:
+            if self.address.kind == "unix":
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(timeout)
+                try:
+                    sock.connect(str(self.address.path))
+                except OSError:
+                    sock.close()
+                    raise
+                self._stream = sock.makefile("rwb")
+                sock.close()  # the file keeps the connection open
+            else:
+                self._http = http.client.HTTPConnection(self.address.host, self.address.port, timeout=timeout)
+                self._http.connect()
+        except OSError as exc:
+            raise ServiceError(f"Cannot reach the calculator service at {self.address}: {exc}") from exc
+
+    def send(self, lines: Sequence[str]) -> list[str]:
+        """Responses to ``lines``, in order; fewer than sent if an ``exit`` ended the session."""
+        lines = [" ".join(line.splitlines()) for line in lines]
+        try:
+            if self._http is not None:
+                return self._post(lines)
+            responses: list[str] = []
+            for start in range(0, len(lines), PIPELINE_WINDOW):
+                window = lines[start:start + PIPELINE_WINDOW]
+                try:
+                    self._stream.write("".join(line + "\n" for line in window).encode())
+                    self._stream.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    return responses  # the session already ended
+                for _ in window:
+                    raw = self._stream.readline()
+                    if not raw:
+                        return responses
+                    responses.append(json.loads(raw))
+            return responses
+        except OSError as exc:
+            raise ServiceError(f"Lost connection to the calculator service at {self.address}: {exc}") from exc
+
+    def _post(self, lines: list[str]) -> list[str]:
+        body = "\n".join(lines).encode()
+        self._http.request("POST", "/", body, {"Content-Type": "text/plain; charset=utf-8"})
+        response = self._http.getresponse()
+        payload = json.loads(response.read())
+        if response.status != 200:
+            raise ServiceError(f"Service error {response.status}: {payload.get('error', payload)}")
+        return payload
+
+    def command(self, line: str) -> str | None:
+        """The response to one command, or None once the session has ended."""
+        responses = self.send([line])
+        return responses[0] if responses else None
+
+    def close(self) -> None:
+        if self._stream is not None:
+            with suppress(OSError):  # unsent lines of an ended session
+                self._stream.close()
+        if self._http is not None:
+            self._http.close()
+
+    def __enter__(self) -> ServiceClient:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def run_remote_repl(
+    address: str,
+    input_func: Callable[[str], str] = input,
+    output_func: Callable[[str], None] = print,
+) -> int:
+    """The interactive REPL, with commands run by the service at ``address``."""
+    try:
+        client = ServiceClient(address)
+    except (ValueError, ServiceError) as exc:
+        output_func(f"Error: {exc}")
+        return 1
+
+    with client:
+        output_func(f"Calculator REPL connected to {client.address}. Type 'help' for commands.")
+        while True:
+            line = input_func("> ")
+            if line.strip().lower() == "exit":
+                output_func("Goodbye.")
+                return 0
+            try:
+                response = client.command(line)
+            except ServiceError as exc:
+                output_func(f"Error: {exc}")
+                return 1
+            if response is None:
+                output_func("Error: The calculator service closed the connection.")
+                return 1
+            output_func(_colorize_response(response))
+
+
+def run_remote_batch(
+    source: str | Path,
+    address: str,
+    out: TextIO | None = None,
+    report: TextIO | None = None,
+    batch_size: int = PIPELINE_WINDOW,
+) -> int:
+    """``--batch`` against a running service: the script is sent ``batch_size`` lines at a time."""
+    out = out if out is not None else sys.__stdout__
+    report = report if report is not None else sys.__stderr__
+    summary = BatchSummary()
+    started = time.perf_counter()
+    try:
+        with ServiceClient(address) as client:
+            if str(source) == "-":
+                _send_script(sys.stdin, client, out, summary, batch_size)
+            else:
+                with open(source, encoding="utf-8") as fh:
+                    _send_script(fh, client, out, summary, batch_size)
+    except (ValueError, ServiceError, OSError) as exc:
+        report.write(f"Error: {exc}\n")
+        return 1
+
+    out.flush()
+    summary.seconds = time.perf_counter() - started
+    report.write(summary.line() + "\n")
+    return 0
+
+
+def _send_script(
+    lines: Iterable[str], client: ServiceClient, out: TextIO, summary: BatchSummary, batch_size: int
+) -> None:
+    # ``exit`` ends the script here, as in run_batch; it never reaches the
+    # service, which keeps serving other clients.
+    chunk: list[str] = []
+    for line in _script_lines(lines):
+        if line.lower() == "exit":
+            summary.commands += 1
+            break
+        chunk.append(line)
+        if len(chunk) >= batch_size:
+            _send_chunk(chunk, client, out, summary)
+    _send_chunk(chunk, client, out, summary)
+
+
+def _send_chunk(chunk: list[str], client: ServiceClient, out: TextIO, summary: BatchSummary) -> None:
+    if chunk:
+        responses = client.send(chunk)
+        summary.commands += len(responses)
+        _count(summary, responses)
+        out.write("\n".join(responses) + "\n")
+        chunk.clear()
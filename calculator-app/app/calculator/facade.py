@@ -1,13 +1,92 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import threading
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Mapping, Sequence
 
+import numpy as np
+
+from app.calculation.archive import EVICTION_POLICIES, HistoryArchive
+from app.calculation.expression import ExpressionCompiler, chain_results
 from app.calculation.factory import CalculationFactory
-from app.calculation.history import CalculationHistory, HistorySnapshot
-from app.observers import Observer, AutoSaveObserver, LoggingObserver
-from app.strategy import ExecutionStrategy, DirectExecutionStrategy
+from app.calculation.history import CalculationHistory, HistoryMatches, HistorySnapshot
+from app.calculation.journal import AUTOSAVE_MODES, HistoryJournal
+from app.calculation.models import Calculation
+from app.calculation.query import HistoryQuery, parse_query
+from app.calculation.stats import HistoryStats
+from app.calculation.variables import Assignment, Scope, is_history_reference
+from app.operation.base import (
+    ArrayResult,
+    Operation,
+    as_operands,
+    combine_results,
+    compute_elementwise,
+)
+from app.event_bus import DEFAULT_EVENT_QUEUE_SIZE, OBSERVER_DISPATCH_MODES, ObserverBus
+from app.observers import (
+    DEFAULT_LOG_BACKUP_COUNT,
+    Observer,
+    AutoSaveObserver,
+    BackgroundAutoSaveObserver,
+    LoggingObserver,
+)
+from app.result_cache import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL, DEFAULT_DISK_CACHE_SIZE
+from app.strategy import (
+    DEFAULT_CHUNK_SIZE,
+    EXECUTION_STRATEGIES,
+    RESULT_CACHE_POLICIES,
+    ExecutionStrategy,
+    DirectExecutionStrategy,
+    create_strategy,
+)
+
+
+class _StateGuard:
+    """Re-entrant lock around a calculator's state changes (``thread_safe`` mode).
+
+    Observer events raised while it is held are queued and delivered by
+    ``dispatch`` on the same thread once the outermost ``with`` block releases it,
+    so an observer that blocks, or waits on a thread that needs the
+    calculator, can't deadlock the caller. Events of concurrent callers may
+    reach observers in a different order than their rows reached history.
+    """
+
+    __slots__ = ("_lock", "_dispatch", "_owner", "_depth", "_events")
+
+    def __init__(self, dispatch) -> None:
+        self._lock = threading.RLock()
+        self._dispatch = dispatch
+        # Only the thread holding the lock reads or writes these
+        self._owner: int | None = None
+        self._depth = 0
+        self._events: list[tuple[str, dict[str, Any]]] = []
+
+    def __enter__(self) -> None:
+        self._lock.acquire()
+        if not self._depth:
+            self._owner = threading.get_ident()
+        self._depth += 1
+
+    def __exit__(self, *exc_info) -> None:
+        self._depth -= 1
+        if self._depth:
+            self._lock.release()
+            return
+        self._owner = None
+        events, self._events = self._events, []
+        self._lock.release()
+        for event, payload in events:
+            self._dispatch(event, payload)
+
+    def defer(self, event: str, payload: dict[str, Any]) -> bool:
+        """Queue an event raised under the lock; False when this thread doesn't hold it."""
+        if self._owner != threading.get_ident():
+            return False
+        self._events.append((event, payload))
+        return True
 
 
 @dataclass
@@ -22,9 +101,38 @@ class Calculator:
     # Observer pattern: subscribers get notified on changes
     _observers: list[Observer] = field(default_factory=list)
 
-    # Memento stacks (undo/redo)
-    _undo_stack: list[HistorySnapshot] = field(default_factory=list)
-    _redo_stack: list[HistorySnapshot] = field(default_factory=list)
+    # Asynchronous dispatch: when set, attached observers are fed from its worker thread
+    event_bus: ObserverBus | None = None
+
+    # Memento stacks (undo/redo), bounded ring buffers when max_undo_depth is set
+    max_undo_depth: int | None = None
+    _undo_stack: deque[HistorySnapshot] = field(default_factory=deque)
+    _redo_stack: deque[HistorySnapshot] = field(default_factory=deque)
+    undo_evicted_total: int = 0
+
+    # Incremental persistence (autosave_mode="journal"); None means full CSV saves
+    journal: HistoryJournal | None = None
+
+    # Compiled expressions (``= ...``), cached by source text; built from the factory
+    expressions: ExpressionCompiler | None = field(default=None, repr=False)
+
+    # Serializes file I/O between the caller and background autosave threads
+    _persist_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    # Concurrency-safe mode: state changes are serialized by a short critical
+    # section (calculations run outside it) and observers are notified after it
+    thread_safe: bool = False
+    _guard: AbstractContextManager = field(init=False, repr=False, compare=False, default=nullcontext())
+
+    def __post_init__(self) -> None:
+        if self.thread_safe:
+            self._guard = _StateGuard(self._dispatch)
+        self._undo_stack = deque(self._undo_stack, maxlen=self.max_undo_depth)
+        self._redo_stack = deque(self._redo_stack, maxlen=self.max_undo_depth)
+        if self.expressions is None:
+            self.expressions = ExpressionCompiler(self.factory)
+        if self.event_bus is not None and self.event_bus not in self._observers:
+            self._observers.append(self.event_bus)
 
     @classmethod
     def create_default(
@@ -34,32 +142,137 @@ class Calculator:
         auto_load: bool = False,
         log_path: str | Path | None = None,
         log_encoding: str = "utf-8",
+        log_format: str = "text",
+        log_buffer_size: int = 0,
+        log_max_bytes: int = 0,
+        log_backup_count: int = DEFAULT_LOG_BACKUP_COUNT,
+        log_rotate_when: str = "",
+        max_history_size: int | None = None,
+        max_undo_depth: int | None = None,
+        history_eviction: str = "archive",
+        archive_path: str | Path | None = None,
+        autosave_mode: str = "snapshot",
+        journal_compact_every: int = 1000,
+        autosave_async: bool = False,
+        autosave_delay: float = 0.5,
+        autosave_batch: int = 100,
+        history_format: str = "auto",
+        lazy_load: bool = False,
+        execution_strategy: str = "direct",
+        execution_workers: int | None = None,
+        batch_chunk_size: int = DEFAULT_CHUNK_SIZE,
+        result_cache: str = "off",
+        result_cache_size: int = DEFAULT_CACHE_SIZE,
+        result_cache_ttl: float = DEFAULT_CACHE_TTL,
+        result_cache_path: str | Path | None = None,
+        result_cache_disk_size: int = DEFAULT_DISK_CACHE_SIZE,
+        observer_dispatch: str = "sync",
+        observer_queue_size: int = DEFAULT_EVENT_QUEUE_SIZE,
+        observer_backpressure: str = "block",
+        config_profile: dict[str, Any] | None = None,
+        thread_safe: bool = False,
     ) -> "Calculator":
+        if history_eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unsupported eviction policy: {history_eviction}")
+        if execution_strategy not in EXECUTION_STRATEGIES:
+            raise ValueError(f"Unsupported execution strategy: {execution_strategy}")
+        if result_cache not in RESULT_CACHE_POLICIES:
+            raise ValueError(f"Unsupported result cache policy: {result_cache}")
+        if autosave_mode not in AUTOSAVE_MODES:
+            raise ValueError(f"Unsupported autosave mode: {autosave_mode}")
+        if observer_dispatch not in OBSERVER_DISPATCH_MODES:
+            raise ValueError(f"Unsupported observer dispatch: {observer_dispatch}")
+
+        history_path = Path(history_path)
+        archive = None
+        if history_eviction == "archive":
+            if archive_path is None:
+                archive_path = history_path.with_name(f"{history_path.stem}_archive.csv")
+            archive = HistoryArchive(archive_path, encoding=log_encoding)
+
         calc = cls(
             factory=CalculationFactory(),
-            history=CalculationHistory(),
-            history_path=Path(history_path),
+            history=CalculationHistory(
+                max_size=max_history_size,
+                archive=archive,
+                history_format=history_format,
+                lazy_load=lazy_load,
+            ),
+            history_path=history_path,
+            strategy=create_strategy(
+                execution_strategy,
+                execution_workers,
+                batch_chunk_size,
+                result_cache=result_cache,
+                cache_size=result_cache_size,
+                cache_ttl=result_cache_ttl,
+                cache_path=result_cache_path,
+                disk_cache_size=result_cache_disk_size,
+                config_profile=config_profile,
+            ),
+            max_undo_depth=max_undo_depth,
+            event_bus=(
+                ObserverBus(observer_queue_size, observer_backpressure) if observer_dispatch == "async" else None
+            ),
+            thread_safe=thread_safe,
         )
 
+        if autosave_mode == "journal":
+            calc.journal = HistoryJournal(
+                history_path, compact_every=journal_compact_every, encoding=log_encoding
+            )
+
         # Attach file logging observer (spec-required).
         # If not provided, default to history file name with .log suffix.
         if log_path is None:
             log_path = calc.history_path.with_suffix(".log")
 
-        calc.attach(LoggingObserver(log_file=Path(log_path), encoding=log_encoding))
+        calc.attach(
+            LoggingObserver(
+                log_file=Path(log_path),
+                encoding=log_encoding,
+                log_format=log_format,
+                buffer_size=log_buffer_size,
+                max_bytes=log_max_bytes,
+                backup_count=log_backup_count,
+                rotate_when=log_rotate_when,
+            )
+        )
 
         if auto_save:
-            calc.attach(AutoSaveObserver(save_func=calc.save))
+            if autosave_async:
+                calc.attach(
+                    BackgroundAutoSaveObserver(
+                        save_func=calc.autosave, delay=autosave_delay, max_batch=autosave_batch
+                    )
+                )
+            else:
+                # One save after a burst covers every event in it
+                calc.attach(AutoSaveObserver(save_func=calc.autosave), backpressure="coalesce")
 
         if auto_load:
             calc.auto_load_if_exists()
 
         return calc
 
-    def attach(self, observer: Observer) -> None:
-        self._observers.append(observer)
+    def attach(self, observer: Observer, backpressure: str | None = None) -> None:
+        """Subscribe ``observer``; with an event bus, ``backpressure`` overrides its policy."""
+        if self.event_bus is not None:
+            self.event_bus.subscribe(observer, backpressure)
+        else:
+            self._observers.append(observer)
+
+    def flush_events(self) -> None:
+        """Wait until observers have handled every event so far (a no-op with sync dispatch)."""
+        if self.event_bus is not None:
+            self.event_bus.flush()
 
     def _notify(self, event: str, payload: dict[str, Any]) -> None:
+        if self.thread_safe and self._guard.defer(event, payload):
+            return
+        self._dispatch(event, payload)
+
+    def _dispatch(self, event: str, payload: dict[str, Any]) -> None:
         for obs in list(self._observers):
             obs.update(event, payload)
 
@@ -71,7 +284,14 @@ class Calculator:
         return (
             "Commands:\n"
             "  add | sub | mul | div | pow | root | mod | int_div | percent | abs_diff  -> perform arithmetic\n"
-            "  history                            -> show history\n"
+            "  = <expression>                     -> evaluate, e.g. = (2 ^ 10) root 3 + 7 % 4\n"
+            "  <name> = <expression>              -> set a variable (use ans, $n for history results)\n"
+            "  vars                               -> list variables\n"
+            "  stats [n]                          -> per-operation stats (of the last n rows)\n"
+            "  history [n]                        -> show history (only the last n rows)\n"
+            "  history head|tail <n>              -> show the oldest/newest n rows\n"
+            "  history page <p> [size]            -> show page p (default 20 rows per page)\n"
+            "  history <filters> [limit n]        -> e.g. history op=pow since=2026-03-01 result>1e6 limit 20\n"
             "  clear                              -> clear history\n"
             "  undo                               -> undo last change\n"
             "  redo                               -> redo last undone change\n"
@@ -81,77 +301,400 @@ class Calculator:
             "  exit                               -> quit\n\n"
             "Usage:\n"
             "  <op> <a> <b>\n"
+            "  = <a> <symbol or op> <b> ...    (symbols: + - * / // % ^)\n"
             f"Supported ops: {ops}"
         )
 
-    def history_lines(self) -> list[str]:
-        return self.history.format_lines()
+    def history_lines(self, limit: int | None = None) -> list[str]:
+        return self.history.format_lines(limit)
 
-    def _record_undo_before_change(self) -> None:
-        self._undo_stack.append(self.history.snapshot())
-        self._redo_stack.clear()
+    def history_chunks(self, start: int = 0, stop: int | None = None) -> Iterator[list[str]]:
+        """Display lines for history rows ``[start, stop)``, a chunk at a time."""
+        return self.history.iter_lines(start, stop)
+
+    def query_history(self, query: HistoryQuery | str) -> HistoryMatches:
+        """Query history rows; ``op=`` accepts command names (``mod``) as well as stored ones (``modulus``)."""
+        if isinstance(query, str):
+            query = parse_query(query)
+        operations = tuple(
+            self.factory.operation(op).name if op in self.factory.supported else op for op in query.operations
+        )
+        with self._guard:  # the query index catches up on new rows in place
+            return self.history.query(replace(query, operations=operations))
+
+    def stats(self, last: int | None = None) -> HistoryStats:
+        return self.history.stats(last)
+
+    def stats_lines(self, last: int | None = None) -> list[str]:
+        stats = self.history.stats(last)
+        if not stats.rows and not stats.failures:
+            return ["(no history)"]
+        names = sorted(set(stats.operations) | set(stats.failures))
+        width = max(map(len, names + ["all"]))
+        lines = [f"Stats over the last {stats.rows} rows:" if last is not None else f"Stats over {stats.rows} rows:"]
+        for name in [*names, None]:
+            s = stats.operations.get(name) if name is not None else stats.overall
+            line = f"{name or 'all':<{width}}  count={s.count if s else 0}"
+            if s is not None and s.count:
+                line += (
+                    f" sum={s.total:.6g} mean={s.mean:.6g} min={s.minimum:.6g}"
+                    f" max={s.maximum:.6g} variance={s.variance:.6g}"
+                )
+            if last is None:
+                line += f" errors={stats.failures.get(name, 0) if name else sum(stats.failures.values())}"
+                line += f" ({stats.error_rate(name):.1%})"
+            lines.append(line)
+        return lines
+
+    def variable_lines(self) -> list[str]:
+        with self._guard:
+            variables = list(self.history.variables)
+        if not variables:
+            return ["(no variables)"]
+        return [
+            f"{var.name} = {var.value if var.error is None else f'error: {var.error}'}  [{var.expression.source}]"
+            for var in variables
+        ]
+
+    def _record_undo_before_change(self) -> int:
+        """Push an undo snapshot. Returns how many old snapshots fell off the ring."""
+        dropped = int(len(self._undo_stack) == self._undo_stack.maxlen)
+        self.undo_evicted_total += dropped
+        # Unmarked: see CalculationHistory.snapshot
+        self._undo_stack.append(self.history.snapshot(mark=False))
+        self._redo_stack.clear()  # lets the next append reuse the undone rows in place
+        return dropped
+
+    def _notify_evictions(self, rows: int, undo_snapshots: int = 0) -> None:
+        if not rows and not undo_snapshots:
+            return
+        self._notify(
+            "history_evicted",
+            {
+                "rows": rows,
+                "undo_snapshots": undo_snapshots,
+                "rows_total": self.history.evicted_total,
+                "undo_snapshots_total": self.undo_evicted_total,
+            },
+        )
 
     def clear(self) -> None:
-        self._record_undo_before_change()
-        self.history.clear()
-        self._notify("history_cleared", {"rows": 0})
+        with self._guard:
+            dropped = self._record_undo_before_change()
+            self.history.clear()
+            self._notify("history_cleared", {"rows": 0})
+            self._notify_evictions(0, dropped)
 
     def execute(self, op_name: str, a: float, b: float) -> float:
-        calc = self.factory.create(op_name, a, b)
-
-        self._record_undo_before_change()
+        return self._execute(self.factory.create(op_name, a, b))
+
+    def _execute(self, calc: Calculation, **details: Any) -> float:
+        # Strategy determines how we execute a calculation; the record keeps
+        # its result so history and observers don't recompute it.
+        try:
+            result = calc.settle(self.strategy.execute(calc))
+        except Exception:
+            with self._guard:
+                self.history.record_failures([calc.operation.name])
+            raise
+
+        with self._guard:
+            dropped = self._record_undo_before_change()
+            evicted = self.history.add(calc)
+            self._notify(
+                "calculation_added",
+                {"operation": calc.operation.name, "a": calc.a, "b": calc.b, "result": result, **details},
+            )
+            self._notify_evictions(evicted, dropped)
+        return result
 
-        # Strategy determines how we execute a calculation
-        result = self.strategy.execute(calc)
+    def evaluate(self, source: str, variables: Mapping[str, float] | None = None) -> float:
+        """Evaluate an expression such as ``(2 ^ 10) root 3 + 7 % 4``.
+
+        Compiled once per distinct source text. Inner steps run directly;
+        the final operation runs through the strategy and is recorded as a
+        single history entry (``add 10.07... 3 = 13.07...``), with the
+        source in the event payload.
+        """
+        expression = self.expressions.compile(source)
+        a, b = expression.operands(self.scope(variables))
+        return self._execute(Calculation(expression.operation, a, b), expression=expression.source)
+
+    def scope(self, bindings: Mapping[str, float] | None = None) -> Scope:
+        """Names visible to expressions: ``bindings``, session variables, ``ans`` and ``$n``."""
+        return Scope(self.history, self.history.variables, bindings)
+
+    def assign(self, name: str, source: str) -> Assignment:
+        """Set session variable ``name`` to an expression's value and recompute its dependents.
+
+        An expression with an operation is also recorded like ``evaluate``;
+        a bare value (``x = 5``) or copy (``y = x``) is not. ``ans``/``$n``
+        are read once, now. Undo/redo restore variables with the history.
+        """
+        expression = self.expressions.compile(source)
+        with self._guard:  # dependents are recomputed from a consistent variable table
+            variables = self.history.variables
+            variables.check(name, expression)
+            scope = self.scope()
+            refs = {ref: scope[ref] for ref in expression.variables if is_history_reference(ref)}
+
+            if expression.operation is None:
+                value = expression.evaluate(scope)
+                self._notify_evictions(0, self._record_undo_before_change())
+            else:
+                a, b = expression.operands(scope)
+                value = self._execute(Calculation(expression.operation, a, b), expression=expression.source)
+                # _execute pushed the undo snapshot; the assignment joins that step
+            assignment = variables.assign(name, expression, refs, value)
+            self._notify(
+                "variable_assigned",
+                {
+                    "name": name,
+                    "value": value,
+                    "expression": expression.source,
+                    "recomputed": len(assignment.recomputed),
+                    "recomputed_total": variables.recomputed_total,
+                },
+            )
+        return assignment
+
+    def _execute_array(self, operation: Operation, a, b) -> ArrayResult:
+        execute_array = getattr(self.strategy, "execute_array", None)
+        if execute_array is not None:
+            return execute_array(operation, a, b)
+        return compute_elementwise(
+            lambda x, y: self.strategy.execute(Calculation(operation=operation, a=x, b=y)), a, b
+        )
 
-        self.history.add(calc)
-        self._notify(
-            "calculation_added",
-            {"operation": calc.operation.name, "a": a, "b": b, "result": result},
+    def evaluate_many(self, source: str, variables: Mapping[str, Any]) -> ArrayResult:
+        """Evaluate one expression over vectors of variable bindings (scalars broadcast).
+
+        Like ``execute_many``: failures are per element, and the final step
+        of each successful element is appended to history as one change.
+        """
+        expression = self.expressions.compile(source)
+        left, right, _ = expression.operand_arrays(self.scope(variables))
+        operation = expression.operation
+        batch = chain_results(left, right, self._execute_array(operation, left.values, right.values))
+        self._record_batch(
+            operation.name, left.values, right.values, batch, operation.name, expression=expression.source
         )
-        return result
+        return batch
+
+    def execute_many(self, op_name: str | Sequence[str], a, b, undo_per_row: bool = False) -> ArrayResult:
+        """Apply an operation to arrays of operands (scalars broadcast).
+
+        ``op_name`` is one operation for all elements, or one per element;
+        mixed batches run one vectorized pass per distinct operation.
+        Failed elements don't raise: they are NaN in the result and reported
+        per element in ``errors``, with the exceptions ``execute`` would
+        raise. Successful rows are appended to history in input order as a
+        single change: one undo record and one ``calculations_added`` event.
+        With ``undo_per_row``, undo steps back one row at a time instead, as
+        after calling ``execute`` per element (batch mode relies on this).
+        """
+        a, b = as_operands(a, b)
+        if isinstance(op_name, str):
+            operation = self.factory.operation(op_name)
+            batch = self._execute_array(operation, a, b)
+            names: str | np.ndarray = operation.name
+            label = operation.name
+        else:
+            keys, inverse = np.unique(np.asarray(op_name, dtype=str), return_inverse=True)
+            if len(inverse) != len(a):
+                raise ValueError("Batch needs one operation name per operand pair.")
+            operations = [self.factory.operation(key) for key in keys.tolist()]
+            parts = []
+            for code, operation in enumerate(operations):
+                indexes = np.flatnonzero(inverse == code)
+                parts.append((indexes, self._execute_array(operation, a[indexes], b[indexes])))
+            batch = combine_results(len(a), parts)
+            names = np.array([operation.name for operation in operations], dtype=object)[inverse]
+            label = ",".join(operation.name for operation in operations)
+
+        self._record_batch(names, a, b, batch, label, undo_per_row=undo_per_row)
+        return batch
+
+    def _record_batch(
+        self,
+        names: str | np.ndarray,
+        a: np.ndarray,
+        b: np.ndarray,
+        batch: ArrayResult,
+        label: str,
+        undo_per_row: bool = False,
+        **details: Any,
+    ) -> None:
+        ok = batch.ok
+        added = int(ok.sum())
+        failed = [names] * (len(batch) - added) if isinstance(names, str) else names[~ok]
+        if not added:
+            with self._guard:
+                self.history.record_failures(failed)
+            return
+
+        ops = names if isinstance(names, str) else names[ok]
+        a, b, values = a[ok], b[ok], batch.values[ok]
+        with self._guard:
+            if undo_per_row:
+                dropped, evicted = self._add_rows_one_step_each(names, ok, a, b, values)
+            else:
+                dropped = self._record_undo_before_change()
+                self.history.record_failures(failed)  # undone with the batch
+                evicted = self.history.add_many(ops, a, b, values)
+            self._notify(
+                "calculations_added",
+                {"operation": label, "count": added, "failed": len(batch) - added, **details},
+            )
+            self._notify_evictions(evicted, dropped)
+
+    def _add_rows_one_step_each(
+        self, names: str | np.ndarray, ok: np.ndarray, a: np.ndarray, b: np.ndarray, values: np.ndarray
+    ) -> tuple[int, int]:
+        """Append a batch's successful rows (``a``, ``b``, ``values``) with one undo step per row.
+
+        Leaves history, failure counts and the undo ring as ``execute`` per
+        element would. Only the newest ``max_undo_depth`` rows get a step:
+        older ones would fall off the ring anyway. Returns ``(undo snapshots
+        dropped, rows evicted)``.
+        """
+        history = self.history
+        positions = np.flatnonzero(ok)  # input index of each appended row
+        depth = self._undo_stack.maxlen
+        steps = len(positions) if depth is None else min(depth, len(positions))
+        head = len(positions) - steps  # rows appended without a step of their own
+        dropped = max(len(self._undo_stack) + len(positions) - depth, 0) if depth is not None else 0
+        self.undo_evicted_total += dropped
+        self._redo_stack.clear()
+
+        failed = np.flatnonzero(~ok)
+        failed_names = [names] * len(failed) if isinstance(names, str) else names[failed]
+        before = np.searchsorted(failed, positions).tolist()  # failures preceding each row
+        recorded = 0
+
+        def record_failures(upto: int) -> None:
+            nonlocal recorded
+            if upto > recorded:
+                history.record_failures(failed_names[recorded:upto])
+                recorded = upto
+
+        def operations(rows: slice) -> str | np.ndarray:
+            return names if isinstance(names, str) else names[positions[rows]]
+
+        if history.max_size is None or len(history) + len(positions) <= history.max_size:
+            # Nothing is evicted: append everything at once, then point each
+            # step at its prefix of the new rows
+            counts = {}
+            for n in dict.fromkeys(before[head:]):
+                record_failures(n)
+                counts[n] = history.failures
+            record_failures(len(failed))
+            evicted = history.add_many(operations(slice(None)), a, b, values)
+            last = history.snapshot(mark=False)
+            first = last.stop - steps
+            self._undo_stack.extend(
+                HistorySnapshot(last.columns, last.start, first + step, last.variables, counts[n])
+                for step, n in enumerate(before[head:])
+            )
+            return dropped, evicted
+
+        evicted = 0
+        if head:
+            record_failures(before[head])
+            evicted += history.add_many(operations(slice(head)), a[:head], b[:head], values[:head])
+        for row in range(head, len(positions)):
+            record_failures(before[row])
+            self._undo_stack.append(history.snapshot(mark=False))
+            rows = slice(row, row + 1)
+            evicted += history.add_many(operations(rows), a[rows], b[rows], values[rows])
+        record_failures(len(failed))
+        return dropped, evicted
 
     def undo(self) -> bool:
-        if not self._undo_stack:
-            return False
+        with self._guard:
+            if not self._undo_stack:
+                return False
 
-        self._redo_stack.append(self.history.snapshot())
-        snap = self._undo_stack.pop()
-        self.history.restore(snap)
+            self._redo_stack.append(self.history.snapshot(mark=False))
+            snap = self._undo_stack.pop()
+            self.history.restore(snap)
 
-        self._notify("undo", {"rows": len(self.history.all())})
-        return True
+            self._notify("undo", {"rows": len(self.history)})
+            return True
 
     def redo(self) -> bool:
-        if not self._redo_stack:
-            return False
+        with self._guard:
+            if not self._redo_stack:
+                return False
 
-        self._undo_stack.append(self.history.snapshot())
-        snap = self._redo_stack.pop()
-        self.history.restore(snap)
+            self._undo_stack.append(self.history.snapshot(mark=False))
+            snap = self._redo_stack.pop()
+            self.history.restore(snap)
 
-        self._notify("redo", {"rows": len(self.history.all())})
-        return True
+            self._notify("redo", {"rows": len(self.history)})
+            return True
+
+    def _write_history(self) -> None:
+        with self._persist_lock:
+            if self.journal is not None:
+                self.journal.compact(self.history)
+            else:
+                self.history.save(self.history_path)
 
     def save(self) -> None:
-        self.history.save(self.history_path)
+        self._write_history()
         self._notify("history_saved", {"path": str(self.history_path)})
 
+    def autosave(self) -> None:
+        """Persist changes: append to the journal if enabled, else rewrite the CSV.
+
+        Safe to call from a background thread.
+        """
+        if self.journal is not None:
+            with self._persist_lock:
+                self.journal.sync(self.history)
+        else:
+            self.save()
+
+    def _load_history(self) -> int:
+        with self._persist_lock:
+            if self.journal is not None:
+                return self.journal.load(self.history)
+            return self.history.load(self.history_path)
+
+    def close(self) -> None:
+        """Flush pending persistence work and stop worker pools; call once the session ends."""
+        for obs in list(self._observers):
+            close = getattr(obs, "close", None)
+            if callable(close):
+                close()
+        close = getattr(self.strategy, "close", None)
+        if callable(close):
+            close()
+        if self.journal is not None:
+            with self._persist_lock:
+                self.journal.checkpoint(self.history)
+                self.journal.close()
+
     def load(self) -> None:
         # LBYL: check before attempting to load
         if not self.history_path.exists():
             raise FileNotFoundError(f"History file not found: {self.history_path}")
 
-        self._record_undo_before_change()
-        self.history.load(self.history_path)
-        self._notify("history_loaded", {"path": str(self.history_path), "rows": len(self.history.all())})
+        with self._guard:
+            dropped = self._record_undo_before_change()
+            evicted = self._load_history()
+            self._notify("history_loaded", {"path": str(self.history_path), "rows": len(self.history)})
+            self._notify_evictions(evicted, dropped)
 
     def auto_load_if_exists(self) -> bool:
         """Load history if the CSV exists. Returns True if loaded, False otherwise."""
         if not self.history_path.exists():
             return False
-        self.history.load(self.history_path)
-        self._notify("history_loaded", {"path": str(self.history_path), "rows": len(self.history.all())})
+        with self._guard:
+            evicted = self._load_history()
+            self._notify("history_loaded", {"path": str(self.history_path), "rows": len(self.history)})
+            self._notify_evictions(evicted)
         return True
     
 @classmethod
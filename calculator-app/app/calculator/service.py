@@ -0,0 +1,425 @@
+"""Long-running service mode: one warm ``Calculator`` shared by local clients.
+
+Clients speak the REPL's command language over one of two transports:
+
+* a Unix domain socket, one command per line. Each line gets one response
+  line: the text the REPL would print, JSON-encoded so multi-line output
+  (``history``, ``help``) stays on one line. Clients may pipeline; lines
+  that arrive together run as one batch, with arithmetic vectorized.
+* HTTP on localhost. ``POST /`` takes command lines as a text body and
+  returns a JSON array of responses; ``GET /health`` reports the history
+  size. Connections are kept alive.
+
+All commands run on a single worker thread, so the calculator and its
+history file have one writer; ``HistoryLock`` keeps a second service (or
+one started by mistake on the same file) from writing it too.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sys
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import asdict, dataclass, replace
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, TextIO
+
+from app.calculator.cli import (
+    BATCH_SIZE,
+    _create_calculator,
+    _install_signal_handlers,
+    _restore_signal_handlers,
+    respond,
+)
+from app.calculator.facade import Calculator
+from app.calculator.sessions import DEFAULT_TENANT, SessionManager
+from app.calculator_config import CalculatorConfig, load_config
+from app.exceptions import ConfigurationError, ServiceError, ValidationError
+from app.strategy import create_strategy
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not on Windows
+    fcntl = None
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+DEFAULT_HTTP_PORT = 8765
+# Largest request line or HTTP body accepted; bounds per-connection memory.
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+READ_SIZE = 65_536
+# The session a connection uses until it sends ``session [tenant/]id``.
+DEFAULT_SESSION = (DEFAULT_TENANT, "default")
+
+SessionKey = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class ServiceAddress:
+    kind: str  # "unix" or "http"
+    path: Path | None = None
+    host: str = "127.0.0.1"
+    port: int = DEFAULT_HTTP_PORT
+
+    def __str__(self) -> str:
+        if self.kind == "unix":
+            return f"unix:{self.path}"
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        return f"http://{host}:{self.port}"
+
+
+def parse_address(text: str) -> ServiceAddress:
+    """``http://127.0.0.1:8765`` for HTTP; ``unix:/path`` or a bare path for a Unix socket."""
+    text = text.strip()
+    if text.startswith("http://"):
+        host, sep, port = text[len("http://"):].rstrip("/").rpartition(":")
+        if not sep or not port.isdigit():
+            raise ValueError(f"Invalid service address: {text!r} (expected http://host:port)")
+        host = host.strip("[]") or "127.0.0.1"
+        if host not in LOOPBACK_HOSTS:
+            raise ValueError(f"The HTTP service only listens on localhost, not {host!r}")
+        return ServiceAddress("http", host=host, port=int(port))
+    path = text[len("unix:"):] if text.startswith("unix:") else text
+    if not path:
+        raise ValueError("Service address cannot be empty.")
+    return ServiceAddress("unix", path=Path(path).expanduser())
+
+
+class HistoryLock:
+    """Exclusive ownership of a history file for the service writing it.
+
+    An ``flock`` on ``<history>.lock`` is dropped by the OS when the process
+    exits, so a crashed service never leaves a stale lock. Platforms without
+    ``fcntl`` skip the check.
+    """
+
+    def __init__(self, history_path: str | Path) -> None:
+        self.history_path = Path(history_path)
+        self.path = self.history_path.with_name(self.history_path.name + ".lock")
+        self._fd: int | None = None
+
+    def acquire(self) -> None:
+        if fcntl is None or self._fd is not None:  # pragma: no cover - not on Windows
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            owner = os.read(fd, 32).decode(errors="replace").strip() or "unknown"
+            os.close(fd)
+            raise ServiceError(
+                f"History file {self.history_path} is owned by another service (pid {owner})."
+            ) from None
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _http_response(status: HTTPStatus, payload: Any, keep_alive: bool = True) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class CalculatorService:
+    """Serves one calculator to concurrent clients on an asyncio event loop.
+
+    Connections are handled concurrently, but their commands run one batch
+    at a time on a single worker thread: requests from one client keep
+    their order and the history has a single writer. ``serve()`` runs until
+    ``stop()``, which may be called from any thread.
+    """
+
+    def __init__(
+        self, calc: Calculator | None = None, batch_size: int = BATCH_SIZE, sessions: SessionManager | None = None
+    ) -> None:
+        if (calc is None) == (sessions is None):
+            raise ValueError("Serve either one calculator or a session manager.")
+        self.calc = calc
+        self.sessions = sessions
+        self.batch_size = batch_size
+        self.commands = 0
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="calc-service")
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping: asyncio.Event | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def run(
+        self, lines: list[str], session: SessionKey = DEFAULT_SESSION
+    ) -> tuple[list[str], bool, SessionKey]:
+        """Responses to ``lines``, whether ``exit`` ended them, and the session they left selected."""
+        loop = asyncio.get_running_loop()
+        responses, done, session = await loop.run_in_executor(self._worker, self._respond, lines, session)
+        self.commands += len(responses)
+        return responses, done, session
+
+    def _respond(self, lines: list[str], session: SessionKey) -> tuple[list[str], bool, SessionKey]:
+        # On the worker thread. ``session [tenant/]id`` lines switch sessions in-band.
+        responses: list[str] = []
+        start = 0
+        for i, line in enumerate(lines):
+            words = line.split()
+            if len(words) != 2 or words[0].lower() != "session":
+                continue
+            if self._respond_in(session, lines[start:i], responses):
+                return responses, True, session
+            start = i + 1
+            try:
+                session = self._select(words[1])
+            except ValidationError as exc:
+                responses.append(f"Error: {exc}")
+            else:
+                responses.append(f"Session: {session[0]}/{session[1]}")
+        return responses, self._respond_in(session, lines[start:], responses), session
+
+    def _respond_in(self, session: SessionKey, lines: list[str], responses: list[str]) -> bool:
+        if not lines:
+            return False
+        calc = self.calc if self.sessions is None else self.sessions.get(session[1], session[0])
+        more, done = respond(lines, calc, self.batch_size)
+        responses.extend(more)
+        return done
+
+    def _select(self, name: str) -> SessionKey:
+        if self.sessions is None:
+            raise ValidationError("Sessions are not enabled on this service (start it with --sessions DIR).")
+        tenant, _, session = name.rpartition("/")
+        key = (tenant or DEFAULT_TENANT, session)
+        self.sessions.get(key[1], key[0])  # validates the ids and opens the session
+        return key
+
+    async def _serve_lines(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        buffer = b""
+        session = DEFAULT_SESSION
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                *lines, buffer = (buffer + data).split(b"\n")
+                if len(buffer) > MAX_REQUEST_BYTES:
+                    writer.write(json.dumps("Error: Request line too long.").encode() + b"\n")
+                    break
+                if not lines:
+                    continue
+                requests = [line.decode(errors="replace") for line in lines]
+                responses, done, session = await self.run(requests, session)
+                writer.write("".join(json.dumps(response) + "\n" for response in responses).encode())
+                await writer.drain()
+                if done:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            await self._close_writer(writer)
+
+    async def _serve_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: dict[str, str] = {}
+                while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    method, target, _ = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    writer.write(_http_response(HTTPStatus.BAD_REQUEST, {"error": "Malformed request."}, False))
+                    break
+                if length > MAX_REQUEST_BYTES:
+                    error = {"error": "Request body too large."}
+                    writer.write(_http_response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, error, False))
+                    break
+                body = await reader.readexactly(length) if length > 0 else b""
+                status, payload = await self._http_request(method.upper(), target, body)
+                writer.write(_http_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await self._close_writer(writer)
+
+    async def _http_request(self, method: str, target: str, body: bytes) -> tuple[HTTPStatus, Any]:
+        path = target.split("?", 1)[0]
+        parts = path.strip("/").split("/")
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, self.health()
+        if path == "/" and method == "POST":
+            responses, _, _ = await self.run(body.decode(errors="replace").splitlines())
+            return HTTPStatus.OK, responses
+        if self.sessions is not None and parts[0] == "sessions" and len(parts) in (2, 3):
+            if method != "POST":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} is not supported on {path}."}
+            session = (parts[1], parts[2]) if len(parts) == 3 else (DEFAULT_TENANT, parts[1])
+            try:
+                self.sessions.history_path(session[1], session[0])
+            except ValidationError as exc:
+                return HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+            responses, _, _ = await self.run(body.decode(errors="replace").splitlines(), session)
+            return HTTPStatus.OK, responses
+        if path in ("/", "/health"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} is not supported on {path}."}
+        return HTTPStatus.NOT_FOUND, {"error": f"No such endpoint: {path}"}
+
+    def health(self) -> dict[str, Any]:
+        if self.sessions is None:
+            return {"status": "ok", "history": len(self.calc.history), "commands": self.commands}
+        return {"status": "ok", "commands": self.commands, "sessions": asdict(self.sessions.stats())}
+
+    async def _close_writer(self, writer: asyncio.StreamWriter) -> None:
+        self._writers.discard(writer)
+        writer.close()
+        with suppress(ConnectionError):
+            await writer.wait_closed()
+
+    async def serve(
+        self, address: ServiceAddress, on_ready: Callable[[ServiceAddress], None] | None = None
+    ) -> None:
+        """Listen on ``address`` until ``stop()``; ``on_ready`` gets the bound address (with the real port)."""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if address.kind == "unix":
+            _claim_socket_path(address.path)
+            server = await asyncio.start_unix_server(self._serve_lines, path=str(address.path))
+        else:
+            server = await asyncio.start_server(self._serve_http, address.host, address.port)
+            address = replace(address, port=server.sockets[0].getsockname()[1])
+        try:
+            if on_ready is not None:
+                on_ready(address)
+            await self._stopping.wait()
+        finally:
+            server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await server.wait_closed()
+            if address.kind == "unix":
+                with suppress(FileNotFoundError):
+                    address.path.unlink()
+
+    def stop(self) -> None:
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    def close(self) -> None:
+        """Wait for the command in progress; the calculator itself is closed by its owner."""
+        self._worker.shutdown(wait=True)
+
+
+def _claim_socket_path(path: Path) -> None:
+    """Remove a socket file left by a dead service; refuse one a live service is listening on."""
+    if not path.exists():
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+    else:
+        raise ServiceError(f"A service is already listening on {path}.")
+    finally:
+        probe.close()
+
+
+def _create_sessions(cfg: CalculatorConfig, root: Path) -> SessionManager:
+    strategy = create_strategy(
+        cfg.execution_strategy,
+        cfg.execution_workers or None,
+        cfg.batch_chunk_size,
+        result_cache=cfg.result_cache,
+        cache_size=cfg.result_cache_size,
+        cache_ttl=cfg.result_cache_ttl,
+        cache_path=cfg.result_cache_path,
+        disk_cache_size=cfg.result_cache_disk_size,
+        config_profile=cfg.to_profile() if cfg.execution_strategy == "process" else None,
+    )
+    return SessionManager(
+        root,
+        max_sessions=cfg.max_sessions,
+        max_rows=cfg.max_session_rows,
+        max_history_size=cfg.max_history_size,
+        history_eviction=cfg.history_eviction,
+        max_undo_depth=cfg.max_undo_depth,
+        strategy=strategy,
+        log_format=cfg.log_format,
+        log_encoding=cfg.default_encoding,
+    )
+
+
+def run_service(
+    address: str,
+    history_path: str | Path | None = None,
+    report: TextIO | None = None,
+    batch_size: int = BATCH_SIZE,
+    sessions_dir: str | Path | None = None,
+) -> int:
+    """Serve the configured calculator on ``address`` until interrupted. Returns an exit status.
+
+    With ``sessions_dir``, serve a ``SessionManager`` of per-session
+    calculators sharded under that directory instead of one calculator.
+    """
+    report = report if report is not None else sys.__stderr__
+    try:
+        target = parse_address(address)
+        cfg = load_config()
+    except (ValueError, ConfigurationError) as exc:
+        report.write(f"Configuration error: {exc}\n")
+        return 2
+
+    if sessions_dir is not None:
+        root = Path(sessions_dir).expanduser()
+        root.mkdir(parents=True, exist_ok=True)
+        owner: Calculator | SessionManager = _create_sessions(cfg, root)
+        service = CalculatorService(sessions=owner, batch_size=batch_size)
+        lock, serving = HistoryLock(root / "sessions"), f"sessions in {root}"
+    else:
+        owner = _create_calculator(cfg, history_path)
+        service = CalculatorService(owner, batch_size)
+        lock, serving = HistoryLock(owner.history_path), str(owner.history_path)
+    previous_handlers = _install_signal_handlers()
+    try:
+        lock.acquire()
+        if cfg.auto_load and service.calc is not None:
+            try:
+                service.calc.auto_load_if_exists()
+            except Exception as exc:
+                report.write(f"Warning: Failed to load history: {exc}\n")
+
+        def ready(bound: ServiceAddress) -> None:
+            report.write(f"Serving {serving} on {bound}\n")
+            report.flush()
+
+        asyncio.run(service.serve(target, on_ready=ready))
+    except ServiceError as exc:
+        report.write(f"Error: {exc}\n")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _restore_signal_handlers(previous_handlers)
+        service.close()
+        owner.close()
+        lock.release()
+    return 0
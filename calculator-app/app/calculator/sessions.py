@@ -0,0 +1,205 @@
+"""Many calculator sessions in one process, within a fixed memory budget.
+
+``SessionManager.get(session, tenant)`` returns the session's calculator,
+creating it (or resuming it from disk) on first use. Sessions are kept in
+LRU order. Once more than ``max_sessions`` are live, or their histories
+hold more than ``max_rows`` rows, the least recently used sessions are
+evicted: their history is saved to the session's file and the calculator
+is dropped. The next ``get`` resumes it from that file. Undo/redo stacks
+and session variables do not survive eviction.
+
+History files are sharded per tenant and by a hash of the session id
+(``<root>/<tenant>/<2 hex digits>/<session>.hist``), so no directory grows
+past a few hundred files. They use the fixed-width ``records`` format, so
+a resume is one read of the file. They are not memory-mapped: each mapping
+keeps a file descriptor open, and a thousand live sessions would exhaust
+the default descriptor limit.
+
+Every session shares one operation factory, expression cache and
+execution strategy (a process or thread pool is started once, not per
+session), and logs through one ``SessionLogRouter`` handler into
+``<session>.log`` beside its history. With ``max_history_size`` set, rows a
+session evicts go to ``<session>_archive.csv`` unless ``history_eviction``
+is ``"drop"``.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.calculation.archive import EVICTION_POLICIES, HistoryArchive
+from app.calculation.expression import ExpressionCompiler
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory, HistorySnapshot
+from app.calculator.facade import Calculator
+from app.exceptions import ValidationError
+from app.observers import SessionLoggingObserver, SessionLogRouter
+from app.strategy import ExecutionStrategy, create_strategy
+
+DEFAULT_TENANT = "default"
+DEFAULT_MAX_SESSIONS = 1024
+DEFAULT_MAX_ROWS = 10_000_000
+DEFAULT_MAX_OPEN_LOGS = 64
+HISTORY_SUFFIX = ".hist"
+
+# Session and tenant ids become file and directory names.
+_SESSION_ID = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.-]{0,63}\Z")
+
+
+def _check_id(value: str, kind: str) -> str:
+    if not isinstance(value, str) or not _SESSION_ID.match(value):
+        raise ValidationError(
+            f"Invalid {kind} id: {value!r} (1-64 letters, digits, '_', '.' or '-', not starting with '.' or '-')"
+        )
+    return value
+
+
+@dataclass
+class SessionStats:
+    live: int = 0
+    rows: int = 0
+    created: int = 0
+    resumed: int = 0
+    evicted: int = 0
+    hits: int = 0
+
+
+@dataclass
+class _Session:
+    calc: Calculator
+    saved: HistorySnapshot
+    rows: int
+
+
+class SessionManager:
+    """Pools calculators by ``(tenant, session)`` and evicts idle ones to disk (see module docs).
+
+    Not thread-safe: call it from one thread, as ``CalculatorService`` does.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        max_history_size: int | None = None,
+        history_eviction: str = "archive",
+        max_undo_depth: int | None = 100,
+        strategy: ExecutionStrategy | None = None,
+        log_format: str = "text",
+        log_encoding: str = "utf-8",
+        max_open_logs: int = DEFAULT_MAX_OPEN_LOGS,
+    ) -> None:
+        if max_sessions < 1 or max_rows < 1:
+            raise ValueError("max_sessions and max_rows must be positive integers.")
+        if history_eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unsupported eviction policy: {history_eviction}")
+        self.root = Path(root)
+        self.max_sessions = max_sessions
+        self.max_rows = max_rows
+        self.max_history_size = max_history_size
+        self.history_eviction = history_eviction
+        self.max_undo_depth = max_undo_depth
+        self.factory = CalculationFactory()
+        self.expressions = ExpressionCompiler(self.factory)
+        self.strategy = strategy if strategy is not None else create_strategy()
+        self.router = SessionLogRouter(self._log_path, log_encoding, log_format, max_open_logs)
+        self._sessions: OrderedDict[tuple[str, str], _Session] = OrderedDict()
+        self._stats = SessionStats()
+
+    def history_path(self, session: str, tenant: str = DEFAULT_TENANT) -> Path:
+        _check_id(tenant, "tenant")
+        _check_id(session, "session")
+        shard = hashlib.blake2b(session.encode(), digest_size=1).hexdigest()
+        return self.root / tenant / shard / f"{session}{HISTORY_SUFFIX}"
+
+    def _log_path(self, key: str | None) -> Path:
+        if key is None:
+            return self.root / "sessions.log"
+        tenant, _, session = key.partition("/")
+        return self.history_path(session, tenant).with_suffix(".log")
+
+    def get(self, session: str, tenant: str = DEFAULT_TENANT) -> Calculator:
+        """The session's calculator, created or resumed from disk as needed."""
+        key = (tenant, session)
+        entry = self._sessions.get(key)
+        if entry is not None:
+            self._sessions.move_to_end(key)
+            self._stats.hits += 1
+            self._stats.rows += len(entry.calc.history) - entry.rows
+            entry.rows = len(entry.calc.history)
+        else:
+            entry = self._open(session, tenant)
+            self._sessions[key] = entry
+            self._stats.rows += entry.rows
+        self._enforce_budget(keep=key)
+        return entry.calc
+
+    def _open(self, session: str, tenant: str) -> _Session:
+        path = self.history_path(session, tenant)
+        archive = None
+        if self.max_history_size is not None and self.history_eviction == "archive":
+            archive = HistoryArchive(path.with_name(f"{session}_archive.csv"))
+        calc = Calculator(
+            factory=self.factory,
+            history=CalculationHistory(max_size=self.max_history_size, archive=archive, history_format="records"),
+            history_path=path,
+            strategy=self.strategy,
+            max_undo_depth=self.max_undo_depth,
+            expressions=self.expressions,
+        )
+        calc.attach(SessionLoggingObserver(self.router, f"{tenant}/{session}"))
+        if calc.auto_load_if_exists():
+            self._stats.resumed += 1
+        else:
+            self._stats.created += 1
+        return _Session(calc, calc.history.snapshot(), len(calc.history))
+
+    def _enforce_budget(self, keep: tuple[str, str]) -> None:
+        while len(self._sessions) > self.max_sessions or (
+            self._stats.rows > self.max_rows and len(self._sessions) > 1
+        ):
+            oldest = next(iter(self._sessions))
+            if oldest == keep:  # only the session in use is over budget
+                break
+            self._evict(oldest)
+
+    def _evict(self, key: tuple[str, str]) -> None:
+        entry = self._sessions.pop(key)
+        calc = entry.calc
+        calc.flush_events()
+        if calc.history.snapshot() != entry.saved:
+            calc.save()
+        # Not calc.close(): that would also stop the shared strategy.
+        self.router.close_session("/".join(key))
+        self._stats.rows -= entry.rows
+        self._stats.evicted += 1
+
+    def evict(self, session: str, tenant: str = DEFAULT_TENANT) -> bool:
+        """Save and drop a live session now. Returns False if it wasn't live."""
+        key = (tenant, session)
+        if key not in self._sessions:
+            return False
+        self._evict(key)
+        return True
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> SessionStats:
+        return SessionStats(**{**vars(self._stats), "live": len(self._sessions)})
+
+    def close(self) -> None:
+        """Save every live session and release the shared strategy and log files."""
+        for key in list(self._sessions):
+            self._evict(key)
+        close = getattr(self.strategy, "close", None)
+        if callable(close):
+            close()
+        self.router.close()
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
 from pathlib import Path
+from typing import Any
 
-from dotenv import load_dotenv
-
+from app.calculation.archive import EVICTION_POLICIES
+from app.calculation.formats import HISTORY_FORMATS, default_suffix
+from app.calculation.journal import AUTOSAVE_MODES
+from app.event_bus import BACKPRESSURE_POLICIES, OBSERVER_DISPATCH_MODES
 from app.exceptions import ConfigurationError
+from app.observers import LOG_FORMATS, LOG_ROTATE_INTERVALS
+from app.strategy import EXECUTION_STRATEGIES, RESULT_CACHE_POLICIES
 
 
-def _get_env_fallback(primary: str, fallback: str, default: str) -> str:
-    v = os.getenv(primary)
+def _get_env_fallback(env: Mapping[str, str], primary: str, fallback: str, default: str) -> str:
+    v = env.get(primary)
     if v is not None:
         return v
-    v2 = os.getenv(fallback)
+    v2 = env.get(fallback)
     if v2 is not None:
         return v2
     return default
@@ -35,6 +42,27 @@ def _parse_int(value: str, name: str) -> int:
         raise ConfigurationError(f"Invalid integer for {name}: {value!r}") from exc
 
 
+def _parse_positive_int(value: str, name: str) -> int:
+    n = _parse_int(value, name)
+    if n < 1:
+        raise ConfigurationError(f"{name} must be a positive integer: {value!r}")
+    return n
+
+
+def _parse_non_negative_int(value: str, name: str) -> int:
+    n = _parse_int(value, name)
+    if n < 0:
+        raise ConfigurationError(f"{name} must be >= 0: {value!r}")
+    return n
+
+
+def _parse_choice(value: str, name: str, choices: tuple[str, ...]) -> str:
+    v = value.strip().lower()
+    if v not in choices:
+        raise ConfigurationError(f"Invalid value for {name}: {value!r} (expected one of {', '.join(choices)})")
+    return v
+
+
 def _parse_float(value: str, name: str) -> float:
     try:
         return float(value.strip())
@@ -42,15 +70,70 @@ def _parse_float(value: str, name: str) -> float:
         raise ConfigurationError(f"Invalid float for {name}: {value!r}") from exc
 
 
+def _parse_non_negative_float(value: str, name: str) -> float:
+    f = _parse_float(value, name)
+    if f < 0:
+        raise ConfigurationError(f"{name} must be >= 0: {value!r}")
+    return f
+
+
+def _parse_positive_float(value: str, name: str) -> float:
+    f = _parse_float(value, name)
+    if not f > 0:
+        raise ConfigurationError(f"{name} must be > 0: {value!r}")
+    return f
+
+
+def _lazy_history_format(history_format: str, lazy_load: bool) -> str:
+    """Lazy loading memory-maps record files, so it implies that format unless one is set."""
+    return "records" if lazy_load and history_format == "auto" else history_format
+
+
+def _history_file_for_format(history_file: str, history_format: str) -> str:
+    """Swap the default .csv extension for the configured binary format's."""
+    suffix = default_suffix(history_format)
+    if suffix and Path(history_file).suffix.lower() == ".csv":
+        return str(Path(history_file).with_suffix(suffix))
+    return history_file
+
+
 @dataclass(frozen=True)
 class CalculatorConfig:
     history_dir: Path
     history_file: str
+    history_format: str
+    lazy_load: bool
     log_dir: Path
     log_file: str
+    log_format: str
+    log_buffer_size: int
+    log_max_bytes: int
+    log_backup_count: int
+    log_rotate_when: str
 
     max_history_size: int
+    max_undo_depth: int
+    history_eviction: str
+    history_archive_file: str
     auto_save: bool
+    autosave_mode: str
+    journal_compact_every: int
+    autosave_async: bool
+    autosave_delay: float
+    autosave_batch: int
+    execution_strategy: str
+    execution_workers: int
+    batch_chunk_size: int
+    result_cache: str
+    result_cache_size: int
+    result_cache_ttl: float
+    result_cache_file: str
+    result_cache_disk_size: int
+    observer_dispatch: str
+    observer_queue_size: int
+    observer_backpressure: str
+    max_sessions: int
+    max_session_rows: int
     auto_load: bool
     precision: int
     max_input_value: float
@@ -64,78 +147,247 @@ class CalculatorConfig:
     def log_path(self) -> Path:
         return self.log_dir / self.log_file
 
+    @property
+    def archive_path(self) -> Path:
+        return self.history_dir / self.history_archive_file
 
-def load_config() -> CalculatorConfig:
-    load_dotenv()
+    @property
+    def result_cache_path(self) -> Path | None:
+        """Shared on-disk result cache, or None when disabled."""
+        if not self.result_cache_file:
+            return None
+        return self.history_dir / Path(self.result_cache_file).expanduser()
+
+    def to_profile(self) -> dict[str, Any]:
+        """Plain, JSON-serializable values (paths as strings), e.g. for worker processes."""
+        profile = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            profile[f.name] = str(value) if isinstance(value, Path) else value
+        return profile
+
+    @classmethod
+    def from_profile(cls, profile: Mapping[str, Any]) -> CalculatorConfig:
+        """Rebuild a config from ``to_profile()`` output without parsing the environment again."""
+        names = {f.name for f in fields(cls)}
+        if set(profile) != names:
+            missing, unknown = sorted(names - set(profile)), sorted(set(profile) - names)
+            raise ConfigurationError(f"Invalid config profile (missing: {missing}, unknown: {unknown})")
+        values = dict(profile)
+        values["history_dir"] = Path(values["history_dir"])
+        values["log_dir"] = Path(values["log_dir"])
+        return cls(**values)
+
+
+_ENV_PREFIXES = ("CALCULATOR_", "CALC_")
+
+
+def parse_config(env: Mapping[str, str] | None = None) -> CalculatorConfig:
+    """Build a config from ``env`` (default: ``os.environ``); no caching, no ``.env``."""
+    env = os.environ if env is None else env
+
+    def get(name: str, default: str) -> str:
+        # PDF-style names (primary) with CALC_* backward-compatible fallbacks
+        return _get_env_fallback(env, f"CALCULATOR_{name}", f"CALC_{name}", default)
 
     # Legacy full-path override (used by existing tests)
-    legacy_history_path = os.getenv("CALC_HISTORY_PATH")
+    legacy_history_path = env.get("CALC_HISTORY_PATH")
     if legacy_history_path is not None:
         legacy_history_path = legacy_history_path.strip()
         if not legacy_history_path:
             raise ConfigurationError("CALC_HISTORY_PATH cannot be empty.")
-
         p = Path(legacy_history_path).expanduser()
-        return CalculatorConfig(
-            history_dir=p.parent,
-            history_file=p.name,
-            log_dir=Path(_get_env_fallback("CALCULATOR_LOG_DIR", "CALC_LOG_DIR", ".")).expanduser(),
-            log_file=(
-                _get_env_fallback("CALCULATOR_LOG_FILE", "CALC_LOG_FILE", "calculator.log").strip()
-                or "calculator.log"
-            ),
-            max_history_size=_parse_int(
-                _get_env_fallback("CALCULATOR_MAX_HISTORY_SIZE", "CALC_MAX_HISTORY_SIZE", "1000"),
-                "CALCULATOR_MAX_HISTORY_SIZE",
-            ),
-            auto_save=_parse_bool(_get_env_fallback("CALCULATOR_AUTO_SAVE", "CALC_AUTO_SAVE", "false")),
-            auto_load=_parse_bool(_get_env_fallback("CALCULATOR_AUTO_LOAD", "CALC_AUTO_LOAD", "true")),
-            precision=_parse_int(_get_env_fallback("CALCULATOR_PRECISION", "CALC_PRECISION", "6"), "CALCULATOR_PRECISION"),
-            max_input_value=_parse_float(
-                _get_env_fallback("CALCULATOR_MAX_INPUT_VALUE", "CALC_MAX_INPUT_VALUE", "1000000000"),
-                "CALCULATOR_MAX_INPUT_VALUE",
-            ),
-            default_encoding=(
-                _get_env_fallback("CALCULATOR_DEFAULT_ENCODING", "CALC_DEFAULT_ENCODING", "utf-8").strip()
-                or "utf-8"
-            ),
-        )
-
-    # PDF-style names (primary) with CALC_* backward-compatible fallbacks
-    history_dir_raw = _get_env_fallback("CALCULATOR_HISTORY_DIR", "CALC_HISTORY_DIR", ".")
-    history_file_raw = _get_env_fallback("CALCULATOR_HISTORY_FILE", "CALC_HISTORY_FILE", "history.csv")
-
-    log_dir_raw = _get_env_fallback("CALCULATOR_LOG_DIR", "CALC_LOG_DIR", ".")
-    log_file_raw = _get_env_fallback("CALCULATOR_LOG_FILE", "CALC_LOG_FILE", "calculator.log")
-
-    max_history_size_raw = _get_env_fallback("CALCULATOR_MAX_HISTORY_SIZE", "CALC_MAX_HISTORY_SIZE", "1000")
-    auto_save_raw = _get_env_fallback("CALCULATOR_AUTO_SAVE", "CALC_AUTO_SAVE", "false")
-    auto_load_raw = _get_env_fallback("CALCULATOR_AUTO_LOAD", "CALC_AUTO_LOAD", "true")
-
-    precision_raw = _get_env_fallback("CALCULATOR_PRECISION", "CALC_PRECISION", "6")
-    max_input_raw = _get_env_fallback("CALCULATOR_MAX_INPUT_VALUE", "CALC_MAX_INPUT_VALUE", "1000000000")
-    encoding_raw = _get_env_fallback("CALCULATOR_DEFAULT_ENCODING", "CALC_DEFAULT_ENCODING", "utf-8")
-
-    history_dir = Path(history_dir_raw).expanduser()
-    log_dir = Path(log_dir_raw).expanduser()
-
-    history_file = history_file_raw.strip()
-    log_file = log_file_raw.strip()
-
-    if not history_file:
-        raise ConfigurationError("CALCULATOR_HISTORY_FILE cannot be empty.")
+        history_dir, history_file = p.parent, p.name
+    else:
+        history_dir = Path(get("HISTORY_DIR", ".")).expanduser()
+        history_file = get("HISTORY_FILE", "history.csv").strip()
+        if not history_file:
+            raise ConfigurationError("CALCULATOR_HISTORY_FILE cannot be empty.")
+
+    log_file = get("LOG_FILE", "calculator.log").strip()
+    archive_file = get("HISTORY_ARCHIVE_FILE", "history_archive.csv").strip()
+    if legacy_history_path is not None:
+        # The legacy override has always fallen back to the defaults here.
+        log_file = log_file or "calculator.log"
+        archive_file = archive_file or "history_archive.csv"
     if not log_file:
         raise ConfigurationError("CALCULATOR_LOG_FILE cannot be empty.")
+    if not archive_file:
+        raise ConfigurationError("CALCULATOR_HISTORY_ARCHIVE_FILE cannot be empty.")
+
+    lazy_load = _parse_bool(get("HISTORY_LAZY_LOAD", "false"))
+    history_format = _lazy_history_format(
+        _parse_choice(get("HISTORY_FORMAT", "auto"), "CALCULATOR_HISTORY_FORMAT", HISTORY_FORMATS), lazy_load
+    )
 
     return CalculatorConfig(
         history_dir=history_dir,
-        history_file=history_file,
-        log_dir=log_dir,
+        history_file=_history_file_for_format(history_file, history_format),
+        history_format=history_format,
+        lazy_load=lazy_load,
+        log_dir=Path(get("LOG_DIR", ".")).expanduser(),
         log_file=log_file,
-        max_history_size=_parse_int(max_history_size_raw, "CALCULATOR_MAX_HISTORY_SIZE"),
-        auto_save=_parse_bool(auto_save_raw),
-        auto_load=_parse_bool(auto_load_raw),
-        precision=_parse_int(precision_raw, "CALCULATOR_PRECISION"),
-        max_input_value=_parse_float(max_input_raw, "CALCULATOR_MAX_INPUT_VALUE"),
-        default_encoding=encoding_raw.strip() or "utf-8",
-    )
\ No newline at end of file
+        log_format=_parse_choice(get("LOG_FORMAT", "text"), "CALCULATOR_LOG_FORMAT", LOG_FORMATS),
+        log_buffer_size=_parse_non_negative_int(get("LOG_BUFFER_SIZE", "0"), "CALCULATOR_LOG_BUFFER_SIZE"),
+        log_max_bytes=_parse_non_negative_int(get("LOG_MAX_BYTES", "10485760"), "CALCULATOR_LOG_MAX_BYTES"),
+        log_backup_count=_parse_non_negative_int(get("LOG_BACKUP_COUNT", "5"), "CALCULATOR_LOG_BACKUP_COUNT"),
+        log_rotate_when=_parse_choice(
+            get("LOG_ROTATE_WHEN", ""), "CALCULATOR_LOG_ROTATE_WHEN", LOG_ROTATE_INTERVALS
+        ),
+        max_history_size=_parse_positive_int(get("MAX_HISTORY_SIZE", "1000"), "CALCULATOR_MAX_HISTORY_SIZE"),
+        max_undo_depth=_parse_positive_int(get("MAX_UNDO_DEPTH", "100"), "CALCULATOR_MAX_UNDO_DEPTH"),
+        history_eviction=_parse_choice(
+            get("HISTORY_EVICTION", "archive"), "CALCULATOR_HISTORY_EVICTION", EVICTION_POLICIES
+        ),
+        history_archive_file=archive_file,
+        auto_save=_parse_bool(get("AUTO_SAVE", "false")),
+        autosave_mode=_parse_choice(
+            get("AUTO_SAVE_MODE", "snapshot"), "CALCULATOR_AUTO_SAVE_MODE", AUTOSAVE_MODES
+        ),
+        journal_compact_every=_parse_positive_int(
+            get("JOURNAL_COMPACT_EVERY", "1000"), "CALCULATOR_JOURNAL_COMPACT_EVERY"
+        ),
+        autosave_async=_parse_bool(get("AUTO_SAVE_ASYNC", "false")),
+        autosave_delay=_parse_non_negative_float(get("AUTO_SAVE_DELAY", "0.5"), "CALCULATOR_AUTO_SAVE_DELAY"),
+        autosave_batch=_parse_positive_int(get("AUTO_SAVE_BATCH", "100"), "CALCULATOR_AUTO_SAVE_BATCH"),
+        execution_strategy=_parse_choice(
+            get("EXECUTION_STRATEGY", "direct"), "CALCULATOR_EXECUTION_STRATEGY", EXECUTION_STRATEGIES
+        ),
+        execution_workers=_parse_non_negative_int(get("EXECUTION_WORKERS", "0"), "CALCULATOR_EXECUTION_WORKERS"),
+        batch_chunk_size=_parse_positive_int(get("BATCH_CHUNK_SIZE", "262144"), "CALCULATOR_BATCH_CHUNK_SIZE"),
+        result_cache=_parse_choice(get("RESULT_CACHE", "off"), "CALCULATOR_RESULT_CACHE", RESULT_CACHE_POLICIES),
+        result_cache_size=_parse_positive_int(get("RESULT_CACHE_SIZE", "4096"), "CALCULATOR_RESULT_CACHE_SIZE"),
+        result_cache_ttl=_parse_positive_float(get("RESULT_CACHE_TTL", "300"), "CALCULATOR_RESULT_CACHE_TTL"),
+        result_cache_file=get("RESULT_CACHE_FILE", "").strip(),
+        result_cache_disk_size=_parse_positive_int(
+            get("RESULT_CACHE_DISK_SIZE", "1000000"), "CALCULATOR_RESULT_CACHE_DISK_SIZE"
+        ),
+        observer_dispatch=_parse_choice(
+            get("OBSERVER_DISPATCH", "sync"), "CALCULATOR_OBSERVER_DISPATCH", OBSERVER_DISPATCH_MODES
+        ),
+        observer_queue_size=_parse_positive_int(
+            get("OBSERVER_QUEUE_SIZE", "1024"), "CALCULATOR_OBSERVER_QUEUE_SIZE"
+        ),
+        observer_backpressure=_parse_choice(
+            get("OBSERVER_BACKPRESSURE", "block"), "CALCULATOR_OBSERVER_BACKPRESSURE", BACKPRESSURE_POLICIES
+        ),
+        max_sessions=_parse_positive_int(get("MAX_SESSIONS", "1024"), "CALCULATOR_MAX_SESSIONS"),
+        max_session_rows=_parse_positive_int(get("MAX_SESSION_ROWS", "10000000"), "CALCULATOR_MAX_SESSION_ROWS"),
+        auto_load=_parse_bool(get("AUTO_LOAD", "true")),
+        precision=_parse_int(get("PRECISION", "6"), "CALCULATOR_PRECISION"),
+        max_input_value=_parse_float(get("MAX_INPUT_VALUE", "1000000000"), "CALCULATOR_MAX_INPUT_VALUE"),
+        default_encoding=get("DEFAULT_ENCODING", "utf-8").strip() or "utf-8",
+    )
+
+
+class _DotEnv:
+    """The nearest ``.env`` at or above this package, where ``load_dotenv()`` looks.
+
+    The file is found once and read again only when its mtime changes. Like
+    ``load_dotenv()`` it never overrides variables set in the environment,
+    but values it set itself are updated (or removed) when the file changes.
+    python-dotenv is only imported when there is such a file, keeping it off
+    the startup path otherwise.
+    """
+
+    def __init__(self) -> None:
+        self.origin: str | None = None
+        self.path: Path | None = None
+        self.mtime_ns: int | None = None
+        self.applied: dict[str, str] = {}
+
+    def _find(self) -> Path | None:
+        here = Path(__file__).resolve().parent
+        for directory in (here, *here.parents):
+            candidate = directory / ".env"
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def refresh(self, rescan: bool = False) -> int | None:
+        """Apply the file if it changed; returns its mtime, part of the cache key."""
+        if rescan or self.origin != __file__:
+            self._apply({})
+            self.origin, self.path, self.mtime_ns = __file__, self._find(), None
+        if self.path is None:
+            return None
+        try:
+            mtime_ns = self.path.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns != self.mtime_ns:
+            self.mtime_ns = mtime_ns
+            self._apply({} if mtime_ns is None else self._read())
+        return mtime_ns
+
+    def _read(self) -> dict[str, str]:
+        from dotenv import dotenv_values
+
+        return {key: value for key, value in dotenv_values(self.path).items() if value is not None}
+
+    def _apply(self, values: dict[str, str]) -> None:
+        previous, self.applied = self.applied, {}
+        for key, value in previous.items():
+            if key not in values and os.environ.get(key) == value:
+                del os.environ[key]
+        for key, value in values.items():
+            current = os.environ.get(key)
+            if current is None or previous.get(key) == current:
+                os.environ[key] = value
+                self.applied[key] = value
+
+
+_dotenv = _DotEnv()
+_lock = threading.Lock()
+_cached: tuple[tuple, CalculatorConfig] | None = None
+_pinned: CalculatorConfig | None = None
+
+
+def _fingerprint(rescan: bool = False) -> tuple:
+    mtime_ns = _dotenv.refresh(rescan)
+    return mtime_ns, tuple(item for item in os.environ.items() if item[0].startswith(_ENV_PREFIXES))
+
+
+def load_config() -> CalculatorConfig:
+    """The current config, parsed once and cached.
+
+    A call re-parses only when a ``CALCULATOR_*``/``CALC_*`` variable or the
+    ``.env`` file's mtime changed since the cached parse; otherwise it costs
+    one ``stat`` and a scan of the environment. ``reload_config()`` forces a
+    fresh parse, and a worker given a profile by ``use_profile()`` skips
+    parsing altogether.
+    """
+    global _cached
+    with _lock:
+        if _pinned is not None:
+            return _pinned
+        key = _fingerprint()
+        if _cached is not None and _cached[0] == key:
+            return _cached[1]
+        config = parse_config()
+        _cached = (key, config)
+        return config
+
+
+def reload_config() -> CalculatorConfig:
+    """Drop the cached config (and any profile in use), look for ``.env`` again and re-parse."""
+    global _cached, _pinned
+    with _lock:
+        _cached, _pinned = None, None
+        key = _fingerprint(rescan=True)
+        config = parse_config()
+        _cached = (key, config)
+        return config
+
+
+def use_profile(profile: Mapping[str, Any]) -> CalculatorConfig:
+    """Make ``load_config()`` return the config from ``profile`` until ``reload_config()``.
+
+    Used as a process-pool initializer, so workers share the parent's config
+    without reading ``.env`` or the environment.
+    """
+    global _pinned
+    config = CalculatorConfig.from_profile(profile)
+    with _lock:
+        _pinned = config
+    return config
@@ -1,8 +1,60 @@
 from __future__ import annotations
 
-from app.calculator.cli import run_repl
+import argparse
+
+from app.calculator.cli import BATCH_SIZE, run_batch_file, run_repl
+
+__all__ = ["main", "run_repl"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.calculator_repl", description="Command-line calculator.")
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="run commands from FILE ('-' for stdin) without prompts and exit",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE, help="arithmetic commands per vectorized batch"
+    )
+    parser.add_argument("--history", metavar="PATH", help="history file (overrides configuration)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--serve",
+        metavar="ADDRESS",
+        help="keep one calculator running and serve it on a Unix socket path or http://127.0.0.1:PORT",
+    )
+    mode.add_argument("--connect", metavar="ADDRESS", help="run commands on a calculator started with --serve")
+    parser.add_argument(
+        "--sessions",
+        metavar="DIR",
+        help="with --serve: one calculator per client session, histories sharded under DIR",
+    )
+    args = parser.parse_args(argv)
+    if args.sessions is not None and (args.serve is None or args.history is not None):
+        parser.error("--sessions needs --serve and replaces --history")
+
+    # The service modules are imported only when used, keeping them off the startup path.
+    if args.serve is not None:
+        from app.calculator.service import run_service
+
+        return run_service(
+            args.serve, history_path=args.history, batch_size=max(1, args.batch_size), sessions_dir=args.sessions
+        )
+    if args.connect is not None:
+        if args.history is not None:
+            parser.error("--history belongs to the service; it cannot be combined with --connect")
+        from app.calculator.client import run_remote_batch, run_remote_repl
+
+        if args.batch is not None:
+            return run_remote_batch(args.batch, args.connect)
+        return run_remote_repl(args.connect)
+
+    if args.batch is not None:
+        return run_batch_file(args.batch, history_path=args.history, batch_size=max(1, args.batch_size))
+    run_repl(history_path=args.history)
+    return 0
 
-__all__ = ["run_repl"]
 
 if __name__ == "__main__":
-    run_repl()
\ No newline at end of file
+    raise SystemExit(main())
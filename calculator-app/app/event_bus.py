@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any
+
+from app.observers import Observer
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "coalesce")
+OBSERVER_DISPATCH_MODES = ("sync", "async")
+DEFAULT_EVENT_QUEUE_SIZE = 1024
+
+# (event, payload, perf_counter() when published)
+_Queued = tuple[str, dict[str, Any], float]
+# (delivered, errors, last error, total latency, max latency) of one delivery
+_Delivery = tuple[int, int, "Exception | None", float, float]
+
+
+@dataclass(frozen=True)
+class EventBusStats:
+    published: int
+    delivered: int
+    dropped: int
+    coalesced: int
+    errors: int
+    depth: int  # events queued right now, across observers
+    max_depth: int
+    mean_latency: float  # seconds from publish to delivery
+    max_latency: float
+
+
+class _Subscription:
+    """One observer's bounded queue and its backpressure policy."""
+
+    __slots__ = ("observer", "policy", "maxsize", "queue", "batch", "dropped", "coalesced")
+
+    def __init__(self, observer: Observer, policy: str, maxsize: int) -> None:
+        self.observer = observer
+        self.policy = policy
+        self.maxsize = maxsize
+        # Coalescing keeps only the newest payload per event name
+        self.queue: deque[_Queued] | OrderedDict[str, _Queued] = (
+            OrderedDict() if policy == "coalesce" else deque()
+        )
+        self.batch = callable(getattr(observer, "update_batch", None))
+        self.dropped = 0
+        self.coalesced = 0
+
+    def full(self) -> bool:
+        return len(self.queue) >= self.maxsize
+
+    def push(self, item: _Queued) -> int:
+        """Queue ``item``; returns the change in queue length."""
+        queue = self.queue
+        if isinstance(queue, OrderedDict):
+            if item[0] in queue:
+                del queue[item[0]]
+                queue[item[0]] = item
+                self.coalesced += 1
+                return 0
+            grew = 1
+            if len(queue) >= self.maxsize:
+                queue.popitem(last=False)
+                self.dropped += 1
+                grew = 0
+            queue[item[0]] = item
+            return grew
+        if self.policy == "drop_oldest" and len(queue) >= self.maxsize:
+            queue.popleft()
+            self.dropped += 1
+            queue.append(item)
+            return 0
+        queue.append(item)  # "block" waits for room before pushing
+        return 1
+
+    def take(self) -> list[_Queued]:
+        items = list(self.queue.values()) if isinstance(self.queue, OrderedDict) else list(self.queue)
+        self.queue.clear()
+        return items
+
+
+class ObserverBus:
+    """Delivers events to observers from a worker thread instead of the caller.
+
+    Each subscribed observer has its own bounded queue. When it is full,
+    ``block`` makes the publisher wait, ``drop_oldest`` discards the oldest
+    queued event and ``coalesce`` keeps only the newest payload per event
+    name (a save after the last change covers the earlier ones). Observers
+    with an ``update_batch(events)`` method receive everything queued for
+    them in one call. ``flush()`` blocks until every published event has
+    been delivered; ``close()`` flushes, stops the worker, closes the
+    observers and also runs at interpreter shutdown.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_EVENT_QUEUE_SIZE, policy: str = "block") -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unsupported backpressure policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+
+        self.published = 0
+        self.delivered = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.last_error: Exception | None = None
+        self._latency_total = 0.0
+        self._max_latency = 0.0
+
+        self._cond = threading.Condition()
+        self._subscriptions: list[_Subscription] = []
+        self._depth = 0
+        self._delivering = False
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    @property
+    def observers(self) -> list[Observer]:
+        return [sub.observer for sub in self._subscriptions]
+
+    def subscribe(self, observer: Observer, policy: str | None = None, maxsize: int | None = None) -> None:
+        policy = policy or self.policy
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unsupported backpressure policy: {policy}")
+        with self._cond:
+            self._subscriptions.append(_Subscription(observer, policy, maxsize or self.maxsize))
+
+    def update(self, event: str, payload: dict[str, Any]) -> None:
+        self.publish(event, payload)
+
+    def publish(self, event: str, payload: dict[str, Any]) -> None:
+        item = (event, payload, time.perf_counter())
+        with self._cond:
+            if self._closed:
+                self.published += 1
+                subscriptions = list(self._subscriptions)
+            else:
+                subscriptions = None
+                self._enqueue(item)
+        if subscriptions is not None:
+            # After close there's no worker: deliver in the caller, like sync dispatch
+            delivery = self._deliver([(sub, [item]) for sub in subscriptions])
+            with self._cond:
+                self._record(delivery)
+
+    def _enqueue(self, item: _Queued) -> None:
+        # Observers publish too (autosave reports history_saved); the worker must never wait on itself.
+        on_worker = threading.current_thread() is self._thread
+        self.published += 1
+        for sub in self._subscriptions:
+            if sub.policy == "block" and not on_worker:
+                while sub.full() and not self._closed:
+                    self._cond.wait()
+            self._depth += sub.push(item)
+        self.max_depth = max(self.max_depth, self._depth)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="calculator-events", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        self._cond.notify_all()
+
+    def _run(self) -> None:
+        with self._cond:
+            while True:
+                while not self._depth and not self._closed:
+                    self._cond.wait()
+                if not self._depth:
+                    return
+                work = [(sub, sub.take()) for sub in self._subscriptions if sub.queue]
+                self._depth = 0
+                self._delivering = True
+                self._cond.notify_all()  # wake publishers blocked on a full queue
+                self._cond.release()
+                delivery = None
+                try:
+                    delivery = self._deliver(work)
+                finally:
+                    self._cond.acquire()
+                    if delivery is not None:
+                        self._record(delivery)
+                    self._delivering = False
+                    self._cond.notify_all()
+
+    def _deliver(self, work: list[tuple[_Subscription, list[_Queued]]]) -> _Delivery:
+        """Hand ``work`` to the observers, without the lock; returns the counts for ``_record``."""
+        delivered = errors = 0
+        last_error = None
+        latency_total = max_latency = 0.0
+        for sub, items in work:
+            try:
+                if sub.batch:
+                    sub.observer.update_batch([(event, payload) for event, payload, _ in items])
+                else:
+                    for event, payload, _ in items:
+                        sub.observer.update(event, payload)
+            except Exception as exc:  # keep the worker alive; surface via last_error
+                errors += 1
+                last_error = exc
+                logging.getLogger("calculator").exception("Observer %r failed", sub.observer)
+            now = time.perf_counter()
+            for _, _, published_at in items:
+                latency = now - published_at
+                latency_total += latency
+                max_latency = max(max_latency, latency)
+            delivered += len(items)
+        return delivered, errors, last_error, latency_total, max_latency
+
+    def _record(self, delivery: _Delivery) -> None:
+        """Add a delivery's counts to the bus totals; call with ``_cond`` held."""
+        delivered, errors, last_error, latency_total, max_latency = delivery
+        self.delivered += delivered
+        self.errors += errors
+        if last_error is not None:
+            self.last_error = last_error
+        self._latency_total += latency_total
+        self._max_latency = max(self._max_latency, max_latency)
+
+    def flush(self) -> None:
+        with self._cond:
+            if self._thread is None or threading.current_thread() is self._thread:
+                return
+            while self._depth or self._delivering:
+                self._cond.wait()
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+            atexit.unregister(self.close)
+        for observer in self.observers:
+            close = getattr(observer, "close", None)
+            if callable(close):
+                close()
+
+    def stats(self) -> EventBusStats:
+        with self._cond:
+            subscriptions = self._subscriptions
+            return EventBusStats(
+                published=self.published,
+                delivered=self.delivered,
+                dropped=sum(sub.dropped for sub in subscriptions),
+                coalesced=sum(sub.coalesced for sub in subscriptions),
+                errors=self.errors,
+                depth=self._depth,
+                max_depth=self.max_depth,
+                mean_latency=self._latency_total / self.delivered if self.delivered else 0.0,
+                max_latency=self._max_latency,
+            )
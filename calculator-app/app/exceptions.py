@@ -11,4 +11,8 @@ class ValidationError(CalculatorError):
 
 
 class UnknownOperationError(CalculatorError):
-    """Raised when a requested operation is unsupported."""
\ No newline at end of file
+    """Raised when a requested operation is unsupported."""
+
+
+class ServiceError(CalculatorError):
+    """Raised when the calculator service cannot start or be reached."""
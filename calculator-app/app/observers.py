@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+import atexit
+import json
 import logging
+import logging.handlers
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Callable, Protocol
 
@@ -11,7 +18,151 @@ class Observer(Protocol):
         ...
 
 
-def _get_file_logger(log_file: Path, encoding: str = "utf-8") -> logging.Logger:
+LOG_FORMATS = ("text", "json")
+# TimedRotatingFileHandler intervals; "" turns time-based rotation off
+LOG_ROTATE_INTERVALS = ("", "s", "m", "h", "d", "midnight") + tuple(f"w{day}" for day in range(7))
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 5
+
+# One handler per resolved log file, shared by every observer writing to it
+_FILE_HANDLERS: dict[str, logging.Handler] = {}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line: time, level, event and the event payload's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="microseconds"),
+            "level": record.levelname,
+        }
+        event = getattr(record, "event", None)
+        if event is not None:
+            entry["event"] = event
+            entry.update(record.payload)
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredFlush:
+    """Leaves records in the file's write buffer until ``capacity`` are pending.
+
+    ``StreamHandler.emit`` flushes after every record; this skips those
+    flushes (one write syscall each) except for warnings and errors.
+    Explicit ``flush()`` calls and closing still write everything out.
+    """
+
+    capacity = 1
+    _pending = 0
+    _deferring = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._deferring = record.levelno < logging.WARNING
+        try:
+            super().emit(record)
+        finally:
+            self._deferring = False
+
+    def flush(self) -> None:
+        if self._deferring:
+            self._pending += 1
+            if self._pending < self.capacity:
+                return
+        self._pending = 0
+        super().flush()
+
+
+class BufferedFileHandler(_DeferredFlush, logging.FileHandler):
+    pass
+
+
+class BufferedRotatingFileHandler(_DeferredFlush, logging.handlers.RotatingFileHandler):
+    _size: int | None = None
+    # The record being emitted and its text, formatted once for both the
+    # rollover check and the write
+    _formatted: tuple[logging.LogRecord, str] | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            super().emit(record)
+        finally:
+            self._formatted = None
+
+    def format(self, record: logging.LogRecord) -> str:
+        formatted = self._formatted
+        if formatted is not None and formatted[0] is record:
+            return formatted[1]
+        return super().format(record)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        # The base class seeks to the end of the file for every record,
+        # which flushes the buffer; count the bytes written instead.
+        if self.stream is None:
+            self.stream = self._open()
+        if self._size is None:
+            self._size = self.stream.seek(0, 2)
+        msg = self.format(record)
+        self._formatted = (record, msg)
+        length = len((msg + self.terminator).encode(self.stream.encoding, self.stream.errors or "strict"))
+        if self._size + length >= self.maxBytes:
+            self._size = length  # the record goes to the fresh file
+            return True
+        self._size += length
+        return False
+
+
+class BufferedTimedRotatingFileHandler(_DeferredFlush, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+def _file_handler(
+    log_file: Path,
+    encoding: str,
+    log_format: str,
+    buffer_size: int,
+    max_bytes: int,
+    backup_count: int,
+    rotate_when: str,
+) -> logging.Handler:
+    handler: logging.FileHandler
+    if rotate_when:
+        handler = (BufferedTimedRotatingFileHandler if buffer_size else logging.handlers.TimedRotatingFileHandler)(
+            log_file, when=rotate_when, backupCount=backup_count, encoding=encoding
+        )
+    elif max_bytes:
+        handler = (BufferedRotatingFileHandler if buffer_size else logging.handlers.RotatingFileHandler)(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding
+        )
+    else:
+        handler = (BufferedFileHandler if buffer_size else logging.FileHandler)(log_file, encoding=encoding)
+    if buffer_size:
+        handler.capacity = buffer_size
+    if log_format == "json":
+        handler.setFormatter(JsonLinesFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    return handler
+
+
+def _get_file_logger(
+    log_file: Path,
+    encoding: str = "utf-8",
+    log_format: str = "text",
+    buffer_size: int = 0,
+    max_bytes: int = 0,
+    backup_count: int = DEFAULT_LOG_BACKUP_COUNT,
+    rotate_when: str = "",
+) -> tuple[logging.Logger, logging.Handler]:
+    """The shared ``calculator`` logger and the handler writing ``log_file``.
+
+    The handler is created on first use of a file (later options for the
+    same file are ignored): rotating by time if ``rotate_when`` is set, else
+    by size if ``max_bytes`` is, and flushing ``buffer_size`` records at a
+    time (warnings and errors at once) when ``buffer_size`` > 0.
+    """
     logger = logging.getLogger("calculator")
     logger.setLevel(logging.INFO)
 
@@ -20,19 +171,13 @@ def _get_file_logger(log_file: Path, encoding: str = "utf-8") -> logging.Logger:
 
     # Avoid duplicate handlers if create_default() is called multiple times in tests
     handler_key = str(log_file.resolve())
-    existing = getattr(logger, "_calculator_handler_keys", set())
+    handler = _FILE_HANDLERS.get(handler_key)
+    if handler is None:
+        handler = _file_handler(log_file, encoding, log_format, buffer_size, max_bytes, backup_count, rotate_when)
+        logger.addHandler(handler)
+        _FILE_HANDLERS[handler_key] = handler
 
-    if handler_key not in existing:
-        fh = logging.FileHandler(log_file, encoding=encoding)
-        fmt = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
-        fh.setFormatter(fmt)
-        logger.addHandler(fh)
-
-        existing = set(existing)
-        existing.add(handler_key)
-        setattr(logger, "_calculator_handler_keys", existing)
-
-    return logger
+    return logger, handler
 
 
 @dataclass
@@ -45,20 +190,166 @@ class InMemoryLoggerObserver:
 
 @dataclass
 class LoggingObserver:
+    """Writes events to ``log_file`` as text lines or, with ``log_format="json"``, JSON lines.
+
+    The logger and file handler are resolved on the first event and reused.
+    See ``_get_file_logger`` for buffering and rotation.
+    """
+
     log_file: Path
     encoding: str = "utf-8"
+    log_format: str = "text"
+    buffer_size: int = 0
+    max_bytes: int = 0
+    backup_count: int = DEFAULT_LOG_BACKUP_COUNT
+    rotate_when: str = ""
+    _logger: logging.Logger | None = field(default=None, init=False, repr=False, compare=False)
+    _handler: logging.Handler | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.log_format not in LOG_FORMATS:
+            raise ValueError(f"Unsupported log format: {self.log_format}")
+        if self.rotate_when.lower() not in LOG_ROTATE_INTERVALS:
+            raise ValueError(f"Unsupported log rotation interval: {self.rotate_when}")
+        if self.buffer_size < 0 or self.max_bytes < 0 or self.backup_count < 0:
+            raise ValueError("buffer_size, max_bytes and backup_count must be >= 0.")
+
+    def _open(self) -> logging.Logger:
+        self._logger, self._handler = _get_file_logger(
+            self.log_file,
+            self.encoding,
+            self.log_format,
+            self.buffer_size,
+            self.max_bytes,
+            self.backup_count,
+            self.rotate_when,
+        )
+        return self._logger
 
     def update(self, event: str, payload: dict[str, Any]) -> None:
-        logger = _get_file_logger(self.log_file, self.encoding)
+        self._log(self._logger or self._open(), event, payload)
 
+    def update_batch(self, events: list[tuple[str, dict[str, Any]]]) -> None:
+        """Log a batch of queued events (see ``ObserverBus``)."""
+        logger = self._logger or self._open()
+        for event, payload in events:
+            self._log(logger, event, payload)
+
+    @staticmethod
+    def _log(logger: logging.Logger, event: str, payload: dict[str, Any], session: str | None = None) -> None:
+        extra = {"event": event, "payload": payload, "session": session}
         if event == "calculation_added":
             op = payload.get("operation")
             a = payload.get("a")
             b = payload.get("b")
             result = payload.get("result")
-            logger.info("calc op=%s a=%s b=%s result=%s", op, a, b, result)
+            logger.info("calc op=%s a=%s b=%s result=%s", op, a, b, result, extra=extra)
         else:
-            logger.info("%s %s", event, payload)
+            logger.info("%s %s", event, payload, extra=extra)
+
+    def flush(self) -> None:
+        """Write out buffered records."""
+        if self._handler is not None:
+            self._handler.flush()
+
+    def close(self) -> None:
+        # The handler may be shared with other observers of the same file; it
+        # is closed by logging.shutdown() at exit.
+        self.flush()
+
+
+class SessionLogRouter(logging.Handler):
+    """One handler for many sessions, writing each record to its session's log file.
+
+    Records carry a ``session`` attribute (see ``SessionLoggingObserver``);
+    ``path_for(session)`` names the file. At most ``max_open`` files are open
+    at once: the least recently written is closed to make room, and reopened
+    in append mode when its session logs again. Records without a session go
+    to ``path_for(None)``.
+    """
+
+    def __init__(
+        self,
+        path_for: Callable[[str | None], Path],
+        encoding: str = "utf-8",
+        log_format: str = "text",
+        max_open: int = 64,
+    ) -> None:
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Unsupported log format: {log_format}")
+        if max_open < 1:
+            raise ValueError("max_open must be a positive integer.")
+        super().__init__(logging.INFO)
+        self.path_for = path_for
+        self.encoding = encoding
+        self.max_open = max_open
+        self._streams: OrderedDict[str | None, Any] = OrderedDict()
+        self.opened = 0
+        if log_format == "json":
+            self.setFormatter(JsonLinesFormatter())
+        else:
+            self.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        # Private, not registered with logging: records never reach the
+        # "calculator" logger's files, nor another router's sessions.
+        self.logger = logging.Logger("calculator.sessions", logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(self)
+
+    def _stream(self, session: str | None) -> Any:
+        stream = self._streams.get(session)
+        if stream is not None:
+            self._streams.move_to_end(session)
+            return stream
+        if len(self._streams) >= self.max_open:
+            _, oldest = self._streams.popitem(last=False)
+            oldest.close()
+        path = self.path_for(session)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stream = self._streams[session] = open(path, "a", encoding=self.encoding)
+        self.opened += 1
+        return stream
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            stream = self._stream(getattr(record, "session", None))
+            stream.write(self.format(record) + "\n")
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close_session(self, session: str | None) -> None:
+        """Close ``session``'s file, e.g. when the session is evicted."""
+        with self.lock:
+            stream = self._streams.pop(session, None)
+            if stream is not None:
+                stream.close()
+
+    def close(self) -> None:
+        with self.lock:
+            for stream in self._streams.values():
+                stream.close()
+            self._streams.clear()
+        super().close()
+
+
+@dataclass
+class SessionLoggingObserver:
+    """Logs one session's events through a shared ``SessionLogRouter``; no handler of its own."""
+
+    router: SessionLogRouter
+    session: str
+
+    def update(self, event: str, payload: dict[str, Any]) -> None:
+        LoggingObserver._log(self.router.logger, event, payload, self.session)
+
+    def update_batch(self, events: list[tuple[str, dict[str, Any]]]) -> None:
+        for event, payload in events:
+            LoggingObserver._log(self.router.logger, event, payload, self.session)
+
+
+AUTOSAVE_EVENTS = frozenset(
+    {"calculation_added", "calculations_added", "history_cleared", "history_loaded", "undo", "redo"}
+)
 
 
 @dataclass
@@ -66,9 +357,105 @@ class AutoSaveObserver:
     save_func: Callable[[], None]
 
     def update(self, event: str, payload: dict[str, Any]) -> None:
-        if event in {"calculation_added", "history_cleared", "history_loaded", "undo", "redo"}:
+        if event in AUTOSAVE_EVENTS:
             self.save_func()
 
 
+class BackgroundAutoSaveObserver:
+    """Autosave on a worker thread, coalescing bursts of events into one save.
+
+    A save runs once ``delay`` seconds have passed since the first unsaved
+    event, or as soon as ``max_batch`` events are pending. ``flush()`` blocks
+    until everything seen so far is saved; ``close()`` flushes and stops the
+    worker and also runs at interpreter shutdown.
+    """
+
+    def __init__(self, save_func: Callable[[], None], delay: float = 0.5, max_batch: int = 100) -> None:
+        if delay < 0:
+            raise ValueError("delay must be >= 0.")
+        if max_batch < 1:
+            raise ValueError("max_batch must be a positive integer.")
+        self.save_func = save_func
+        self.delay = delay
+        self.max_batch = max_batch
+
+        self.events = 0
+        self.saves = 0
+        self.last_error: Exception | None = None
+
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._first_pending_at = 0.0
+        self._saving = False
+        self._flushing = False
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+    def update(self, event: str, payload: dict[str, Any]) -> None:
+        if event not in AUTOSAVE_EVENTS:
+            return
+        with self._cond:
+            if self._closed:
+                return
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending += 1
+            self.events += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="calculator-autosave", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self._cond.notify_all()
+
+    def _due(self) -> bool:
+        if self._closed or self._flushing or self._pending >= self.max_batch:
+            return True
+        return time.monotonic() - self._first_pending_at >= self.delay
+
+    def _run(self) -> None:
+        with self._cond:
+            while True:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                while not self._due():
+                    self._cond.wait(self._first_pending_at + self.delay - time.monotonic())
+
+                self._pending = 0
+                self._saving = True
+                self._cond.release()
+                try:
+                    self.save_func()
+                    self.saves += 1
+                except Exception as exc:  # keep the worker alive; surface via last_error
+                    self.last_error = exc
+                    logging.getLogger("calculator").exception("Background autosave failed")
+                finally:
+                    self._cond.acquire()
+                    self._saving = False
+                    self._cond.notify_all()
+
+    def flush(self) -> None:
+        with self._cond:
+            if self._thread is None:
+                return
+            self._flushing = True
+            self._cond.notify_all()
+            while self._pending or self._saving:
+                self._cond.wait()
+            self._flushing = False
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+            atexit.unregister(self.close)
+
+
 # Backwards-compatible name expected by existing tests:
 LoggerObserver = InMemoryLoggerObserver
\ No newline at end of file
@@ -1,14 +1,42 @@
 from __future__ import annotations
 
+import math
+
+import numpy as np
+
 from .base import Operation
 
 
+def _pow_or_nan(base: float, exponent: float) -> float:
+    try:
+        return math.pow(base, exponent)
+    except (ValueError, OverflowError):
+        return math.nan
+
+
+def _exact_power(base: np.ndarray, exponent: np.ndarray) -> np.ndarray:
+    """Element-wise ``base ** exponent``, bit-identical to Python floats.
+
+    NumPy's SIMD pow can differ from libm in the last bit, and batch results
+    must match ``compute``. Elements math.pow rejects come back as NaN, which
+    ``compute_array`` then re-runs through ``compute``.
+    """
+    args = (base.tolist(), exponent.tolist())
+    try:
+        return np.fromiter(map(math.pow, *args), dtype=np.float64, count=len(base))
+    except (ValueError, OverflowError):
+        return np.fromiter(map(_pow_or_nan, *args), dtype=np.float64, count=len(base))
+
+
 class Add(Operation):
     name = "add"
 
     def compute(self, a: float, b: float) -> float:
         return a + b
 
+    def _array_kernel(self, a, b):
+        return a + b, []
+
 
 class Subtract(Operation):
     name = "sub"
@@ -16,6 +44,9 @@ class Subtract(Operation):
     def compute(self, a: float, b: float) -> float:
         return a - b
 
+    def _array_kernel(self, a, b):
+        return a - b, []
+
 
 class Multiply(Operation):
     name = "mul"
@@ -23,6 +54,9 @@ class Multiply(Operation):
     def compute(self, a: float, b: float) -> float:
         return a * b
 
+    def _array_kernel(self, a, b):
+        return a * b, []
+
 
 class Divide(Operation):
     name = "div"
@@ -32,6 +66,12 @@ class Divide(Operation):
         if b == 0:
             raise ZeroDivisionError("Cannot divide by zero.")
         return a / b
+
+    def _array_kernel(self, a, b):
+        zero = b == 0
+        return a / np.where(zero, 1.0, b), [(ZeroDivisionError("Cannot divide by zero."), zero)]
+
+
 class Power(Operation):
     name = "pow"
 
@@ -42,6 +82,16 @@ class Power(Operation):
             raise ValueError("Result is not a real number. (complex)")
         return result
 
+    def _array_kernel(self, a, b):
+        # Python returns a complex number for a negative base and a fractional exponent
+        fractional = (a < 0) & np.isfinite(a) & np.isfinite(b) & (b != np.trunc(b))
+        if fractional.any():
+            # ... unless its magnitude overflows: compute raises OverflowError then, so
+            # leave those NaN for compute_array to re-run
+            where = np.flatnonzero(fractional)
+            fractional[where[~np.isfinite(_exact_power(-a[where], b[where]))]] = False
+        return _exact_power(np.where(fractional, 1.0, a), b), [(ValueError("Result is not a real number. (complex)"), fractional)]
+
 
 class Root(Operation):
     name = "root"
@@ -61,6 +111,21 @@ class Root(Operation):
             raise ValueError("Root of a negative number requires an odd integer exponent.")
 
         return a ** (1 / b)
+
+    def _array_kernel(self, a, b):
+        zero = b == 0
+        negative = (a < 0) & ~zero
+        integral = np.isfinite(b) & (b == np.trunc(b))
+        even = negative & integral & (np.fmod(b, 2) == 0)
+        odd = negative & integral & ~even
+        exponent = 1 / np.where(zero, 1.0, b)
+        values = _exact_power(np.where(odd, -a, np.where(negative, 1.0, a)), exponent)
+        values = np.where(odd, -values, values)
+        return values, [
+            (ZeroDivisionError("Cannot take a root with exponent 0."), zero),
+            (ValueError("Even root of a negative number is not a real number."), even),
+            (ValueError("Root of a negative number requires an odd integer exponent."), negative & ~integral),
+        ]
     
 class Modulus(Operation):
     name = "modulus"
@@ -70,6 +135,12 @@ class Modulus(Operation):
             raise ZeroDivisionError("Cannot take modulus by zero.")
         return a % b
 
+    def _array_kernel(self, a, b):
+        zero = b == 0
+        return np.remainder(a, np.where(zero, 1.0, b)), [
+            (ZeroDivisionError("Cannot take modulus by zero."), zero)
+        ]
+
 
 class IntDivide(Operation):
     name = "int_divide"
@@ -79,6 +150,12 @@ class IntDivide(Operation):
             raise ZeroDivisionError("Cannot integer-divide by zero.")
         return a // b
 
+    def _array_kernel(self, a, b):
+        zero = b == 0
+        return np.floor_divide(a, np.where(zero, 1.0, b)), [
+            (ZeroDivisionError("Cannot integer-divide by zero."), zero)
+        ]
+
 
 class Percent(Operation):
     name = "percent"
@@ -88,9 +165,18 @@ class Percent(Operation):
             raise ZeroDivisionError("Cannot compute percent with divisor zero.")
         return (a / b) * 100
 
+    def _array_kernel(self, a, b):
+        zero = b == 0
+        return (a / np.where(zero, 1.0, b)) * 100, [
+            (ZeroDivisionError("Cannot compute percent with divisor zero."), zero)
+        ]
+
 
 class AbsDiff(Operation):
     name = "abs_diff"
 
     def compute(self, a: float, b: float) -> float:
-        return abs(a - b)
\ No newline at end of file
+        return abs(a - b)
+
+    def _array_kernel(self, a, b):
+        return np.abs(a - b), []
@@ -1,6 +1,114 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+import numpy as np
+
+# Per-element failure: the exception scalar compute() raises, and where it applies.
+ArrayError = tuple[Exception, np.ndarray]
+
+
+@dataclass(frozen=True)
+class ArrayResult:
+    """Element-wise outcome of ``Operation.compute_array``.
+
+    ``values`` is NaN wherever an element failed. ``errors`` pairs each
+    distinct failure (the exception ``compute`` would raise for that
+    element) with the mask of elements that hit it; masks don't overlap.
+    """
+
+    values: np.ndarray
+    errors: tuple[ArrayError, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def failed(self) -> np.ndarray:
+        mask = np.zeros(len(self.values), dtype=bool)
+        for _, where in self.errors:
+            mask |= where
+        return mask
+
+    @property
+    def ok(self) -> np.ndarray:
+        return ~self.failed
+
+    def error_at(self, index: int) -> Exception | None:
+        for exc, where in self.errors:
+            if where[index]:
+                return exc
+        return None
+
+
+def as_operands(a, b) -> tuple[np.ndarray, np.ndarray]:
+    """Broadcast two operands (scalars or sequences) to equal-length float64 arrays."""
+    a_arr, b_arr = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(a, dtype=np.float64)), np.atleast_1d(np.asarray(b, dtype=np.float64))
+    )
+    if a_arr.ndim != 1:
+        raise ValueError("Batch operands must be one-dimensional.")
+    return a_arr, b_arr
+
+
+def _compute_elements(
+    func: Callable[[float, float], float],
+    a: np.ndarray,
+    b: np.ndarray,
+    indexes: np.ndarray,
+    values: np.ndarray,
+    errors: list[ArrayError],
+) -> None:
+    """Run scalar ``func`` on selected elements, writing into ``values``/``errors``."""
+    found: dict[tuple[type, tuple], ArrayError] = {}
+    for i in indexes.tolist():
+        try:
+            values[i] = func(float(a[i]), float(b[i]))
+        except (ArithmeticError, ValueError) as exc:
+            key = (type(exc), exc.args)
+            if key not in found:
+                found[key] = (exc, np.zeros(len(values), dtype=bool))
+            found[key][1][i] = True
+    errors.extend(found.values())
+
+
+def _result(values: np.ndarray, errors: list[ArrayError]) -> ArrayResult:
+    merged: dict[tuple[type, tuple], ArrayError] = {}
+    for exc, where in errors:
+        if not where.any():
+            continue
+        key = (type(exc), exc.args)
+        if key in merged:
+            merged[key][1][:] |= where
+        else:
+            merged[key] = (exc, where.copy())
+    result = ArrayResult(values, tuple(merged.values()))
+    values[result.failed] = np.nan
+    return result
+
+
+def combine_results(length: int, parts: Iterable[tuple[np.ndarray, ArrayResult]]) -> ArrayResult:
+    """Scatter results computed on subsets (``(indexes, result)`` pairs) into one of ``length``."""
+    values = np.full(length, np.nan)
+    errors: list[ArrayError] = []
+    for indexes, part in parts:
+        values[indexes] = part.values
+        for exc, where in part.errors:
+            mask = np.zeros(length, dtype=bool)
+            mask[indexes[where]] = True
+            errors.append((exc, mask))
+    return _result(values, errors)
+
+
+def compute_elementwise(func: Callable[[float, float], float], a, b) -> ArrayResult:
+    """Apply a scalar ``func`` element by element, capturing failures per element."""
+    a, b = as_operands(a, b)
+    values = np.empty(len(a), dtype=np.float64)
+    errors: list[ArrayError] = []
+    _compute_elements(func, a, b, np.arange(len(a)), values, errors)
+    return _result(values, errors)
 
 
 class Operation(ABC):
@@ -12,3 +120,32 @@ class Operation(ABC):
     def compute(self, a: float, b: float) -> float:
         """Compute the result of applying the operation to a and b."""
         raise NotImplementedError  # pragma: no cover
+
+    def _array_kernel(self, a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, list[ArrayError]] | None:
+        """Vectorized compute for subclasses: ``(values, errors)``, or None to loop over ``compute``."""
+        return None
+
+    def compute_array(self, a, b) -> ArrayResult:
+        """Apply the operation to whole arrays of operands.
+
+        Matches ``compute`` element by element, but reports failures as
+        masks instead of raising. Elements with non-finite inputs or results
+        are re-run through ``compute``: that is where NumPy and Python float
+        semantics differ (e.g. ``OverflowError``, ``0.0 ** -1``).
+        """
+        a, b = as_operands(a, b)
+        with np.errstate(all="ignore"):
+            kernel = self._array_kernel(a, b)
+        if kernel is None:
+            return compute_elementwise(self.compute, a, b)
+
+        values, errors = kernel
+        values = np.array(values, dtype=np.float64)
+        failed = np.zeros(len(values), dtype=bool)
+        for _, where in errors:
+            failed |= where
+
+        exotic = ~failed & ~(np.isfinite(a) & np.isfinite(b) & np.isfinite(values))
+        if exotic.any():
+            _compute_elements(self.compute, a, b, np.flatnonzero(exotic), values, errors)
+        return _result(values, errors)
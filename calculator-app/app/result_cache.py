@@ -0,0 +1,511 @@
+from __future__ import annotations
+
+import math
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+# Eviction policies for CachingExecutionStrategy (CALCULATOR_RESULT_CACHE).
+CACHE_POLICIES = ("lru", "lfu", "ttl")
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_TTL = 300.0
+DEFAULT_DISK_CACHE_SIZE = 1_000_000
+
+# Returned by ``get`` on a miss; a cached value may legitimately be None.
+MISSING: Any = object()
+
+
+def operand_key(x: Any) -> Hashable:
+    """Hashable key for an operand that keeps apart what ``==`` conflates.
+
+    ``0.0 == -0.0`` yet their results can differ (``1 / -0.0``), and
+    ``nan != nan`` would make NaN operands never hit. Both get a tagged key;
+    every other value keys as itself, typed so ``2`` and ``2.0`` (whose
+    results differ in type) stay separate.
+    """
+    if x.__class__ is float and (x == 0.0 or x != x):
+        return ("float", "nan" if x != x else math.copysign(1.0, x))
+    return (x.__class__, x)
+
+
+class CachedError:
+    """A failure remembered in the cache; each hit raises a fresh copy."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+
+    def raise_copy(self):
+        raise type(self.error)(*self.error.args)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """Bounded key -> value map with hit/miss/eviction counters.
+
+    Subclasses choose the victim. Not thread-safe by itself: the caching
+    strategy serializes access.
+    """
+
+    policy: str
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError("Cache size must be a positive integer.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        raise NotImplementedError  # pragma: no cover
+
+    def get(self, key: Hashable) -> Any:
+        raise NotImplementedError  # pragma: no cover
+
+    def put(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def clear(self) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, self.expirations, len(self), self.maxsize)
+
+
+class LRUCache(ResultCache):
+    """Evicts the least recently used entry."""
+
+    policy = "lru"
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        super().__init__(maxsize)
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        value = self._data.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class LFUCache(ResultCache):
+    """Evicts the least frequently used entry, oldest first among ties.
+
+    O(1) per operation: entries sit in one insertion-ordered bucket per use
+    count, and the lowest non-empty count is tracked.
+    """
+
+    policy = "lfu"
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        super().__init__(maxsize)
+        self._data: dict[Hashable, list] = {}  # key -> [value, count]
+        self._buckets: dict[int, OrderedDict[Hashable, None]] = {}
+        self._min_count = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _touch(self, key: Hashable, entry: list) -> None:
+        count = entry[1]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        entry[1] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        self._touch(key, entry)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        entry = self._data.get(key)
+        if entry is not None:
+            entry[0] = value
+            self._touch(key, entry)
+            return
+        if len(self._data) >= self.maxsize:
+            bucket = self._buckets[self._min_count]
+            victim, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_count]
+            del self._data[victim]
+            self.evictions += 1
+        self._data[key] = [value, 1]
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_count = 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._buckets.clear()
+        self._min_count = 0
+
+
+class TTLCache(ResultCache):
+    """Entries expire ``ttl`` seconds after being stored; when full, the oldest goes.
+
+    Every entry lives for the same ``ttl``, so insertion order is expiry
+    order and expired entries are purged from the front.
+    """
+
+    policy = "ttl"
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        ttl: float = DEFAULT_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(maxsize)
+        if ttl <= 0:
+            raise ValueError("Cache TTL must be positive.")
+        self.ttl = ttl
+        self.clock = clock
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _purge(self, now: float) -> None:
+        data = self._data
+        while data:
+            key, (_, expires) = next(iter(data.items()))
+            if expires > now:
+                return
+            del data[key]
+            self.expirations += 1
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] > self.clock():
+            self.hits += 1
+            return entry[0]
+        if entry is not None:
+            del self._data[key]
+            self.expirations += 1
+        self.misses += 1
+        return MISSING
+
+    def put(self, key: Hashable, value: Any) -> None:
+        now = self.clock()
+        self._purge(now)
+        data = self._data
+        data[key] = (value, now + self.ttl)
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+# Failures a disk cache can store and rebuild by name.
+_PERSISTED_ERRORS: dict[str, type[Exception]] = {
+    exc.__name__: exc for exc in (ArithmeticError, ZeroDivisionError, OverflowError, ValueError)
+}
+_CANONICAL_NAN = struct.unpack("<q", struct.pack("<d", math.nan))[0]
+
+
+def _float_bits(x: float) -> int:
+    if x != x:
+        return _CANONICAL_NAN
+    return struct.unpack("<q", struct.pack("<d", x))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack("<d", struct.pack("<q", bits))[0]
+
+
+def _operand_bits(key: Hashable) -> int | None:
+    """IEEE-754 bits of a float operand, from either form the caching strategy keys it by."""
+    if key.__class__ is float:
+        return _float_bits(key)
+    if key.__class__ is tuple:
+        tag, value = key
+        if tag is float:
+            return _float_bits(value)
+        if tag == "float":
+            return _CANONICAL_NAN if value == "nan" else _float_bits(math.copysign(0.0, value))
+    return None  # not a float: kept in memory only
+
+
+class SQLiteResultCache(ResultCache):
+    """Results in a local SQLite file, shared by every process on the host.
+
+    Rows are keyed by operation name and the operands' IEEE-754 bits, so
+    ``0.0``/``-0.0`` stay apart and results (including NaN and inf) round-trip
+    exactly. Only float operands are stored. The database runs in WAL mode:
+    readers never block, and writers from several processes take turns.
+    Writes are buffered and committed ``flush_every`` at a time (and on
+    ``close``), after which the oldest rows beyond ``maxsize`` are evicted.
+    Warm results survive restarts.
+    """
+
+    policy = "sqlite"
+
+    def __init__(
+        self, path: str | Path, maxsize: int = DEFAULT_DISK_CACHE_SIZE, flush_every: int = 64, timeout: float = 5.0
+    ) -> None:
+        super().__init__(maxsize)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = max(1, flush_every)
+        # Callers serialize access (the caching strategy holds a lock).
+        import sqlite3  # only disk caches need it; keep it off the startup path
+
+        self._db = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " operation TEXT NOT NULL, a INTEGER NOT NULL, b INTEGER NOT NULL,"
+            " value INTEGER, error_type TEXT, error_message TEXT, written INTEGER NOT NULL,"
+            " PRIMARY KEY (operation, a, b)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_written ON results (written)")
+        # Row count kept beside the rows, so sizing never scans the table
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            if self._db.execute("SELECT 1 FROM meta WHERE key = 'rows'").fetchone() is None:
+                self._db.execute("INSERT INTO meta SELECT 'rows', COUNT(*) FROM results")  # once per file
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._pending: dict[tuple[str, int, int], tuple] = {}
+
+    @staticmethod
+    def _row_key(key: Hashable) -> tuple[str, int, int] | None:
+        if key.__class__ is not tuple or len(key) != 3:
+            return None
+        a, b = _operand_bits(key[1]), _operand_bits(key[2])
+        if a is None or b is None:
+            return None
+        return key[0], a, b
+
+    def _stored_rows(self) -> int:
+        (count,) = self._db.execute("SELECT value FROM meta WHERE key = 'rows'").fetchone()
+        return count
+
+    def _is_stored(self, row_key: tuple[str, int, int]) -> bool:
+        return self._db.execute(
+            "SELECT 1 FROM results WHERE operation=? AND a=? AND b=?", row_key
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._stored_rows() + sum(not self._is_stored(key) for key in self._pending)
+
+    def get(self, key: Hashable) -> Any:
+        row_key = self._row_key(key)
+        row = None
+        if row_key is not None:
+            row = self._pending.get(row_key)
+            if row is None:
+                row = self._db.execute(
+                    "SELECT value, error_type, error_message FROM results WHERE operation=? AND a=? AND b=?", row_key
+                ).fetchone()
+        if row is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        value, error_type, message = row[:3]
+        if error_type is not None:
+            return CachedError(_PERSISTED_ERRORS[error_type](message))
+        return _bits_float(value)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        row_key = self._row_key(key)
+        if row_key is None:
+            return
+        if value.__class__ is CachedError:
+            error_type = type(value.error).__name__
+            if _PERSISTED_ERRORS.get(error_type) is not type(value.error) or len(value.error.args) != 1:
+                return
+            row = (None, error_type, str(value.error.args[0]))
+        elif value.__class__ is float:
+            row = (_float_bits(value), None, None)
+        else:
+            return
+        self._pending[row_key] = row
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit buffered results, then trim the file to ``maxsize`` rows."""
+        if not self._pending:
+            return
+        written = time.time_ns()
+        rows = [key + row + (written,) for key, row in self._pending.items()]
+        self._pending.clear()
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            added = sum(not self._is_stored(row[:3]) for row in rows)
+            db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            count = self._stored_rows() + added
+            excess = count - self.maxsize
+            if excess > 0:
+                excess = db.execute(
+                    "DELETE FROM results WHERE (operation, a, b) IN"
+                    " (SELECT operation, a, b FROM results ORDER BY written LIMIT ?)",
+                    (excess,),
+                ).rowcount
+                count -= excess
+                self.evictions += excess
+            db.execute("UPDATE meta SET value = ? WHERE key = 'rows'", (count,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def clear(self) -> None:
+        self._pending.clear()
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM results")
+            db.execute("UPDATE meta SET value = 0 WHERE key = 'rows'")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        if self._db is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._db.close()
+            self._db = None
+
+
+class TieredCache(ResultCache):
+    """An in-memory cache in front of a slower shared one (e.g. ``SQLiteResultCache``).
+
+    Lookups try ``front`` first; a ``back`` hit is copied into ``front``.
+    Stores go to both. ``hits`` counts hits in either tier, ``misses`` only
+    lookups that missed both.
+    """
+
+    def __init__(self, front: ResultCache, back: ResultCache) -> None:
+        self.front = front
+        self.back = back
+        self.policy = f"{front.policy}+{back.policy}"
+        self.maxsize = front.maxsize
+
+    def __len__(self) -> int:
+        return len(self.front)
+
+    @property
+    def hits(self) -> int:
+        return self.front.hits + self.back.hits
+
+    @property
+    def misses(self) -> int:
+        return self.back.misses
+
+    @property
+    def evictions(self) -> int:
+        return self.front.evictions + self.back.evictions
+
+    @property
+    def expirations(self) -> int:
+        return self.front.expirations + self.back.expirations
+
+    def get(self, key: Hashable) -> Any:
+        value = self.front.get(key)
+        if value is MISSING:
+            value = self.back.get(key)
+            if value is not MISSING:
+                self.front.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self.front.put(key, value)
+        self.back.put(key, value)
+
+    def clear(self) -> None:
+        self.front.clear()
+        self.back.clear()
+
+    def close(self) -> None:
+        close = getattr(self.back, "close", None)
+        if callable(close):
+            close()
+
+
+def create_cache(
+    policy: str = "lru",
+    maxsize: int = DEFAULT_CACHE_SIZE,
+    ttl: float = DEFAULT_CACHE_TTL,
+    path: str | Path | None = None,
+    disk_maxsize: int = DEFAULT_DISK_CACHE_SIZE,
+) -> ResultCache:
+    """In-memory cache for ``policy``; with ``path``, backed by a shared SQLite file.
+
+    ``policy="off"`` with a ``path`` uses the file alone.
+    """
+    if policy == "lru":
+        cache: ResultCache | None = LRUCache(maxsize)
+    elif policy == "lfu":
+        cache = LFUCache(maxsize)
+    elif policy == "ttl":
+        cache = TTLCache(maxsize, ttl)
+    elif policy == "off" and path is not None:
+        cache = None
+    else:
+        raise ValueError(f"Unsupported cache policy: {policy}")
+
+    if path is None:
+        return cache
+    disk = SQLiteResultCache(path, maxsize=disk_maxsize)
+    return disk if cache is None else TieredCache(cache, disk)
@@ -1,8 +1,35 @@
 from __future__ import annotations
 
-from typing import Protocol
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Protocol
+
+import numpy as np
 
 from app.calculation.models import Calculation
+from app.operation.base import ArrayResult, Operation, combine_results, compute_elementwise
+from app.result_cache import (
+    CACHE_POLICIES,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_DISK_CACHE_SIZE,
+    MISSING,
+    CachedError,
+    CacheStats,
+    ResultCache,
+    create_cache,
+    operand_key,
+)
+
+# How Calculator.create_default picks a strategy (CALCULATOR_EXECUTION_STRATEGY).
+EXECUTION_STRATEGIES = ("direct", "thread", "process")
+# Optional memoization around it (CALCULATOR_RESULT_CACHE).
+RESULT_CACHE_POLICIES = ("off",) + CACHE_POLICIES
+
+DEFAULT_CHUNK_SIZE = 262_144
+DEFAULT_MIN_CHUNK_SIZE = 16_384
 
 
 class ExecutionStrategy(Protocol):
@@ -12,4 +39,241 @@ class ExecutionStrategy(Protocol):
 
 class DirectExecutionStrategy:
     def execute(self, calc: Calculation) -> float:
-        return calc.result()
\ No newline at end of file
+        return calc.result()
+
+    def execute_array(self, operation: Operation, a, b) -> ArrayResult:
+        # Optional batch hook; strategies without it run element by element.
+        return operation.compute_array(a, b)
+
+
+def _compute_chunk(operation: Operation, a: np.ndarray, b: np.ndarray) -> ArrayResult:
+    # Module level so process pools can pickle it.
+    return operation.compute_array(a, b)
+
+
+class ChunkScheduler:
+    """Split a batch into contiguous chunks, run them on an executor, reassemble in order.
+
+    Chunks aim for one per worker, but are never larger than ``chunk_size``
+    (bounding per-task memory) nor smaller than ``min_chunk_size`` (below
+    which dispatch overhead outweighs the work). A batch that fits in one
+    chunk runs inline.
+    """
+
+    def __init__(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE, min_chunk_size: int = DEFAULT_MIN_CHUNK_SIZE
+    ) -> None:
+        if chunk_size < 1 or min_chunk_size < 1:
+            raise ValueError("Chunk sizes must be positive integers.")
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min(min_chunk_size, chunk_size)
+
+    def bounds(self, length: int, workers: int) -> list[tuple[int, int]]:
+        per_worker = -(-length // max(workers, 1))
+        size = max(self.min_chunk_size, min(self.chunk_size, per_worker))
+        return [(start, min(start + size, length)) for start in range(0, length, size)]
+
+    def run(
+        self, executor: Executor, workers: int, operation: Operation, a: np.ndarray, b: np.ndarray
+    ) -> ArrayResult:
+        chunks = self.bounds(len(a), workers)
+        if len(chunks) <= 1:
+            return operation.compute_array(a, b)
+
+        futures = [
+            executor.submit(_compute_chunk, operation, a[start:stop], b[start:stop]) for start, stop in chunks
+        ]
+        return combine_results(
+            len(a),
+            ((np.arange(start, stop), future.result()) for (start, stop), future in zip(chunks, futures)),
+        )
+
+
+class _PoolExecutionStrategy:
+    """Shared pool lifecycle: created on first batch, shut down by ``close()``.
+
+    Single calculations run inline; only ``execute_array`` batches are
+    spread over the pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_chunk_size: int = DEFAULT_MIN_CHUNK_SIZE,
+    ) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.scheduler = ChunkScheduler(chunk_size, min_chunk_size)
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def _create_executor(self) -> Executor:
+        raise NotImplementedError  # pragma: no cover
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def execute(self, calc: Calculation) -> float:
+        return calc.result()
+
+    def execute_array(self, operation: Operation, a, b) -> ArrayResult:
+        a = np.asarray(a, dtype=np.float64)
+        b = np.asarray(b, dtype=np.float64)
+        if len(self.scheduler.bounds(len(a), self.max_workers)) <= 1:
+            return operation.compute_array(a, b)
+        return self.scheduler.run(self.executor, self.max_workers, operation, a, b)
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class ThreadPoolExecutionStrategy(_PoolExecutionStrategy):
+    """Batches on a thread pool. NumPy kernels release the GIL, so element-wise
+    operations scale; ``pow``/``root`` hold it and gain little here."""
+
+    def _create_executor(self) -> Executor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="calc-exec")
+
+
+class ProcessPoolExecutionStrategy(_PoolExecutionStrategy):
+    """Batches on a process pool, for CPU-bound operations such as ``pow``/``root``.
+
+    Uses the "spawn" start method by default: forking a process that runs
+    background threads (e.g. async autosave) is unsafe. A ``config_profile``
+    (``CalculatorConfig.to_profile()``) is installed in each worker, so
+    ``load_config()`` there returns the parent's config without parsing.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_chunk_size: int = DEFAULT_MIN_CHUNK_SIZE,
+        start_method: str = "spawn",
+        config_profile: dict[str, Any] | None = None,
+    ) -> None:
+        super().__init__(max_workers, chunk_size, min_chunk_size)
+        self.start_method = start_method
+        self.config_profile = config_profile
+
+    def _create_executor(self) -> Executor:
+        # Imported here: multiprocessing isn't needed unless a process pool is
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        initializer, initargs = None, ()
+        if self.config_profile is not None:
+            from app.calculator_config import use_profile
+
+            initializer, initargs = use_profile, (self.config_profile,)
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=initializer,
+            initargs=initargs,
+        )
+
+
+class CachingExecutionStrategy:
+    """Memoizes another strategy's single-calculation results.
+
+    Keyed by operation name and operands (see ``operand_key`` for -0.0 and
+    NaN). Failures that ``compute`` raises for bad operands (ZeroDivisionError,
+    ValueError, ...) are cached too and re-raised on a hit, so repeated bad
+    input also skips validation. Batches pass straight through to the wrapped
+    strategy: they are already vectorized. ``stats()`` reports hit, miss and
+    eviction counts for sizing.
+    """
+
+    def __init__(
+        self,
+        inner: ExecutionStrategy | None = None,
+        policy: str = "lru",
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        ttl: float = DEFAULT_CACHE_TTL,
+        cache: ResultCache | None = None,
+        cache_errors: bool = True,
+    ) -> None:
+        self.inner = inner if inner is not None else DirectExecutionStrategy()
+        self.cache = cache if cache is not None else create_cache(policy, maxsize, ttl)
+        self.cache_errors = cache_errors
+        self._lock = threading.Lock()
+
+    def execute(self, calc: Calculation) -> float:
+        a, b = calc.a, calc.b
+        if a.__class__ is float and b.__class__ is float and a and b and a == a and b == b:
+            key = (calc.operation.name, a, b)  # common case: plain keys are exact
+        else:
+            key = (calc.operation.name, operand_key(a), operand_key(b))
+        with self._lock:
+            cached = self.cache.get(key)
+        if cached is not MISSING:
+            if cached.__class__ is CachedError:
+                cached.raise_copy()
+            return cached
+
+        try:
+            result = self.inner.execute(calc)
+        except (ArithmeticError, ValueError) as exc:
+            if self.cache_errors:
+                with self._lock:
+                    self.cache.put(key, CachedError(exc))
+            raise
+        with self._lock:
+            self.cache.put(key, result)
+        return result
+
+    def execute_array(self, operation: Operation, a, b) -> ArrayResult:
+        execute_array = getattr(self.inner, "execute_array", None)
+        if execute_array is not None:
+            return execute_array(operation, a, b)
+        return compute_elementwise(lambda x, y: self.execute(Calculation(operation, x, y)), a, b)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return self.cache.stats()
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self.cache.clear()
+
+    def close(self) -> None:
+        for part in (self.inner, self.cache):
+            close = getattr(part, "close", None)
+            if callable(close):
+                close()
+
+
+def create_strategy(
+    name: str = "direct",
+    max_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    result_cache: str = "off",
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    cache_ttl: float = DEFAULT_CACHE_TTL,
+    cache_path: str | Path | None = None,
+    disk_cache_size: int = DEFAULT_DISK_CACHE_SIZE,
+    config_profile: dict[str, Any] | None = None,
+) -> ExecutionStrategy:
+    if name == "direct":
+        strategy: ExecutionStrategy = DirectExecutionStrategy()
+    elif name == "thread":
+        strategy = ThreadPoolExecutionStrategy(max_workers=max_workers, chunk_size=chunk_size)
+    elif name == "process":
+        strategy = ProcessPoolExecutionStrategy(
+            max_workers=max_workers, chunk_size=chunk_size, config_profile=config_profile
+        )
+    else:
+        raise ValueError(f"Unsupported execution strategy: {name}")
+
+    if result_cache == "off" and cache_path is None:
+        return strategy
+    cache = create_cache(result_cache, cache_size, cache_ttl, path=cache_path, disk_maxsize=disk_cache_size)
+    return CachingExecutionStrategy(strategy, cache=cache)
@@ -0,0 +1,66 @@
+"""Per-operation autosave cost: full CSV rewrite vs. journal, inline vs. background.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_autosave
+    python -m benchmarks.bench_autosave --sizes 1000 10000 --ops 200
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+from app.calculator.facade import Calculator
+
+
+def bench(mode: str, size: int, ops: int, workdir: Path, background: bool = False) -> float:
+    """Mean Calculator.execute latency in seconds (excluding the final flush)."""
+    path = workdir / f"{mode}_{background}_{size}.csv"
+    calc = Calculator.create_default(
+        history_path=path, auto_save=True, autosave_mode=mode, autosave_async=background
+    )
+    factory = CalculationFactory()
+
+    seed = CalculationHistory()
+    for i in range(size):
+        seed.add(factory.create("add", float(i), 1.0))
+    calc.history.restore(seed.snapshot())
+    calc.save()
+
+    start = time.perf_counter()
+    for i in range(ops):
+        calc.execute("mul", float(i), 2.0)
+    elapsed = time.perf_counter() - start
+    calc.close()
+    return elapsed / ops
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--ops", type=int, default=100)
+    args = parser.parse_args()
+
+    columns = [
+        ("snapshot", False),
+        ("journal", False),
+        ("snapshot", True),
+        ("journal", True),
+    ]
+    header = " ".join(f"{mode + ('+bg' if bg else ''):>12}" for mode, bg in columns)
+    print(f"{'history rows':>12} {header}   (ms per execute)")
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for size in args.sizes:
+            cells = " ".join(
+                f"{bench(mode, size, args.ops, workdir, bg) * 1000:>12.3f}" for mode, bg in columns
+            )
+            print(f"{size:>12} {cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Per-operation CPU, compute calls and allocation of the execute core path.
+
+Compares the compute-once slotted Calculation against a replica of the
+previous record (plain frozen dataclass, result recomputed on each call),
+running the same factory -> strategy -> history path without observers.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_calculation_record
+    python -m benchmarks.bench_calculation_record --ops 500000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from app.calculation.columns import OPERATIONS
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+from app.calculation.models import Calculation
+from app.operation.arithmetic import Power
+from app.operation.base import Operation
+
+
+@dataclass(frozen=True)
+class LegacyCalculation:
+    operation: Operation
+    a: float
+    b: float
+
+    def result(self) -> float:
+        return self.operation.compute(self.a, self.b)
+
+    @property
+    def code(self) -> int:
+        # History used to intern the operation name on every append.
+        return OPERATIONS.code(self.operation.name)
+
+
+class CountingPower(Power):
+    calls = 0
+
+    def compute(self, a, b):
+        CountingPower.calls += 1
+        return super().compute(a, b)
+
+
+def legacy_step(history: CalculationHistory, op: Operation, a: float, b: float) -> float:
+    calc = LegacyCalculation(op, a, b)
+    result = calc.result()  # strategy.execute
+    history.add(calc)  # calls calc.result() again
+    return result
+
+
+def current_step(history: CalculationHistory, op: Operation, a: float, b: float) -> float:
+    calc = Calculation(op, a, b)
+    result = calc.settle(calc.result())  # strategy.execute
+    history.add(calc)
+    return result
+
+
+def measure(step, ops: int) -> tuple[float, float, float]:
+    """(microseconds per op, compute calls per op, peak bytes per live record)."""
+    op = CountingPower()
+    history = CalculationHistory()
+    CountingPower.calls = 0
+    start = time.perf_counter()
+    for i in range(ops):
+        step(history, op, 1.0001, float(i % 7))
+    elapsed = time.perf_counter() - start
+    calls = CountingPower.calls / ops
+
+    tracemalloc.start()
+    record = Calculation if step is current_step else LegacyCalculation
+    records = [record(op, 1.0, 2.0) for _ in range(10_000)]
+    for record in records:
+        record.result()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed / ops * 1e6, calls, peak / len(records)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=200_000)
+    args = parser.parse_args()
+
+    CalculationFactory()  # intern operation codes up front
+    print(f"{'record':>8} {'us/op':>8} {'compute/op':>11} {'bytes/record':>13}")
+    for name, step in (("legacy", legacy_step), ("current", current_step)):
+        us, calls, size = measure(step, args.ops)
+        print(f"{name:>8} {us:>8.3f} {calls:>11.1f} {size:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Command-file throughput: line-by-line handle_line vs. batch mode.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_cli_batch
+    python -m benchmarks.bench_cli_batch --lines 1000000 --interactive 20000
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.calculator.cli import handle_line, run_batch
+from app.calculator.facade import Calculator
+
+
+def make_script(lines: int) -> list[str]:
+    rng = random.Random(0)
+    ops = ("add", "sub", "mul", "div", "pow", "mod")
+    return [f"{rng.choice(ops)} {rng.uniform(1, 100):.3f} {rng.uniform(0, 4):.3f}" for _ in range(lines)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--interactive", type=int, default=10_000, help="lines timed through handle_line")
+    parser.add_argument(
+        "--undo-depth", type=int, default=100, help="max_undo_depth, as CALCULATOR_MAX_UNDO_DEPTH (0: unbounded)"
+    )
+    args = parser.parse_args()
+
+    script = make_script(args.lines)
+    depth = args.undo_depth or None  # batch mode keeps one undo step per command, up to this depth
+    with tempfile.TemporaryDirectory() as tmp:
+        calc = Calculator.create_default(history_path=Path(tmp) / "line.csv", max_undo_depth=depth)
+        sink = io.StringIO()
+        start = time.perf_counter()
+        for line in script[: args.interactive]:
+            sink.write(handle_line(line, calc) + "\n")
+        per_line = args.interactive / (time.perf_counter() - start)
+
+        calc = Calculator.create_default(history_path=Path(tmp) / "batch.csv", max_undo_depth=depth)
+        summary = run_batch(script, calc, io.StringIO())
+
+    print(f"handle_line loop: {per_line:>12,.0f} commands/s")
+    print(f"batch mode:       {summary.commands / summary.seconds:>12,.0f} commands/s")
+
+
+if __name__ == "__main__":
+    main()
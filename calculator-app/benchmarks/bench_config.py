@@ -0,0 +1,63 @@
+"""Configuration loading: a full parse vs the cached ``load_config()``.
+
+``parse`` is what every ``load_config()`` call cost before: the ``.env``
+lookup plus parsing each variable. ``cached`` is a hit (one ``stat`` of
+``.env`` and a scan of the environment), ``after change`` the re-parse
+after a ``CALCULATOR_*`` variable changes. ``from_profile`` is what a
+process-pool worker pays to install the parent's config, next to the
+pickled profile's size.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_config
+    python -m benchmarks.bench_config --calls 100000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import pickle
+import time
+
+from app.calculator_config import CalculatorConfig, _dotenv, load_config, parse_config, reload_config
+
+
+def per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def best_of(fn, calls: int, repeat: int = 5) -> float:
+    return min(per_call(fn, calls) for _ in range(repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    cfg = reload_config()
+    profile = cfg.to_profile()
+    flip = iter(range(10**9))
+
+    def after_change() -> None:
+        os.environ["CALCULATOR_PRECISION"] = str(next(flip) % 10)
+        load_config()
+
+    rows = [
+        ("parse", best_of(lambda: (_dotenv._find(), parse_config()), args.calls // 10)),
+        ("cached", best_of(load_config, args.calls)),
+        ("after change", best_of(after_change, args.calls // 10)),
+        ("from_profile", best_of(lambda: CalculatorConfig.from_profile(profile), args.calls)),
+    ]
+    os.environ.pop("CALCULATOR_PRECISION", None)
+
+    for label, seconds in rows:
+        print(f"{label:>14} {seconds * 1e6:>9.2f} us/call")
+    print(f"{'profile':>14} {len(pickle.dumps(profile))} bytes pickled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Caller-side cost of ``execute`` with synchronous vs queued observer dispatch.
+
+With sync dispatch every ``execute`` waits for the log write (and, with
+``--auto-save``, a full history save) before returning. With the event bus
+the caller only enqueues; the worker thread writes in batches and coalesces
+autosave events. ``total`` includes the final ``flush_events()`` so the two
+modes do the same work end to end.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_event_bus
+    python -m benchmarks.bench_event_bus --calls 2000 --auto-save
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.calculator.facade import Calculator
+
+
+def run(dispatch: str, backpressure: str, calls: int, auto_save: bool, tmp: Path) -> None:
+    calc = Calculator.create_default(
+        history_path=tmp / f"{dispatch}-{backpressure}.csv",
+        auto_save=auto_save,
+        max_history_size=1000,
+        observer_dispatch=dispatch,
+        observer_backpressure=backpressure,
+    )
+    start = time.perf_counter()
+    for n in range(calls):
+        calc.execute("add", float(n), 1.0)
+    caller = time.perf_counter() - start
+    calc.flush_events()
+    total = time.perf_counter() - start
+    label = dispatch if dispatch == "sync" else f"async/{backpressure}"
+    line = f"{label:>20} {caller / calls * 1e6:>12.1f} {total / calls * 1e6:>10.1f}"
+    if calc.event_bus is not None:
+        stats = calc.event_bus.stats()
+        line += f" {stats.max_depth:>10} {stats.mean_latency * 1e3:>12.2f} {stats.dropped + stats.coalesced:>9}"
+    print(line)
+    calc.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5_000)
+    parser.add_argument("--auto-save", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'dispatch':>20} {'caller us':>12} {'total us':>10} {'max depth':>10} {'latency ms':>12} {'skipped':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        run("sync", "block", args.calls, args.auto_save, Path(tmp))
+        for backpressure in ("block", "drop_oldest", "coalesce"):
+            run("async", backpressure, args.calls, args.auto_save, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
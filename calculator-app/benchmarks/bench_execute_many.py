@@ -0,0 +1,53 @@
+"""Throughput of Calculator.execute (one pair at a time) vs. execute_many (batch).
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_execute_many
+    python -m benchmarks.bench_execute_many --size 1000000 --scalar 20000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.calculator.facade import Calculator
+
+
+def ops_per_second(op: str, size: int, scalar: int, workdir: Path) -> tuple[float, float]:
+    rng = np.random.default_rng(0)
+    a = rng.uniform(1, 100, size)
+    b = rng.uniform(1, 5, size)
+
+    calc = Calculator.create_default(history_path=workdir / f"{op}.csv")
+    start = time.perf_counter()
+    for x, y in zip(a[:scalar].tolist(), b[:scalar].tolist()):
+        calc.execute(op, x, y)
+    loop = scalar / (time.perf_counter() - start)
+
+    calc = Calculator.create_default(history_path=workdir / f"{op}_batch.csv")
+    start = time.perf_counter()
+    calc.execute_many(op, a, b)
+    batch = size / (time.perf_counter() - start)
+    return loop, batch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000, help="batch length")
+    parser.add_argument("--scalar", type=int, default=20_000, help="pairs timed through execute()")
+    parser.add_argument("--ops", nargs="+", default=["add", "div", "pow", "root", "mod"])
+    args = parser.parse_args()
+
+    print(f"{'op':>8} {'execute/s':>14} {'execute_many/s':>16} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for op in args.ops:
+            loop, batch = ops_per_second(op, args.size, args.scalar, Path(tmp))
+            print(f"{op:>8} {loop:>14,.0f} {batch:>16,.0f} {batch / loop:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
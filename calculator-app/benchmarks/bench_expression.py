@@ -0,0 +1,80 @@
+"""Chained calculations as REPL round trips vs one compiled expression.
+
+``(2 ^ 10) root 3 + 7 % 4`` takes four ``<op> <a> <b>`` commands, each with
+its own history append, undo snapshot and log write; as ``= ...`` it is one
+line and one history entry. Also times compilation with and without the
+source-text cache, and ``evaluate_many`` against a scalar loop.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_expression
+    python -m benchmarks.bench_expression --repeat 20000 --vector 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.calculation.expression import ExpressionCompiler
+from app.calculator.cli import handle_line
+from app.calculator.facade import Calculator
+
+EXPRESSION = "(2 ^ 10) root 3 + 7 % 4"
+STEPS = ("pow 2 10", "root 1024 3", "mod 7 4", "add 10.079368399158984 3")
+
+
+def per_call(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5_000)
+    parser.add_argument("--vector", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calc = Calculator.create_default(history_path=Path(tmp) / "history.csv", max_undo_depth=100)
+
+        def round_trips() -> None:
+            for line in STEPS:
+                handle_line(line, calc)
+
+        print(f"{'case':>24} {'us/call':>10} {'history rows':>13}")
+        before = len(calc.history)
+        us = per_call(round_trips, args.repeat)
+        print(f"{'4 REPL commands':>24} {us:>10.2f} {(len(calc.history) - before) / args.repeat:>13.0f}")
+        before = len(calc.history)
+        us = per_call(lambda: handle_line(f"= {EXPRESSION}", calc), args.repeat)
+        print(f"{'= expression':>24} {us:>10.2f} {(len(calc.history) - before) / args.repeat:>13.0f}")
+        calc.close()
+
+    compiler = ExpressionCompiler()
+    print(f"{'compile (cached)':>24} {per_call(lambda: compiler.compile(EXPRESSION), args.repeat):>10.2f}")
+    fresh = ExpressionCompiler()
+    print(f"{'compile (uncached)':>24} {per_call(lambda: fresh._compile(EXPRESSION), args.repeat):>10.2f}")
+
+    expression = compiler.compile("(x ^ 2 + y) root 2 - x / (y + 1)")
+    rng = np.random.default_rng(3)
+    x = rng.uniform(0, 100, args.vector)
+    y = rng.uniform(0, 100, args.vector)
+    start = time.perf_counter()
+    for xi, yi in zip(x.tolist(), y.tolist()):
+        expression.evaluate({"x": xi, "y": yi})
+    loop = (time.perf_counter() - start) / args.vector * 1e9
+    start = time.perf_counter()
+    expression.evaluate_many({"x": x, "y": y})
+    vector = (time.perf_counter() - start) / args.vector * 1e9
+    print(f"{'scalar loop (ns/elem)':>24} {loop:>10.1f}")
+    print(f"{'evaluate_many (ns/elem)':>24} {vector:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
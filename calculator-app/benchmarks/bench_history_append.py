@@ -0,0 +1,59 @@
+"""Append throughput for CalculationHistory.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_history_append
+    python -m benchmarks.bench_history_append --rows 10000 100000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+
+
+def bench_append(rows: int) -> float:
+    factory = CalculationFactory()
+    calcs = [factory.create("add", float(i), 1.0) for i in range(1000)]
+
+    history = CalculationHistory()
+    start = time.perf_counter()
+    for i in range(rows):
+        history.add(calcs[i % 1000])
+    elapsed = time.perf_counter() - start
+
+    assert len(history) == rows
+    return elapsed
+
+
+def bench_materialize(rows: int) -> float:
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    calc = factory.create("mul", 3.0, 4.0)
+    for _ in range(rows):
+        history.add(calc)
+
+    start = time.perf_counter()
+    df = history.all()
+    elapsed = time.perf_counter() - start
+
+    assert len(df) == rows
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'append s':>10} {'rows/s':>12} {'all() s':>10}")
+    for rows in args.rows:
+        append_s = bench_append(rows)
+        frame_s = bench_materialize(rows)
+        print(f"{rows:>10} {append_s:>10.3f} {rows / append_s:>12,.0f} {frame_s:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""History save/load time and file size per on-disk format.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_history_formats
+    python -m benchmarks.bench_history_formats --sizes 10000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.calculation.factory import CalculationFactory
+from app.calculation.formats import default_suffix, has_pyarrow
+from app.calculation.history import CalculationHistory
+
+
+def make_history(size: int) -> CalculationHistory:
+    factory = CalculationFactory()
+    ops = ("add", "sub", "mul", "div")
+    history = CalculationHistory()
+    for i in range(size):
+        history.add(factory.create(ops[i % len(ops)], float(i), 3.0))
+    return history
+
+
+def bench(history: CalculationHistory, fmt: str, workdir: Path) -> tuple[float, float, int]:
+    """(save seconds, load seconds, file bytes) for one format."""
+    path = workdir / f"history{default_suffix(fmt)}"
+    history.history_format = fmt
+
+    start = time.perf_counter()
+    history.save(path)
+    saved = time.perf_counter() - start
+
+    loaded = CalculationHistory(history_format=fmt)
+    start = time.perf_counter()
+    loaded.load(path)
+    load_time = time.perf_counter() - start
+    return saved, load_time, path.stat().st_size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    formats = ["csv", "npz"] + (["feather", "parquet"] if has_pyarrow() else [])
+    print(f"{'rows':>9} {'format':>8} {'save ms':>10} {'load ms':>10} {'MiB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            history = make_history(size)
+            for fmt in formats:
+                saved, loaded, nbytes = bench(history, fmt, Path(tmp))
+                print(
+                    f"{size:>9} {fmt:>8} {saved * 1000:>10.1f} {loaded * 1000:>10.1f} "
+                    f"{nbytes / 2**20:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
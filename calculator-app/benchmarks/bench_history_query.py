@@ -0,0 +1,97 @@
+"""Filtered history queries: secondary indexes vs a full column scan.
+
+``scan`` copies the columns out and masks them with NumPy, which is the
+best a query can do without indexes. ``indexed`` asks the history, whose
+per-segment indexes pick the most selective condition and check the
+others only on its candidate rows. ``build`` is the one-off cost of the
+first query on a segment; ``catch-up`` is a query after 100 appends,
+which only indexes the new rows.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_history_query
+    python -m benchmarks.bench_history_query --rows 5000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.calculation.columns import OPERATIONS
+from app.calculation.formats import column_arrays, columns_from_arrays
+from app.calculation.history import CalculationHistory
+from app.calculation.query import parse_query
+
+QUERIES = [
+    "op=pow limit 20",
+    "op=pow since=2026-03-01 result>1e6 limit 20",
+    "since=2026-03-01T00:00 until=2026-03-01T00:05",
+    "result>1e9",
+    "a>=0 a<0.001",
+]
+
+
+def scan(history: CalculationHistory, text: str) -> int:
+    query = parse_query(text)
+    cols, start, stop = history._view
+    arrays = column_arrays(cols, start, stop)
+    keep = np.ones(stop - start, dtype=bool)
+    if query.operations:
+        keep &= np.isin(arrays["operation"], [OPERATIONS.find(op) for op in query.operations])
+    for where in query.ranges:
+        keep &= where.mask(arrays[where.field])
+    return int(keep.sum())
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    n = args.rows
+    rng = np.random.default_rng(3)
+    names = ["add", "sub", "mul", "div", "pow", "root", "percent"]
+    codes = np.array([OPERATIONS.code(name) for name in names], dtype=np.int32)
+    history = CalculationHistory()
+    # One row every ~2.6 s through February and March 2026
+    timestamps = 1_769_904_000 * 10**6 + np.sort(rng.integers(0, 59 * 86_400 * 10**6, n))
+    history._set_segment(
+        columns_from_arrays(
+            timestamps,
+            codes[rng.integers(0, len(codes), n)],
+            rng.uniform(-1e3, 1e3, n),
+            rng.uniform(-10, 10, n),
+            rng.lognormal(10, 3, n),
+        )
+    )
+
+    build = best_of(lambda: (history._indexes.clear(), history.query("op=pow result>1 a<0")), repeat=1)
+    print(f"{n} rows; first query (builds op, timestamp, result and a indexes): {build * 1e3:.1f} ms")
+    print(f"{'query':>48} {'matches':>9} {'scan ms':>8} {'indexed ms':>11}")
+    for text in QUERIES:
+        matches = history.query(text).total
+        assert matches == scan(history, text)
+        scanned = best_of(lambda: scan(history, text))
+        indexed = best_of(lambda: history.query(text))
+        print(f"{text:>48} {matches:>9} {scanned * 1e3:>8.2f} {indexed * 1e3:>11.3f}")
+
+    def catch_up() -> None:
+        history.add_many("pow", np.full(100, 2.0), np.arange(100.0), 2.0 ** np.arange(100.0))
+        history.query("op=pow result>1e6 limit 20")
+
+    print(f"{'catch-up after 100 appends':>48} {'':>9} {'':>8} {best_of(catch_up) * 1e3:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Rendering the ``history`` command for a large history.
+
+``join`` builds the whole output as one string, as ``handle_line`` does;
+``stream`` writes it chunk by chunk like the REPL and batch mode, so the
+first rows appear almost at once and peak memory is one chunk. ``tail``
+and ``page`` only format the rows they show, so their cost doesn't grow
+with the history.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_history_render
+    python -m benchmarks.bench_history_render --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from app.calculator.cli import handle_line, history_chunks
+from app.calculator.facade import Calculator
+
+
+def measure(render) -> tuple[float, float, float]:
+    """(seconds to first output, total seconds, peak MB); memory is traced in a separate run."""
+    start = time.perf_counter()
+    first = render()
+    total = time.perf_counter() - start
+    tracemalloc.start()
+    render()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return (first - start if first else total), total, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calc = Calculator.create_default(history_path=Path(tmp) / "history.csv")
+        rng = np.random.default_rng(5)
+        calc.execute_many("mul", rng.uniform(-1e6, 1e6, args.rows), rng.uniform(-10, 10, args.rows))
+
+        def join() -> None:
+            io.StringIO().write(handle_line("history", calc))
+
+        def stream(command: str = "history"):
+            out = io.StringIO()
+            first = None
+            for chunk in history_chunks(command, calc):
+                out.write(chunk + "\n")
+                first = first or time.perf_counter()
+            return first
+
+        cases = [
+            ("join", join),
+            ("stream", stream),
+            ("tail 20", lambda: stream("history tail 20")),
+            ("page 100", lambda: stream("history page 100")),
+        ]
+        print(f"{args.rows} rows")
+        print(f"{'history':>10} {'first ms':>9} {'total ms':>9} {'peak MB':>8}")
+        for label, render in cases:
+            first, total, peak = measure(render)
+            print(f"{label:>10} {first * 1e3:>9.1f} {total * 1e3:>9.1f} {peak:>8.1f}")
+        calc.close()
+
+
+if __name__ == "__main__":
+    main()
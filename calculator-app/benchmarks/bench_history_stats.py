@@ -0,0 +1,88 @@
+"""Per-operation history stats: running accumulators vs rescanning a DataFrame.
+
+``pandas`` materializes the history frame and groups it, which is what
+answering ``stats`` cost before. ``running`` asks the history, whose
+per-segment accumulators only fold in rows added since the last call:
+``first`` folds in everything, ``after 1 add`` one row, ``after undo``
+answers a prefix from a checkpoint. The load rows compare reading stats
+back from the ``.stats.json`` file saved with the history against
+computing them from a freshly (lazily) loaded record file.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_history_stats
+    python -m benchmarks.bench_history_stats --rows 5000000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+from app.calculation.stats import stats_path
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    return min(timed(fn) for _ in range(repeat))
+
+
+def pandas_stats(history: CalculationHistory):
+    grouped = history.all().groupby("operation")["result"]
+    return grouped.agg(["count", "sum", "mean", "min", "max", "var"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    names = np.array(["add", "sub", "mul", "div", "pow"])[rng.integers(0, 5, args.rows)]
+    history = CalculationHistory()
+    a, b = rng.normal(size=args.rows), rng.normal(size=args.rows)
+    history.add_many(names.tolist(), a, b, rng.lognormal(5, 2, args.rows))
+    calc = CalculationFactory().create("add", 1, 2)
+
+    rows = [
+        ("pandas groupby", best_of(lambda: pandas_stats(history), repeat=3)),
+        ("running: first", timed(history.stats)),
+        ("running: again", best_of(history.stats)),
+    ]
+    before = history.snapshot()
+
+    def add_then_stats() -> None:
+        history.add(calc)
+        history.stats()
+
+    rows.append(("running: after 1 add", best_of(add_then_stats)))
+    history.restore(before)
+    rows.append(("running: after undo", best_of(history.stats)))
+    rows.append(("running: last 1000", best_of(lambda: history.stats(last=1000))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "history.hist"
+        history.save(path)
+        loaded = CalculationHistory(lazy_load=True)
+        rows.append(("lazy load + stats (saved)", timed(lambda: (loaded.load(path), loaded.stats()))))
+        stats_path(path).unlink()
+        loaded = CalculationHistory(lazy_load=True)
+        rows.append(("lazy load + stats (computed)", timed(lambda: (loaded.load(path), loaded.stats()))))
+
+    print(f"{args.rows} rows")
+    for label, seconds in rows:
+        print(f"{label:>30} {seconds * 1e3:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Startup cost of loading history: eager CSV/records vs. memory-mapped lazy load.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_lazy_load
+    python -m benchmarks.bench_lazy_load --sizes 100000 5000000 --tail 20
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.calculation.columns import OPERATIONS
+from app.calculation.formats import columns_from_arrays
+from app.calculation.history import CalculationHistory
+
+
+def make_history(size: int) -> CalculationHistory:
+    rng = np.random.default_rng(0)
+    a = rng.random(size)
+    b = rng.random(size)
+    ops = np.full(size, OPERATIONS.code("add"), dtype=np.int32)
+    history = CalculationHistory()
+    history.replace(columns_from_arrays(np.arange(size, dtype=np.int64), ops, a, b, a + b))
+    return history
+
+
+def bench(path: Path, lazy: bool, tail: int) -> tuple[float, float]:
+    """(load seconds, seconds to render the newest ``tail`` rows)."""
+    history = CalculationHistory(lazy_load=lazy)
+    start = time.perf_counter()
+    history.load(path)
+    loaded = time.perf_counter() - start
+
+    start = time.perf_counter()
+    history.format_lines(tail)
+    return loaded, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--tail", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [("csv", ".csv", False), ("records", ".hist", False), ("lazy", ".hist", True)]
+    print(f"{'rows':>9} {'mode':>8} {'load ms':>10} {'tail ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            history = make_history(size)
+            for suffix in {suffix for _, suffix, _ in cases}:
+                history.save(Path(tmp) / f"history_{size}{suffix}")
+            for mode, suffix, lazy in cases:
+                loaded, shown = bench(Path(tmp) / f"history_{size}{suffix}", lazy, args.tail)
+                print(f"{size:>9} {mode:>8} {loaded * 1000:>10.2f} {shown * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Per-event cost of LoggingObserver: handler lookup, buffering and format.
+
+``lookup per event`` re-resolves the logger on every event (mkdir,
+``Path.resolve()``, handler-registry check), as the observer used to. The
+other rows resolve once and differ in how records reach the file:
+unbuffered (one write and flush per event) or flushed ``--buffer``
+records at a time, with and without size rotation, as text or JSON lines.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --events 200000 --buffer 1024
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from app import observers
+from app.observers import LoggingObserver
+
+PAYLOAD = {"operation": "add", "a": 2.0, "b": 3.0, "result": 5.0}
+
+
+def reset() -> None:
+    logger = logging.getLogger("calculator")
+    for handler in observers._FILE_HANDLERS.values():
+        logger.removeHandler(handler)
+        handler.close()
+    observers._FILE_HANDLERS.clear()
+
+
+def time_events(update, events: int) -> float:
+    start = time.perf_counter()
+    for _ in range(events):
+        update("calculation_added", PAYLOAD)
+    return (time.perf_counter() - start) / events * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--buffer", type=int, default=256)
+    args = parser.parse_args()
+
+    # Keep records out of the root logger's handlers (e.g. a console)
+    logging.getLogger("calculator").propagate = False
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{'case':>30} {'us/event':>9} {'file MB':>8}")
+
+        def report(label: str, us: float, path: Path) -> None:
+            reset()
+            print(f"{label:>30} {us:>9.2f} {path.stat().st_size / 1e6:>8.2f}")
+
+        path = tmp / "lookup.log"
+        obs = LoggingObserver(log_file=path)
+
+        def lookup(event, payload) -> None:
+            obs._logger = None
+            obs.update(event, payload)
+
+        report("lookup per event", time_events(lookup, args.events), path)
+
+        rotate = 10 * 1024 * 1024
+        cases = [
+            ("text", 0, 0),
+            ("text", args.buffer, 0),
+            ("text", 0, rotate),
+            ("text", args.buffer, rotate),
+            ("json", 0, 0),
+            ("json", args.buffer, 0),
+        ]
+        for log_format, buffer_size, max_bytes in cases:
+            path = tmp / f"{log_format}-{buffer_size}-{max_bytes}.log"
+            obs = LoggingObserver(log_file=path, log_format=log_format, buffer_size=buffer_size, max_bytes=max_bytes)
+            us = time_events(obs.update, args.events)
+            obs.close()
+            label = f"{log_format}, " + (f"buffer {buffer_size}" if buffer_size else "unbuffered")
+            report(label + (", rotating" if max_bytes else ""), us, path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Batch throughput of the direct, thread-pool and process-pool execution strategies.
+
+Run from the calculator-app directory (speedups need more than one core):
+
+    python -m benchmarks.bench_parallel_strategy
+    python -m benchmarks.bench_parallel_strategy --size 4000000 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.calculation.factory import CalculationFactory
+from app.strategy import DirectExecutionStrategy, ProcessPoolExecutionStrategy, ThreadPoolExecutionStrategy
+
+
+def throughput(strategy, op: str, a: np.ndarray, b: np.ndarray, repeat: int) -> float:
+    operation = CalculationFactory().operation(op)
+    strategy.execute_array(operation, a[:100_000], b[:100_000])  # warm up the pool
+    start = time.perf_counter()
+    for _ in range(repeat):
+        strategy.execute_array(operation, a, b)
+    return len(a) * repeat / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ops", nargs="+", default=["add", "div", "pow", "root"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    a = rng.uniform(1, 100, args.size)
+    b = rng.uniform(1, 5, args.size)
+
+    strategies = {
+        "direct": DirectExecutionStrategy(),
+        "thread": ThreadPoolExecutionStrategy(max_workers=args.workers),
+        "process": ProcessPoolExecutionStrategy(max_workers=args.workers),
+    }
+    print(f"{args.workers} workers, {args.size:,} elements (ops/s)")
+    print(f"{'op':>6} " + " ".join(f"{name:>14}" for name in strategies))
+    try:
+        for op in args.ops:
+            cells = " ".join(
+                f"{throughput(strategy, op, a, b, args.repeat):>14,.0f}" for strategy in strategies.values()
+            )
+            print(f"{op:>6} {cells}")
+    finally:
+        for strategy in strategies.values():
+            close = getattr(strategy, "close", None)
+            if close is not None:
+                close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Throughput and hit rate of CachingExecutionStrategy on repetitive workloads.
+
+Draws (op, a, b) triples from a skewed (Zipf) pool of distinct inputs, so
+some repeat far more than others, and runs them through the direct strategy
+and through each cache policy. Includes failing inputs (division by zero,
+even roots of negatives) to exercise exception caching. ``--compute-us``
+adds a busy-wait to every real computation, standing in for a costlier
+wrapped strategy, to find where caching starts to pay off.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_result_cache
+    python -m benchmarks.bench_result_cache --distinct 50000 --cache-size 1024
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from app.calculation.factory import CalculationFactory
+from app.strategy import CachingExecutionStrategy, DirectExecutionStrategy
+
+OPS = ("add", "div", "pow", "root", "mod")
+
+
+def workload(calls: int, distinct: int, seed: int = 7) -> list[tuple[str, float, float]]:
+    rng = np.random.default_rng(seed)
+    pool = [
+        (OPS[i % len(OPS)], float(rng.integers(-20, 20)) / 4, float(rng.integers(-3, 8)))
+        for i in range(distinct)
+    ]
+    picks = np.minimum(rng.zipf(1.3, calls) - 1, distinct - 1)
+    return [pool[i] for i in picks.tolist()]
+
+
+class SlowStrategy(DirectExecutionStrategy):
+    def __init__(self, compute_us: float) -> None:
+        self.compute_s = compute_us / 1e6
+
+    def execute(self, calc) -> float:
+        deadline = time.perf_counter() + self.compute_s
+        while time.perf_counter() < deadline:
+            pass
+        return super().execute(calc)
+
+
+def measure(strategy, calls: list[tuple[str, float, float]], factory: CalculationFactory) -> float:
+    start = time.perf_counter()
+    for op_name, a, b in calls:
+        try:
+            strategy.execute(factory.create(op_name, a, b))
+        except (ArithmeticError, ValueError):
+            pass
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=10_000)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    parser.add_argument("--compute-us", type=float, default=0.0)
+    args = parser.parse_args()
+
+    factory = CalculationFactory()
+    calls = workload(args.calls, args.distinct)
+
+    print(f"{'strategy':>8} {'us/op':>8} {'hit rate':>9} {'evictions':>10}")
+    direct = SlowStrategy(args.compute_us) if args.compute_us else DirectExecutionStrategy()
+    print(f"{'direct':>8} {measure(direct, calls, factory):>8.3f} {'-':>9} {'-':>10}")
+    for policy in ("lru", "lfu", "ttl"):
+        strategy = CachingExecutionStrategy(direct, policy=policy, maxsize=args.cache_size)
+        us = measure(strategy, calls, factory)
+        stats = strategy.stats()
+        print(f"{policy:>8} {us:>8.3f} {stats.hit_rate:>9.1%} {stats.evictions:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Cold vs warm runs of the shared on-disk result cache.
+
+A first "process" computes a workload of ``pow``/``root`` calls through a
+memory+SQLite cache and closes it; a second one, with a fresh in-memory
+tier, replays the same workload against the warm file, as a restarted REPL
+or another batch worker would. Worker processes then replay it
+concurrently against the same file.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_result_cache_disk
+    python -m benchmarks.bench_result_cache_disk --calls 50000 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.calculation.factory import CalculationFactory
+from app.result_cache import create_cache
+from app.strategy import CachingExecutionStrategy, DirectExecutionStrategy
+
+
+def workload(calls: int, seed: int = 11) -> list[tuple[str, float, float]]:
+    rng = np.random.default_rng(seed)
+    a = np.round(rng.uniform(-100, 100, calls), 2)
+    b = rng.integers(-4, 9, calls).astype(float)
+    ops = np.where(rng.random(calls) < 0.5, "pow", "root")
+    return list(zip(ops.tolist(), a.tolist(), b.tolist()))
+
+
+def replay(strategy, calls: list[tuple[str, float, float]]) -> float:
+    factory = CalculationFactory()
+    start = time.perf_counter()
+    for op_name, a, b in calls:
+        try:
+            strategy.execute(factory.create(op_name, a, b))
+        except (ArithmeticError, ValueError):
+            pass
+    return (time.perf_counter() - start) / len(calls) * 1e6
+
+
+def cached_run(path: Path, calls: list[tuple[str, float, float]]) -> tuple[float, float]:
+    strategy = CachingExecutionStrategy(cache=create_cache("lru", 4096, path=path))
+    us = replay(strategy, calls)
+    hit_rate = strategy.cache.back.stats().hit_rate
+    strategy.close()
+    return us, hit_rate
+
+
+def _worker(args: tuple[str, int]) -> tuple[float, float]:
+    path, calls = args
+    return cached_run(Path(path), workload(calls))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    calls = workload(args.calls)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "results.sqlite"
+        print(f"{'run':>8} {'us/op':>8} {'disk hit rate':>14}")
+        print(f"{'direct':>8} {replay(DirectExecutionStrategy(), calls):>8.3f} {'-':>14}")
+        for name in ("cold", "warm"):
+            us, hit_rate = cached_run(path, calls)
+            print(f"{name:>8} {us:>8.3f} {hit_rate:>14.1%}")
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.workers) as pool:
+            results = pool.map(_worker, [(str(path), args.calls)] * args.workers)
+        for i, (us, hit_rate) in enumerate(results):
+            print(f"{f'worker{i}':>8} {us:>8.3f} {hit_rate:>14.1%}")
+        print(f"file: {path.stat().st_size / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Service mode: a warm calculator vs a fresh process per script.
+
+``cold`` runs ``python -m app.calculator_repl --batch`` for a one-line
+script, paying interpreter startup, config and auto-loading a history of
+``--rows`` rows every time. ``connect`` runs the same script through
+``--connect`` against a service started once with ``--serve``. The other
+rows are in-process clients: one command per round trip, then the whole
+script pipelined (Unix socket) or sent as one request body (HTTP).
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_service
+    python -m benchmarks.bench_service --rows 1000000 --commands 100000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.calculation.history import CalculationHistory
+from app.calculator.client import ServiceClient
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    return min(timed(fn) for _ in range(repeat))
+
+
+def start_service(address: str, env: dict[str, str]) -> tuple[subprocess.Popen, str]:
+    """A ``--serve`` process and the address it reports (with the real port)."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.calculator_repl", "--serve", address],
+        cwd=_ROOT, env=env, stderr=subprocess.PIPE, text=True,
+    )
+    line = proc.stderr.readline()
+    if not line.startswith("Serving"):
+        proc.kill()
+        raise RuntimeError(f"service failed to start: {line.strip()}")
+    return proc, line.split(" on ", 1)[1].strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="history rows auto-loaded at startup")
+    parser.add_argument("--commands", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        rng = np.random.default_rng(3)
+        history = CalculationHistory()
+        a, b = rng.normal(size=args.rows), rng.normal(size=args.rows)
+        history.add_many(["add"] * args.rows, a, b, a + b)
+        history.save(tmp / "history.csv")
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(_ROOT),
+            "CALC_HISTORY_PATH": str(tmp / "history.csv"),
+            "CALC_AUTO_LOAD": "true",
+            "CALC_AUTO_SAVE": "false",
+            "CALCULATOR_MAX_HISTORY_SIZE": str(args.rows + 10 * args.commands),
+        }
+        script = tmp / "script.txt"
+        script.write_text("add 1 2\n")
+        socket_path = str(tmp / "calc.sock")
+
+        def cli(*extra: str) -> None:
+            subprocess.run(
+                [sys.executable, "-m", "app.calculator_repl", *extra, "--batch", str(script)],
+                cwd=_ROOT, env=env, check=True, capture_output=True,
+            )
+
+        rows = [("cold --batch", best_of(lambda: cli()))]
+        lines = [f"add {i} 1" for i in range(args.commands)]
+        n = min(2000, args.commands)
+        unix, unix_address = start_service(socket_path, env)
+        web_env = {**env, "CALC_HISTORY_PATH": str(tmp / "web.csv")}
+        web, web_address = start_service("http://127.0.0.1:0", web_env)
+        try:
+            rows.append(("--connect --batch", best_of(lambda: cli("--connect", socket_path))))
+            with ServiceClient(unix_address) as client:
+                rows.append((f"unix: {n} round trips", best_of(lambda: [client.command(x) for x in lines[:n]])))
+                rows.append((f"unix: {args.commands} pipelined", best_of(lambda: client.send(lines))))
+            with ServiceClient(web_address) as client:
+                rows.append((f"http: {n} requests", best_of(lambda: [client.command(x) for x in lines[:n]])))
+                rows.append((f"http: {args.commands} in one POST", best_of(lambda: client.send(lines))))
+        finally:
+            for proc in (unix, web):
+                proc.terminate()
+                proc.wait()
+
+    print(f"history of {args.rows} rows")
+    for label, seconds in rows:
+        print(f"{label:>28} {seconds * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Many sessions in one process: hit, evict and resume costs under a budget.
+
+``--sessions`` sessions each run ``--ops`` calculations, round-robin, with at
+most ``--live`` kept in memory. ``hit`` is a ``get`` + ``execute`` on a live
+session; ``miss`` also evicts the least recently used session (saving its
+history) and resumes the requested one from disk. Memory is the traced
+Python allocation peak; open files are counted from ``/proc/self/fd``.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_sessions
+    python -m benchmarks.bench_sessions --sessions 10000 --live 1000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.calculator.sessions import SessionManager
+
+
+def open_files() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def touch(manager: SessionManager, names: list[str], ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        for name in names:
+            manager.get(name).execute("add", i, 1)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=4000)
+    parser.add_argument("--live", type=int, default=500, help="max_sessions kept in memory")
+    parser.add_argument("--ops", type=int, default=3, help="calculations per session per pass")
+    args = parser.parse_args()
+
+    names = [f"user{i}" for i in range(args.sessions)]
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = SessionManager(tmp, max_sessions=args.live)
+        baseline_files = open_files()
+        tracemalloc.start()
+
+        warm = names[: args.live]
+        touch(manager, warm, 1)
+        hit = touch(manager, warm, args.ops) / (len(warm) * args.ops)
+
+        # Round-robin over more sessions than fit: every get evicts and resumes.
+        touch(manager, names, 1)
+        miss_ops = len(names)
+        miss = touch(manager, names, 1) / miss_ops
+
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        files = open_files() - baseline_files
+        stats = manager.stats()
+        manager.close()
+
+    print(f"{args.sessions} sessions, {args.live} live at most")
+    print(f"{'hit (get + execute)':>28} {hit * 1e6:>10.1f} us")
+    print(f"{'miss (evict + resume)':>28} {miss * 1e6:>10.1f} us")
+    print(f"{'peak traced memory':>28} {peak / 2**20:>10.1f} MiB")
+    print(f"{'extra open files':>28} {files:>10}")
+    print(f"{'created/resumed/evicted':>28} {stats.created}/{stats.resumed}/{stats.evicted}")
+
+
+if __name__ == "__main__":
+    main()
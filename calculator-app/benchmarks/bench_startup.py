@@ -0,0 +1,83 @@
+"""CLI startup import time, as a regression check (exits 1 on regression).
+
+Runs ``python -X importtime -c "import app.calculator_repl"`` in fresh
+interpreters and reports the best cumulative import time. It fails when a
+module that must stay off the startup path is imported (pandas is loaded
+only for analytics and CSV reads, colorama on first colored output,
+python-dotenv when a ``.env`` exists), or when the app's own import time,
+beyond importing NumPy, exceeds ``--budget`` times NumPy's import time.
+Measuring against NumPy in the same run keeps the check meaningful on
+slower or noisier machines.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 20 --budget 1.5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ENTRY_POINT = "app.calculator_repl"
+DEFERRED_MODULES = ("pandas", "pyarrow", "colorama", "dotenv", "sqlite3", "multiprocessing")
+# The app's own imports may take at most this many times as long as NumPy's
+# (about 1.1x after deferring pandas; it was 5.6x before).
+DEFAULT_BUDGET = 2.0
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module ``module`` pulls in."""
+    env = {**os.environ, "PYTHONPATH": str(_ROOT)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def best(module: str, runs: int) -> dict[str, int]:
+    return min((import_times(module) for _ in range(runs)), key=lambda times: times[module])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="max app/numpy import time ratio")
+    args = parser.parse_args()
+
+    app = best(ENTRY_POINT, args.runs)
+    numpy_ms = best("numpy", args.runs)["numpy"] / 1e3
+    total_ms = app[ENTRY_POINT] / 1e3
+    own_ms = total_ms - numpy_ms
+
+    print(f"import {ENTRY_POINT}: {total_ms:.1f} ms (best of {args.runs})")
+    print(f"  of which numpy:   {numpy_ms:.1f} ms")
+    budget_ms = args.budget * numpy_ms
+    print(f"  app and stdlib:   {own_ms:.1f} ms (budget {budget_ms:.1f} ms)")
+    top_level = [name for name in app if name.count(".") == 1 and name.startswith("app.") and name != ENTRY_POINT]
+    heaviest = sorted(((app[name], name) for name in top_level), reverse=True)
+    for ms, name in heaviest[:5]:
+        print(f"  {name:<28} {ms / 1e3:>7.1f} ms")
+
+    failures = [f"{name} is imported at startup" for name in DEFERRED_MODULES if name in app]
+    if own_ms > budget_ms:
+        failures.append(f"startup import time {own_ms:.1f} ms exceeds the {budget_ms:.1f} ms budget")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
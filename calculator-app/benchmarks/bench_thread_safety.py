@@ -0,0 +1,78 @@
+"""Throughput of one ``thread_safe`` calculator shared by 1..N threads.
+
+Every thread runs ``--ops`` scalar ``execute`` calls (or, with ``--batch``,
+``execute_many`` calls of that many rows) against the same calculator, with
+file logging attached. The first row is the default single-threaded
+calculator, to show what the lock costs when nobody contends for it. Each
+run also checks that no row was lost.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_thread_safety
+    python -m benchmarks.bench_thread_safety --threads 16 --batch 1000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app.calculator.facade import Calculator
+
+
+def run(threads: int, ops: int, batch: int, thread_safe: bool, tmp: Path) -> float:
+    # One path for every run: each new log file would add a handler to the shared "calculator" logger
+    calc = Calculator.create_default(history_path=tmp / "history.csv", max_undo_depth=100, thread_safe=thread_safe)
+    start_line = threading.Barrier(threads + 1)
+
+    def work(i: int) -> None:
+        start_line.wait()
+        if batch:
+            for n in range(ops):
+                calc.execute_many("add", [float(i)] * batch, [float(n)] * batch)
+        else:
+            for n in range(ops):
+                calc.execute("add", float(i), float(n))
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    start_line.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    rows = threads * ops * (batch or 1)
+    if len(calc.history) != rows:
+        raise SystemExit(f"lost rows: {len(calc.history)} of {rows}")
+    calc.close()
+    return rows / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8, help="largest thread count (runs 1, 2, 4, ...)")
+    parser.add_argument("--ops", type=int, default=5_000, help="calls per thread")
+    parser.add_argument("--batch", type=int, default=0, help="rows per execute_many call (0: scalar execute)")
+    args = parser.parse_args()
+
+    counts = [1]
+    while counts[-1] * 2 <= args.threads:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != args.threads:
+        counts.append(args.threads)
+
+    print(f"{'threads':>16} {'rows/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        rate = run(1, args.ops, args.batch, False, Path(tmp))
+        print(f"{'1 (unlocked)':>16} {rate:>12,.0f}")
+        for threads in counts:
+            rate = run(threads, args.ops, args.batch, True, Path(tmp))
+            print(f"{threads:>16} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Undo/redo memory and time over a long calculator session.
+
+The second part repeats execute, undo, execute on a history of ``--rows``
+rows: each new calculation lands where an undone one was, which should
+reuse the segment rather than copy it.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_undo_memory
+    python -m benchmarks.bench_undo_memory --ops 20000 --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+from app.calculator.facade import Calculator
+
+
+def run_session(ops: int) -> None:
+    calc = Calculator(
+        factory=CalculationFactory(),
+        history=CalculationHistory(),
+        history_path=Path("history.csv"),
+    )
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(ops):
+        calc.execute("add", float(i), 1.0)
+        if i % 1000 == 999:
+            calc.clear()
+            calc.undo()
+    execute_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    rows = len(calc.history)
+
+    start = time.perf_counter()
+    while calc.undo():
+        pass
+    undo_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    while calc.redo():
+        pass
+    redo_s = time.perf_counter() - start
+    tracemalloc.stop()
+
+    print(f"operations:       {ops:,}")
+    print(f"history rows:     {rows:,}")
+    print(f"execute total:    {execute_s:.3f} s ({ops / execute_s:,.0f} ops/s)")
+    print(f"peak traced heap: {peak / 1_000_000:.1f} MB")
+    print(f"undo all:         {undo_s:.3f} s")
+    print(f"redo all:         {redo_s:.3f} s")
+
+
+def run_undo_execute(rows: int, cycles: int) -> None:
+    calc = Calculator(
+        factory=CalculationFactory(),
+        history=CalculationHistory(),
+        history_path=Path("history.csv"),
+        max_undo_depth=cycles,
+    )
+    calc.execute_many("add", np.arange(rows, dtype=np.float64), 1.0)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(cycles):
+        calc.execute("add", float(i), 1.0)
+        calc.undo()
+        calc.execute("add", float(i), 2.0)
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    segments = len({id(snap.columns) for snap in calc._undo_stack})
+
+    print(f"undo->execute:    {cycles:,} cycles on {rows:,} rows")
+    print(f"  total:          {elapsed:.3f} s ({elapsed / cycles * 1e6:,.1f} us/cycle)")
+    print(f"  held by undo:   {held / 1_000_000:.1f} MB in {segments} segment(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=100_000)
+    parser.add_argument("--rows", type=int, default=200_000, help="history size for the undo->execute cycles")
+    parser.add_argument("--cycles", type=int, default=200)
+    args = parser.parse_args()
+    run_session(args.ops)
+    run_undo_execute(args.rows, args.cycles)
+
+
+if __name__ == "__main__":
+    main()
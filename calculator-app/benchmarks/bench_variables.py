@@ -0,0 +1,93 @@
+"""Incremental variable recompute vs replaying every formula.
+
+Builds ``--chains`` independent chains of ``--length`` variables each
+(``c0_1 = c0_0 * 1.0001 + 1``, ...), then repeatedly changes one chain's
+input. The graph re-evaluates only that chain; a full replay re-evaluates
+every formula in dependency order, which is what a session without a
+dependency graph would have to do. Undo is timed too: it restores the
+variable table from the history snapshot without recomputing.
+
+Run from the calculator-app directory:
+
+    python -m benchmarks.bench_variables
+    python -m benchmarks.bench_variables --chains 500 --length 20
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.calculation.expression import ExpressionCompiler
+from app.calculation.variables import VariableGraph
+from app.calculator.facade import Calculator
+
+
+def build(graph: VariableGraph, compiler: ExpressionCompiler, chains: int, length: int) -> list[tuple]:
+    """Define the chains; returns every variable's (name, expression) in dependency order."""
+    order = []
+    for c in range(chains):
+        root = compiler.compile("1")
+        graph.assign(f"c{c}_0", root, {}, 1.0)
+        order.append((f"c{c}_0", root))
+        for i in range(1, length):
+            expression = compiler.compile(f"c{c}_{i - 1} * 1.0001 + 1")
+            value = expression.evaluate({f"c{c}_{i - 1}": graph.get(f"c{c}_{i - 1}").value})
+            graph.assign(f"c{c}_{i}", expression, {}, value)
+            order.append((f"c{c}_{i}", expression))
+    return order
+
+
+def replay(order: list[tuple], inputs: dict[str, float]) -> dict[str, float]:
+    values = dict(inputs)
+    for name, expression in order:
+        if name not in values:
+            values[name] = expression.evaluate(values)
+    return values
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chains", type=int, default=100)
+    parser.add_argument("--length", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    compiler = ExpressionCompiler(cache_size=args.chains * args.length + 16)
+    graph = VariableGraph()
+    order = build(graph, compiler, args.chains, args.length)
+    constant = compiler.compile("2")
+    total = args.chains * args.length
+
+    start = time.perf_counter()
+    for n in range(args.repeat):
+        graph.assign(f"c{n % args.chains}_0", constant, {}, float(n))
+    incremental = (time.perf_counter() - start) / args.repeat * 1e6
+    per_change = graph.recomputed_total / args.repeat
+
+    start = time.perf_counter()
+    for n in range(args.repeat):
+        replay(order, {f"c{c}_0": float(n) for c in range(args.chains)})
+    full = (time.perf_counter() - start) / args.repeat * 1e6
+
+    print(f"{total} variables in {args.chains} chains of {args.length}")
+    print(f"{'case':>20} {'us/change':>10} {'recomputes':>11}")
+    print(f"{'incremental':>20} {incremental:>10.1f} {per_change:>11.0f}")
+    print(f"{'full replay':>20} {full:>10.1f} {total - args.chains:>11}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calc = Calculator.create_default(history_path=Path(tmp) / "history.csv", max_undo_depth=args.repeat)
+        calc.history.variables = graph
+        for n in range(args.repeat):
+            calc.assign(f"c{n % args.chains}_0", str(n))
+        start = time.perf_counter()
+        while calc.undo():
+            pass
+        undo = (time.perf_counter() - start) / args.repeat * 1e6
+        calc.close()
+    print(f"{'undo':>20} {undo:>10.1f} {0:>11}")
+
+
+if __name__ == "__main__":
+    main()
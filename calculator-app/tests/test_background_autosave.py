@@ -0,0 +1,117 @@
+import signal
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.calculator.cli import _install_signal_handlers, _raise_system_exit, _restore_signal_handlers
+from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+from app.exceptions import ConfigurationError
+from app.observers import BackgroundAutoSaveObserver
+
+
+def test_background_autosave_coalesces_bursts():
+    calls: list[str] = []
+    obs = BackgroundAutoSaveObserver(save_func=lambda: calls.append("saved"), delay=10, max_batch=5)
+
+    for _ in range(12):
+        obs.update("calculation_added", {})
+    obs.flush()
+
+    assert obs.events == 12
+    assert 1 <= obs.saves == len(calls) < 12
+    obs.close()
+
+
+def test_background_autosave_saves_after_delay():
+    saved = threading.Event()
+    obs = BackgroundAutoSaveObserver(save_func=saved.set, delay=0.01, max_batch=100)
+
+    obs.update("undo", {})
+    assert saved.wait(timeout=5)
+    obs.close()
+
+
+def test_background_autosave_ignores_other_events_and_closed_state():
+    calls: list[str] = []
+    obs = BackgroundAutoSaveObserver(save_func=lambda: calls.append("saved"))
+
+    obs.update("history_saved", {})
+    obs.flush()
+    assert obs._thread is None
+
+    obs.update("redo", {})
+    obs.close()
+    obs.update("redo", {})
+    obs.close()
+    assert calls == ["saved"]
+
+
+def test_background_autosave_records_errors():
+    def failing_save() -> None:
+        raise OSError("disk full")
+
+    obs = BackgroundAutoSaveObserver(save_func=failing_save, delay=0)
+    obs.update("calculation_added", {})
+    obs.close()
+
+    assert isinstance(obs.last_error, OSError)
+    assert obs.saves == 0
+
+
+@pytest.mark.parametrize("kwargs", [{"delay": -1}, {"max_batch": 0}])
+def test_background_autosave_rejects_bad_settings(kwargs):
+    with pytest.raises(ValueError):
+        BackgroundAutoSaveObserver(save_func=lambda: None, **kwargs)
+
+
+@pytest.mark.parametrize("mode", ["snapshot", "journal"])
+def test_calculator_async_autosave_flushes_on_close(tmp_path: Path, mode: str):
+    path = tmp_path / "history.csv"
+    calc = Calculator.create_default(
+        history_path=path, auto_save=True, autosave_mode=mode, autosave_async=True, autosave_delay=10
+    )
+    for i in range(20):
+        calc.execute("add", i, 1)
+    calc.undo()
+    calc.close()
+
+    reopened = Calculator.create_default(history_path=path, autosave_mode=mode, auto_load=True)
+    assert reopened.history_lines() == calc.history_lines()
+    assert len(reopened.history) == 19
+
+
+def test_signal_handlers_turn_sigterm_into_system_exit():
+    previous = _install_signal_handlers()
+    try:
+        assert signal.getsignal(signal.SIGTERM) is _raise_system_exit
+        with pytest.raises(SystemExit):
+            _raise_system_exit(signal.SIGTERM, None)
+    finally:
+        _restore_signal_handlers(previous)
+    assert signal.getsignal(signal.SIGTERM) is not _raise_system_exit
+
+
+def test_signal_handlers_are_skipped_off_main_thread():
+    result: list[dict] = []
+    worker = threading.Thread(target=lambda: result.append(_install_signal_handlers()))
+    worker.start()
+    worker.join()
+    assert result == [{}]
+
+
+def test_load_config_async_autosave_settings(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("CALCULATOR_AUTO_SAVE_ASYNC", "true")
+    monkeypatch.setenv("CALCULATOR_AUTO_SAVE_DELAY", "0.25")
+    monkeypatch.setenv("CALCULATOR_AUTO_SAVE_BATCH", "10")
+
+    cfg = load_config()
+    assert cfg.autosave_async is True
+    assert cfg.autosave_delay == 0.25
+    assert cfg.autosave_batch == 10
+
+    monkeypatch.setenv("CALCULATOR_AUTO_SAVE_DELAY", "-1")
+    with pytest.raises(ConfigurationError):
+        load_config()
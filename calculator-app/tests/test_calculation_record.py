@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pytest
+
+from app.calculation.columns import OPERATIONS
+from app.calculation.factory import CalculationFactory
+from app.calculation.models import Calculation
+from app.calculator.facade import Calculator
+from app.observers import InMemoryLoggerObserver
+from app.operation.arithmetic import Add
+
+
+class CountingAdd(Add):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def compute(self, a, b):
+        self.calls += 1
+        return super().compute(a, b)
+
+
+def test_result_is_computed_once_and_cached():
+    op = CountingAdd()
+    calc = Calculation(op, 2, 3)
+
+    assert calc.result() == 5
+    assert calc.format() == "add 2 3 = 5"
+    assert op.calls == 1
+
+
+def test_record_is_slotted_and_compares_on_operands():
+    factory = CalculationFactory()
+    calc = factory.create("mul", 2, 4)
+
+    assert not hasattr(calc, "__dict__")
+    assert calc.code == OPERATIONS.code("mul")
+    calc.result()
+    assert calc == factory.create("mul", 2, 4)
+    assert calc != factory.create("mul", 2, 5)
+    assert hash(calc) == hash(factory.create("mul", 2, 4))
+    with pytest.raises(AttributeError):
+        calc.note = "extra"
+
+
+def test_execute_computes_once_per_operation(tmp_path: Path, monkeypatch):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    op = CountingAdd()
+    monkeypatch.setitem(calc.factory._ops, "add", op)
+
+    calc.execute("add", 1, 2)
+
+    assert op.calls == 1
+
+
+def test_history_and_observers_store_the_strategy_result(tmp_path: Path):
+    class DoubleResultStrategy:
+        def execute(self, calc) -> float:
+            return 2 * calc.result()
+
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    calc.strategy = DoubleResultStrategy()
+    events = InMemoryLoggerObserver()
+    calc.attach(events)
+
+    assert calc.execute("add", 2, 3) == 10
+    assert calc.history_lines() == ["add 2.0 3.0 = 10.0"]
+    assert "'result': 10" in events.lines[0]
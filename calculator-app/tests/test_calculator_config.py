@@ -1,10 +1,12 @@
+import json
 import os
 from pathlib import Path
 
 import pytest
 
-from app.calculator_config import load_config
+from app.calculator_config import CalculatorConfig, load_config, parse_config, reload_config, use_profile
 from app.exceptions import ConfigurationError
+from app.strategy import create_strategy
 
 
 def test_load_config_defaults(monkeypatch, tmp_path: Path):
@@ -52,4 +54,95 @@ def test_load_config_rejects_invalid_bool(monkeypatch, tmp_path: Path, bad: str)
     monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
     monkeypatch.setenv("CALC_AUTO_LOAD", bad)
     with pytest.raises(ConfigurationError):
-        load_config()
\ No newline at end of file
+        load_config()
+
+def test_load_config_reads_the_nearest_dotenv(monkeypatch, tmp_path: Path):
+    import app.calculator_config as config_module
+
+    package = tmp_path / "project" / "app"
+    package.mkdir(parents=True)
+    (tmp_path / "project" / ".env").write_text("CALC_AUTO_SAVE=yes\n")
+    monkeypatch.setattr(config_module, "__file__", str(package / "calculator_config.py"))
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.delenv("CALC_AUTO_SAVE", raising=False)
+    try:
+        assert load_config().auto_save is True
+    finally:
+        os.environ.pop("CALC_AUTO_SAVE", None)
+
+
+def test_load_config_is_cached_until_the_environment_changes(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("CALCULATOR_PRECISION", "3")
+    first = load_config()
+    assert load_config() is first
+
+    monkeypatch.setenv("CALCULATOR_PRECISION", "4")
+    assert load_config().precision == 4
+    assert reload_config() is not first
+
+
+def test_legacy_history_path_keeps_its_lenient_file_names(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALCULATOR_LOG_FILE", " ")
+    with pytest.raises(ConfigurationError, match="CALCULATOR_LOG_FILE"):
+        parse_config()
+
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    cfg = parse_config()
+    assert cfg.log_file == "calculator.log"
+    assert cfg.history_path == tmp_path / "history.csv"
+    assert parse_config({"CALCULATOR_PRECISION": "2"}).precision == 2
+
+
+def test_dotenv_is_read_again_when_it_changes(monkeypatch, tmp_path: Path):
+    import app.calculator_config as config_module
+
+    package = tmp_path / "project" / "app"
+    package.mkdir(parents=True)
+    dotenv = tmp_path / "project" / ".env"
+    dotenv.write_text("CALCULATOR_PRECISION=2\nCALCULATOR_MAX_UNDO_DEPTH=7\n")
+    monkeypatch.setattr(config_module, "__file__", str(package / "calculator_config.py"))
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("CALCULATOR_MAX_UNDO_DEPTH", "9")  # the environment wins over .env
+    monkeypatch.delenv("CALCULATOR_PRECISION", raising=False)
+    try:
+        cfg = load_config()
+        assert (cfg.precision, cfg.max_undo_depth) == (2, 9)
+
+        dotenv.write_text("CALCULATOR_AUTO_SAVE=yes\n")
+        stat = dotenv.stat()
+        os.utime(dotenv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        cfg = load_config()
+        assert (cfg.precision, cfg.auto_save, cfg.max_undo_depth) == (6, True, 9)
+    finally:
+        dotenv.unlink()
+        reload_config()
+    assert "CALCULATOR_AUTO_SAVE" not in os.environ
+
+
+def test_profile_round_trips_and_pins_load_config(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    cfg = reload_config()
+    profile = json.loads(json.dumps(cfg.to_profile()))
+    assert CalculatorConfig.from_profile(profile) == cfg
+    with pytest.raises(ConfigurationError, match="unknown: \\['extra'\\]"):
+        CalculatorConfig.from_profile({**profile, "extra": 1})
+
+    pinned = use_profile({**profile, "precision": 1})
+    try:
+        monkeypatch.setenv("CALCULATOR_PRECISION", "5")
+        assert load_config() is pinned
+    finally:
+        assert reload_config().precision == 5
+
+
+def test_process_pool_workers_get_the_config_profile(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("CALCULATOR_PRECISION", "8")
+    cfg = load_config()
+    strategy = create_strategy("process", max_workers=1, config_profile=cfg.to_profile())
+    monkeypatch.setenv("CALCULATOR_PRECISION", "3")  # inherited by the worker, but not parsed there
+    try:
+        assert strategy.executor.submit(load_config).result().precision == 8
+    finally:
+        strategy.close()
@@ -0,0 +1,149 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from app.calculator.cli import handle_line, run_batch, run_batch_file
+from app.calculator.facade import Calculator
+from app.calculator_repl import main
+from app.observers import InMemoryLoggerObserver
+
+SCRIPT = """\
+# comment lines and blanks are skipped
+add 1 2
+
+div 1 0
+modulus 7 3
+foo 1 2
+add x 1
+history 2
+pow -8 0.5
+root 27 3
+"""
+
+
+@pytest.fixture
+def batch_env(monkeypatch, tmp_path: Path) -> Path:
+    history = tmp_path / "history.csv"
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(history))
+    monkeypatch.setenv("CALC_AUTO_LOAD", "false")
+    monkeypatch.setenv("CALC_AUTO_SAVE", "false")
+    return history
+
+
+def test_run_batch_keeps_input_order_and_counts(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    out = io.StringIO()
+
+    summary = run_batch(SCRIPT.splitlines(), calc, out)
+
+    assert out.getvalue().splitlines() == [
+        "Result: 3.0",
+        "Error: Cannot divide by zero.",
+        "Result: 1.0",
+        "Error: Unsupported operation: foo",
+        "Error: Inputs must be numbers.",
+        "add 1.0 2.0 = 3.0",
+        "modulus 7.0 3.0 = 1.0",
+        "Error: Result is not a real number. (complex)",
+        "Result: 3.0",
+    ]
+    assert (summary.commands, summary.calculations, summary.errors) == (8, 3, 4)
+    assert "8 commands (3 calculations, 4 errors)" in summary.line()
+
+
+def test_run_batch_runs_are_one_event_but_undo_steps_per_command(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    events = InMemoryLoggerObserver()
+    calc.attach(events)
+
+    run_batch(["add 1 1", "mul 2 3", "sub 5 1", "undo", "add 2 2", "exit", "add 9 9"], calc, io.StringIO())
+
+    assert calc.history_lines() == ["add 1.0 1.0 = 2.0", "mul 2.0 3.0 = 6.0", "add 2.0 2.0 = 4.0"]
+    assert sum(line.startswith("calculations_added") for line in events.lines) == 2
+
+
+@pytest.mark.parametrize("undo_depth,history_size", [(100, None), (2, None), (3, 4)])
+def test_run_batch_prints_what_the_repl_prints(tmp_path: Path, undo_depth: int, history_size: int | None):
+    script = [
+        "add 1 2", "add 3 4", "undo", "history",
+        "mul 2 3", "div 1 0", "sub 9 1", "pow 2 3", "undo", "undo", "stats", "redo", "history",
+        "add 5 5", "redo", "undo", "undo", "undo", "undo", "history", "stats",
+    ]
+    repl = Calculator.create_default(
+        history_path=tmp_path / "repl.csv", max_undo_depth=undo_depth, max_history_size=history_size
+    )
+    expected = "\n".join(handle_line(line, repl) for line in script).splitlines()
+
+    calc = Calculator.create_default(
+        history_path=tmp_path / "batch.csv", max_undo_depth=undo_depth, max_history_size=history_size
+    )
+    out = io.StringIO()
+    run_batch(script, calc, out)
+
+    assert out.getvalue().splitlines() == expected
+    assert expected[3] == "add 1.0 2.0 = 3.0"
+    assert calc.undo_evicted_total == repl.undo_evicted_total
+
+
+def test_run_batch_reports_bad_lines_as_the_repl_does(tmp_path: Path):
+    script = ["foo x 2", "foo 1 2", "add x 2", "add 1", "plus 1 y", "mod 1 0"]
+    repl = Calculator.create_default(history_path=tmp_path / "repl.csv")
+    expected = [handle_line(line, repl) for line in script]
+
+    out = io.StringIO()
+    run_batch(script, Calculator.create_default(history_path=tmp_path / "batch.csv"), out)
+
+    assert out.getvalue().splitlines() == expected
+    assert expected[0] == "Error: Inputs must be numbers."
+
+
+def test_run_batch_size_bounds_each_vectorized_run(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+
+    run_batch([f"add {i} 1" for i in range(5)], calc, io.StringIO(), batch_size=2)
+
+    assert len(calc.history) == 5
+    assert len(calc._undo_stack) == 5
+
+
+def test_run_batch_file_writes_plain_output_and_summary(batch_env: Path, tmp_path: Path):
+    script = tmp_path / "commands.txt"
+    script.write_text(SCRIPT + "save\n", encoding="utf-8")
+    out, report = io.StringIO(), io.StringIO()
+
+    status = run_batch_file(script, out=out, report=report)
+
+    assert status == 0
+    assert "\x1b[" not in out.getvalue()
+    assert out.getvalue().splitlines()[0] == "Result: 3.0"
+    assert report.getvalue().startswith("Processed 9 commands")
+    assert batch_env.exists()
+
+
+def test_run_batch_file_reads_stdin_and_reports_missing_file(batch_env: Path, monkeypatch, tmp_path: Path):
+    monkeypatch.setattr("sys.stdin", io.StringIO("mul 6 7\n"))
+    out, report = io.StringIO(), io.StringIO()
+    assert run_batch_file("-", out=out, report=report) == 0
+    assert out.getvalue() == "Result: 42.0\n"
+
+    report = io.StringIO()
+    assert run_batch_file(tmp_path / "missing.txt", out=io.StringIO(), report=report) == 1
+    assert report.getvalue().startswith("Error:")
+
+
+def test_run_batch_file_config_error(monkeypatch):
+    monkeypatch.setenv("CALC_HISTORY_PATH", "")
+    report = io.StringIO()
+    assert run_batch_file("-", out=io.StringIO(), report=report) == 2
+    assert report.getvalue().startswith("Configuration error")
+
+
+def test_main_batch_flag(batch_env: Path, tmp_path: Path, capfd):
+    script = tmp_path / "commands.txt"
+    script.write_text("add 2 3\n", encoding="utf-8")
+
+    assert main(["--batch", str(script), "--batch-size", "1"]) == 0
+    captured = capfd.readouterr()
+    assert captured.out == "Result: 5.0\n"
+    assert "Processed 1 commands" in captured.err
@@ -0,0 +1,217 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+from app.event_bus import ObserverBus
+from app.exceptions import ConfigurationError
+from app.observers import InMemoryLoggerObserver
+
+
+class GatedObserver:
+    """Records events, holding the worker inside ``update`` until ``gate`` is set."""
+
+    def __init__(self) -> None:
+        self.events: list[str] = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def update(self, event: str, payload: dict) -> None:
+        self.entered.set()
+        self.gate.wait(5)
+        self.events.append(f"{event}:{payload['n']}")
+
+
+class BatchObserver:
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def update(self, event: str, payload: dict) -> None:  # pragma: no cover - batches preferred
+        raise AssertionError("update_batch should be used")
+
+    def update_batch(self, events) -> None:
+        self.batches.append([event for event, _ in events])
+
+
+def stall(bus: ObserverBus, observer: GatedObserver) -> None:
+    """Occupy the worker with one event so later ones queue up."""
+    bus.publish("first", {"n": 0})
+    assert observer.entered.wait(5)
+
+
+def test_events_are_delivered_in_order_off_the_caller_thread():
+    bus = ObserverBus()
+    seen = InMemoryLoggerObserver()
+    threads: list[str] = []
+    bus.subscribe(seen)
+    bus.subscribe(type("T", (), {"update": lambda self, e, p: threads.append(threading.current_thread().name)})())
+
+    for n in range(100):
+        bus.publish("calculation_added", {"n": n})
+    bus.flush()
+
+    assert seen.lines == [f"calculation_added: {{'n': {n}}}" for n in range(100)]
+    assert set(threads) == {"calculator-events"}
+    stats = bus.stats()
+    assert (stats.published, stats.delivered, stats.depth, stats.dropped) == (100, 200, 0, 0)
+    assert stats.max_depth >= 1 and stats.max_latency >= stats.mean_latency > 0
+    bus.close()
+
+
+def test_drop_oldest_keeps_the_newest_events():
+    bus = ObserverBus(maxsize=3, policy="drop_oldest")
+    observer = GatedObserver()
+    bus.subscribe(observer)
+    stall(bus, observer)
+
+    for n in range(1, 7):
+        bus.publish("e", {"n": n})
+    assert bus.stats().depth == 3
+    observer.gate.set()
+    bus.close()
+
+    assert observer.events == ["first:0", "e:4", "e:5", "e:6"]
+    assert bus.stats().dropped == 3
+
+
+def test_coalesce_keeps_the_newest_payload_per_event():
+    bus = ObserverBus()
+    observer = GatedObserver()
+    bus.subscribe(observer, "coalesce")
+    stall(bus, observer)
+
+    for n in range(1, 5):
+        bus.publish("calculation_added", {"n": n})
+    bus.publish("undo", {"n": 5})
+    bus.publish("calculation_added", {"n": 6})
+    observer.gate.set()
+    bus.flush()
+
+    assert observer.events == ["first:0", "undo:5", "calculation_added:6"]
+    assert bus.stats().coalesced == 4
+    bus.close()
+
+
+def test_block_makes_the_publisher_wait_for_room():
+    bus = ObserverBus(maxsize=1)
+    observer = GatedObserver()
+    bus.subscribe(observer)
+    stall(bus, observer)
+    bus.publish("e", {"n": 1})
+
+    publisher = threading.Thread(target=bus.publish, args=("e", {"n": 2}))
+    publisher.start()
+    publisher.join(0.1)
+    assert publisher.is_alive()
+
+    observer.gate.set()
+    publisher.join(5)
+    bus.close()
+    assert observer.events == ["first:0", "e:1", "e:2"]
+
+
+def test_batch_delivery_and_failing_observers():
+    bus = ObserverBus()
+    batch = BatchObserver()
+    gated = GatedObserver()
+    bus.subscribe(gated)
+    bus.subscribe(batch)
+    bus.subscribe(type("Broken", (), {"update": lambda self, e, p: 1 / 0})())
+    stall(bus, gated)
+    for n in range(1, 4):
+        bus.publish("e", {"n": n})
+    gated.gate.set()
+    bus.flush()
+
+    assert sum(batch.batches, []) == ["first", "e", "e", "e"]
+    assert len(batch.batches) < 4
+    assert isinstance(bus.last_error, ZeroDivisionError) and bus.stats().errors >= 2
+    bus.close()
+
+
+def test_close_flushes_closes_observers_and_then_delivers_inline():
+    bus = ObserverBus()
+    closed = []
+    observer = InMemoryLoggerObserver()
+    observer.close = lambda: closed.append(True)
+    bus.subscribe(observer)
+    bus.publish("a", {})
+    bus.close()
+    assert observer.lines == ["a: {}"] and closed == [True]
+
+    bus.publish("b", {})
+    assert observer.lines[-1] == "b: {}"
+    bus.flush()
+    with pytest.raises(ValueError):
+        ObserverBus(policy="lifo")
+    with pytest.raises(ValueError):
+        ObserverBus(maxsize=0)
+    with pytest.raises(ValueError):
+        bus.subscribe(observer, "lifo")
+
+
+def test_counters_stay_consistent_when_publishers_deliver_after_close():
+    bus = ObserverBus()
+    bus.subscribe(InMemoryLoggerObserver())
+    bus.subscribe(type("Broken", (), {"update": lambda self, e, p: 1 / 0})())
+    bus.publish("before", {})
+    bus.close()
+
+    def publish() -> None:
+        for _ in range(200):
+            bus.publish("after", {})
+
+    threads = [threading.Thread(target=publish) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = bus.stats()
+    assert (stats.published, stats.delivered, stats.errors, stats.depth) == (801, 2 * 801, 801, 0)
+    assert stats.max_latency >= stats.mean_latency > 0
+
+
+def test_calculator_async_dispatch_logs_and_autosaves(tmp_path: Path):
+    log = tmp_path / "calc.log"
+    calc = Calculator.create_default(
+        history_path=tmp_path / "history.csv",
+        log_path=log,
+        auto_save=True,
+        observer_dispatch="async",
+        observer_queue_size=1,
+    )
+    events = InMemoryLoggerObserver()
+    calc.attach(events)
+    for n in range(20):
+        calc.execute("add", float(n), 1.0)
+    calc.flush_events()
+
+    assert [line.split(":")[0] for line in events.lines].count("calculation_added") == 20
+    assert "history_saved" in events.lines[-1]  # published from the worker without deadlocking
+    assert "op=add a=19.0 b=1.0 result=20.0" in log.read_text()
+    calc.close()
+    assert (tmp_path / "history.csv").read_text().count("\n") == 21
+
+    with pytest.raises(ValueError, match="observer dispatch"):
+        Calculator.create_default(history_path=tmp_path / "h.csv", observer_dispatch="later")
+
+
+def test_config_reads_observer_dispatch(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALCULATOR_HISTORY_DIR", str(tmp_path))
+    cfg = load_config()
+    assert (cfg.observer_dispatch, cfg.observer_queue_size, cfg.observer_backpressure) == ("sync", 1024, "block")
+
+    monkeypatch.setenv("CALCULATOR_OBSERVER_DISPATCH", "async")
+    monkeypatch.setenv("CALCULATOR_OBSERVER_QUEUE_SIZE", "16")
+    monkeypatch.setenv("CALCULATOR_OBSERVER_BACKPRESSURE", "drop_oldest")
+    cfg = load_config()
+    assert (cfg.observer_dispatch, cfg.observer_queue_size, cfg.observer_backpressure) == ("async", 16, "drop_oldest")
+
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "legacy.csv"))
+    assert load_config().observer_backpressure == "drop_oldest"
+    monkeypatch.setenv("CALCULATOR_OBSERVER_BACKPRESSURE", "newest")
+    with pytest.raises(ConfigurationError):
+        load_config()
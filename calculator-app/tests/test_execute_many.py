@@ -0,0 +1,121 @@
+import itertools
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.calculation.factory import CalculationFactory
+from app.calculator.facade import Calculator
+from app.observers import InMemoryLoggerObserver
+from app.operation.base import Operation, compute_elementwise
+
+SPECIAL = [
+    -27, -8, -2.5, -1, -1 / 3, -0.0, 0.0, 1e-320, 1e-5, 1 / 3, 0.5, 1, 2, 3, 7, 400, 694.87,
+    2**53 + 1.0, 1e308, -1e308, math.inf, -math.inf, math.nan,
+]
+
+
+def scalar_outcome(op: Operation, a: float, b: float):
+    try:
+        return op.compute(a, b), None
+    except (ArithmeticError, ValueError) as exc:
+        return None, exc
+
+
+@pytest.mark.parametrize("op_name", CalculationFactory().supported)
+def test_compute_array_matches_scalar_compute_exactly(op_name: str):
+    op = CalculationFactory().operation(op_name)
+    pairs = list(itertools.product(SPECIAL, SPECIAL))
+    a = np.array([x for x, _ in pairs])
+    b = np.array([y for _, y in pairs])
+
+    batch = op.compute_array(a, b)
+
+    for i, (x, y) in enumerate(pairs):
+        value, exc = scalar_outcome(op, float(x), float(y))
+        got = batch.error_at(i)
+        if exc is not None:
+            assert (type(got), str(got)) == (type(exc), str(exc)), (x, y)
+            assert math.isnan(batch.values[i])
+        else:
+            assert got is None, (x, y, got)
+            assert str(batch.values[i]) == str(value), (x, y)  # bit-exact incl. -0.0 and nan
+
+
+def test_error_masks_report_each_failure_once():
+    batch = CalculationFactory().operation("root").compute_array([8, -8, -16, 4, 9], [3, 3, 2, 0, 0.5])
+
+    assert batch.ok.tolist() == [True, True, False, False, True]
+    assert batch.values[[0, 1, 4]].tolist() == [2.0, -2.0, 81.0]
+    messages = {str(exc): where.tolist() for exc, where in batch.errors}
+    assert messages == {
+        "Even root of a negative number is not a real number.": [False, False, True, False, False],
+        "Cannot take a root with exponent 0.": [False, False, False, True, False],
+    }
+
+
+def test_operations_without_kernel_fall_back_to_scalar_compute():
+    class Hypot(Operation):
+        name = "hypot"
+
+        def compute(self, a, b):
+            if a < 0:
+                raise ValueError("negative")
+            return math.hypot(a, b)
+
+    batch = Hypot().compute_array([3, -1], 4)
+    assert batch.values[0] == 5.0
+    assert isinstance(batch.error_at(1), ValueError)
+    assert compute_elementwise(Hypot().compute, [], []).values.size == 0
+
+
+def test_execute_many_is_one_history_change(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    events = InMemoryLoggerObserver()
+    calc.attach(events)
+    calc.execute("add", 1, 1)
+
+    batch = calc.execute_many("div", [6, 1, 9], [3, 0, 3])
+
+    assert batch.values[0] == 2.0 and math.isnan(batch.values[1])
+    assert isinstance(batch.error_at(1), ZeroDivisionError)
+    assert calc.history_lines()[1:] == ["div 6.0 3.0 = 2.0", "div 9.0 3.0 = 3.0"]
+    assert [line for line in events.lines if line.startswith("calculations_added")] == [
+        "calculations_added: {'operation': 'div', 'count': 2, 'failed': 1}"
+    ]
+
+    assert calc.undo()
+    assert calc.history_lines() == ["add 1.0 1.0 = 2.0"]
+
+
+def test_execute_many_all_failed_leaves_history_alone(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+
+    batch = calc.execute_many("mod", [1, 2], 0)
+
+    assert not batch.ok.any()
+    assert calc.undo() is False
+    with pytest.raises(ValueError):
+        calc.execute_many("nope", [1], [2])
+    with pytest.raises(ValueError):
+        calc.execute_many("add", [1, 2, 3], [1, 2])
+
+
+def test_execute_many_respects_custom_scalar_strategy(tmp_path: Path):
+    class DoubleResultStrategy:
+        def execute(self, calc) -> float:
+            return 2 * calc.result()
+
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    calc.strategy = DoubleResultStrategy()
+
+    assert calc.execute_many("add", [1, 2], [3, 4]).values.tolist() == [8.0, 12.0]
+
+
+def test_execute_many_with_max_history_size_evicts(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv", max_history_size=3)
+    calc.execute_many("add", np.arange(5), 1)
+
+    assert calc.history_lines() == ["add 2.0 1.0 = 3.0", "add 3.0 1.0 = 4.0", "add 4.0 1.0 = 5.0"]
+    assert calc.history.evicted_total == 2
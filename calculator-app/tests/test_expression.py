@@ -0,0 +1,188 @@
+import io
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.calculation.expression import BinOp, ExpressionCompiler, Num, Var, tokenize
+from app.calculator.cli import handle_line, run_batch
+from app.calculator.facade import Calculator
+from app.exceptions import ValidationError
+from app.observers import InMemoryLoggerObserver
+
+
+@pytest.fixture
+def compiler():
+    return ExpressionCompiler()
+
+
+@pytest.fixture
+def calc(tmp_path: Path):
+    return Calculator.create_default(history_path=tmp_path / "history.csv")
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        ("(2 ^ 10) root 3 + 7 % 4", 1024 ** (1 / 3) + 3),
+        ("2 + 3 * 4", 14.0),
+        ("(2 + 3) * 4", 20.0),
+        ("10 - 2 - 3", 5.0),
+        ("2 ^ 3 ^ 2", 512.0),
+        ("-2 ^ 2", -4.0),
+        ("2 ^ -1", 0.5),
+        ("2 * -3 + +1", -5.0),
+        ("7 // 2 + 1.5e1", 18.0),
+        ("8 int_divide 3 percent 4", 50.0),
+        ("3 abs_diff 10 modulus 4", 3.0),
+    ],
+)
+def test_precedence_and_operators(compiler, source: str, expected: float):
+    assert compiler.compile(source).evaluate() == pytest.approx(expected)
+
+
+def test_constants_fold_below_the_final_step(compiler):
+    expression = compiler.compile("(2 ^ 10) root 3 + 7 % 4")
+    assert expression.tree == BinOp("add", Num(1024 ** (1 / 3)), Num(3.0))
+    assert expression.operation.name == "add"
+
+    # A failing constant step is left for evaluation to report
+    failing = compiler.compile("1 / 0 + x")
+    assert failing.tree == BinOp("add", BinOp("div", Num(1.0), Num(0.0)), Var("x"))
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero."):
+        failing.evaluate({"x": 1.0})
+
+
+def test_negation_keeps_signed_zero(compiler):
+    assert math.copysign(1.0, compiler.compile("-x + -0").evaluate({"x": 0.0})) == -1.0
+
+
+def test_compiled_expressions_are_cached_by_source(compiler):
+    first = compiler.compile("x * 2 + y")
+    assert compiler.compile("  x * 2 + y ") is first
+    assert first.variables == ("x", "y")
+    assert first.evaluate({"x": 3.0, "y": 1.0}) == 7.0
+    assert compiler.cache.stats().hits == 1
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("", "Empty expression"),
+        ("2 +", "Incomplete"),
+        ("(1 + 2", "Incomplete"),
+        ("(1 + 2]", "Unexpected character"),
+        ("1 2", "Unexpected '2'"),
+        ("root 2", "needs a left operand"),
+        (") + 1", r"Unexpected '\)'"),
+    ],
+)
+def test_malformed_expressions_raise_validation_errors(compiler, source: str, message: str):
+    with pytest.raises(ValidationError, match=message):
+        compiler.compile(source)
+
+
+def test_bare_values_evaluate_but_have_no_final_step(compiler):
+    assert compiler.compile("5").evaluate() == 5.0
+    assert compiler.compile("-x").evaluate({"x": 2.0}) == -2.0
+    with pytest.raises(ValidationError, match="at least one operation"):
+        compiler.compile("5").operands()
+    with pytest.raises(ValidationError, match="at least one operation"):
+        compiler.compile("x").evaluate_many({"x": [1.0]})
+
+
+def test_unbound_variables_are_reported(compiler):
+    expression = compiler.compile("x + y")
+    with pytest.raises(ValidationError, match="Unknown variable: y"):
+        expression.evaluate({"x": 1.0})
+    with pytest.raises(ValidationError, match="Unknown variable: y"):
+        expression.evaluate_many({"x": [1.0]})
+
+
+def test_tokenize():
+    assert tokenize("2**x // .5") == [
+        ("number", "2"),
+        ("symbol", "**"),
+        ("name", "x"),
+        ("symbol", "//"),
+        ("number", ".5"),
+    ]
+
+
+def test_evaluate_many_matches_scalar_evaluation(compiler):
+    expression = compiler.compile("(x ^ 2 - 1) / (x - 1) root y")
+    x = np.array([0.0, 1.0, 2.0, -3.0, 4.0])
+    y = np.array([2.0, 3.0, 0.0, 3.0, -1.0])
+
+    batch = expression.evaluate_many({"x": x, "y": y})
+
+    for i in range(len(x)):
+        try:
+            expected = expression.evaluate({"x": x[i], "y": y[i]})
+        except (ArithmeticError, ValueError) as exc:
+            assert batch.failed[i]
+            assert str(batch.error_at(i)) == str(exc)
+        else:
+            assert batch.values[i] == expected
+    assert batch.failed.tolist() == [True, True, True, False, False]
+
+    broadcast = compiler.compile("x + 1").evaluate_many({"x": 2.0})
+    assert broadcast.values.tolist() == [3.0]
+    with pytest.raises(ValueError):
+        expression.evaluate_many({"x": [[1.0]], "y": 1.0})
+
+
+def test_calculator_records_an_expression_as_one_entry(calc):
+    events = InMemoryLoggerObserver()
+    calc.attach(events)
+
+    result = calc.evaluate("(2 ^ 10) root 3 + 7 % 4")
+
+    assert result == pytest.approx(13.0793684)
+    assert len(calc.history) == 1
+    assert calc.history_lines() == [f"add {1024 ** (1 / 3)} 3.0 = {result}"]
+    assert "'expression': '(2 ^ 10) root 3 + 7 % 4'" in events.lines[0]
+
+    assert calc.evaluate("x * y", {"x": 2.0, "y": 4.0}) == 8.0
+    assert calc.undo() and len(calc.history) == 1
+
+
+def test_calculator_evaluate_many_appends_successful_rows(calc):
+    events = InMemoryLoggerObserver()
+    calc.attach(events)
+
+    batch = calc.evaluate_many("x / y + 1", {"x": [1.0, 2.0, 3.0], "y": [1.0, 0.0, 2.0]})
+
+    assert batch.values[[0, 2]].tolist() == [2.0, 2.5]
+    assert isinstance(batch.error_at(1), ZeroDivisionError)
+    assert calc.history_lines() == ["add 1.0 1.0 = 2.0", "add 1.5 1.0 = 2.5"]
+    assert events.lines == [
+        "calculations_added: {'operation': 'add', 'count': 2, 'failed': 1, 'expression': 'x / y + 1'}"
+    ]
+
+    assert calc.evaluate_many("1 / x + 1", {"x": 0.0}).failed.all()
+    assert len(calc.history) == 2
+
+
+def test_cli_expression_mode(calc):
+    assert handle_line("= 2 + 3 * 4", calc) == "Result: 14.0"
+    assert handle_line("=1 / (2 - 2) + 1", calc) == "Error: Cannot divide by zero."
+    assert handle_line("= 2 +", calc) == "Error: Incomplete expression."
+    assert handle_line("= x + 1", calc) == "Error: Unknown variable: x"
+    assert "= <expression>" in handle_line("help", calc)
+    assert len(calc.history) == 1
+
+
+def test_batch_runs_expressions_in_order(calc):
+    out = io.StringIO()
+    summary = run_batch(["add 1 2", "= 2 ^ 3 + 1", "mul 2 2", "= 1 / 0 + 1"], calc, out)
+
+    assert out.getvalue().splitlines() == [
+        "Result: 3.0",
+        "Result: 9.0",
+        "Result: 4.0",
+        "Error: Cannot divide by zero.",
+    ]
+    assert (summary.calculations, summary.errors) == (3, 1)
+    assert [line.split()[0] for line in calc.history_lines()] == ["add", "add", "mul"]
@@ -0,0 +1,199 @@
+from pathlib import Path
+
+import pandas as pd
+
+from app.calculation.columns import MISSING_TIMESTAMP, OperationTable, HistoryColumns
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+from app.calculator.facade import Calculator
+
+
+def test_operation_table_interns_names():
+    table = OperationTable()
+    assert table.code("add") == 0
+    assert table.code("pow") == 1
+    assert table.code("add") == 0
+    assert table.name(1) == "pow"
+    assert table.names == ("add", "pow")
+
+
+def test_history_columns_append_and_copy_are_independent():
+    cols = HistoryColumns()
+    cols.append(1, 0, 2.0, 3.0, 5.0)
+    cols.extend([2], [0], [1.0], [1.0], [2.0])
+
+    clone = cols.copy()
+    clone.append(3, 0, 0.0, 0.0, 0.0)
+
+    assert len(cols) == 2
+    assert len(clone) == 3
+    assert list(clone.result) == [5.0, 2.0, 0.0]
+
+
+def test_copies_know_how_far_they_match_their_source():
+    cols = HistoryColumns()
+    cols.extend(range(10), [0] * 10, [1.0] * 10, [1.0] * 10, map(float, range(10)))
+
+    fork = cols.copy(2, 8)
+    fork.append(99, 0, 0.0, 0.0, -1.0)
+    compacted = fork.copy(3)
+    assert fork.shared_prefix(cols) == (2, 6)
+    assert compacted.shared_prefix(cols) == (5, 3) and compacted.shared_prefix(fork) == (3, 4)
+
+    fork.truncate(4)  # rows past 4 may be rewritten: the compacted copy no longer matches them
+    assert fork.shared_prefix(cols) == (2, 4) and compacted.shared_prefix(cols) == (5, 1)
+    assert cols.shared_prefix(fork) is None and HistoryColumns().shared_prefix(cols) is None
+
+
+def test_history_len_tracks_appends_without_dataframe():
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    for i in range(50):
+        history.add(factory.create("add", i, 1))
+
+    assert len(history) == 50
+    df = history.all()
+    assert list(df.columns) == list(CalculationHistory.REQUIRED_COLUMNS)
+    assert df["result"].tolist() == [float(i + 1) for i in range(50)]
+
+
+def test_history_round_trip_preserves_timestamps_and_operations(tmp_path: Path):
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    history.add(factory.create("mod", 7, 3))
+    history.add(factory.create("int_div", 7, 2))
+
+    path = tmp_path / "history.csv"
+    history.save(path)
+
+    loaded = CalculationHistory()
+    loaded.load(path)
+
+    assert loaded.all().equals(history.all())
+    assert loaded.format_lines() == history.format_lines()
+
+
+def test_history_load_without_timestamps_saves_blank_timestamps(tmp_path: Path):
+    path = tmp_path / "legacy.csv"
+    pd.DataFrame([{"operation": "add", "a": 1, "b": 2, "result": 3}]).to_csv(path, index=False)
+
+    history = CalculationHistory()
+    history.load(path)
+    assert history._cols.timestamp[0] == MISSING_TIMESTAMP
+
+    out = tmp_path / "out.csv"
+    history.save(out)
+    assert pd.read_csv(out, keep_default_na=False)["timestamp"].tolist() == [""]
+
+
+def test_snapshot_shares_segment_instead_of_copying():
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    history.add(factory.create("add", 1, 1))
+
+    snap = history.snapshot()
+    history.add(factory.create("add", 2, 2))
+
+    assert snap.columns is history._cols
+    assert len(snap) == 1
+    assert len(snap.df) == 1
+
+
+def test_add_after_restore_forks_and_keeps_redo_snapshot_intact():
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    history.add(factory.create("add", 1, 1))
+    before = history.snapshot()
+    history.add(factory.create("add", 2, 2))
+    after = history.snapshot()
+
+    history.restore(before)
+    history.add(factory.create("mul", 5, 5))
+
+    assert history._cols is not after.columns
+    assert after.df["result"].tolist() == [2.0, 4.0]
+    assert history.all()["result"].tolist() == [2.0, 25.0]
+
+
+def test_add_after_undo_truncates_in_place_once_redo_is_gone():
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    for i in range(3):
+        history.add(factory.create("add", i, 1))
+    assert history.query("op=add result>1").total == 2 and history.stats().rows == 3
+    before = history.snapshot()
+    history.add(factory.create("mul", 5, 5))
+    segment = history._cols
+
+    history.restore(before)  # the undone row is covered by no live snapshot
+    history.add(factory.create("sub", 9, 1))
+    assert history._cols is segment and len(segment) == 4
+    assert history.format_lines()[-1] == "sub 9.0 1.0 = 8.0"
+    assert history.query("op=mul").total == 0 and history.query("result>1").total == 3
+    operations = history.stats().operations
+    assert operations["sub"].total == 8.0 and "mul" not in operations
+
+    lines = history.iter_lines(chunk_size=2)
+    assert next(lines) == ["add 0.0 1.0 = 1.0", "add 1.0 1.0 = 2.0"]
+    history.restore(before)  # an open iterator still shows the sub row
+    history.add(factory.create("div", 8, 2))
+    assert history._cols is not segment and next(lines) == ["add 2.0 1.0 = 3.0", "sub 9.0 1.0 = 8.0"]
+
+
+def test_snapshot_retries_when_an_append_cuts_its_rows_before_the_mark(monkeypatch):
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    history.add(factory.create("add", 1, 1))
+    before = history.snapshot(mark=False)
+    history.add(factory.create("add", 2, 2))
+    history.add(factory.create("add", 3, 3))
+    mark = HistoryColumns.mark
+
+    def undo_and_append_first(cols, stop):  # another thread wins the race once
+        monkeypatch.setattr(HistoryColumns, "mark", mark)
+        history.restore(before)
+        history.add(factory.create("mul", 5, 5))
+        return mark(cols, stop)
+
+    monkeypatch.setattr(HistoryColumns, "mark", undo_and_append_first)
+    snap = history.snapshot()
+
+    assert len(snap) == 2
+    assert snap.df["result"].tolist() == [2.0, 25.0]
+    history.restore(before)
+    history.add(factory.create("sub", 9, 1))
+    assert snap.df["result"].tolist() == [2.0, 25.0]
+
+
+def test_calculator_undo_then_execute_reuses_the_segment(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    calc.execute_many("add", list(range(1000)), 1.0)
+    segment = calc.history._cols
+    for i in range(5):
+        calc.execute("mul", i, 2)
+        calc.undo()
+        calc.execute("sub", i, 1)
+    assert calc.history._cols is segment and len(segment) == 1005
+    assert {id(snap.columns) for snap in calc._undo_stack} == {id(segment)}
+
+    calc.undo()
+    calc.undo()
+    assert calc.redo() and calc.history_lines(1)[-1] == "sub 3.0 1.0 = 2.0"
+
+    saved = calc.history.snapshot()  # e.g. a session's last saved state
+    calc.undo()
+    calc.execute("div", 9, 3)
+    assert calc.history._cols is not segment and saved.df["operation"].iloc[-1] == "sub"
+
+
+def test_clear_keeps_prior_segment_reachable_from_snapshot():
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    history.add(factory.create("add", 1, 1))
+    snap = history.snapshot()
+
+    history.clear()
+    assert len(history) == 0
+
+    history.restore(snap)
+    assert history.format_lines() == ["add 1.0 1.0 = 2.0"]
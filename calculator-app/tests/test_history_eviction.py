@@ -0,0 +1,177 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.calculation.archive import HistoryArchive
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+from app.calculation.journal import HistoryJournal
+from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+from app.exceptions import ConfigurationError
+from app.observers import LoggerObserver
+
+
+def test_history_rejects_non_positive_max_size():
+    with pytest.raises(ValueError):
+        CalculationHistory(max_size=0)
+
+
+def test_bounded_history_keeps_newest_rows():
+    factory = CalculationFactory()
+    history = CalculationHistory(max_size=3)
+
+    evicted = [history.add(factory.create("add", i, 0)) for i in range(10)]
+
+    assert evicted == [0, 0, 0] + [1] * 7
+    assert len(history) == 3
+    assert history.evicted_total == 7
+    assert history.all()["result"].tolist() == [7.0, 8.0, 9.0]
+    # The dead prefix is compacted away instead of growing forever.
+    assert len(history._cols) < 2 * 3 + 1
+
+
+def test_archive_policy_spills_evicted_rows(tmp_path: Path):
+    factory = CalculationFactory()
+    archive = HistoryArchive(tmp_path / "archive.csv")
+    history = CalculationHistory(max_size=2, archive=archive)
+
+    for i in range(5):
+        history.add(factory.create("add", i, 0))
+
+    archived = pd.read_csv(archive.path)
+    assert archived["result"].tolist() == [0.0, 1.0, 2.0]
+    assert list(archived.columns) == list(HistoryArchive.COLUMNS)
+    assert history.all()["result"].tolist() == [3.0, 4.0]
+
+
+def test_load_enforces_max_size(tmp_path: Path):
+    path = tmp_path / "history.csv"
+    rows = [{"operation": "add", "a": i, "b": 0, "result": i} for i in range(5)]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    history = CalculationHistory(max_size=2)
+    assert history.load(path) == 3
+    assert history.all()["result"].tolist() == [3.0, 4.0]
+
+
+def test_undo_depth_is_bounded_and_evictions_are_notified(tmp_path: Path):
+    calc = Calculator.create_default(
+        history_path=tmp_path / "history.csv",
+        max_history_size=2,
+        max_undo_depth=2,
+    )
+    events = LoggerObserver()
+    calc.attach(events)
+
+    for i in range(4):
+        calc.execute("add", i, 0)
+
+    assert len(calc.history) == 2
+    assert calc.undo() and calc.undo()
+    assert calc.undo() is False
+    assert calc.undo_evicted_total == 2
+
+    evictions = [line for line in events.lines if line.startswith("history_evicted:")]
+    assert len(evictions) == 2
+    assert "'rows_total': 2" in evictions[-1]
+    assert "'undo_snapshots_total': 2" in evictions[-1]
+
+
+def test_create_default_archive_policy_uses_default_archive_path(tmp_path: Path):
+    calc = Calculator.create_default(
+        history_path=tmp_path / "history.csv",
+        max_history_size=1,
+        history_eviction="archive",
+    )
+    calc.execute("add", 1, 1)
+    calc.execute("add", 2, 2)
+
+    assert (tmp_path / "history_archive.csv").exists()
+
+
+def test_create_default_rejects_unknown_eviction_policy(tmp_path: Path):
+    with pytest.raises(ValueError):
+        Calculator.create_default(history_path=tmp_path / "history.csv", history_eviction="shred")
+
+
+def test_load_config_eviction_settings(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("CALCULATOR_MAX_UNDO_DEPTH", "5")
+    monkeypatch.setenv("CALCULATOR_HISTORY_EVICTION", "Archive")
+
+    cfg = load_config()
+    assert cfg.max_undo_depth == 5
+    assert cfg.history_eviction == "archive"
+    assert cfg.archive_path == tmp_path / "history_archive.csv"
+
+
+@pytest.mark.parametrize(
+    "name,value",
+    [
+        ("CALCULATOR_MAX_HISTORY_SIZE", "0"),
+        ("CALCULATOR_MAX_UNDO_DEPTH", "-1"),
+        ("CALCULATOR_HISTORY_EVICTION", "shred"),
+    ],
+)
+def test_load_config_rejects_invalid_eviction_settings(monkeypatch, name: str, value: str):
+    monkeypatch.delenv("CALC_HISTORY_PATH", raising=False)
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ConfigurationError):
+        load_config()
+
+
+def test_loading_archives_rows_beyond_max_size_unless_drop_is_chosen(tmp_path: Path, monkeypatch):
+    monkeypatch.delenv("CALCULATOR_HISTORY_EVICTION", raising=False)
+    monkeypatch.delenv("CALC_HISTORY_EVICTION", raising=False)
+    assert load_config().history_eviction == "archive"
+
+    path = tmp_path / "history.csv"
+    rows = [{"operation": "add", "a": i, "b": 0, "result": i} for i in range(5)]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    calc = Calculator.create_default(history_path=path, max_history_size=2)
+    calc.load()
+    calc.save()
+    kept = pd.read_csv(tmp_path / "history_archive.csv")["result"].tolist() + pd.read_csv(path)["result"].tolist()
+    assert kept == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    calc = Calculator.create_default(history_path=path, max_history_size=1, history_eviction="drop")
+    calc.load()
+    assert calc.history_lines() == ["add 4.0 0.0 = 4.0"]
+    assert len(pd.read_csv(tmp_path / "history_archive.csv")) == 3
+
+
+def test_reloading_archives_each_row_once(tmp_path: Path):
+    path = tmp_path / "history.csv"
+    pd.DataFrame([{"operation": "add", "a": i, "b": 0, "result": i} for i in range(5)]).to_csv(path, index=False)
+    archive = HistoryArchive(tmp_path / "archive.csv")
+
+    for _ in range(2):  # restarts without a save in between
+        history = CalculationHistory(max_size=2, archive=archive)
+        history.load(path)
+
+    assert pd.read_csv(archive.path)["result"].tolist() == [0.0, 1.0, 2.0]
+    assert pd.read_csv(path)["result"].tolist() == [3.0, 4.0]
+
+
+def test_reloading_a_journal_archives_each_row_once(tmp_path: Path):
+    factory = CalculationFactory()
+    source = CalculationHistory()
+    journal = HistoryJournal(tmp_path / "history.csv")
+    for i in range(3):
+        source.add(factory.create("add", i, 0))
+    journal.compact(source)
+    for i in range(3, 5):
+        source.add(factory.create("add", i, 0))
+    journal.sync(source)
+    journal.close()
+    archive = HistoryArchive(tmp_path / "archive.csv")
+
+    for _ in range(2):
+        history = CalculationHistory(max_size=2, archive=archive)
+        HistoryJournal(tmp_path / "history.csv").load(history)
+        assert history.all()["result"].tolist() == [3.0, 4.0]
+
+    assert pd.read_csv(archive.path)["result"].tolist() == [0.0, 1.0, 2.0]
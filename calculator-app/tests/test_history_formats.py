@@ -0,0 +1,142 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.calculation import formats
+from app.calculation.factory import CalculationFactory
+from app.calculation.formats import format_name_for, resolve_format
+from app.calculation.history import CalculationHistory
+from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+from app.exceptions import ConfigurationError
+
+needs_pyarrow = pytest.mark.skipif(not formats.has_pyarrow(), reason="pyarrow not installed")
+
+
+def make_history() -> CalculationHistory:
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    history.add(factory.create("add", 2, 3))
+    history.add(factory.create("root", 27, 3))
+    history.add(factory.create("mod", -7, 3))
+    return history
+
+
+@pytest.mark.parametrize(
+    "suffix",
+    [".csv", ".npz", pytest.param(".feather", marks=needs_pyarrow), pytest.param(".parquet", marks=needs_pyarrow)],
+)
+def test_round_trip_by_extension(tmp_path: Path, suffix: str):
+    history = make_history()
+    path = tmp_path / f"history{suffix}"
+    history.save(path)
+
+    loaded = CalculationHistory()
+    loaded.load(path)
+
+    assert loaded.all().equals(history.all())
+
+
+@pytest.mark.parametrize(
+    "suffix",
+    [".npz", pytest.param(".parquet", marks=needs_pyarrow)],
+)
+def test_binary_formats_accept_missing_timestamp(tmp_path: Path, suffix: str):
+    path = tmp_path / f"legacy{suffix}"
+    if suffix == ".npz":
+        np.savez(path, operation=np.array(["add"]), a=[1.0], b=[2.0], result=[3.0])
+    else:
+        pd.DataFrame([{"operation": "add", "a": 1.0, "b": 2.0, "result": 3.0}]).to_parquet(path)
+
+    history = CalculationHistory()
+    history.load(path)
+
+    assert history.format_lines() == ["add 1.0 2.0 = 3.0"]
+    assert history.all()["timestamp"].tolist() == [""]
+
+
+@needs_pyarrow
+def test_arrow_reader_parses_string_timestamps(tmp_path: Path):
+    path = tmp_path / "strings.parquet"
+    history = make_history()
+    history.all().to_parquet(path)
+
+    loaded = CalculationHistory()
+    loaded.load(path)
+    assert loaded.all()["timestamp"].tolist() == history.all()["timestamp"].tolist()
+
+
+def test_binary_format_missing_required_columns_raises(tmp_path: Path):
+    path = tmp_path / "bad.npz"
+    np.savez(path, operation=np.array(["add"]), a=[1.0])
+
+    with pytest.raises(ValueError):
+        CalculationHistory().load(path)
+
+
+def test_explicit_format_overrides_extension_and_is_sniffed_back(tmp_path: Path):
+    history = make_history()
+    path = tmp_path / "history.dat"
+    history.snapshot().save(path, "npz")
+
+    assert format_name_for(path) == "npz"
+    loaded = CalculationHistory()
+    loaded.load(path)
+    assert len(loaded) == 3
+
+
+def test_format_resolution_rules(monkeypatch, tmp_path: Path):
+    assert format_name_for("h.CSV") == "csv"
+    assert format_name_for("h.arrow") == "feather"
+    assert format_name_for(tmp_path / "missing.tmp") == "csv"
+
+    with pytest.raises(ValueError):
+        format_name_for("h.csv", "xml")
+
+    monkeypatch.setattr(formats, "has_pyarrow", lambda: False)
+    assert format_name_for("h.csv", "binary") == "npz"
+    with pytest.raises(ValueError):
+        resolve_format("h.parquet")
+
+
+def test_journal_compaction_keeps_binary_format(tmp_path: Path):
+    path = tmp_path / "history.npz"
+    calc = Calculator.create_default(history_path=path, auto_save=True, autosave_mode="journal")
+    calc.execute("add", 1, 2)
+    calc.execute("mul", 3, 4)
+    calc.close()
+
+    assert path.read_bytes().startswith(b"PK")
+    reopened = Calculator.create_default(history_path=path, auto_load=True)
+    assert reopened.history_lines() == calc.history_lines()
+
+
+def test_load_config_history_format_swaps_default_extension(monkeypatch, tmp_path: Path):
+    monkeypatch.delenv("CALC_HISTORY_PATH", raising=False)
+    monkeypatch.setenv("CALCULATOR_HISTORY_FORMAT", "npz")
+    cfg = load_config()
+    assert cfg.history_format == "npz"
+    assert cfg.history_path.name == "history.npz"
+
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "h.csv"))
+    monkeypatch.setenv("CALCULATOR_HISTORY_FORMAT", "auto")
+    assert load_config().history_path == tmp_path / "h.csv"
+
+    monkeypatch.setenv("CALCULATOR_HISTORY_FORMAT", "xml")
+    with pytest.raises(ConfigurationError):
+        load_config()
+
+
+def test_csv_writer_matches_pandas_output(tmp_path: Path):
+    history = make_history()
+    a, b = np.array([1.0, -0.0, 1e300]), np.array([0.0, 3.0, 1e-300])
+    history.add_many("div", a, b, np.array([np.inf, -0.0, np.nan]))
+    history.add_many("mul", np.array([0.1]), np.array([3.0]), np.array([0.30000000000000004]))
+    history._cols.timestamp[0] = formats.MISSING_TIMESTAMP
+    path = tmp_path / "history.csv"
+    history.save(path)
+
+    expected = history.all().to_csv(index=False, lineterminator="\n")
+    assert path.read_text(encoding="utf-8") == expected
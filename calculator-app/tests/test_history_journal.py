@@ -0,0 +1,202 @@
+from pathlib import Path
+
+import pytest
+
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+from app.calculation.journal import HistoryJournal
+from app.calculator.facade import Calculator
+
+
+def journal_kinds(journal: HistoryJournal) -> list[str]:
+    return [line.split(",")[0] for line in journal.journal_path.read_text().splitlines()]
+
+
+def test_sync_appends_rows_without_rewriting_snapshot(tmp_path: Path):
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    journal = HistoryJournal(tmp_path / "history.csv")
+
+    history.add(factory.create("add", 1, 1))
+    journal.sync(history)  # first sync writes the base snapshot
+    snapshot_bytes = journal.snapshot_path.read_bytes()
+
+    history.add(factory.create("mul", 2, 3))
+    journal.sync(history)
+    journal.sync(history)  # no change -> no record
+    journal.close()
+
+    assert journal.snapshot_path.read_bytes() == snapshot_bytes
+    assert journal_kinds(journal) == ["B", "+"]
+
+
+def test_undo_clear_and_eviction_are_written_as_markers(tmp_path: Path):
+    factory = CalculationFactory()
+    history = CalculationHistory(max_size=3)
+    journal = HistoryJournal(tmp_path / "history.csv")
+    journal.sync(history)
+
+    history.add(factory.create("add", 1, 1))
+    before_second = history.snapshot()
+    history.add(factory.create("add", 2, 2))
+    journal.sync(history)
+
+    history.restore(before_second)  # undo
+    journal.sync(history)
+
+    history.add(factory.create("add", 3, 3))  # nothing holds the undone row: appended in place
+    journal.sync(history)
+
+    history.add(factory.create("add", 4, 4))
+    history.add(factory.create("add", 5, 5))  # evicts the oldest row
+    journal.sync(history)
+
+    history.clear()
+    journal.sync(history)
+    journal.close()
+
+    assert journal_kinds(journal) == ["B", "+", "+", "T", "+", "+", "+", "E", "C"]
+
+
+def test_forked_and_compacted_segments_journal_only_the_delta(tmp_path: Path):
+    factory = CalculationFactory()
+    history = CalculationHistory(max_size=3)
+    journal = HistoryJournal(tmp_path / "history.csv")
+    journal.sync(history)
+
+    history.add(factory.create("add", 1, 1))
+    before_second = history.snapshot()
+    history.add(factory.create("add", 2, 2))
+    journal.sync(history)
+    segments = {id(history._cols)}
+
+    redo = history.snapshot()  # still holds the row undone next
+    history.restore(before_second)
+    journal.sync(history)
+    history.add(factory.create("mul", 3, 3))  # forks: the undone row stays with `redo`
+    journal.sync(history)
+    for i in range(4, 9):  # evicts, compacting the dead prefix away twice
+        history.add(factory.create("sub", i, 1))
+        segments.add(id(history._cols))
+        journal.sync(history)
+    journal.close()
+
+    assert len(segments) >= 3 and redo.df["result"].tolist() == [2.0, 4.0]
+    assert journal_kinds(journal) == ["B", "+", "+", "T", "+", "+"] + ["+", "E"] * 4
+    restored = CalculationHistory(max_size=3)
+    HistoryJournal(tmp_path / "history.csv").load(restored)
+    assert restored.format_lines() == history.format_lines()
+
+
+def test_load_replays_journal_to_identical_state(tmp_path: Path):
+    factory = CalculationFactory()
+    history = CalculationHistory(max_size=3)
+    journal = HistoryJournal(tmp_path / "history.csv")
+    journal.sync(history)
+
+    for i in range(5):
+        history.add(factory.create("pow", i, 2))
+        journal.sync(history)
+    snap = history.snapshot()
+    history.add(factory.create("sub", 9, 1))
+    journal.sync(history)
+    history.restore(snap)
+    journal.sync(history)
+    journal.close()
+
+    restored = CalculationHistory(max_size=3)
+    HistoryJournal(tmp_path / "history.csv").load(restored)
+
+    assert restored.format_lines() == history.format_lines()
+    assert restored.all().equals(history.all())
+
+
+def test_journal_compacts_after_threshold(tmp_path: Path):
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    journal = HistoryJournal(tmp_path / "history.csv", compact_every=3)
+
+    for i in range(4):
+        history.add(factory.create("add", i, 0))
+        journal.sync(history)
+    journal.close()
+
+    assert journal.records < 3
+    reloaded = CalculationHistory()
+    HistoryJournal(tmp_path / "history.csv").load(reloaded)
+    assert len(reloaded) == 4
+
+
+def test_stale_journal_is_ignored(tmp_path: Path):
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    journal = HistoryJournal(tmp_path / "history.csv")
+    history.add(factory.create("add", 1, 1))
+    journal.sync(history)
+    history.add(factory.create("add", 2, 2))
+    journal.sync(history)
+    journal.close()
+
+    # Snapshot rewritten behind the journal's back (e.g. crash mid-compaction).
+    history.save(journal.snapshot_path)
+
+    reloaded = CalculationHistory()
+    HistoryJournal(tmp_path / "history.csv").load(reloaded)
+    assert len(reloaded) == 2
+
+
+def test_unknown_journal_record_raises(tmp_path: Path):
+    history = CalculationHistory()
+    journal = HistoryJournal(tmp_path / "history.csv")
+    journal.sync(history)
+    journal.close()
+    with journal.journal_path.open("a") as fh:
+        fh.write("X,1\n")
+
+    with pytest.raises(ValueError):
+        HistoryJournal(tmp_path / "history.csv").load(CalculationHistory())
+
+
+def test_journal_rejects_non_positive_compact_every(tmp_path: Path):
+    with pytest.raises(ValueError):
+        HistoryJournal(tmp_path / "history.csv", compact_every=0)
+
+
+def test_calculator_journal_autosave_round_trip(tmp_path: Path):
+    path = tmp_path / "history.csv"
+    calc = Calculator.create_default(history_path=path, auto_save=True, autosave_mode="journal")
+
+    calc.execute("add", 2, 3)
+    calc.execute("mul", 4, 5)
+    calc.clear()
+    calc.undo()
+    calc.execute("sub", 9, 1)
+    expected = calc.history_lines()
+
+    reopened = Calculator.create_default(history_path=path, autosave_mode="journal", auto_load=True)
+    assert reopened.history_lines() == expected
+
+    calc.close()
+    assert journal_kinds(calc.journal) == ["B"]
+    reopened.load()
+    assert reopened.history_lines() == expected
+
+
+def test_calculator_save_in_journal_mode_compacts(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv", autosave_mode="journal")
+    calc.execute("add", 1, 2)
+    calc.save()
+
+    assert journal_kinds(calc.journal) == ["B"]
+    assert calc.history_path.exists()
+
+
+def test_close_without_history_writes_nothing(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv", autosave_mode="journal")
+    calc.close()
+    assert not calc.history_path.exists()
+
+
+def test_create_default_rejects_unknown_autosave_mode(tmp_path: Path):
+    with pytest.raises(ValueError):
+        Calculator.create_default(history_path=tmp_path / "history.csv", autosave_mode="sometimes")
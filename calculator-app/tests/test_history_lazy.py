@@ -0,0 +1,142 @@
+from pathlib import Path
+
+import pytest
+
+from app.calculation.archive import HistoryArchive
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory
+from app.calculation.records import RECORD_DTYPE, map_records
+from app.calculator.cli import handle_line
+from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+
+
+def write_history(path: Path, rows: int) -> CalculationHistory:
+    factory = CalculationFactory()
+    history = CalculationHistory()
+    for i in range(rows):
+        history.add(factory.create("add" if i % 2 else "pow", float(i), 2.0))
+    history.save(path)
+    return history
+
+
+def lazy_history(path: Path, **kwargs) -> CalculationHistory:
+    history = CalculationHistory(lazy_load=True, **kwargs)
+    history.load(path)
+    return history
+
+
+def test_records_file_round_trips_eagerly(tmp_path: Path):
+    path = tmp_path / "history.hist"
+    original = write_history(path, 5)
+
+    loaded = CalculationHistory()
+    loaded.load(path)
+
+    assert loaded._cols.base is None
+    assert loaded.all().equals(original.all())
+
+
+def test_lazy_load_maps_file_and_reads_tail_on_demand(tmp_path: Path):
+    path = tmp_path / "history.hist"
+    original = write_history(path, 50)
+
+    history = lazy_history(path)
+
+    assert len(history) == 50
+    assert len(history._cols.base) == 50
+    assert len(history._cols.result) == 0
+    assert history.format_lines(limit=2) == ["... (48 earlier rows)", *original.format_lines()[-2:]]
+    assert history.all().equals(original.all())
+
+
+def test_append_and_save_over_mapped_file(tmp_path: Path):
+    path = tmp_path / "history.hist"
+    write_history(path, 3)
+    history = lazy_history(path)
+
+    history.add(CalculationFactory().create("div", 9, 3))
+    history.save(path)
+
+    # The old mapping survives the atomic replace.
+    assert history.format_lines()[-1] == "div 9.0 3.0 = 3.0"
+    reloaded = lazy_history(path)
+    assert reloaded.format_lines() == history.format_lines()
+
+
+def test_undo_past_loaded_rows_reuses_mapping(tmp_path: Path):
+    path = tmp_path / "history.hist"
+    write_history(path, 4)
+    calc = Calculator.create_default(history_path=path, auto_load=True, lazy_load=True)
+    before = calc.history_lines()
+
+    calc.clear()
+    calc.execute("mul", 2, 3)
+    assert calc.undo() and calc.undo()
+
+    assert calc.history_lines() == before
+    assert calc.history._cols.base is not None
+
+
+def test_eviction_and_truncation_reach_into_mapped_rows(tmp_path: Path):
+    path = tmp_path / "history.hist"
+    original = write_history(path, 6)
+    archive = HistoryArchive(tmp_path / "archive.csv")
+
+    history = lazy_history(path, max_size=4, archive=archive)
+
+    assert history.format_lines() == original.format_lines()[2:]
+    assert len(archive.path.read_text().splitlines()) == 3  # header + 2 rows
+
+    cols = history._cols.copy()
+    cols.truncate(1)
+    assert len(cols) == 1 and len(cols.base) == 1
+
+
+def test_journal_replays_on_top_of_mapped_snapshot(tmp_path: Path):
+    path = tmp_path / "history.hist"
+    calc = Calculator.create_default(history_path=path, auto_save=True, autosave_mode="journal")
+    for i in range(3):
+        calc.execute("add", i, 1)
+    calc.save()
+    calc.undo()
+    calc.undo()
+    calc.execute("sub", 5, 1)
+    expected = calc.history_lines()
+
+    reopened = Calculator.create_default(
+        history_path=path, auto_load=True, lazy_load=True, autosave_mode="journal"
+    )
+    assert reopened.history_lines() == expected
+
+
+def test_map_rejects_foreign_and_handles_empty_files(tmp_path: Path):
+    bad = tmp_path / "bad.hist"
+    bad.write_bytes(b"not a history file at all")
+    with pytest.raises(ValueError):
+        map_records(bad)
+
+    empty = tmp_path / "empty.hist"
+    CalculationHistory().save(empty)
+    assert len(map_records(empty)) == 0
+    assert RECORD_DTYPE.itemsize == 40
+
+
+def test_lazy_load_config_selects_record_format(monkeypatch, tmp_path: Path):
+    monkeypatch.delenv("CALC_HISTORY_PATH", raising=False)
+    monkeypatch.setenv("CALCULATOR_HISTORY_LAZY_LOAD", "true")
+
+    cfg = load_config()
+
+    assert cfg.lazy_load is True
+    assert cfg.history_format == "records"
+    assert cfg.history_path.name == "history.hist"
+
+
+def test_cli_history_limit(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    handle_line("add 1 2", calc)
+    handle_line("add 3 4", calc)
+
+    assert handle_line("history 1", calc) == "... (1 earlier rows)\nadd 3.0 4.0 = 7.0"
+    assert handle_line("history x", calc).startswith("Invalid format")
@@ -0,0 +1,191 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.calculation.columns import OPERATIONS
+from app.calculation.factory import CalculationFactory
+from app.calculation.formats import column_arrays, columns_from_arrays
+from app.calculation.history import CalculationHistory
+from app.calculation.query import Range, parse_query, take
+from app.calculator.cli import handle_line
+from app.calculator.facade import Calculator
+from app.exceptions import ValidationError
+
+DAY_US = 86_400 * 10**6
+MAR_1_2026_US = 1_772_323_200 * 10**6
+
+
+def random_history(n: int, seed: int = 0) -> CalculationHistory:
+    """``n`` rows with shuffled timestamps (so the timestamp index can't rely on order)."""
+    rng = np.random.default_rng(seed)
+    names = ["add", "pow", "mul", "div"]
+    history = CalculationHistory()
+    history._set_segment(
+        columns_from_arrays(
+            MAR_1_2026_US + rng.integers(-30, 30, n) * DAY_US,
+            np.array([OPERATIONS.code(names[i]) for i in rng.integers(0, 4, n)], dtype=np.int32),
+            rng.integers(-50, 50, n).astype(float),
+            rng.integers(-50, 50, n).astype(float),
+            rng.normal(0, 1e6, n),
+        )
+    )
+    return history
+
+
+def brute_force(history: CalculationHistory, text: str) -> list[int]:
+    query = parse_query(text)
+    cols, start, stop = history._view
+    arrays = column_arrays(cols, start, stop)
+    keep = np.ones(stop - start, dtype=bool)
+    if query.operations:
+        keep &= np.isin(arrays["operation"], [OPERATIONS.find(op) for op in query.operations])
+    for where in query.ranges:
+        keep &= where.mask(arrays[where.field])
+    return np.flatnonzero(keep).tolist()
+
+
+QUERIES = [
+    "op=pow",
+    "op=pow,div result>1e6",
+    "since=2026-03-01",
+    "since=2026-02-20 until=2026-03-05T12:00 op=add",
+    "a=7",
+    "a>=10 a<20 b<0",
+    "result<=-2e6",
+    "op=mul b>49",
+    "op=missing",
+]
+
+
+@pytest.mark.parametrize("text", QUERIES)
+def test_query_matches_a_full_scan(text):
+    history = random_history(5000)
+    assert history.query(text).positions.tolist() == brute_force(history, text)
+
+
+def test_indexes_follow_appends_and_are_shared_with_snapshots():
+    history = random_history(1000)
+    history.query("op=pow result>0")
+    index = history._indexes[history._cols]
+    before = history.snapshot()
+
+    history.add_many("pow", np.full(3, 2.0), np.arange(3.0), np.full(3, 5e6))
+    assert history.query("op=pow result>0").positions.tolist() == brute_force(history, "op=pow result>0")
+    assert index.size == 1003
+
+    history.restore(before)
+    assert history.query("op=pow result>0").positions.tolist() == brute_force(history, "op=pow result>0")
+    assert history._indexes[history._cols] is index
+
+    history.clear()
+    assert history.query("op=pow").total == 0
+
+
+def test_limit_keeps_the_newest_matches_and_counts_all():
+    history = random_history(2000)
+    matched = brute_force(history, "op=add")
+
+    result = history.query("op=add limit 5")
+    assert result.positions.tolist() == matched[-5:]
+    assert result.total == len(matched)
+    assert history.query("limit=3").positions.tolist() == [1997, 1998, 1999]
+
+
+def test_query_positions_follow_a_ring_buffer_window():
+    history = CalculationHistory(max_size=10)
+    history.add_many("add", np.arange(25.0), np.zeros(25), np.arange(25.0))
+
+    result = history.query("result>=20")
+    assert result.positions.tolist() == [5, 6, 7, 8, 9]
+    assert result.lines[0] == "add 20.0 0.0 = 20.0"
+
+
+def test_query_reads_a_memory_mapped_base(tmp_path: Path):
+    source = random_history(3000)
+    source.save(tmp_path / "history.hist")
+    history = CalculationHistory(lazy_load=True)
+    history.load(tmp_path / "history.hist")
+    history.add(CalculationFactory().create("pow", 2, 30))
+
+    text = "op=pow result>1e6"
+    assert history._cols.base is not None
+    assert history.query(text).positions.tolist() == brute_force(history, text)
+    assert history.query(text).lines[-1] == "pow 2.0 30.0 = 1073741824.0"
+
+
+def test_take_copies_instead_of_pinning_the_live_columns():
+    history = random_history(50_000)
+    cols = history._cols
+    expected = {name: column_arrays(cols, 0, len(cols))[name] for name in ("operation", "result")}
+    for ids in (np.arange(0, 50_000, 3), np.arange(0, 50_000, 997), np.array([7])):
+        for name, values in expected.items():
+            assert np.array_equal(take(cols, name, ids), values[ids])
+
+    failures, done = [], threading.Event()
+
+    def append() -> None:
+        while not done.is_set():
+            try:
+                cols.append(0, 0, 1.0, 1.0, 2.0)
+            except BufferError as exc:
+                failures.append(exc)
+                return
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    appender = threading.Thread(target=append)
+    appender.start()
+    try:
+        for _ in range(300):
+            take(cols, "result", np.arange(0, 50_000, 2))
+    finally:
+        done.set()
+        appender.join()
+        sys.setswitchinterval(interval)
+    assert not failures
+
+
+def test_parse_query():
+    query = parse_query("OP=pow,Add since=2026-03-01 Result>1e6 b=2 LIMIT 20")
+    assert query.operations == ("pow", "add")
+    assert query.limit == 20
+    assert query.ranges == (
+        Range("timestamp", low=MAR_1_2026_US),
+        Range("result", low=1e6, low_inclusive=False),
+        Range("b", 2.0, 2.0),
+    )
+    # Bounds on one field are merged into a single range
+    assert parse_query("a>1 a<=5 a>=2 a<9").ranges == (Range("a", 2.0, 5.0),)
+    assert parse_query("a>=2 a>2").ranges == (Range("a", low=2.0, low_inclusive=False),)
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("op>pow", "Invalid query term"),
+        ("foo=1", "Invalid query term"),
+        ("limit 0", "limit must be a positive integer"),
+        ("since=yesterday", "Invalid date for since"),
+        ("until>2026-01-01", "Use until=<date>"),
+        ("result>big", "Invalid number for result"),
+    ],
+)
+def test_parse_query_errors(text, message):
+    with pytest.raises(ValidationError, match=message):
+        parse_query(text)
+
+
+def test_history_query_command(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    for line in ["add 1 2", "pow 2 30", "mod 7 3", "pow 3 3"]:
+        handle_line(line, calc)
+
+    assert handle_line("history op=pow result>1e6", calc) == "$2  pow 2.0 30.0 = 1073741824.0"
+    assert handle_line("history op=mod,pow limit 1", calc) == "... (2 earlier matches)\n$4  pow 3.0 3.0 = 27.0"
+    assert handle_line("history op=modulus", calc) == "$3  modulus 7.0 3.0 = 1.0"
+    assert handle_line("history result>1e12", calc) == "(no matches)"
+    assert handle_line("history until=soon", calc) == "Error: Invalid date for until: soon"
+    assert handle_line("history soon", calc).startswith("Invalid format")
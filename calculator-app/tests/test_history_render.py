@@ -0,0 +1,107 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.calculation.history import HISTORY_CHUNK_ROWS, CalculationHistory
+from app.calculation.factory import CalculationFactory
+from app.calculator.cli import handle_line, run_batch, run_repl
+from app.calculator.facade import Calculator
+
+
+def add(a: float, b: float):
+    return CalculationFactory().create("add", a, b)
+
+
+def filled(n: int) -> CalculationHistory:
+    history = CalculationHistory()
+    a = np.arange(n) * 1.5
+    history.add_many("add", a, np.ones(n), a + 1)
+    return history
+
+
+@pytest.fixture
+def calc(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    for n in range(1, 8):
+        calc.execute("add", float(n), 0.0)
+    return calc
+
+
+def test_format_range_matches_row_by_row_formatting():
+    history = filled(50)
+    history.add(add(-0.0, float("nan")))
+    cols, start, stop = history._view
+    expected = [f"add {a} {b} = {r}" for _, _, a, b, r in cols.rows(start, stop)]
+
+    assert history.format_range() == expected
+    assert history.format_range(-2) == expected[-2:]
+    assert history.format_range(3, 5) == expected[3:5]
+    assert history.format_range(10, 5) == []
+    assert history.format_lines(3) == ["... (48 earlier rows)", *expected[-3:]]
+
+
+def test_iter_lines_streams_a_fixed_window():
+    history = filled(10)
+    chunks = history.iter_lines(2, None, chunk_size=3)
+    first = next(chunks)
+    history.add(add(1.0, 1.0))  # not part of the window being streamed
+
+    assert [len(first), *map(len, chunks)] == [3, 3, 2]
+    assert sum(map(len, history.iter_lines())) == 11
+    assert list(CalculationHistory().iter_lines()) == []
+
+
+@pytest.mark.parametrize(
+    "command, expected",
+    [
+        ("history 2", ["... (5 earlier rows)", "add 6.0 0.0 = 6.0", "add 7.0 0.0 = 7.0"]),
+        ("history tail 1", ["... (6 earlier rows)", "add 7.0 0.0 = 7.0"]),
+        ("history tail 50", [f"add {n}.0 0.0 = {n}.0" for n in range(1, 8)]),
+        ("history head 2", ["add 1.0 0.0 = 1.0", "add 2.0 0.0 = 2.0", "... (5 later rows)"]),
+        ("History HEAD 7", [f"add {n}.0 0.0 = {n}.0" for n in range(1, 8)]),
+        ("history page 2 3", ["Page 2/3 (rows 4-6 of 7)", "add 4.0 0.0 = 4.0", "add 5.0 0.0 = 5.0", "add 6.0 0.0 = 6.0"]),
+        ("history page 3 3", ["Page 3/3 (rows 7-7 of 7)", "add 7.0 0.0 = 7.0"]),
+        ("history page 1", ["Page 1/1 (rows 1-7 of 7)", *[f"add {n}.0 0.0 = {n}.0" for n in range(1, 8)]]),
+        ("history page 4 3", ["Error: Page 4 is out of range (1..3)."]),
+    ],
+)
+def test_history_windows(calc, command: str, expected: list[str]):
+    assert handle_line(command, calc).splitlines() == expected
+
+
+@pytest.mark.parametrize("command", ["history 0", "history x", "history head", "history page 1 2 3", "history mid 2"])
+def test_history_usage_errors(calc, command: str):
+    assert handle_line(command, calc).startswith("Invalid format. Use: history [n | head n")
+
+
+def test_empty_history(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    assert handle_line("history head 3", calc) == "(no history)"
+
+
+def test_repl_and_batch_stream_history_in_chunks(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("CALC_AUTO_LOAD", "false")
+    monkeypatch.setenv("CALC_MAX_HISTORY_SIZE", "100000")
+    rows = HISTORY_CHUNK_ROWS + 10
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    calc.execute_many("add", np.arange(rows, dtype=float), 1.0)
+    calc.save()
+    monkeypatch.setenv("CALC_AUTO_LOAD", "true")
+
+    outputs: list[str] = []
+    commands = iter(["history", "history page 9999 2", "exit"])
+    run_repl(input_func=lambda prompt: next(commands), output_func=outputs.append)
+    history_output = outputs[2:-2]  # after the banner and load message
+    assert [chunk.count("\n") + 1 for chunk in history_output] == [HISTORY_CHUNK_ROWS, 10]
+    assert "Error: Page 9999 is out of range (1..2053)." in outputs[-2]
+
+    out = io.StringIO()
+    summary = run_batch(["history tail 3", "history x"], calc, out)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == f"... ({rows - 3} earlier rows)"
+    assert lines[3] == f"add {rows - 1.0} 1.0 = {float(rows)}"
+    assert lines[4].startswith("Invalid format")
+    assert summary.errors == 1
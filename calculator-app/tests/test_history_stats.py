@@ -0,0 +1,235 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.calculation import stats as stats_module
+from app.calculation.factory import CalculationFactory
+from app.calculation.history import CalculationHistory, HistorySnapshot
+from app.calculation.journal import HistoryJournal
+from app.calculation.stats import STATS_CHECKPOINT_ROWS, Summary, stats_path, summarize
+from app.calculator.cli import handle_line
+from app.calculator.facade import Calculator
+
+
+def expected(history: CalculationHistory, last: int | None = None) -> dict[str, tuple]:
+    df = history.all()
+    if last is not None:
+        df = df.tail(last)
+    grouped = df.groupby("operation")["result"]
+    table = grouped.agg(["count", "sum", "mean", "min", "max"]).join(grouped.var(ddof=0).rename("var"))
+    return {name: tuple(row) for name, row in table.iterrows()}
+
+
+def actual(history: CalculationHistory, last: int | None = None) -> dict[str, tuple]:
+    ops = history.stats(last).operations
+    return {name: (s.count, s.total, s.mean, s.minimum, s.maximum, s.variance) for name, s in ops.items()}
+
+
+def assert_stats(history: CalculationHistory, last: int | None = None) -> None:
+    want, got = expected(history, last), actual(history, last)
+    assert got.keys() == want.keys()
+    for name in want:
+        assert got[name] == pytest.approx(want[name], rel=1e-9), name
+
+
+def grow(history: CalculationHistory, n: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    names = np.array(["add", "mul", "pow"])[rng.integers(0, 3, n)]
+    history.add_many(names.tolist(), rng.normal(size=n), rng.normal(size=n), rng.normal(100, 15, n))
+
+
+def test_merged_summaries_match_a_single_pass():
+    values = np.random.default_rng(1).lognormal(3, 2, 10_000)
+    merged = Summary()
+    for chunk in np.array_split(values, 7):
+        merged = merged.merge(summarize(np.zeros(len(chunk), dtype=np.int32), chunk)[0])
+
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert merged.variance == pytest.approx(values.var(), rel=1e-12)
+    assert (merged.minimum, merged.maximum) == (values.min(), values.max())
+    assert Summary().variance == 0.0 and Summary().merge(merged) is merged
+
+
+def test_stats_follow_appends_across_checkpoints():
+    history = CalculationHistory()
+    grow(history, STATS_CHECKPOINT_ROWS + 100)
+    assert_stats(history)
+    history.add(CalculationFactory().create("div", 1, 4))
+    grow(history, 2 * STATS_CHECKPOINT_ROWS, seed=1)
+    assert_stats(history)
+    assert_stats(history, last=10)
+    assert history.stats(last=10**9).rows == len(history)
+
+
+def test_undo_windows_and_forks_reuse_the_running_stats():
+    history = CalculationHistory()
+    grow(history, 2 * STATS_CHECKPOINT_ROWS + 10)
+    history.stats()
+    before = history.snapshot()
+    grow(history, 500, seed=2)
+    history.stats()
+
+    history.restore(before)  # a prefix of the segment, answered from a checkpoint
+    assert_stats(history)
+
+    history.add(CalculationFactory().create("add", 1, 1))  # forks the segment
+    forked = stats_module._SEGMENTS[history._cols]
+    assert forked.size == len(before) and forked.checkpoints is not None
+    assert_stats(history)
+
+
+def test_undo_to_empty_then_execute_drops_the_undone_stats(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    calc.execute("add", 100, 100)
+    calc.stats_lines()
+    calc.undo()
+    calc.execute("add", 1, 1)
+
+    assert calc.stats_lines()[1].startswith("add  count=1 sum=2 mean=2 min=2 max=2")
+
+
+def test_inheriting_no_rows_drops_the_targets_stats():
+    history = CalculationHistory()
+    grow(history, 10)
+    history.stats()
+    segment = history._cols
+
+    stats_module.inherit(segment, segment, 0)
+    assert segment not in stats_module._SEGMENTS
+    segment.truncate(0)
+    history.restore(HistorySnapshot(segment, 0, 0))
+    history.add(CalculationFactory().create("add", 1, 1))
+    assert history.stats().operations["add"].total == 2.0
+
+
+def test_ring_buffer_stats_cover_only_the_visible_rows():
+    history = CalculationHistory(max_size=100)
+    grow(history, 1000)
+    assert history.stats().rows == 100
+    assert_stats(history)
+
+
+def test_ring_buffer_stats_stay_incremental_after_eviction(monkeypatch):
+    history = CalculationHistory(max_size=1000)
+    grow(history, 1500)
+    history.stats()
+    scanned = []
+    summarize_rows = stats_module.summarize_rows
+    monkeypatch.setattr(
+        stats_module, "summarize_rows", lambda cols, start, stop: scanned.append(stop - start) or summarize_rows(cols, start, stop)
+    )
+
+    for seed in range(50):
+        grow(history, 3, seed=seed)
+        assert_stats(history)
+    assert sum(scanned) == 150  # only the appended rows; evicted ones are stepped past
+    assert_stats(history, last=10)
+
+
+def test_failures_are_counted_undone_and_cleared(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    calc.execute("add", 1, 2)
+    with pytest.raises(Exception):
+        calc.execute("div", 1, 0)
+    calc.execute_many("div", [1.0, 2.0, 3.0], [1.0, 0.0, 0.0])
+
+    stats = calc.stats()
+    assert stats.failures == {"div": 3}
+    assert stats.error_rate("div") == 0.75
+    assert stats.error_rate() == 0.6
+
+    calc.undo()  # the batch, with its failures
+    assert calc.stats().failures == {"div": 1}
+    calc.clear()
+    assert calc.stats().failures == {}
+    assert calc.stats().error_rate() == 0.0
+
+
+def test_stats_are_saved_beside_the_history_and_seed_a_load(tmp_path: Path):
+    path = tmp_path / "history.csv"
+    source = CalculationHistory()
+    grow(source, 3000)
+    source.record_failures(["div", "div"])
+    source.save(path)
+    data = json.loads(stats_path(path).read_text())
+    assert data["rows"] == 3000 and data["failures"] == {"div": 2}
+
+    history = CalculationHistory()
+    history.load(path)
+    seeded = stats_module._SEGMENTS[history._cols]
+    assert seeded.size == 3000 and seeded.checkpoints is None
+    assert history.stats().failures == {"div": 2}
+    assert_stats(history)
+
+    history.restore(HistorySnapshot(history._cols, 0, 2000))  # a prefix: builds the checkpoints
+    assert_stats(history)
+
+
+def test_a_stale_stats_file_is_ignored(tmp_path: Path):
+    path = tmp_path / "history.csv"
+    source = CalculationHistory()
+    grow(source, 50)
+    source.save(path)
+    sidecar = stats_path(path).read_text()
+    grow(source, 5, seed=3)
+    source.save(path)
+    stats_path(path).write_text(sidecar)  # left over from the older file
+
+    history = CalculationHistory()
+    history.load(path)
+    assert history._cols not in stats_module._SEGMENTS
+    assert_stats(history)
+
+
+def test_journal_keeps_the_stats_file_with_its_snapshot(tmp_path: Path):
+    history = CalculationHistory()
+    journal = HistoryJournal(tmp_path / "history.csv", compact_every=100)
+    grow(history, 20)
+    journal.compact(history)
+    grow(history, 5, seed=4)
+    journal.sync(history)
+    assert stats_path(tmp_path / "history.csv").exists()
+    assert not list(tmp_path.glob("*.tmp*"))
+
+    loaded = CalculationHistory()
+    journal.load(loaded)
+    inherited = stats_module._SEGMENTS[loaded._cols]
+    assert inherited.size >= 20
+    assert_stats(loaded)
+
+
+def test_stats_command(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    assert handle_line("stats", calc) == "(no history)"
+    for line in ["add 1 2", "add 3 4", "div 1 0", "pow 2 3"]:
+        handle_line(line, calc)
+
+    assert handle_line("stats", calc).splitlines() == [
+        "Stats over 3 rows:",
+        "add  count=2 sum=10 mean=5 min=3 max=7 variance=4 errors=0 (0.0%)",
+        "div  count=0 errors=1 (100.0%)",
+        "pow  count=1 sum=8 mean=8 min=8 max=8 variance=0 errors=0 (0.0%)",
+        "all  count=3 sum=18 mean=6 min=3 max=8 variance=4.66667 errors=1 (25.0%)",
+    ]
+    assert handle_line("stats last 1", calc).splitlines() == [
+        "Stats over the last 1 rows:",
+        "pow  count=1 sum=8 mean=8 min=8 max=8 variance=0",
+        "all  count=1 sum=8 mean=8 min=8 max=8 variance=0",
+    ]
+    assert handle_line("stats 0", calc) == "Invalid format. Use: stats [last n]"
+    assert not math.isnan(calc.stats().overall.variance)
+
+
+def test_stats_command_with_only_failures(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    handle_line("div 1 0", calc)
+
+    assert handle_line("stats", calc).splitlines() == [
+        "Stats over 0 rows:",
+        "div  count=0 errors=1 (100.0%)",
+        "all  count=0 errors=1 (100.0%)",
+    ]
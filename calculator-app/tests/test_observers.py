@@ -1,6 +1,14 @@
+import json
+import logging
+import logging.handlers
 from pathlib import Path
 
+import pytest
+
+from app import observers
 from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+from app.exceptions import ConfigurationError
 from app.observers import AutoSaveObserver, LoggingObserver, LoggerObserver
 
 
@@ -36,4 +44,125 @@ def test_logging_observer_writes_file(tmp_path: Path) -> None:
     obs.update("calculation_added", {"operation": "add", "a": 2, "b": 3, "result": 5})
 
     assert log_file.exists()
-    assert log_file.read_text(encoding="utf-8").strip() != ""
\ No newline at end of file
+    assert log_file.read_text(encoding="utf-8").strip() != ""
+
+def test_logging_observer_resolves_its_logger_once(tmp_path: Path, monkeypatch) -> None:
+    calls = []
+    real = observers._get_file_logger
+    monkeypatch.setattr(observers, "_get_file_logger", lambda *args: calls.append(args) or real(*args))
+    obs = LoggingObserver(log_file=tmp_path / "calc.log")
+
+    for n in range(3):
+        obs.update("calculation_added", {"operation": "add", "a": n, "b": 1, "result": n + 1})
+    obs.update_batch([("undo", {"rows": 2})])
+
+    assert len(calls) == 1
+    assert (tmp_path / "calc.log").read_text().count("\n") == 4
+
+
+def test_json_lines_format(tmp_path: Path) -> None:
+    log_file = tmp_path / "calc.jsonl"
+    obs = LoggingObserver(log_file=log_file, log_format="json")
+    obs.update("calculation_added", {"operation": "add", "a": 2.0, "b": 3.0, "result": 5.0})
+    obs.update("history_saved", {"path": tmp_path})
+    logging.getLogger("calculator").warning("plain message")
+
+    first, second, third = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert first["event"] == "calculation_added" and first["result"] == 5.0 and first["level"] == "INFO"
+    assert second["path"] == str(tmp_path)
+    assert third == {"time": third["time"], "level": "WARNING", "message": "plain message"}
+
+
+def test_buffered_logging_writes_in_batches(tmp_path: Path) -> None:
+    log_file = tmp_path / "calc.log"
+    obs = LoggingObserver(log_file=log_file, buffer_size=3)
+    obs.flush()  # nothing opened yet
+
+    obs.update("undo", {"rows": 1})
+    obs.update("undo", {"rows": 0})
+    assert log_file.read_text() == ""
+    obs.update("redo", {"rows": 1})
+    assert log_file.read_text().count("\n") == 3
+
+    obs.update("undo", {"rows": 0})
+    obs.close()
+    assert log_file.read_text().count("\n") == 4
+
+
+@pytest.mark.parametrize("buffer_size", [0, 4])
+def test_log_rotation(tmp_path: Path, buffer_size: int) -> None:
+    log_file = tmp_path / "calc.log"
+    obs = LoggingObserver(log_file=log_file, max_bytes=200, backup_count=2, buffer_size=buffer_size)
+    for n in range(20):
+        obs.update("calculation_added", {"operation": "add", "a": n, "b": 1, "result": n + 1})
+    obs.flush()
+
+    files = sorted(tmp_path.iterdir())
+    assert [p.name for p in files] == ["calc.log", "calc.log.1", "calc.log.2"]
+    assert all(0 < p.stat().st_size < 200 for p in files)
+
+    timed = LoggingObserver(log_file=tmp_path / "timed.log", rotate_when="midnight", buffer_size=buffer_size)
+    timed.update("undo", {"rows": 0})
+    assert isinstance(timed._handler, logging.handlers.TimedRotatingFileHandler)
+    timed.close()
+
+
+def test_buffered_rotation_counts_encoded_bytes_and_formats_once(tmp_path: Path, monkeypatch) -> None:
+    log_file = tmp_path / "calc.log"
+    obs = LoggingObserver(log_file=log_file, log_format="json", max_bytes=300, backup_count=5, buffer_size=4)
+    obs._open()
+    formatter = obs._handler.formatter
+    formatted = []
+    format_record = formatter.format
+    monkeypatch.setattr(formatter, "format", lambda record: formatted.append(record) or format_record(record))
+    for n in range(12):
+        obs.update("variable_set", {"name": "π" * 20, "value": n})
+    obs.flush()
+
+    assert len(formatted) == 12
+    files = sorted(tmp_path.iterdir())
+    assert len(files) > 1 and all(0 < p.stat().st_size < 300 for p in files)
+    obs.close()
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"log_format": "xml"}, {"rotate_when": "weekly"}, {"buffer_size": -1}, {"max_bytes": -5}]
+)
+def test_logging_observer_rejects_bad_options(tmp_path: Path, kwargs) -> None:
+    with pytest.raises(ValueError):
+        LoggingObserver(log_file=tmp_path / "calc.log", **kwargs)
+
+
+def test_logging_settings_from_config(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CALCULATOR_HISTORY_DIR", str(tmp_path))
+    cfg = load_config()
+    assert (cfg.log_format, cfg.log_buffer_size, cfg.log_max_bytes, cfg.log_backup_count, cfg.log_rotate_when) == (
+        "text",
+        0,
+        10 * 1024 * 1024,
+        5,
+        "",
+    )
+
+    monkeypatch.setenv("CALCULATOR_LOG_FORMAT", "JSON")
+    monkeypatch.setenv("CALCULATOR_LOG_BUFFER_SIZE", "64")
+    monkeypatch.setenv("CALCULATOR_LOG_ROTATE_WHEN", "H")
+    cfg = load_config()
+    assert (cfg.log_format, cfg.log_buffer_size, cfg.log_rotate_when) == ("json", 64, "h")
+
+    calc = Calculator.create_default(
+        history_path=tmp_path / "history.csv",
+        log_path=tmp_path / "calc.jsonl",
+        log_format=cfg.log_format,
+        log_buffer_size=cfg.log_buffer_size,
+        log_rotate_when=cfg.log_rotate_when,
+    )
+    calc.execute("mul", 2.0, 4.0)
+    calc.close()
+    assert json.loads((tmp_path / "calc.jsonl").read_text())["result"] == 8.0
+
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "legacy.csv"))
+    assert load_config().log_buffer_size == 64
+    monkeypatch.setenv("CALCULATOR_LOG_MAX_BYTES", "-1")
+    with pytest.raises(ConfigurationError):
+        load_config()
@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.calculation.factory import CalculationFactory
+from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+from app.exceptions import ConfigurationError
+from app.strategy import (
+    ChunkScheduler,
+    DirectExecutionStrategy,
+    ProcessPoolExecutionStrategy,
+    ThreadPoolExecutionStrategy,
+    create_strategy,
+)
+
+
+def operands(n: int = 1000):
+    rng = np.random.default_rng(1)
+    a = rng.uniform(-50, 50, n)
+    b = rng.integers(-3, 4, n).astype(float)  # includes zeros and negative bases
+    return a, b
+
+
+def assert_same_result(got, expected):
+    assert np.array_equal(got.values, expected.values, equal_nan=True)
+    assert [(type(e), str(e), m.tolist()) for e, m in got.errors] == [
+        (type(e), str(e), m.tolist()) for e, m in expected.errors
+    ]
+
+
+def test_scheduler_bounds_are_contiguous_and_bounded():
+    scheduler = ChunkScheduler(chunk_size=300, min_chunk_size=50)
+
+    assert scheduler.bounds(1000, 2) == [(0, 300), (300, 600), (600, 900), (900, 1000)]
+    assert scheduler.bounds(100, 8) == [(0, 50), (50, 100)]
+    assert scheduler.bounds(0, 4) == []
+    with pytest.raises(ValueError):
+        ChunkScheduler(chunk_size=0)
+
+
+@pytest.mark.parametrize("op_name", ["div", "root", "pow"])
+def test_thread_pool_matches_direct_in_order(op_name: str):
+    operation = CalculationFactory().operation(op_name)
+    a, b = operands()
+    strategy = ThreadPoolExecutionStrategy(max_workers=3, chunk_size=128, min_chunk_size=16)
+    try:
+        got = strategy.execute_array(operation, a, b)
+    finally:
+        strategy.close()
+
+    assert_same_result(got, DirectExecutionStrategy().execute_array(operation, a, b))
+
+
+def test_process_pool_matches_direct_in_order():
+    operation = CalculationFactory().operation("root")
+    a, b = operands(300)
+    strategy = ProcessPoolExecutionStrategy(max_workers=2, chunk_size=100, min_chunk_size=10)
+    try:
+        got = strategy.execute_array(operation, a, b)
+        assert strategy._executor is not None
+    finally:
+        strategy.close()
+
+    assert strategy._executor is None
+    assert_same_result(got, operation.compute_array(a, b))
+
+
+def test_small_batches_and_scalars_run_inline():
+    strategy = ThreadPoolExecutionStrategy(max_workers=4)
+    calc = CalculationFactory().create("add", 1, 2)
+
+    assert strategy.execute(calc) == 3
+    assert strategy.execute_array(calc.operation, [1, 2], [3, 4]).values.tolist() == [4.0, 6.0]
+    assert strategy._executor is None
+
+
+def test_calculator_owns_pool_lifecycle(tmp_path: Path):
+    calc = Calculator.create_default(
+        history_path=tmp_path / "history.csv", execution_strategy="thread", execution_workers=2, batch_chunk_size=64
+    )
+    calc.strategy.scheduler.min_chunk_size = 8
+    a, b = operands(500)
+
+    batch = calc.execute_many("div", a, b)
+
+    assert len(calc.history) == int(batch.ok.sum())
+    assert calc.undo() and len(calc.history) == 0
+    calc.close()
+    assert calc.strategy._executor is None
+
+    with pytest.raises(ValueError):
+        Calculator.create_default(history_path=tmp_path / "h.csv", execution_strategy="gpu")
+    with pytest.raises(ValueError):
+        create_strategy("gpu")
+
+
+def test_config_execution_settings(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.setenv("CALCULATOR_EXECUTION_STRATEGY", "process")
+    monkeypatch.setenv("CALCULATOR_EXECUTION_WORKERS", "3")
+    cfg = load_config()
+    assert (cfg.execution_strategy, cfg.execution_workers, cfg.batch_chunk_size) == ("process", 3, 262144)
+
+    monkeypatch.setenv("CALCULATOR_EXECUTION_WORKERS", "-1")
+    with pytest.raises(ConfigurationError):
+        load_config()
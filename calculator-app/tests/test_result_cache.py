@@ -0,0 +1,195 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.calculation.factory import CalculationFactory
+from app.calculation.models import Calculation
+from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+from app.exceptions import ConfigurationError
+from app.result_cache import MISSING, LFUCache, LRUCache, TTLCache, create_cache, operand_key
+from app.strategy import CachingExecutionStrategy, DirectExecutionStrategy, create_strategy
+
+
+class CountingStrategy(DirectExecutionStrategy):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def execute(self, calc: Calculation) -> float:
+        self.calls += 1
+        return super().execute(calc)
+
+
+def run(strategy, op_name: str, a, b, factory=CalculationFactory()):
+    return strategy.execute(factory.create(op_name, a, b))
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (3, 1, 1, 2)
+    assert stats.hit_rate == 0.75
+
+
+def test_lfu_evicts_least_frequently_used_oldest_first():
+    cache = LFUCache(maxsize=3)
+    for key in "abc":
+        cache.put(key, key.upper())
+    cache.get("a")
+    cache.get("a")
+    cache.get("c")
+    cache.put("d", "D")  # b: used once, evicted
+    cache.put("e", "E")  # d and e tie at one use; d is older
+
+    assert cache.get("b") is MISSING
+    assert cache.get("d") is MISSING
+    assert [cache.get(key) for key in "ace"] == ["A", "C", "E"]
+    assert cache.evictions == 2
+    cache.put("a", "A2")
+    assert cache.get("a") == "A2" and len(cache) == 3
+
+
+def test_ttl_expires_entries():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    now[0] = 5
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    now[0] = 12
+    assert cache.get("a") is MISSING
+    cache.put("c", 3)  # purges nothing new; b is still fresh
+    cache.put("d", 4)  # full: oldest (b) evicted
+    assert cache.get("b") is MISSING
+    assert cache.stats().expirations == 1
+    assert cache.evictions == 1
+
+    now[0] = 30
+    cache.put("e", 5)
+    assert len(cache) == 1 and cache.expirations == 3
+
+
+def test_cache_arguments_are_validated():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+    with pytest.raises(ValueError):
+        TTLCache(ttl=0)
+    with pytest.raises(ValueError):
+        create_cache("fifo")
+    with pytest.raises(ValueError):
+        create_strategy("direct", result_cache="fifo")
+
+
+def test_operand_keys_separate_signed_zero_nan_and_types():
+    assert operand_key(0.0) != operand_key(-0.0)
+    assert operand_key(float("nan")) == operand_key(float("nan"))
+    assert operand_key(2) != operand_key(2.0)
+    assert operand_key(1.5) == operand_key(1.5)
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu", "ttl"])
+def test_caching_strategy_skips_repeated_computation(policy: str):
+    inner = CountingStrategy()
+    strategy = CachingExecutionStrategy(inner, policy=policy, maxsize=8)
+
+    assert run(strategy, "pow", 2.0, 10.0) == 1024.0
+    assert run(strategy, "pow", 2.0, 10.0) == 1024.0
+    assert run(strategy, "pow", 2.0, 11.0) == 2048.0
+
+    assert inner.calls == 2
+    stats = strategy.stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+    strategy.cache_clear()
+    assert strategy.stats().size == 0
+
+
+def test_caching_strategy_distinguishes_signed_zero_and_hits_nan():
+    inner = CountingStrategy()
+    strategy = CachingExecutionStrategy(inner)
+
+    with pytest.raises(ZeroDivisionError):
+        run(strategy, "div", 1.0, 0.0)
+    with pytest.raises(ZeroDivisionError):
+        run(strategy, "div", 1.0, -0.0)
+    assert run(strategy, "abs_diff", -0.0, 0.0) == 0.0
+    assert np.isnan(run(strategy, "add", float("nan"), 1.0))
+    assert np.isnan(run(strategy, "add", float("nan"), 1.0))
+
+    # -0.0 and 0.0 are separate entries; the two NaN calls share one
+    assert strategy.stats().hits == 1
+
+
+def test_caching_strategy_caches_failures():
+    inner = CountingStrategy()
+    strategy = CachingExecutionStrategy(inner)
+
+    for _ in range(3):
+        with pytest.raises(ValueError, match="Even root"):
+            run(strategy, "root", -8.0, 2.0)
+    assert inner.calls == 1
+
+    uncached = CachingExecutionStrategy(CountingStrategy(), cache_errors=False)
+    for _ in range(2):
+        with pytest.raises(ZeroDivisionError):
+            run(uncached, "mod", 1.0, 0.0)
+    assert uncached.inner.calls == 2
+
+
+def test_caching_strategy_passes_batches_through():
+    operation = CalculationFactory().operation("div")
+    strategy = CachingExecutionStrategy()
+    batch = strategy.execute_array(operation, [1.0, 4.0], [2.0, 0.0])
+    assert batch.values[0] == 0.5 and batch.failed.tolist() == [False, True]
+
+    class ScalarOnly:
+        def execute(self, calc):
+            return calc.result()
+
+    fallback = CachingExecutionStrategy(ScalarOnly())
+    batch = fallback.execute_array(operation, [1.0, 1.0], [2.0, 2.0])
+    assert batch.values.tolist() == [0.5, 0.5]
+    assert fallback.stats().hits == 1
+    fallback.close()
+
+
+def test_calculator_uses_configured_result_cache(tmp_path: Path):
+    calc = Calculator.create_default(
+        history_path=tmp_path / "history.csv", result_cache="lfu", result_cache_size=16
+    )
+    assert isinstance(calc.strategy, CachingExecutionStrategy)
+    assert calc.strategy.cache.maxsize == 16
+
+    calc.execute("mul", 3, 4)
+    calc.execute("mul", 3, 4)
+    assert len(calc.history) == 2
+    assert calc.strategy.stats().hits == 1
+    calc.close()
+
+    with pytest.raises(ValueError):
+        Calculator.create_default(history_path=tmp_path / "h.csv", result_cache="fifo")
+
+
+def test_config_reads_result_cache_settings(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    cfg = load_config()
+    assert (cfg.result_cache, cfg.result_cache_size, cfg.result_cache_ttl) == ("off", 4096, 300.0)
+
+    monkeypatch.delenv("CALC_HISTORY_PATH")
+    monkeypatch.setenv("CALCULATOR_RESULT_CACHE", "TTL")
+    monkeypatch.setenv("CALCULATOR_RESULT_CACHE_SIZE", "64")
+    monkeypatch.setenv("CALCULATOR_RESULT_CACHE_TTL", "2.5")
+    cfg = load_config()
+    assert (cfg.result_cache, cfg.result_cache_size, cfg.result_cache_ttl) == ("ttl", 64, 2.5)
+
+    monkeypatch.setenv("CALCULATOR_RESULT_CACHE_TTL", "0")
+    with pytest.raises(ConfigurationError):
+        load_config()
@@ -0,0 +1,180 @@
+import math
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.calculation.factory import CalculationFactory
+from app.calculator.facade import Calculator
+from app.calculator_config import load_config
+from app.result_cache import MISSING, CachedError, LRUCache, SQLiteResultCache, TieredCache, create_cache
+from app.strategy import CachingExecutionStrategy, DirectExecutionStrategy, create_strategy
+
+
+class CountingStrategy(DirectExecutionStrategy):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def execute(self, calc) -> float:
+        self.calls += 1
+        return super().execute(calc)
+
+
+def run(strategy, op_name: str, a, b, factory=CalculationFactory()):
+    return strategy.execute(factory.create(op_name, a, b))
+
+
+def test_results_survive_reopening(tmp_path: Path):
+    path = tmp_path / "cache" / "results.sqlite"
+    cache = SQLiteResultCache(path)
+    cache.put(("pow", 2.0, 0.5), math.sqrt(2))
+    cache.put(("div", 1.0, ("float", -1.0)), -math.inf)
+    cache.put(("add", ("float", "nan"), (float, 1.0)), math.nan)
+    cache.put(("div", 1.0, ("float", 1.0)), CachedError(ZeroDivisionError("Cannot divide by zero.")))
+    cache.close()
+    cache.close()
+
+    reopened = SQLiteResultCache(path)
+    assert len(reopened) == 4
+    assert reopened.get(("pow", 2.0, 0.5)) == math.sqrt(2)
+    assert reopened.get(("div", 1.0, ("float", -1.0))) == -math.inf
+    assert math.isnan(reopened.get(("add", ("float", "nan"), (float, 1.0))))
+    error = reopened.get(("div", 1.0, ("float", 1.0)))
+    with pytest.raises(ZeroDivisionError, match="divide by zero"):
+        error.raise_copy()
+    assert reopened.get(("div", 1.0, 1.0)) is MISSING
+    assert (reopened.hits, reopened.misses) == (4, 1)
+    reopened.clear()
+    assert len(reopened) == 0
+    reopened.close()
+
+
+def test_only_float_operands_and_known_errors_are_stored(tmp_path: Path):
+    cache = SQLiteResultCache(tmp_path / "results.sqlite", flush_every=1)
+    cache.put(("add", (int, 2), (int, 3)), 5)
+    cache.put(("add", 2.0, 3.0), 5)
+    cache.put(("add", 2.0, 4.0), CachedError(KeyError("x")))
+    cache.put(("bad",), 1.0)
+    assert len(cache) == 0
+    assert cache.get(("add", (int, 2), (int, 3))) is MISSING
+    cache.close()
+
+
+def test_size_bound_evicts_oldest_rows(tmp_path: Path):
+    cache = SQLiteResultCache(tmp_path / "results.sqlite", maxsize=3, flush_every=2)
+    for i in range(6):
+        cache.put(("add", float(i + 1), 1.0), float(i + 2))
+    cache.flush()
+
+    assert len(cache) == 3
+    assert cache.evictions == 3
+    assert cache.get(("add", 1.0, 1.0)) is MISSING
+    assert cache.get(("add", 6.0, 1.0)) == 7.0
+    cache.close()
+
+
+def test_row_count_is_kept_without_scanning(tmp_path: Path):
+    cache = SQLiteResultCache(tmp_path / "results.sqlite", maxsize=4, flush_every=100)
+    statements = []
+    cache._db.set_trace_callback(statements.append)
+    for i in range(3):
+        cache.put(("add", float(i), 1.0), float(i + 1))
+    cache.flush()
+    cache.put(("add", 0.0, 1.0), 1.0)  # pending and already stored
+    cache.put(("add", 9.0, 1.0), 10.0)
+
+    assert len(cache) == 4
+    cache.flush()
+    assert len(cache) == 4
+    cache.put(("add", 10.0, 1.0), 11.0)
+    cache.flush()
+    assert len(cache) == 4 and cache.evictions == 1
+    assert not any("COUNT(" in sql for sql in statements)
+    cache.close()
+
+    reopened = SQLiteResultCache(tmp_path / "results.sqlite", maxsize=4)
+    assert len(reopened) == 4
+    reopened.clear()
+    assert len(reopened) == 0
+    reopened.close()
+
+
+def test_concurrent_writers_share_one_file(tmp_path: Path):
+    path = tmp_path / "results.sqlite"
+    SQLiteResultCache(path).close()  # create the schema before racing
+
+    def writer(offset: int) -> None:
+        cache = SQLiteResultCache(path, flush_every=5)
+        for i in range(50):
+            cache.put(("mul", float(offset + i), 2.0), float(offset + i) * 2)
+        cache.close()
+
+    threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reader = SQLiteResultCache(path)
+    assert len(reader) == 150
+    assert reader.get(("mul", 2049.0, 2.0)) == 4098.0
+    reader.close()
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path: Path):
+    path = tmp_path / "results.sqlite"
+    warm = create_strategy("direct", result_cache="lru", cache_path=path)
+    assert run(warm, "root", 27.0, 3.0) == pytest.approx(3.0)
+    with pytest.raises(ValueError):
+        run(warm, "root", -4.0, 2.0)
+    warm.close()
+
+    inner = CountingStrategy()
+    cold = CachingExecutionStrategy(inner, cache=create_cache("lru", 8, path=path))
+    assert isinstance(cold.cache, TieredCache) and cold.cache.policy == "lru+sqlite"
+    assert run(cold, "root", 27.0, 3.0) == pytest.approx(3.0)  # from disk
+    assert run(cold, "root", 27.0, 3.0) == pytest.approx(3.0)  # from memory
+    with pytest.raises(ValueError, match="Even root"):
+        run(cold, "root", -4.0, 2.0)
+    assert inner.calls == 0
+
+    stats = cold.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.expirations) == (3, 0, 0, 0)
+    assert cold.cache.front.hits == 1 and cold.cache.back.hits == 2
+    cold.cache_clear()
+    assert len(cold.cache.back) == 0
+    cold.close()
+
+
+def test_disk_only_cache_and_validation(tmp_path: Path):
+    assert isinstance(create_cache("off", path=tmp_path / "r.sqlite"), SQLiteResultCache)
+    assert isinstance(create_cache("ttl", path=tmp_path / "t.sqlite"), TieredCache)
+    with pytest.raises(ValueError):
+        create_cache("off")
+    TieredCache(LRUCache(), LRUCache()).close()
+
+
+def test_calculator_and_config_use_result_cache_file(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALCULATOR_HISTORY_DIR", str(tmp_path))
+    cfg = load_config()
+    assert cfg.result_cache_path is None and cfg.result_cache_disk_size == 1_000_000
+
+    monkeypatch.setenv("CALCULATOR_RESULT_CACHE_FILE", "results.sqlite")
+    monkeypatch.setenv("CALCULATOR_RESULT_CACHE_DISK_SIZE", "10")
+    cfg = load_config()
+    assert cfg.result_cache_path == tmp_path / "results.sqlite"
+
+    calc = Calculator.create_default(
+        history_path=tmp_path / "history.csv",
+        result_cache_path=cfg.result_cache_path,
+        result_cache_disk_size=cfg.result_cache_disk_size,
+    )
+    assert isinstance(calc.strategy.cache, SQLiteResultCache)
+    calc.execute("pow", 3.0, 4.0)
+    calc.close()
+    reopened = SQLiteResultCache(cfg.result_cache_path)
+    assert reopened.get(("pow", 3.0, 4.0)) == 81.0
+    reopened.close()
+
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "legacy.csv"))
+    assert load_config().result_cache_file == "results.sqlite"
@@ -0,0 +1,194 @@
+import asyncio
+import http.client
+import io
+import json
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.calculator import service as service_module
+from app.calculator.cli import handle_line, respond
+from app.calculator.client import ServiceClient, run_remote_batch, run_remote_repl
+from app.calculator.facade import Calculator
+from app.calculator.service import CalculatorService, HistoryLock, parse_address, run_service
+from app.calculator_repl import main
+from app.exceptions import ServiceError
+
+
+@pytest.fixture
+def serve(tmp_path: Path):
+    running = []
+
+    def start(address: str):
+        calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+        service = CalculatorService(calc)
+        ready, bound = threading.Event(), []
+
+        def on_ready(address) -> None:
+            bound.append(address)
+            ready.set()
+
+        thread = threading.Thread(target=asyncio.run, args=(service.serve(parse_address(address), on_ready),))
+        thread.start()
+        assert ready.wait(10)
+        running.append((service, thread))
+        return service, bound[0]
+
+    yield start
+    for service, thread in running:
+        service.stop()
+        thread.join(10)
+        service.close()
+        service.calc.close()
+
+
+def test_respond_pairs_every_line_with_a_response(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv")
+    responses, done = respond(["add 1 2", "", "mul 2 x", "history 1", "exit", "add 5 5"], calc)
+    assert responses == [
+        "Result: 3.0",
+        "Please enter a command. Type 'help' for options.",
+        "Error: Inputs must be numbers.",
+        "add 1.0 2.0 = 3.0",
+        "Goodbye.",
+    ]
+    assert done and len(calc.history) == 1
+
+
+def test_unix_socket_clients_pipeline_and_share_one_history(serve, tmp_path: Path):
+    service, address = serve(str(tmp_path / "calc.sock"))
+
+    def client_run(n: int, results: list) -> None:
+        with ServiceClient(address) as client:
+            results.extend(client.send([f"add {i} {n}" for i in range(200)]))
+
+    per_client = [[] for _ in range(6)]
+    threads = [threading.Thread(target=client_run, args=(n, out)) for n, out in enumerate(per_client)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for n, results in enumerate(per_client):
+        assert results == [f"Result: {float(i + n)}" for i in range(200)]
+    assert len(service.calc.history) == 1200 and service.commands == 1200
+
+    with ServiceClient(address) as client:
+        assert client.command("history 1").startswith("... (1199 earlier rows)\nadd 199.0 ")
+        assert client.send(["help", "exit", "add 1 1"])[1:] == ["Goodbye."]
+        assert client.command("add 1 1") is None
+
+
+def test_pipelined_undo_steps_back_one_command_like_the_repl(serve, tmp_path: Path):
+    service, address = serve(str(tmp_path / "calc.sock"))
+    script = ["add 1 2", "add 3 4", "div 1 0", "sub 9 1", "undo", "history", "redo", "undo", "undo", "history", "stats"]
+    repl = Calculator.create_default(history_path=tmp_path / "repl.csv")
+
+    with ServiceClient(address) as client:
+        responses = client.send(script)  # one request: the arithmetic lines reach the service as a batch
+
+    assert responses == [handle_line(line, repl) for line in script]
+    assert responses[5] == "add 1.0 2.0 = 3.0\nadd 3.0 4.0 = 7.0" and responses[9] == "add 1.0 2.0 = 3.0"
+    assert service.calc.history_lines() == ["add 1.0 2.0 = 3.0"]
+
+
+def test_http_endpoints_and_keep_alive(serve):
+    service, address = serve("http://127.0.0.1:0")
+    with ServiceClient(address) as client:
+        assert client.send(["add 1 2", "div 1 0", "= 2 ** 10"]) == [
+            "Result: 3.0",
+            "Error: Cannot divide by zero.",
+            "Result: 1024.0",
+        ]
+        assert client.command("sub 5 1") == "Result: 4.0"  # same connection
+
+    conn = http.client.HTTPConnection(address.host, address.port, timeout=10)
+    conn.request("GET", "/health")
+    assert json.loads(conn.getresponse().read()) == {"status": "ok", "history": 3, "commands": 4}
+    conn.request("GET", "/")
+    assert conn.getresponse().read() and conn.sock is not None
+    conn.request("GET", "/nope", headers={"Connection": "close"})
+    response = conn.getresponse()
+    assert response.status == 404 and response.getheader("Connection") == "close"
+    conn.close()
+
+    with socket.create_connection((address.host, address.port), timeout=10) as raw:
+        raw.sendall(b"BROKEN\r\n\r\n")
+        assert raw.recv(4096).startswith(b"HTTP/1.1 400 Bad Request")
+
+
+def test_oversized_requests_are_refused(serve, tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(service_module, "MAX_REQUEST_BYTES", 32)
+    _, unix_address = serve(str(tmp_path / "calc.sock"))
+    with socket.socket(socket.AF_UNIX) as raw:  # a line that never ends
+        raw.connect(str(unix_address.path))
+        raw.sendall(b"add 1 " + b"1" * 64)
+        assert raw.makefile("rb").read() == b'"Error: Request line too long."\n'
+
+    _, http_address = serve("http://127.0.0.1:0")
+    with ServiceClient(http_address) as client, pytest.raises(ServiceError, match="413"):
+        client.send(["add 1 1"] * 10)
+
+
+def test_history_lock_has_a_single_owner(tmp_path: Path):
+    first, second = HistoryLock(tmp_path / "history.csv"), HistoryLock(tmp_path / "history.csv")
+    first.acquire()
+    with pytest.raises(ServiceError, match="owned by another service"):
+        second.acquire()
+    first.release()
+    second.acquire()
+    second.release()
+
+
+def test_socket_paths_are_reclaimed_only_from_dead_services(serve, tmp_path: Path):
+    stale = tmp_path / "stale.sock"
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(str(stale))
+    listener.close()  # leaves the file behind, with nobody listening
+    serve(str(stale))
+
+    with pytest.raises(ServiceError, match="already listening"):
+        service_module._claim_socket_path(stale)
+
+
+@pytest.mark.parametrize("text", ["http://10.0.0.1:80", "http://127.0.0.1", "unix:", ""])
+def test_parse_address_rejects(text: str):
+    with pytest.raises(ValueError):
+        parse_address(text)
+
+
+def test_cli_talks_to_a_running_service(serve, tmp_path: Path, capsys):
+    service, address = serve(str(tmp_path / "calc.sock"))
+    script = tmp_path / "script.txt"
+    script.write_text("# warm service\nadd 1 2\nfoo 1 2\nexit\nadd 3 4\n")
+
+    out, report = io.StringIO(), io.StringIO()
+    assert run_remote_batch(script, str(address), out, report) == 0
+    assert out.getvalue().splitlines() == ["Result: 3.0", "Error: Unsupported operation: foo"]
+    assert report.getvalue().startswith("Processed 3 commands (1 calculations, 1 errors)")
+
+    printed = []
+    inputs = iter(["history", "exit"])
+    assert run_remote_repl(str(address), lambda _: next(inputs), printed.append) == 0
+    assert "add 1.0 2.0 = 3.0" in printed[1] and printed[-1] == "Goodbye."
+
+    assert main(["--connect", str(tmp_path / "missing.sock")]) == 1
+    assert "Cannot reach the calculator service" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        main(["--connect", str(address), "--history", "x.csv"])
+
+
+def test_run_service_reports_startup_errors(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("CALC_HISTORY_PATH", str(tmp_path / "history.csv"))
+    report = io.StringIO()
+    assert run_service("http://example.com:80", report=report) == 2
+
+    lock = HistoryLock(tmp_path / "history.csv")
+    lock.acquire()
+    try:
+        assert run_service(str(tmp_path / "calc.sock"), report=report) == 1
+    finally:
+        lock.release()
+    assert "owned by another service" in report.getvalue()
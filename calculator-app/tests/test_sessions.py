@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.calculator.client import ServiceClient
+from app.calculator.facade import Calculator
+from app.calculator.service import CalculatorService, parse_address
+from app.calculator.sessions import SessionManager
+from app.exceptions import ValidationError
+from app.observers import SessionLogRouter, SessionLoggingObserver
+
+
+def test_histories_are_sharded_per_tenant_and_session(tmp_path: Path):
+    manager = SessionManager(tmp_path)
+    path = manager.history_path("alice", "acme")
+    assert path.parent.parent == tmp_path / "acme" and len(path.parent.name) == 2
+    assert path.name == "alice.hist"
+    assert manager.history_path("alice", "acme") == path
+
+    for bad in ["", "../x", ".hidden", "a/b", "x" * 65]:
+        with pytest.raises(ValidationError):
+            manager.get(bad)
+    assert len(manager) == 0
+
+
+def test_idle_sessions_are_evicted_lru_and_resumed_from_disk(tmp_path: Path):
+    manager = SessionManager(tmp_path, max_sessions=2)
+    manager.get("a").execute("add", 1, 2)
+    manager.get("b").execute("mul", 2, 3)
+    manager.get("a")  # a is now the most recently used
+    manager.get("c")
+
+    assert ("default", "b") not in manager and ("default", "a") in manager
+    assert manager.history_path("b").exists()
+    stats = manager.stats()
+    assert (stats.live, stats.created, stats.evicted, stats.hits) == (2, 3, 1, 1)
+
+    resumed = manager.get("b")
+    assert resumed.history_lines() == ["mul 2.0 3.0 = 6.0"]
+    assert manager.stats().resumed == 1
+    resumed.execute("add", 1, 1)
+    manager.close()
+
+    again = SessionManager(tmp_path)
+    assert again.get("b").history_lines() == ["mul 2.0 3.0 = 6.0", "add 1.0 1.0 = 2.0"]
+    again.close()
+
+
+def test_row_budget_evicts_and_unchanged_sessions_are_not_rewritten(tmp_path: Path):
+    manager = SessionManager(tmp_path, max_rows=5)
+    manager.get("big").execute_many("add", list(range(4)), list(range(4)))
+    manager.get("small").execute("add", 1, 1)
+    manager.evict("small")
+    saved = manager.history_path("small").stat().st_mtime_ns
+
+    manager.get("small")  # resumed, unchanged
+    manager.get("big")  # 4 + 1 rows: within budget
+    assert len(manager) == 2
+    manager.get("big").execute_many("add", [1.0, 2.0], [3.0, 4.0])
+    manager.get("big")  # the growth is seen on this get: 6 + 1 rows evicts "small"
+    assert ("default", "small") not in manager and manager.stats().rows == 6
+    assert manager.history_path("small").stat().st_mtime_ns == saved
+    assert not manager.evict("small")
+    manager.close()
+
+
+def test_sessions_log_to_their_own_files_through_one_handler(tmp_path: Path):
+    calculator_handlers = list(logging.getLogger("calculator").handlers)
+    manager = SessionManager(tmp_path)
+    manager.router.max_open = 1
+    for name in ["a", "b", "a"]:
+        manager.get(name).execute("add", 1, 2)
+    assert manager.router.opened == 3  # a was reopened after b took its slot
+    manager.close()
+
+    def calc_lines(name: str) -> list[str]:
+        text = manager.history_path(name).with_suffix(".log").read_text()
+        return [line for line in text.splitlines() if " calc " in line]
+
+    log_a, log_b = calc_lines("a"), calc_lines("b")
+    assert len(log_a) == 2 and len(log_b) == 1
+    assert all("calc op=add a=1 b=2 result=3" in line for line in log_a + log_b)
+    assert logging.getLogger("calculator").handlers == calculator_handlers
+
+
+def test_router_writes_json_and_sessionless_records(tmp_path: Path):
+    router = SessionLogRouter(lambda session: tmp_path / f"{session or 'shared'}.log", log_format="json")
+    SessionLoggingObserver(router, "s1").update_batch([("history_cleared", {"rows": 0})])
+    router.logger.info("plain message")
+    router.close()
+    assert '"event": "history_cleared"' in (tmp_path / "s1.log").read_text()
+    assert '"message": "plain message"' in (tmp_path / "shared.log").read_text()
+    with pytest.raises(ValueError):
+        SessionLogRouter(lambda session: tmp_path / "x.log", max_open=0)
+
+
+def test_sessions_share_the_strategy_until_the_manager_closes(tmp_path: Path):
+    class Strategy:
+        closed = False
+
+        def execute(self, calc):
+            return calc.result()
+
+        def close(self):
+            self.closed = True
+
+    strategy = Strategy()
+    manager = SessionManager(tmp_path, max_sessions=1, strategy=strategy)
+    assert manager.get("a").strategy is strategy
+    manager.get("b")
+    assert manager.get("b").strategy is strategy and not strategy.closed
+    manager.close()
+    assert strategy.closed
+
+
+def test_service_routes_commands_to_sessions(tmp_path: Path):
+    manager = SessionManager(tmp_path / "sessions")
+    service = CalculatorService(sessions=manager)
+    with pytest.raises(ValueError):
+        CalculatorService()
+
+    async def scenario():
+        one, _, key = await service.run(["add 1 2", "session acme/alice", "add 2 2", "session ../x", "history"])
+        two, _, _ = await service.run(["history"], key)
+        three, _, _ = await service.run(["history"])
+        return one, two, three, key
+
+    one, two, three, key = asyncio.run(scenario())
+    assert one[:3] == ["Result: 3.0", "Session: acme/alice", "Result: 4.0"]
+    assert one[3].startswith("Error: Invalid tenant id")
+    assert one[4] == two[0] == "add 2.0 2.0 = 4.0"
+    assert three == ["add 1.0 2.0 = 3.0"] and key == ("acme", "alice")
+    assert service.health()["sessions"]["live"] == 2
+    service.close()
+    manager.close()
+
+
+def test_http_session_endpoints(tmp_path: Path):
+    manager = SessionManager(tmp_path / "sessions")
+    service = CalculatorService(sessions=manager)
+    ready, bound = threading.Event(), []
+    thread = threading.Thread(
+        target=asyncio.run,
+        args=(service.serve(parse_address("http://127.0.0.1:0"), lambda a: (bound.append(a), ready.set())),),
+    )
+    thread.start()
+    assert ready.wait(10)
+    try:
+        client = ServiceClient(bound[0])
+        client.send(["session acme/bob", "add 5 5"])
+        client._http.request("POST", "/sessions/acme/bob", b"history")
+        response = client._http.getresponse()
+        assert response.status == 200 and b"add 5.0 5.0 = 10.0" in response.read()
+        client._http.request("POST", "/sessions/..", b"history")
+        response = client._http.getresponse()
+        assert response.status == 400
+        response.read()
+        client._http.request("GET", "/sessions/bob")
+        response = client._http.getresponse()
+        assert response.status == 405
+        response.read()
+        client.close()
+    finally:
+        service.stop()
+        thread.join(10)
+        service.close()
+        manager.close()
+
+    single = CalculatorService(Calculator.create_default(history_path=tmp_path / "history.csv"))
+    with pytest.raises(ValidationError, match="not enabled"):
+        single._select("x")
+
+
+def test_bounded_sessions_archive_evicted_rows(tmp_path: Path):
+    manager = SessionManager(tmp_path, max_history_size=2)
+    for i in range(3):
+        manager.get("a").execute("add", i, 0)
+    manager.close()
+
+    resumed = SessionManager(tmp_path, max_history_size=1).get("a")
+    assert resumed.history_lines() == ["add 2.0 0.0 = 2.0"]
+    archive = manager.history_path("a").with_name("a_archive.csv")
+    assert [line.split(",")[2] for line in archive.read_text().splitlines()[1:]] == ["0.0", "1.0"]
+
+    with pytest.raises(ValueError):
+        SessionManager(tmp_path, history_eviction="shred")
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def imported_modules(code: str) -> set[str]:
+    """Modules loaded after running ``code`` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint('\\n'.join(sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return {line.split(".")[0] for line in proc.stdout.splitlines()}
+
+
+@pytest.mark.parametrize("module", ["pandas", "colorama", "dotenv", "sqlite3", "multiprocessing"])
+def test_cli_startup_defers_heavy_imports(module):
+    assert module not in imported_modules("import app.calculator_repl")
+
+
+def test_core_runs_without_pandas(tmp_path: Path):
+    code = f"""
+from app.calculator.facade import Calculator
+calc = Calculator.create_default(history_path={str(tmp_path / "history.csv")!r})
+calc.execute("add", 1, 2)
+calc.execute_many(["mul", "pow"], [2.0, 2.0], [3.0, 10.0])
+calc.history_lines()
+calc.query_history("op=pow")
+calc.stats_lines()
+calc.save()
+"""
+    assert "pandas" not in imported_modules(code)
+    assert "pandas" in imported_modules(code + "calc.history.all()")
@@ -0,0 +1,103 @@
+import random
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.calculator.facade import Calculator
+from app.observers import InMemoryLoggerObserver
+
+
+@pytest.fixture
+def contention():
+    """Switch threads as often as possible, so races show up in a short test."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_threads(target, n: int) -> None:
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert not any(thread.is_alive() for thread in threads)
+
+
+def test_concurrent_appends_keep_every_row(tmp_path: Path, contention):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv", thread_safe=True)
+    seen = InMemoryLoggerObserver()
+    calc.attach(seen)
+
+    def work(i: int) -> None:
+        for n in range(300):
+            calc.execute("add", i, n)
+        calc.execute_many("mul", [i] * 50, list(range(50)))
+
+    run_threads(work, 8)
+    assert len(calc.history) == 8 * 350
+    assert sum(calc.history.all()["result"]) == pytest.approx(
+        sum(i + n for i in range(8) for n in range(300)) + sum(i * n for i in range(8) for n in range(50))
+    )
+    assert len(calc._undo_stack) == 8 * 301
+    assert sum(1 for line in seen.lines if line.startswith("calculation_added")) == 8 * 300
+    assert calc.stats().rows == 8 * 350 and len(calc.query_history("op=mul").positions) == 8 * 50
+
+
+def test_undo_and_redo_stay_consistent_under_contention(tmp_path: Path, contention):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv", thread_safe=True)
+    counts = [[0, 0, 0] for _ in range(6)]
+
+    def work(i: int) -> None:
+        rng = random.Random(i)
+        for _ in range(400):
+            action = rng.choice(["execute", "execute", "undo", "redo"])
+            if action == "execute":
+                calc.execute("add", 1, 1)
+                counts[i][0] += 1
+            elif action == "undo":
+                counts[i][1] += calc.undo()
+            else:
+                counts[i][2] += calc.redo()
+
+    run_threads(work, 6)
+    executed, undone, redone = map(sum, zip(*counts))
+    assert len(calc.history) == executed - undone + redone
+    assert len(calc._undo_stack) == len(calc.history)
+    while calc.undo():
+        pass
+    assert len(calc.history) == 0
+
+
+def test_observers_run_after_the_lock_is_released(tmp_path: Path):
+    calc = Calculator.create_default(history_path=tmp_path / "history.csv", thread_safe=True)
+
+    class CallsBackFromAnotherThread:
+        def update(self, event: str, payload: dict) -> None:
+            if event == "calculation_added" and payload["a"] == 1:
+                # Would deadlock if this ran while the caller held the lock
+                helper = threading.Thread(target=calc.execute, args=("add", 2, 2))
+                helper.start()
+                helper.join(5)
+                assert not helper.is_alive()
+
+    calc.attach(CallsBackFromAnotherThread())
+    seen = InMemoryLoggerObserver()
+    calc.attach(seen)
+    calc.execute("add", 1, 1)
+    assert calc.history_lines() == ["add 1.0 1.0 = 2.0", "add 2.0 2.0 = 4.0"]
+
+    calc.assign("x", "3 + 4")  # nested sections deliver once, in order
+    assert [line.split(":")[0] for line in seen.lines[-2:]] == ["calculation_added", "variable_assigned"]
+
+
+def test_failed_calculations_leave_undo_untouched(tmp_path: Path):
+    for thread_safe in (False, True):
+        calc = Calculator.create_default(history_path=tmp_path / "history.csv", thread_safe=thread_safe)
+        calc.execute("add", 1, 1)
+        with pytest.raises(ZeroDivisionError):
+            calc.execute("div", 1, 0)
+        assert len(calc._undo_stack) == 1 and calc.stats().failures == {"div": 1}
@@ -0,0 +1,165 @@
+import io
+import math
+from pathlib import Path
+
+import pytest
+
+from app.calculation.expression import ExpressionCompiler
+from app.calculation.variables import VariableGraph
+from app.calculator.cli import handle_line, run_batch
+from app.calculator.facade import Calculator
+from app.exceptions import ValidationError
+from app.observers import InMemoryLoggerObserver
+
+
+@pytest.fixture
+def calc(tmp_path: Path):
+    return Calculator.create_default(history_path=tmp_path / "history.csv")
+
+
+def define(graph: VariableGraph, compiler: ExpressionCompiler, name: str, source: str, **env: float):
+    expression = compiler.compile(source)
+    values = {var.name: var.value for var in graph}
+    values.update(env)
+    return graph.assign(name, expression, env, expression.evaluate(values))
+
+
+def test_assignment_recomputes_only_downstream_variables():
+    graph, compiler = VariableGraph(), ExpressionCompiler()
+    define(graph, compiler, "a", "5")
+    define(graph, compiler, "b", "a * 2")
+    define(graph, compiler, "c", "b + 1")
+    define(graph, compiler, "unrelated", "3 + 4")
+    define(graph, compiler, "d", "a + c")
+
+    done = define(graph, compiler, "a", "6")
+
+    assert done.recomputed == ("b", "c", "d")
+    assert [graph.get(n).value for n in "bcd"] == [12.0, 13.0, 19.0]
+    assert graph.recomputed_total == 3
+    assert graph.dependents("b") == {"c", "d"}
+
+
+def test_unchanged_values_stop_the_recompute():
+    graph, compiler = VariableGraph(), ExpressionCompiler()
+    define(graph, compiler, "a", "5")
+    define(graph, compiler, "b", "a abs_diff 0")
+    define(graph, compiler, "c", "b + 1")
+
+    assert define(graph, compiler, "a", "5").recomputed == ()
+    # |-5| == |5|: b is recomputed but doesn't change, so c is skipped
+    assert define(graph, compiler, "a", "-5").recomputed == ("b",)
+
+
+def test_errors_propagate_and_clear_downstream():
+    graph, compiler = VariableGraph(), ExpressionCompiler()
+    define(graph, compiler, "a", "1")
+    define(graph, compiler, "b", "1 / a")
+    define(graph, compiler, "c", "b + 1")
+
+    done = define(graph, compiler, "a", "0")
+    assert done.failed == ("b", "c")
+    assert isinstance(graph.get("b").error, ZeroDivisionError)
+    assert "Variable b has no value" in str(graph.get("c").error)
+    assert math.isnan(graph.get("c").value)
+
+    assert define(graph, compiler, "a", "2").failed == ()
+    assert graph.get("c").value == 1.5
+
+
+def test_invalid_names_and_cycles_are_rejected():
+    graph, compiler = VariableGraph(), ExpressionCompiler()
+    define(graph, compiler, "a", "1")
+    define(graph, compiler, "b", "a + 1")
+
+    with pytest.raises(ValidationError, match="Circular reference"):
+        graph.check("a", compiler.compile("b * 2"))
+    with pytest.raises(ValidationError, match="Circular reference"):
+        graph.check("a", compiler.compile("a + 1"))
+    for name in ("ans", "$1", "1x"):
+        with pytest.raises(ValidationError, match="Invalid variable name"):
+            graph.check(name, compiler.compile("1 + 1"))
+
+
+def test_calculator_assignments_are_recorded_and_undoable(calc):
+    events = InMemoryLoggerObserver()
+    calc.attach(events)
+
+    calc.assign("rate", "0.5")
+    assert calc.assign("cost", "rate * 10").value == 5.0
+    assert len(calc.history) == 1  # the bare value isn't a calculation
+    assert events.lines[-1] == (
+        "variable_assigned: {'name': 'cost', 'value': 5.0, 'expression': 'rate * 10', "
+        "'recomputed': 0, 'recomputed_total': 0}"
+    )
+
+    assert calc.assign("rate", "2").recomputed == ("cost",)
+    assert calc.history.variables.get("cost").value == 20.0
+    assert calc.evaluate("cost + rate") == 22.0
+
+    assert calc.undo() and calc.undo()
+    assert calc.history.variables.get("cost").value == 5.0
+    assert calc.history.variables.recomputed_total == 1  # undo restores, it doesn't recompute
+    assert calc.redo()
+    assert calc.history.variables.get("rate").value == 2.0
+    calc.clear()
+    assert calc.undo() and len(calc.history.variables) == 2
+
+
+def test_history_references(calc):
+    with pytest.raises(ValidationError, match="history is empty"):
+        calc.evaluate("ans + 1")
+    calc.execute("add", 2.0, 3.0)
+    calc.execute("mul", 2.0, 3.0)
+
+    assert calc.evaluate("ans * 2") == 12.0
+    assert calc.evaluate("$1 + $2") == 11.0
+    with pytest.raises(ValidationError, match=r"\$9 is out of range \(1..4\)"):
+        calc.evaluate("$9 + 1")
+
+    # References are read when the variable is assigned, not later
+    calc.assign("first", "ans")
+    calc.execute("add", 100.0, 0.0)
+    assert calc.assign("x", "1").recomputed == ()
+    assert calc.evaluate("first + 0") == 11.0
+
+
+def test_failing_variables_are_reported_on_use(calc):
+    calc.assign("d", "1")
+    calc.assign("q", "10 / d")
+    assert calc.assign("d", "0").failed == ("q",)
+    with pytest.raises(ValidationError, match="Variable q has no value: Cannot divide by zero."):
+        calc.evaluate("q + 1")
+
+
+def test_evaluate_many_reads_session_variables(calc):
+    calc.assign("offset", "100")
+    batch = calc.evaluate_many("x + offset", {"x": [1.0, 2.0]})
+    assert batch.values.tolist() == [101.0, 102.0]
+
+
+def test_cli_assignments_and_vars(calc):
+    assert handle_line("vars", calc) == "(no variables)"
+    assert handle_line("a = 5", calc) == "Result: a = 5.0"
+    assert handle_line("b = a * 2", calc) == "Result: b = 10.0"
+    assert handle_line("c = 1 / (b - 10)", calc) == "Error: Cannot divide by zero."
+    assert handle_line("c = 1 / (a - 5) + b", calc) == "Error: Cannot divide by zero."
+    assert handle_line("c = b - 10", calc) == "Result: c = 0.0"
+    assert handle_line("e = 1 / c", calc) == "Error: Cannot divide by zero."
+    assert handle_line("a = 6", calc) == "Result: a = 6.0 (recomputed 2: b, c)"
+    assert handle_line("a = b", calc) == "Error: Circular reference: a depends on itself."
+    assert handle_line("vars", calc).splitlines() == ["a = 6.0  [6]", "b = 12.0  [a * 2]", "c = 2.0  [b - 10]"]
+    assert "vars" in handle_line("help", calc)
+
+
+def test_batch_handles_assignments_in_order(calc):
+    out = io.StringIO()
+    summary = run_batch(["add 1 2", "x = ans * 2", "mul 2 2", "= x + $2", "x = 0"], calc, out)
+    assert out.getvalue().splitlines() == [
+        "Result: 3.0",
+        "Result: x = 6.0",
+        "Result: 4.0",
+        "Result: 12.0",  # $2 is the row the assignment recorded
+        "Result: x = 0.0",
+    ]
+    assert summary.calculations == 5